@@ -1,11 +1,13 @@
+import contextlib
 import gc
-import glob
 import logging
 import os
 import textwrap
 import time
 import traceback
 import typing
+from collections.abc import Iterable
+from concurrent.futures import as_completed
 from dataclasses import dataclass
 from typing import Any, Literal, cast
 from urllib.error import URLError
@@ -25,6 +27,7 @@ from conda_forge_tick.contexts import (
     FeedstockContext,
     MigratorSessionContext,
 )
+from conda_forge_tick.executors import executor
 from conda_forge_tick.feedstock_parser import BOOTSTRAP_MAPPINGS
 from conda_forge_tick.git_utils import (
     DryRunBackend,
@@ -33,10 +36,12 @@ from conda_forge_tick.git_utils import (
     GitCliError,
     GitPlatformBackend,
     RepositoryNotFoundError,
+    get_github_api_requests_left,
     github_backend,
     is_github_api_limit_reached,
 )
 from conda_forge_tick.lazy_json_backends import (
+    CF_TICK_GRAPH_DATA_BACKENDS,
     LazyJson,
     get_all_keys_for_hashmap,
     lazy_json_transaction,
@@ -47,18 +52,21 @@ from conda_forge_tick.make_migrators import (
     FORCE_PR_AFTER_SOLVER_ATTEMPTS,
     PR_ATTEMPT_LIMIT_FACTOR,
     PR_LIMIT,
-    load_migrators,
+    load_migrator,
+    load_migrator_names,
+    make_version_migrator,
 )
+from conda_forge_tick.memory_usage import MemoryUsageTracker, evict_graph_payloads
 from conda_forge_tick.migration_runner import run_migration
 from conda_forge_tick.migrators import MigrationYaml, Migrator, Version
 from conda_forge_tick.migrators.version import VersionMigrationError
-from conda_forge_tick.os_utils import eval_cmd
+from conda_forge_tick.os_utils import TempWorkspaceManager, eval_cmd
+from conda_forge_tick.pr_attempt_index import PRAttemptIndex
 from conda_forge_tick.rerender_feedstock import rerender_feedstock
 from conda_forge_tick.solver_checks import is_recipe_solvable
 from conda_forge_tick.utils import (
     change_log_level,
     dump_graph,
-    filter_reprinted_lines,
     fold_log_lines,
     frozen_to_json_friendly,
     get_bot_run_url,
@@ -78,6 +86,12 @@ logger = logging.getLogger(__name__)
 
 TIMEOUT = int(os.environ.get("TIMEOUT", 600))
 
+MAIN_PREP_THREADS = 8
+"""
+The number of threads used to read and update the node data in `main_prep`.
+The nodes are processed one at a time if the MongoDB backend is used.
+"""
+
 
 def _set_pre_pr_migrator_error(attrs, migrator_name, error_str, *, is_version):
     if is_version:
@@ -743,7 +757,67 @@ def run(
     return migrate_return_value, pr_lazy_json
 
 
-def _compute_time_per_migrator(migrators, max_attempts_for_share=3):
+@dataclass
+class _MigratorInfo:
+    """The data of a migrator needed to plan an auto-tick run."""
+
+    name: str | None
+    """
+    The name of the migrator in the ``migrators`` hashmap, None if it is not stored there.
+    """
+    report_name: str
+    two_part_name: str
+    is_version: bool
+    pr_limit: int
+    nodes: list[str]
+    """
+    The nodes of the effective graph of the migrator.
+    """
+
+
+def _get_migrator_info(migrator: Migrator, name: str | None = None) -> _MigratorInfo:
+    return _MigratorInfo(
+        name=name,
+        report_name=migrator.report_name,
+        two_part_name=migrator.two_part_name,
+        is_version=isinstance(migrator, Version),
+        pr_limit=getattr(migrator, "pr_limit", PR_LIMIT),
+        nodes=list(migrator.effective_graph.nodes),
+    )
+
+
+def _load_migrator_info(name: str) -> _MigratorInfo:
+    return _get_migrator_info(load_migrator(name), name=name)
+
+
+def _load_migrator_infos(migrators: list[Migrator | str]) -> list[_MigratorInfo]:
+    """Get the data of the migrators, loading the ones given by name in a process pool.
+
+    Only the data is sent back from the worker processes, so the migrators and
+    their graphs are never all in memory at once.
+    """
+    infos: list[_MigratorInfo | None] = [
+        None if isinstance(migrator, str) else _get_migrator_info(migrator)
+        for migrator in migrators
+    ]
+    with executor("process", 2) as pool:
+        futs = {
+            pool.submit(_load_migrator_info, migrator): i
+            for i, migrator in enumerate(migrators)
+            if isinstance(migrator, str)
+        }
+        for fut in tqdm.tqdm(
+            as_completed(futs), desc="loading migrators", ncols=80, total=len(futs)
+        ):
+            infos[futs[fut]] = fut.result()
+    return cast(list[_MigratorInfo], infos)
+
+
+def _compute_time_per_migrator(
+    migrators: Iterable[Migrator | _MigratorInfo],
+    max_attempts_for_share=3,
+    attempt_index: PRAttemptIndex | None = None,
+):
     # we weight each migrator by the number of available nodes to migrate with a
     # a penalty for attempts and accounting for the pr_limit
     # the variables below are
@@ -757,35 +831,54 @@ def _compute_time_per_migrator(migrators, max_attempts_for_share=3):
     num_nodes_not_tried = []
     num_nodes = []
     shares = []
+    #
+    # if an attempt_index is given, the attempts are looked up there instead of
+    # opening the payload of every node of every migrator, which also means
+    # that the data of the migrators (see `_MigratorInfo`) is enough
     for migrator in tqdm.tqdm(migrators, ncols=80, desc="computing time per migrator"):
+        info = (
+            migrator
+            if isinstance(migrator, _MigratorInfo)
+            else _get_migrator_info(migrator)
+        )
         num_to_do = 0.0
-        for node_name in migrator.effective_graph.nodes:
-            with migrator.effective_graph.nodes[node_name]["payload"] as attrs:
-                _attempts = _get_pre_pr_migrator_attempts(
-                    attrs,
-                    migrator_name=migrator.report_name,
-                    is_version=isinstance(migrator, Version),
+        for node_name in info.nodes:
+            if attempt_index is not None:
+                _attempts = attempt_index.get_attempts(
+                    info.report_name,
+                    node_name,
+                    is_version=info.is_version,
                 )
-                if _attempts < max_attempts_for_share:
-                    num_to_do += 1.0
+            elif isinstance(migrator, _MigratorInfo):
+                raise ValueError("The attempt index is needed for migrator infos.")
+            else:
+                with migrator.effective_graph.nodes[node_name]["payload"] as attrs:
+                    _attempts = _get_pre_pr_migrator_attempts(
+                        attrs,
+                        migrator_name=info.report_name,
+                        is_version=info.is_version,
+                    )
+            if _attempts < max_attempts_for_share:
+                num_to_do += 1.0
 
         num_nodes_not_tried.append(num_to_do)
-        num_nodes.append(len(migrator.effective_graph.nodes))
+        num_nodes.append(len(info.nodes))
 
         # we bump the version migrator pr_limit up adaptively
         # if there is a backlog
         # TODO: we should do this when the migrator is made, but we
         # need to rework max_attempts_for_share to be set in global
         # settings
-        if isinstance(migrator, Version):
+        if info.is_version:
             # this threshold is set by experience
             if num_to_do > 50:
-                migrator.pr_limit = migrator.pr_limit * 2
+                info.pr_limit = info.pr_limit * 2
             elif num_to_do > 100:
-                migrator.pr_limit = migrator.pr_limit * 4
+                info.pr_limit = info.pr_limit * 4
+            if not isinstance(migrator, _MigratorInfo):
+                migrator.pr_limit = info.pr_limit
 
-        pr_limit = getattr(migrator, "pr_limit", PR_LIMIT)
-        _share = min(pr_limit, num_to_do)
+        _share = min(info.pr_limit, num_to_do)
         shares.append(_share)
 
     tot_shares = sum(shares)
@@ -802,7 +895,7 @@ def _compute_time_per_migrator(migrators, max_attempts_for_share=3):
 
     # now compute the time per migrator
     time_per_migrator = []
-    for i, migrator in enumerate(migrators):
+    for i in range(len(shares)):
         _tp = shares[i] * time_per_share
         if num_nodes[i] > 0:
             _tp += min_time_per_migrator
@@ -985,8 +1078,9 @@ def _is_migrator_done(
     _mg_start, good_prs, time_per, pr_limit, tried_prs, start_time: float
 ):
     curr_time = time.time()
-    backend = github_backend()
-    api_req = backend.get_api_requests_left()
+    # this uses the rate limit tracked from response headers and only
+    # asks the API when the tracked value is stale
+    api_req = get_github_api_requests_left()
 
     if curr_time - start_time > TIMEOUT:
         logger.info(
@@ -1030,7 +1124,13 @@ def _is_migrator_done(
 
 
 def _run_migrator(
-    migrator, mctx, temp, time_per, git_backend: GitPlatformBackend, start_time: float
+    migrator,
+    mctx,
+    workspaces: TempWorkspaceManager,
+    time_per,
+    git_backend: GitPlatformBackend,
+    start_time: float,
+    attempt_index: PRAttemptIndex | None = None,
 ):
     _mg_start = time.time()
     initial_working_dir = os.getcwd()
@@ -1044,7 +1144,9 @@ def _run_migrator(
         tried_prs = 0
         effective_graph = migrator.effective_graph
 
-        possible_nodes = list(migrator.order(effective_graph, mctx.graph))
+        possible_nodes = list(
+            migrator.order(effective_graph, mctx.graph, attempt_index=attempt_index)
+        )
 
         # version debugging info
         if isinstance(migrator, Version):
@@ -1070,11 +1172,14 @@ def _run_migrator(
         else:
             print("order of possible migrations:", flush=True)
             for node_name in possible_nodes:
-                with effective_graph.nodes[node_name]["payload"] as attrs:
-                    with attrs["pr_info"] as pri:
-                        attempts = pri.get("pre_pr_migrator_attempts", {}).get(
-                            migrator_name, 0
-                        )
+                if attempt_index is not None:
+                    attempts = attempt_index.get_attempts(migrator_name, node_name)
+                else:
+                    with effective_graph.nodes[node_name]["payload"] as attrs:
+                        with attrs["pr_info"] as pri:
+                            attempts = pri.get("pre_pr_migrator_attempts", {}).get(
+                                migrator_name, 0
+                            )
                 print(
                     "    node|num_descendents|attempts: %s|%d|%d"
                     % (node_name, len(nx.descendants(mctx.graph, node_name)), attempts),
@@ -1105,6 +1210,9 @@ def _run_migrator(
                 )
             ),
             mctx.graph.nodes[node_name]["payload"] as attrs,
+            # all temporary files of the node go into a workspace that is removed
+            # when we are done with it
+            workspaces.workspace(node_name, set_tempdir=True),
         ):
             # Don't let CI timeout, break ahead of the timeout so we make certain
             # to write to the repo
@@ -1175,14 +1283,6 @@ def _run_migrator(
                 # Write graph partially through
                 dump_graph(mctx.graph)
 
-                with filter_reprinted_lines("rm-tmp"):
-                    for f in glob.glob("/tmp/*"):
-                        if f not in temp:
-                            try:
-                                eval_cmd(["rm", "-rf", f])
-                            except Exception:
-                                pass
-
     return good_prs
 
 
@@ -1198,6 +1298,45 @@ def _setup_limits():
         resource.setrlimit(resource.RLIMIT_AS, (limit_int, limit_int))
 
 
+def _process_bot_rerun_labels(name: str, pri: dict, vpri: dict) -> None:
+    # reset bad
+    pri["bad"] = False
+    vpri["bad"] = False
+
+    for __pri in [pri, vpri]:
+        for migration in __pri.get("PRed", []):
+            try:
+                pr_json = migration.get("PR", {})
+                # maybe add a pass check info here ? (if using DEBUG)
+            except Exception as e:
+                logger.error(
+                    "BOT-RERUN: could not proceed check with %s",
+                    name,
+                    exc_info=e,
+                )
+                raise e
+            # if there is a valid PR and it isn't currently listed as rerun
+            # but the PR needs a rerun
+            if (
+                pr_json
+                and not migration["data"]["bot_rerun"]
+                and "bot-rerun" in [lb["name"] for lb in pr_json.get("labels", [])]
+            ):
+                migration["data"]["bot_rerun"] = time.time()
+                logger.info(
+                    "BOT-RERUN %s: processing bot rerun label for migration %s",
+                    name,
+                    migration["data"],
+                )
+
+                __name = get_migrator_report_name_from_pr_data(migration)
+                if __name is not None:
+                    if __pri is pri:
+                        _reset_migrator_pre_pr_migrator_fields(pri, __name)
+                    else:
+                        _reset_version_pre_pr_migrator_fields(vpri, version=__name)
+
+
 def _update_nodes_with_bot_rerun(gx: nx.DiGraph):
     """Go through all the open PRs and check if they are rerun.
 
@@ -1220,50 +1359,7 @@ def _update_nodes_with_bot_rerun(gx: nx.DiGraph):
 
             try:
                 with payload["pr_info"] as pri, payload["version_pr_info"] as vpri:
-                    # reset bad
-                    pri["bad"] = False
-                    vpri["bad"] = False
-
-                    for __pri in [pri, vpri]:
-                        for migration in __pri.get("PRed", []):
-                            try:
-                                pr_json = migration.get("PR", {})
-                                # maybe add a pass check info here ? (if using DEBUG)
-                            except Exception as e:
-                                logger.error(
-                                    "BOT-RERUN: could not proceed check with %s",
-                                    name,
-                                    exc_info=e,
-                                )
-                                raise e
-                            # if there is a valid PR and it isn't currently listed as rerun
-                            # but the PR needs a rerun
-                            if (
-                                pr_json
-                                and not migration["data"]["bot_rerun"]
-                                and "bot-rerun"
-                                in [lb["name"] for lb in pr_json.get("labels", [])]
-                            ):
-                                migration["data"]["bot_rerun"] = time.time()
-                                logger.info(
-                                    "BOT-RERUN %s: processing bot rerun label "
-                                    "for migration %s",
-                                    name,
-                                    migration["data"],
-                                )
-
-                                __name = get_migrator_report_name_from_pr_data(
-                                    migration
-                                )
-                                if __name is not None:
-                                    if __pri is pri:
-                                        _reset_migrator_pre_pr_migrator_fields(
-                                            pri, __name
-                                        )
-                                    else:
-                                        _reset_version_pre_pr_migrator_fields(
-                                            vpri, version=__name
-                                        )
+                    _process_bot_rerun_labels(name, pri, vpri)
             except KeyError as e:
                 logger.error(
                     "BOT-RERUN: missing key for node %s",
@@ -1273,6 +1369,31 @@ def _update_nodes_with_bot_rerun(gx: nx.DiGraph):
                 raise
 
 
+def _get_new_version_for_node(attrs: dict, version_data: dict) -> str | None:
+    new_version = None
+
+    version_from_data = version_data.get("new_version", False)
+    if version_follows_conda_spec(version_from_data):
+        # the version we found is OK to use
+        new_version = version_from_data
+
+        # check the version in the attrs already and keep it if it is newer
+        # we only override the graph node if the version we found is newer
+        # or the graph doesn't have a valid version
+        if version_follows_conda_spec(attrs.get("version", False)):
+            version_from_attrs = filter_version(
+                attrs,
+                attrs.get("version", False),
+            )
+            if version_follows_conda_spec(version_from_attrs):
+                new_version = max(
+                    [version_from_data, version_from_attrs],
+                    key=lambda x: VersionOrder(x.replace("-", ".")),
+                )
+
+    return new_version
+
+
 def _update_nodes_with_new_versions(gx):
     """Update every node with it's new version (when available).
 
@@ -1293,26 +1414,7 @@ def _update_nodes_with_new_versions(gx):
             if attrs.get("archived", False):
                 continue
 
-            new_version = None
-
-            version_from_data = version_data.get("new_version", False)
-            if version_follows_conda_spec(version_from_data):
-                # the version we found is OK to use
-                new_version = version_from_data
-
-                # check the version in the attrs already and keep it if it is newer
-                # we only override the graph node if the version we found is newer
-                # or the graph doesn't have a valid version
-                if version_follows_conda_spec(attrs.get("version", False)):
-                    version_from_attrs = filter_version(
-                        attrs,
-                        attrs.get("version", False),
-                    )
-                    if version_follows_conda_spec(version_from_attrs):
-                        new_version = max(
-                            [version_from_data, version_from_attrs],
-                            key=lambda x: VersionOrder(x.replace("-", ".")),
-                        )
+            new_version = _get_new_version_for_node(attrs, version_data)
 
             if new_version is not None:
                 try:
@@ -1327,6 +1429,48 @@ def _update_nodes_with_new_versions(gx):
                     raise
 
 
+def _collapse_closed_prs(pri: dict, now: float) -> set[str]:
+    """Replace archivable PR json blobs in a `pr_info` or `version_pr_info` with a
+    small summary and remove them from the ``pr_json`` hashmap.
+
+    Returns
+    -------
+    set of str
+        The keys of all ``pr_json`` blobs referenced by the PR info.
+    """
+    seen_pr_json = set()
+    for pr_ind in range(len(pri.get("PRed", []))):
+        pr = pri["PRed"][pr_ind].get("PR", None)
+        if pr is not None and isinstance(pr, LazyJson):
+            assert len(pr.file_name.split("/")) == 2
+            assert pr.file_name.split("/")[0] == "pr_json"
+            assert pr.file_name.split("/")[1].endswith(".json")
+            pr_json_node = pr.file_name.split("/")[1][: -len(".json")]
+            seen_pr_json.add(pr_json_node)
+
+            if pr_can_be_archived(pr, now=now, archive_empty_prs=True):
+                pri["PRed"][pr_ind]["PR"] = {
+                    "state": "closed",
+                    "number": pr.get("number", None),
+                    "labels": [{"name": lb["name"]} for lb in pr.get("labels", [])],
+                }
+                del pr
+                remove_key_for_hashmap(
+                    "pr_json",
+                    pr_json_node,
+                )
+    return seen_pr_json
+
+
+def _remove_archivable_pr_json(node: str, now: float) -> None:
+    pr = LazyJson(f"pr_json/{node}.json")
+    if pr_can_be_archived(pr, now=now, archive_empty_prs=True):
+        remove_key_for_hashmap(
+            pr.file_name.split("/")[0],
+            pr.file_name.split("/")[1][: -len(".json")],
+        )
+
+
 def _remove_closed_pr_json():
     print("collapsing closed PR json", flush=True)
 
@@ -1341,45 +1485,156 @@ def _remove_closed_pr_json():
         for node in nodes:
             lzj_pri = LazyJson(f"{name}/{node}.json")
             with lazy_json_transaction(), lzj_pri as pri:
-                for pr_ind in range(len(pri.get("PRed", []))):
-                    pr = pri["PRed"][pr_ind].get("PR", None)
-                    if pr is not None and isinstance(pr, LazyJson):
-                        if pr_can_be_archived(pr, now=now, archive_empty_prs=True):
-                            pri["PRed"][pr_ind]["PR"] = {
-                                "state": "closed",
-                                "number": pr.get("number", None),
-                                "labels": [
-                                    {"name": lb["name"]} for lb in pr.get("labels", [])
-                                ],
-                            }
-                            assert len(pr.file_name.split("/")) == 2
-                            assert pr.file_name.split("/")[0] == "pr_json"
-                            assert pr.file_name.split("/")[1].endswith(".json")
-                            pr_json_node = pr.file_name.split("/")[1][: -len(".json")]
-                            del pr
-                            remove_key_for_hashmap(
-                                "pr_json",
-                                pr_json_node,
-                            )
+                _collapse_closed_prs(pri, now)
 
     # at this point, any json blob referenced in the pr info is
     # state != closed or is too new,
     # so we can remove anything that is empty or closed or old
     nodes = get_all_keys_for_hashmap("pr_json")
     for node in nodes:
-        pr = LazyJson(f"pr_json/{node}.json")
-        if pr_can_be_archived(pr, now=now, archive_empty_prs=True):
-            remove_key_for_hashmap(
-                pr.file_name.split("/")[0],
-                pr.file_name.split("/")[1][: -len(".json")],
+        _remove_archivable_pr_json(node, now)
+
+
+def _update_node_with_pr_info(
+    gx: nx.DiGraph,
+    node: str,
+    now: float,
+    pr_info_nodes: set[str],
+    version_pr_info_nodes: set[str],
+    version_nodes: set[str],
+) -> set[str]:
+    """Apply all PR info updates of `main_prep` to a single node.
+
+    The node's payload and PR info are opened once and written back only if they
+    changed.
+
+    Returns
+    -------
+    set of str
+        The keys of all ``pr_json`` blobs referenced by the node.
+
+    Raises
+    ------
+    KeyError
+        Raised if the required attributes `pr_info` or
+        `version_pr_info` are missing.
+    """
+    seen_pr_json: set[str] = set()
+
+    with contextlib.ExitStack() as stack:
+        attrs = None
+        if node in gx.nodes:
+            attrs = stack.enter_context(gx.nodes[node]["payload"])
+            if attrs.get("archived", False):
+                attrs = None
+
+        if attrs is not None:
+            try:
+                pri = attrs["pr_info"]
+                vpri = attrs["version_pr_info"]
+            except KeyError as e:
+                logger.error(
+                    "BOT-RERUN: missing key for node %s",
+                    node,
+                    exc_info=e,
+                )
+                raise
+        else:
+            # archived nodes and nodes not in the graph only get their
+            # closed PRs collapsed
+            pri = LazyJson(f"pr_info/{node}.json") if node in pr_info_nodes else None
+            vpri = (
+                LazyJson(f"version_pr_info/{node}.json")
+                if node in version_pr_info_nodes
+                else None
+            )
+
+        stack.enter_context(lazy_json_transaction())
+        for lzj in [pri, vpri]:
+            if lzj is not None:
+                stack.enter_context(lzj)
+                seen_pr_json |= _collapse_closed_prs(lzj, now)
+
+        if attrs is not None:
+            _process_bot_rerun_labels(node, pri, vpri)
+
+            if node in version_nodes:
+                with LazyJson(f"versions/{node}.json") as version_data:
+                    new_version = _get_new_version_for_node(attrs, version_data)
+                if new_version is not None:
+                    vpri["new_version"] = new_version
+
+    return seen_pr_json
+
+
+def _update_nodes_with_pr_info(gx: nx.DiGraph, max_workers: int = MAIN_PREP_THREADS):
+    """Collapse closed PRs, process bot-rerun labels and set new versions in one pass.
+
+    This is equivalent to running `_remove_closed_pr_json`,
+    `_update_nodes_with_bot_rerun` and `_update_nodes_with_new_versions`
+    one after the other, but visits every node only once and processes the
+    nodes concurrently. The MongoDB backend keeps the session of the current
+    transaction on its class, so the nodes are processed one at a time if it
+    is used.
+
+    Raises
+    ------
+    KeyError
+        Raised if a node has a new version but is not in the graph or if the
+        required attributes `pr_info` or `version_pr_info` are missing.
+    """
+    print("updating nodes with PR info", flush=True)
+
+    if "mongodb" in CF_TICK_GRAPH_DATA_BACKENDS:
+        max_workers = 1
+
+    now = time.time()
+
+    pr_info_nodes = set(get_all_keys_for_hashmap("pr_info"))
+    version_pr_info_nodes = set(get_all_keys_for_hashmap("version_pr_info"))
+    version_nodes = set(get_all_keys_for_hashmap("versions"))
+
+    missing_nodes = version_nodes - set(gx.nodes)
+    if missing_nodes:
+        raise KeyError(
+            "VERSIONS: nodes with new versions are missing from the graph: "
+            f"{sorted(missing_nodes)}"
+        )
+
+    all_nodes = sorted(set(gx.nodes) | pr_info_nodes | version_pr_info_nodes)
+    seen_pr_json: set[str] = set()
+    with executor("thread", max_workers) as pool:
+        futs = [
+            pool.submit(
+                _update_node_with_pr_info,
+                gx,
+                node,
+                now,
+                pr_info_nodes,
+                version_pr_info_nodes,
+                version_nodes,
             )
+            for node in all_nodes
+        ]
+        for fut in tqdm.tqdm(
+            as_completed(futs), desc="updating nodes", ncols=80, total=len(futs)
+        ):
+            seen_pr_json |= fut.result()
+
+    # any json blob referenced in the pr info was checked above, so we
+    # only need to look at the ones that are not referenced anymore
+    orphan_nodes = set(get_all_keys_for_hashmap("pr_json")) - seen_pr_json
+    with executor("thread", max_workers) as pool:
+        futs = [
+            pool.submit(_remove_archivable_pr_json, node, now) for node in orphan_nodes
+        ]
+        for fut in as_completed(futs):
+            fut.result()
 
 
 def _update_graph_with_pr_info():
-    _remove_closed_pr_json()
     gx = load_existing_graph()
-    _update_nodes_with_bot_rerun(gx)
-    _update_nodes_with_new_versions(gx)
+    _update_nodes_with_pr_info(gx)
     dump_graph(gx)
 
 
@@ -1395,10 +1650,17 @@ def main(ctx: CliContext) -> None:
 
     _setup_limits()
 
-    # record tmp dir so we can be sure to clean it later
-    temp = glob.glob("/tmp/*")
+    memory_budget_gb = settings().auto_tick_memory_budget_gb
+    memory = MemoryUsageTracker(
+        soft_limit_bytes=(
+            int(memory_budget_gb * 1024**3) if memory_budget_gb is not None else None
+        ),
+    )
 
-    with fold_log_lines("loading graph and migrators"):
+    with (
+        fold_log_lines("loading graph and migrators"),
+        memory.phase("loading graph and migrators"),
+    ):
         gx = load_existing_graph()
         smithy_version: str = eval_cmd(["conda", "smithy", "--version"]).strip()
         pinning_version: str = cast(
@@ -1412,10 +1674,23 @@ def main(ctx: CliContext) -> None:
             smithy_version=smithy_version,
             pinning_version=pinning_version,
         )
-        migrators = load_migrators()
+        memory.register_evictor(lambda: evict_graph_payloads(gx))
+
+        # the version migrator is not stored in the migrators hashmap, so we
+        # keep it, but all other migrators are only loaded when they are used
+        version_migrator: Version | None = make_version_migrator()
+        migrator_infos = _load_migrator_infos(
+            [version_migrator, *load_migrator_names()]
+        )
 
     # compute the time per migrator
-    with fold_log_lines("computing migrator run times"):
+    with (
+        fold_log_lines("computing migrator run times"),
+        memory.phase("computing migrator run times"),
+    ):
+        print("building PR attempt index", flush=True)
+        attempt_index = PRAttemptIndex.from_hashmaps(nodes=gx.nodes)
+
         print("computing time per migration", flush=True)
         (
             num_nodes,
@@ -1423,13 +1698,14 @@ def main(ctx: CliContext) -> None:
             tot_time_per_migrator,
             num_nodes_not_tried,
         ) = _compute_time_per_migrator(
-            migrators,
+            migrator_infos,
+            attempt_index=attempt_index,
         )
-        for i, migrator in enumerate(migrators):
+        for i, info in enumerate(migrator_infos):
             print(
                 "    %s: %d to try (%d total left)- gets %f seconds (%f percent)"
                 % (
-                    migrator.two_part_name,
+                    info.two_part_name,
                     num_nodes_not_tried[i],
                     num_nodes[i],
                     time_per_migrator[i],
@@ -1439,12 +1715,40 @@ def main(ctx: CliContext) -> None:
             )
     git_backend = github_backend() if not ctx.dry_run else DryRunBackend()
 
-    for mg_ind, migrator in enumerate(migrators):
-        _run_migrator(
-            migrator, mctx, temp, time_per_migrator[mg_ind], git_backend, start_time
-        )
+    tmp_disk_limit_gb = settings().auto_tick_tmp_disk_limit_gb
+    with TempWorkspaceManager(
+        max_bytes=(
+            int(tmp_disk_limit_gb * 1024**3) if tmp_disk_limit_gb is not None else None
+        ),
+        background=True,
+    ) as workspaces:
+        for mg_ind, info in enumerate(migrator_infos):
+            if info.name is not None:
+                migrator = load_migrator(info.name)
+            else:
+                # the version migrator is the only one that is not loaded by
+                # name, we hand it over so that it is released after its run
+                migrator, version_migrator = version_migrator, None
+            migrator.pr_limit = info.pr_limit
+
+            with memory.phase(f"migrator {info.two_part_name}"):
+                _run_migrator(
+                    migrator,
+                    mctx,
+                    workspaces,
+                    time_per_migrator[mg_ind],
+                    git_backend,
+                    start_time,
+                    attempt_index=attempt_index,
+                )
 
-    logger.info(
-        "API Calls Remaining: %d", github_backend().get_api_requests_left() or -1
-    )
+                # release the migrator and its graphs before the next one is loaded
+                del migrator
+                memory.maybe_evict()
+
+    report_path = settings().auto_tick_memory_report_path
+    if report_path is not None:
+        memory.dump_report(report_path)
+
+    logger.info("API Calls Remaining: %d", get_github_api_requests_left() or -1)
     logger.info("Done")
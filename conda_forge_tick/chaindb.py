@@ -53,38 +53,39 @@ ChainDBDefault = ChainDBDefaultType()
 class ChainDB(ChainMap):
     """A ChainMap who's ``_getitem__`` returns either a ChainDB or
     the result. The results resolve to the outermost mapping.
+
+    The merged values are memoized per key. Writes through the ChainDB clear the
+    memoized values, but if the underlying mappings are changed directly,
+    ``clear_cache`` has to be called.
     """
 
+    def __init__(self, *maps):
+        super().__init__(*maps)
+        self._cache = {}
+
+    def clear_cache(self):
+        """Clear the memoized merged values."""
+        self._cache.clear()
+
     def __getitem__(self, key):
-        res = None
-        results = []
-        # Try to get all the data from all the mappings
-        for mapping in self.maps:
-            results.append(mapping.get(key, ChainDBDefault))
-        # if all the results are mapping create a ChainDB
-        if all([isinstance(result, MutableMapping) for result in results]):
-            for result in results:
-                if res is None:
-                    res = ChainDB(result)
-                else:
-                    res.maps.append(result)
-        elif all(
-            [isinstance(result, (MutableSequence, MutableSet)) for result in results]
-        ):
-            results_chain = itertools.chain(*results)
-            # if all results have the same type, cast into that type
-            if all([isinstance(result, type(results[0])) for result in results]):
-                return type(results[0])(results_chain)
-            else:
-                return list(results_chain)
-        else:
-            for result in reversed(results):
-                if result is not ChainDBDefault:
-                    return result
-            raise KeyError(f"{key} is none of the current mappings")
+        try:
+            res, is_merged_collection = self._cache[key]
+        except KeyError:
+            results = [mapping.get(key, ChainDBDefault) for mapping in self.maps]
+            res = _merge_values(results)
+            if res is ChainDBDefault:
+                raise KeyError(f"{key} is none of the current mappings")
+            is_merged_collection = isinstance(
+                res, (MutableSequence, MutableSet)
+            ) and all(res is not result for result in results)
+            self._cache[key] = (res, is_merged_collection)
+        # merged sequences and sets are new objects on every lookup
+        if is_merged_collection:
+            return type(res)(res)
         return res
 
     def __setitem__(self, key, value):
+        self._cache.clear()
         if key not in self:
             super().__setitem__(key, value)
         else:
@@ -93,9 +94,80 @@ class ChainDB(ChainMap):
                 if key in mapping:
                     mapping[key] = value
 
+    def __delitem__(self, key):
+        self._cache.clear()
+        super().__delitem__(key)
+
+    def popitem(self):
+        self._cache.clear()
+        return super().popitem()
+
+    def pop(self, key, *args):
+        self._cache.clear()
+        return super().pop(key, *args)
+
+    def clear(self):
+        self._cache.clear()
+        super().clear()
+
+    def __ior__(self, other):
+        self._cache.clear()
+        return super().__ior__(other)
+
+    def to_dict(self):
+        """Merge the mappings into a dict in a single pass.
+
+        The result is the same as converting the ChainDB with ``_convert_to_dict``,
+        but no intermediate ChainDBs are built for nested mappings.
+        """
+        res = {}
+        stack = [(self.maps, res)]
+        while stack:
+            maps, out = stack.pop()
+            keys = {}
+            for mapping in reversed(maps):
+                keys.update(dict.fromkeys(mapping))
+            for key in keys:
+                results = [mapping.get(key, ChainDBDefault) for mapping in maps]
+                if all(_is_mapping(result) for result in results):
+                    out[key] = {}
+                    stack.append((results, out[key]))
+                else:
+                    out[key] = _convert_to_dict(_merge_values(results))
+        return res
+
+
+def _is_mapping(obj):
+    # isinstance checks against the ABCs are slow, so we check for dicts first
+    return type(obj) is dict or isinstance(obj, MutableMapping)
+
+
+def _merge_values(results):
+    """Merge the values of a key in the mappings of a ChainDB.
+
+    Returns ``ChainDBDefault`` if the key is in none of the mappings.
+    """
+    # if all the results are mapping create a ChainDB
+    if all(_is_mapping(result) for result in results):
+        return ChainDB(*results)
+    elif all(isinstance(result, (MutableSequence, MutableSet)) for result in results):
+        results_chain = itertools.chain(*results)
+        # if all results have the same type, cast into that type
+        if all(isinstance(result, type(results[0])) for result in results):
+            return type(results[0])(results_chain)
+        else:
+            return list(results_chain)
+    else:
+        for result in reversed(results):
+            if result is not ChainDBDefault:
+                return result
+        return ChainDBDefault
+
 
 def _convert_to_dict(cm):
-    if isinstance(cm, (ChainMap, ChainDB)):
+    if isinstance(cm, ChainDB):
+        return cm.to_dict()
+    elif isinstance(cm, ChainMap):
         r = {}
         for k, v in cm.items():
             r[k] = _convert_to_dict(v)
@@ -300,12 +300,16 @@ def _update_version(*, version, hash_type):
     return data
 
 
-def _get_latest_version(*, attrs, sources):
+def _get_latest_version(*, attrs, sources, source_index_dir=None):
+    from conda_forge_tick import update_sources
     from conda_forge_tick.update_upstream_versions import (
         all_version_sources,
         get_latest_version_local,
     )
 
+    if source_index_dir is not None:
+        update_sources.SOURCE_INDEX_READ_ONLY_DIR = source_index_dir
+
     _sources = all_version_sources()
     if sources is not None:
         sources = sources.split(",")
@@ -384,6 +388,25 @@ def _parse_recipe_yaml(
     )
 
 
+def _parse_recipe_yaml_batch(
+    *,
+    for_pinning,
+    variant,
+):
+    from conda_forge_tick.utils import parse_recipe_yaml_batch_local
+
+    variants = []
+    for _variant in variant:
+        platform_arch, _, cbc_path = _variant.partition(":")
+        variants.append((platform_arch or None, cbc_path or None))
+
+    return parse_recipe_yaml_batch_local(
+        sys.stdin.read(),
+        variants,
+        for_pinning=for_pinning,
+    )
+
+
 @click.group()
 def cli():
     pass
@@ -472,6 +495,36 @@ def parse_recipe_yaml(
     )
 
 
+@cli.command(name="parse-recipe-yaml-batch")
+@log_level_option
+@click.option(
+    "--for-pinning",
+    is_flag=True,
+    help="Parse the recipe.yaml for pinning requirements.",
+)
+@click.option(
+    "--variant",
+    type=str,
+    multiple=True,
+    help=(
+        "A variant to parse the recipe.yaml for as '<platform-arch>:<cbc-path>' "
+        "(e.g., 'linux-64:/path/to/cbc.yaml'). Either part may be empty."
+    ),
+)
+def parse_recipe_yaml_batch(
+    log_level: str,
+    for_pinning,
+    variant,
+):
+    return _run_bot_task(
+        _parse_recipe_yaml_batch,
+        log_level=log_level,
+        existing_feedstock_node_attrs=None,
+        for_pinning=for_pinning,
+        variant=variant,
+    )
+
+
 @cli.command(name="parse-feedstock")
 @log_level_option
 @existing_feedstock_node_attrs_option
@@ -513,12 +566,21 @@ def parse_feedstock(
     type=str,
     help="Comma separated list of sources to use. Default is all sources as given by `all_version_sources`.",
 )
-def get_latest_version(log_level, existing_feedstock_node_attrs, sources):
+@click.option(
+    "--source-index-dir",
+    default=None,
+    type=str,
+    help="The (read-only) directory with the cached indexes of the version sources.",
+)
+def get_latest_version(
+    log_level, existing_feedstock_node_attrs, sources, source_index_dir
+):
     return _run_bot_task(
         _get_latest_version,
         log_level=log_level,
         existing_feedstock_node_attrs=existing_feedstock_node_attrs,
         sources=sources,
+        source_index_dir=source_index_dir,
     )
 
 
@@ -1,35 +1,51 @@
 import logging
 import os
-import secrets
 import subprocess
 import sys
-import time
 
+from pydantic import TypeAdapter, ValidationError
+
+from .git_cli_deploy import deploy_files_via_git_cli
 from .git_utils import (
-    delete_file_via_gh_api,
     get_bot_token,
-    push_file_via_gh_api,
     reset_and_restore_file,
+    reset_and_restore_files,
 )
+from .github_git_data import commit_files_via_gh_git_data_api
 from .lazy_json_backends import (
     CF_TICK_GRAPH_DATA_HASHMAPS,
     get_lazy_json_backends,
     lazy_json_override_backends,
 )
+from .models.node_attributes import NodeAttributes
+from .models.pr_info import PrInfo
+from .models.pr_json import PullRequestData
+from .models.version_pr_info import VersionPrInfo
+from .models.versions import Versions
 from .os_utils import clean_disk_space
 from .settings import settings
 from .utils import (
     fold_log_lines,
     get_bot_run_url,
     load_existing_graph,
-    run_command_hiding_token,
 )
 
 logger = logging.getLogger(__name__)
 
-RNG = secrets.SystemRandom()
 GIT_CMD_TIMEOUT = 300
 
+GRAPH_DATA_MODELS: dict[str, TypeAdapter] = {
+    "node_attrs": NodeAttributes,
+    "pr_info": PrInfo,
+    "pr_json": TypeAdapter(PullRequestData),
+    "version_pr_info": TypeAdapter(VersionPrInfo),
+    "versions": Versions,
+}
+"""
+The pydantic models used to validate the graph data files before deploying them,
+keyed by the hashmap (top-level directory) of the file.
+"""
+
 
 def _flush_io():
     sys.stdout.flush()
@@ -123,101 +139,81 @@ def _pull_changes(batch):
     return n_added
 
 
-def _deploy_batch(
-    *,
-    files_to_add: set[str],
-    batch,
-    n_added,
-    max_per_batch=10,
-    exp_backoff_base: float = 1.1,
-    exp_backoff_rfrac: float = 0.5,
-    max_tries: int = 30,
-):
-    n_added_this_batch = 0
-    while files_to_add and n_added_this_batch < max_per_batch:
-        file = files_to_add.pop()
-        if file and os.path.exists(file):
-            try:
-                print(f"committing {n_added: >5d}: {file}", flush=True)
-                _run_git_cmd(["add", file])
-                n_added_this_batch += 1
-                n_added += 1
-            except Exception as e:
-                print(e, flush=True)
-
-    if n_added_this_batch > 0:
-        try:
-            _step_name = os.environ.get("GITHUB_WORKFLOW", "update graph")
-            _run_git_cmd(
-                [
-                    "commit",
-                    "-m",
-                    f"{_step_name} - batch {batch: >3d} - {get_bot_run_url()}",
-                ],
-            )
-        except Exception as e:
-            print(e, flush=True)
-
-        status = 1
-        num_try = 0
-        while status != 0 and num_try < max_tries:
-            with fold_log_lines(">>>>>>>>>>>> git pull+push try %d" % num_try):
-                try:
-                    # pull twice right away to reduce chance of changes between
-                    # pull and push
-                    for pull_itr in range(2):
-                        print(">>>>>>>>>>>> git pull %d/2" % (pull_itr + 1), flush=True)
-                        _n_added = _pull_changes(batch)
-                        n_added += _n_added
-                        n_added_this_batch += _n_added
-                except Exception as e:
-                    print(
-                        ">>>>>>>>>>>> git pull failed: %s" % repr(e),
-                        flush=True,
-                    )
-                    pass
-
-                print(">>>>>>>>>>>> git push try", flush=True)
-                status = run_command_hiding_token(
-                    [
-                        "git",
-                        "push",
-                        f"https://{get_bot_token()}@github.com/{settings().graph_github_backend_repo}.git",
-                        settings().graph_repo_default_branch,
-                    ],
-                    token=get_bot_token(),
-                )
-                if status != 0:
-                    print(">>>>>>>>>>>> git push failed", flush=True)
-                    interval = exp_backoff_base**num_try
-                    interval = interval * exp_backoff_rfrac * (1.0 + RNG.uniform(0, 1))
-                    time.sleep(interval)
-            num_try += 1
-
-        if status != 0:
-            # we did try to push to a branch but it never worked so we'll just stop
-            raise RuntimeError("bot did not push its data! stopping!")
-
-    return n_added_this_batch
-
-
-def _get_files_to_delete() -> set[str]:
-    r = subprocess.run(
-        ["git", "diff", "--name-status", "--cached"],
-        text=True,
+def _parse_git_status_porcelain_v2(output: str) -> list[tuple[str, str]]:
+    """Parse the output of `git status --porcelain=v2 -z` into (XY, path) pairs.
+
+    Untracked files have the status "??". Unmerged files have the status "UU".
+    """
+    entries = []
+    fields = output.split("\0")
+    i = 0
+    while i < len(fields):
+        field = fields[i]
+        i += 1
+        if not field:
+            continue
+        kind = field[0]
+        if kind == "?":
+            entries.append(("??", field[2:]))
+        elif kind == "1":
+            # 1 XY sub mH mI mW hH hI path
+            parts = field.split(" ", 8)
+            entries.append((parts[1], parts[8]))
+        elif kind == "2":
+            # 2 XY sub mH mI mW hH hI Xscore path\0origPath
+            parts = field.split(" ", 9)
+            entries.append((parts[1], parts[9]))
+            i += 1
+        elif kind == "u":
+            # u XY sub m1 m2 m3 mW h1 h2 h3 path
+            parts = field.split(" ", 10)
+            entries.append(("UU", parts[10]))
+    return entries
+
+
+def _get_files_to_deploy(drs_to_deploy: list[str]) -> tuple[set[str], set[str]]:
+    """Find the changed files to deploy with a single `git status` call.
+
+    Parameters
+    ----------
+    drs_to_deploy : list of str
+        The directories (or files) whose untracked, changed and staged files
+        should be deployed.
+
+    Returns
+    -------
+    files_to_add : set of str
+        The untracked, changed or staged (but not deleted) files in
+        `drs_to_deploy`.
+    files_to_delete : set of str
+        All files in the repository whose deletion is staged.
+    """
+    drs = [dr.rstrip("/") for dr in drs_to_deploy if os.path.exists(dr)]
+    r = _run_git_cmd(
+        [
+            "status",
+            "--porcelain=v2",
+            "-z",
+            "--untracked-files=all",
+            "--no-renames",
+        ],
         capture_output=True,
-        check=True,
-        timeout=GIT_CMD_TIMEOUT,
+        text=True,
     )
+
+    files_to_add = set()
     files_to_delete = set()
-    for line in r.stdout.splitlines():
-        res = line.strip().split()
-        if len(res) < 2:
-            continue
-        status, fname = res[0:2]
-        if status == "D":
-            files_to_delete.add(fname)
-    return files_to_delete
+    for xy, pth in _parse_git_status_porcelain_v2(r.stdout):
+        index_status, worktree_status = xy
+        if index_status == "D":
+            files_to_delete.add(pth)
+
+        if (xy == "??" or worktree_status != "." or index_status not in ".D") and any(
+            pth == dr or pth.startswith(f"{dr}/") for dr in drs
+        ):
+            files_to_add.add(pth)
+
+    return files_to_add, files_to_delete
 
 
 def _get_pth_commit_message(pth):
@@ -233,6 +229,14 @@ def _get_pth_commit_message(pth):
     return msg
 
 
+def _get_commit_message(files: set[str]) -> str:
+    """Make a nice message for a commit of one or more files."""
+    if len(files) == 1:
+        return _get_pth_commit_message(next(iter(files)))
+    step_name = os.environ.get("GITHUB_WORKFLOW", "update graph")
+    return f"{step_name} - {len(files)} files - {get_bot_run_url()}"
+
+
 def _deploy_via_api(
     do_git_ops: bool,
     files_to_add: set[str],
@@ -240,61 +244,114 @@ def _deploy_via_api(
     files_done: set[str],
     files_to_try_again: set[str],
 ) -> tuple[bool, set[str], set[str], set[str]]:
-    if len(files_to_add) + len(files_to_delete) <= 1000:
-        for pth in files_to_add:
-            if do_git_ops:
-                break
-
-            try:
-                print(
-                    f"pushing file '{pth}' to the graph via the GitHub API", flush=True
-                )
-
-                msg = _get_pth_commit_message(pth)
-
-                push_file_via_gh_api(pth, settings().graph_github_backend_repo, msg)
-            except Exception as e:
-                logger.warning(
-                    "git push via API failed - trying via git CLI", exc_info=e
-                )
-                do_git_ops = True
-                files_to_try_again.add(pth)
-            else:
-                files_done.add(pth)
+    if files_to_add or files_to_delete:
+        try:
+            print(
+                f"pushing {len(files_to_add)} files and deleting "
+                f"{len(files_to_delete)} files in a single commit "
+                "to the graph via the GitHub API",
+                flush=True,
+            )
+            commit_files_via_gh_git_data_api(
+                files_to_add,
+                files_to_delete,
+                settings().graph_github_backend_repo,
+                _get_commit_message(files_to_add | files_to_delete),
+                settings().graph_repo_default_branch,
+            )
+        except Exception as e:
+            logger.warning("git push via API failed - trying via git CLI", exc_info=e)
+            do_git_ops = True
+            files_to_try_again |= files_to_add
+        else:
+            files_done |= files_to_add | files_to_delete
+
+    reset_and_restore_files(files_done)
+
+    return do_git_ops, files_to_add, files_done, files_to_try_again
 
-            time.sleep(1.0 + RNG.uniform(-1, 1) * 0.1)
 
-        for pth in files_to_delete:
-            if do_git_ops:
-                break
+def _get_graph_data_hashmap(pth: str) -> str | None:
+    parts = pth.split("/")
+    if (
+        pth.endswith(".json")
+        and len(parts) > 1
+        and parts[0] in CF_TICK_GRAPH_DATA_HASHMAPS
+    ):
+        return parts[0]
+    return None
 
-            try:
-                print(
-                    f"deleting file '{pth}' from the graph via the GitHub API",
-                    flush=True,
-                )
 
-                # make a nice message for stuff managed via LazyJson
-                msg = _get_pth_commit_message(pth)
+def _validate_graph() -> None:
+    """Make sure the graph and all of its node payloads load. Errors if not."""
+    with lazy_json_override_backends(["file-read-only"], use_file_cache=False):
+        gx = load_existing_graph()
+        for node, attrs in gx.nodes.items():
+            with attrs["payload"]:
+                pass
 
-                delete_file_via_gh_api(pth, settings().graph_github_backend_repo, msg)
-            except Exception as e:
-                logger.warning(
-                    "git delete via API failed - trying via git CLI", exc_info=e
-                )
-                do_git_ops = True
-            else:
-                files_done.add(pth)
 
-            time.sleep(1.0 + RNG.uniform(-1, 1) * 0.1)
+def _validate_files_to_deploy(
+    files_to_add: set[str], files_to_delete: set[str], strict: bool = False
+) -> int:
+    """Validate the graph data that is about to be deployed.
+
+    Only the changed files are checked. Each changed graph data file must be
+    valid JSON and is checked against its pydantic model. The full graph is only
+    loaded if `graph.json` itself changed or node attributes were deleted.
+
+    Parameters
+    ----------
+    files_to_add : set of str
+        The files that are added or updated by the deploy.
+    files_to_delete : set of str
+        The files that are deleted by the deploy.
+    strict : bool, optional
+        If True, schema validation errors are fatal. Otherwise they are only
+        logged since not all of the data in the graph conforms to the models yet.
+
+    Returns
+    -------
+    int
+        The number of files that do not conform to their model.
+
+    Raises
+    ------
+    ValueError
+        Raised if a file is not valid JSON or, if `strict` is True, a file does
+        not conform to its model.
+    """
+    num_schema_errors = 0
+    for pth in sorted(files_to_add):
+        hashmap = _get_graph_data_hashmap(pth)
+        if hashmap is None or not os.path.exists(pth):
+            continue
 
-    else:
-        do_git_ops = True
+        with open(pth) as fp:
+            data = fp.read()
 
-    for pth in files_done:
-        reset_and_restore_file(pth)
+        try:
+            GRAPH_DATA_MODELS[hashmap].validate_json(data)
+        except ValidationError as e:
+            if any(err["type"] == "json_invalid" for err in e.errors()):
+                raise ValueError(f"graph data file {pth} is not valid JSON") from e
+            if strict:
+                raise ValueError(
+                    f"graph data file {pth} does not conform to its schema"
+                ) from e
+            num_schema_errors += 1
+            logger.warning(
+                "graph data file %s does not conform to its schema: %s",
+                pth,
+                e,
+            )
 
-    return do_git_ops, files_to_add, files_done, files_to_try_again
+    if "graph.json" in files_to_add or any(
+        _get_graph_data_hashmap(pth) == "node_attrs" for pth in files_to_delete
+    ):
+        _validate_graph()
+
+    return num_schema_errors
 
 
 def deploy(
@@ -308,17 +365,9 @@ def deploy(
         print("(dry run) deploying", flush=True)
         return
 
-    # make sure the graph can load, if not it will error
-    with lazy_json_override_backends(["file-read-only"], use_file_cache=False):
-        gx = load_existing_graph()
-        for node, attrs in gx.nodes.items():
-            with attrs["payload"]:
-                pass
-
     with fold_log_lines("cleaning up disk space for deploy"):
         clean_disk_space()
 
-    files_to_add: set[str] = set()
     if not dirs_to_deploy:
         drs_to_deploy = [
             "status",
@@ -339,38 +388,7 @@ def deploy(
             )
         drs_to_deploy = dirs_to_deploy
 
-    for dr in drs_to_deploy:
-        if not os.path.exists(dr):
-            continue
-
-        # untracked
-        files_to_add |= set(
-            _run_git_cmd(
-                ["ls-files", "-o", "--exclude-standard", dr],
-                capture_output=True,
-                text=True,
-            ).stdout.splitlines(),
-        )
-
-        # changed
-        files_to_add |= set(
-            _run_git_cmd(
-                ["diff", "--name-only", dr],
-                capture_output=True,
-                text=True,
-            ).stdout.splitlines(),
-        )
-
-        # modified and staged but not deleted
-        files_to_add |= set(
-            _run_git_cmd(
-                ["diff", "--name-only", "--cached", "--diff-filter=d", dr],
-                capture_output=True,
-                text=True,
-            ).stdout.splitlines(),
-        )
-
-    files_to_delete = _get_files_to_delete()
+    files_to_add, files_to_delete = _get_files_to_deploy(drs_to_deploy)
 
     if dirs_to_ignore:
         print("ignoring dirs:", dirs_to_ignore, flush=True)
@@ -395,6 +413,14 @@ def deploy(
     print("found %d files to add" % len(files_to_add), flush=True)
     print("found %d files to delete" % len(files_to_delete), flush=True)
 
+    # make sure the data we deploy can load, if not it will error
+    with fold_log_lines("validating graph data to deploy"):
+        _validate_files_to_deploy(
+            files_to_add,
+            files_to_delete,
+            strict=settings().deploy_strict_schema_validation,
+        )
+
     do_git_ops = False
     files_to_try_again: set[str] = set()
     files_done: set[str] = set()
@@ -403,19 +429,26 @@ def deploy(
             do_git_ops, files_to_add, files_to_delete, files_done, files_to_try_again
         )
 
-    batch = 0
     if do_git_ops or git_only:
         files_to_add = (files_to_add - files_done) | files_to_try_again
-        n_added = 0
-        while files_to_add:
-            batch += 1
-            n_added += _deploy_batch(
-                files_to_add=files_to_add,
-                n_added=n_added,
-                batch=batch,
+        files_to_delete = files_to_delete - files_done
+        with fold_log_lines("deploying to the graph via the git CLI"):
+            metrics = deploy_files_via_git_cli(
+                files_to_add,
+                files_to_delete,
+                _get_commit_message(files_to_add | files_to_delete),
+                remote_url=f"https://{get_bot_token()}@github.com/{settings().graph_github_backend_repo}.git",
+                branch=settings().graph_repo_default_branch,
+                token=get_bot_token(),
             )
 
-        print(f"deployed {n_added} files to graph in {batch} batches", flush=True)
+        print(
+            f"deployed {metrics.num_files_added} files and deleted "
+            f"{metrics.num_files_deleted} files ({metrics.bytes_pushed} bytes) "
+            f"to graph in {metrics.num_tries} tries "
+            f"({metrics.num_rejected_pushes} rejected pushes)",
+            flush=True,
+        )
     else:
         if files_done and not no_pull:
-            _pull_changes(batch)
+            _pull_changes(0)
@@ -1,13 +1,16 @@
 import collections.abc
 import hashlib
 import logging
+import multiprocessing
 import os
 import re
 import subprocess
 import tempfile
+import threading
 import typing
 import zipfile
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from typing import Union
 
@@ -35,9 +38,10 @@ from conda_forge_tick.settings import (
 )
 from conda_forge_tick.utils import (
     as_iterable,
+    get_feedstock_parsing_max_workers,
     get_platform_arch_from_ci_support_filename,
     parse_meta_yaml,
-    parse_recipe_yaml,
+    parse_recipe_yaml_batch,
     sanitize_string,
 )
 
@@ -239,6 +243,95 @@ def _clean_req_nones(reqs):
     return reqs
 
 
+def _parse_variant_meta_yaml(
+    cbc_path: Path,
+    plat_arch: tuple[str, str],
+    recipe_dir: Path,
+    meta_yaml: str,
+) -> dict:
+    """Render the meta.yaml for a single .ci_support file."""
+    logger.debug("parsing conda-build config: %s", cbc_path)
+    plat, arch = plat_arch
+
+    variant_yaml = parse_meta_yaml(
+        meta_yaml,
+        platform=plat,
+        arch=arch,
+        cbc_path=cbc_path,
+        orig_cbc_path=os.path.join(
+            recipe_dir,
+            "conda_build_config.yaml",
+        ),
+    )
+    variant_yaml["schema_version"] = 0
+    return variant_yaml
+
+
+def _parse_variant_yamls(
+    ci_support_files: list[Path],
+    plat_archs: list[tuple[str, str]],
+    recipe_dir: Path,
+    meta_yaml: str | None = None,
+    recipe_yaml: str | None = None,
+) -> list[dict]:
+    """Render the recipe for each .ci_support file.
+
+    A recipe.yaml is rendered for all .ci_support files in one batch. The
+    renders of a meta.yaml run in a pool of up to
+    `get_feedstock_parsing_max_workers()` processes. The pool is only used if
+    this process runs no other threads, since forking a multithreaded process
+    can deadlock the children. The results are in the order of the .ci_support
+    files and if rendering fails for some of them, the error of the first one is
+    raised, as if the recipe had been rendered for one file after the other.
+    """
+    if isinstance(recipe_yaml, str):
+        variant_yamls = parse_recipe_yaml_batch(
+            recipe_yaml,
+            [
+                (
+                    f"{plat}-{arch}"
+                    if isinstance(plat, str) and isinstance(arch, str)
+                    else None,
+                    cbc_path,
+                )
+                for cbc_path, (plat, arch) in zip(ci_support_files, plat_archs)
+            ],
+        )
+        for variant_yaml in variant_yamls:
+            variant_yaml["schema_version"] = variant_yaml.get("schema_version", 1)
+        return variant_yamls
+
+    max_workers = min(get_feedstock_parsing_max_workers(), len(ci_support_files))
+    # daemonic processes (e.g., some dask workers) cannot start processes
+    if (
+        max_workers <= 1
+        or multiprocessing.current_process().daemon
+        or threading.active_count() > 1
+    ):
+        return [
+            _parse_variant_meta_yaml(cbc_path, plat_arch, recipe_dir, meta_yaml)
+            for cbc_path, plat_arch in zip(ci_support_files, plat_archs)
+        ]
+
+    logger.debug("rendering %d variants in parallel", len(ci_support_files))
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        futures = [
+            pool.submit(
+                _parse_variant_meta_yaml,
+                cbc_path,
+                plat_arch,
+                recipe_dir,
+                meta_yaml,
+            )
+            for cbc_path, plat_arch in zip(ci_support_files, plat_archs)
+        ]
+        try:
+            return [future.result() for future in futures]
+        finally:
+            for future in futures:
+                future.cancel()
+
+
 def populate_feedstock_attributes(
     name: str,
     existing_node_attrs: typing.MutableMapping[str, typing.Any],
@@ -356,57 +449,32 @@ def populate_feedstock_attributes(
                 with open(str(ci_support_files[0])) as fp:
                     saved_cbc_value = fp.read()
 
-            variant_yamls = []
-            plat_archs = []
-            for cbc_path in ci_support_files:
-                logger.debug("parsing conda-build config: %s", cbc_path)
-                plat, arch = get_platform_arch_from_ci_support_filename(cbc_path.name)
-                plat_archs.append((plat, arch))
-
-                if isinstance(meta_yaml, str):
-                    variant_yamls.append(
-                        parse_meta_yaml(
-                            meta_yaml,
-                            platform=plat,
-                            arch=arch,
-                            cbc_path=cbc_path,
-                            orig_cbc_path=os.path.join(
-                                recipe_dir,
-                                "conda_build_config.yaml",
-                            ),
-                        ),
-                    )
-                    variant_yamls[-1]["schema_version"] = 0
-                elif isinstance(recipe_yaml, str):
-                    platform_arch = (
-                        f"{plat}-{arch}"
-                        if isinstance(plat, str) and isinstance(arch, str)
-                        else None
-                    )
-                    variant_yamls.append(
-                        parse_recipe_yaml(
-                            recipe_yaml,
-                            platform_arch=platform_arch,
-                            cbc_path=cbc_path,
-                        ),
-                    )
-                    variant_yamls[-1]["schema_version"] = variant_yamls[-1].get(
-                        "schema_version", 1
-                    )
+            plat_archs = [
+                get_platform_arch_from_ci_support_filename(cbc_path.name)
+                for cbc_path in ci_support_files
+            ]
+            variant_yamls = _parse_variant_yamls(
+                ci_support_files,
+                plat_archs,
+                recipe_dir,
+                meta_yaml=meta_yaml,
+                recipe_yaml=recipe_yaml,
+            )
 
+            for cbc_path, variant_yaml in zip(ci_support_files, variant_yamls):
                 # sometimes the requirements come out to None or [None]
                 # and this ruins the aggregated meta_yaml / breaks stuff
                 logger.debug("getting reqs for config: %s", cbc_path)
-                if "requirements" in variant_yamls[-1]:
-                    variant_yamls[-1]["requirements"] = _clean_req_nones(
-                        variant_yamls[-1]["requirements"],
+                if "requirements" in variant_yaml:
+                    variant_yaml["requirements"] = _clean_req_nones(
+                        variant_yaml["requirements"],
                     )
-                if "outputs" in variant_yamls[-1]:
-                    for iout in range(len(variant_yamls[-1]["outputs"])):
-                        if "requirements" in variant_yamls[-1]["outputs"][iout]:
-                            variant_yamls[-1]["outputs"][iout]["requirements"] = (
+                if "outputs" in variant_yaml:
+                    for iout in range(len(variant_yaml["outputs"])):
+                        if "requirements" in variant_yaml["outputs"][iout]:
+                            variant_yaml["outputs"][iout]["requirements"] = (
                                 _clean_req_nones(
-                                    variant_yamls[-1]["outputs"][iout]["requirements"],
+                                    variant_yaml["outputs"][iout]["requirements"],
                                 )
                             )
 
@@ -0,0 +1,298 @@
+"""Deploy files to a git branch with the git CLI without merging.
+
+Every bot job owns a disjoint set of files in the graph. So instead of
+committing locally and merging upstream changes (which needs conflict
+resolution when several jobs deploy at the same time), we fetch the branch,
+apply only this job's changed and deleted paths onto the fresh upstream tree
+in a temporary index, commit that tree on top of the upstream head and push.
+If the push is rejected because the branch moved, we fetch again and repeat.
+Nothing in the work tree or the real index is touched until the push went
+through.
+"""
+
+import logging
+import os
+import secrets
+import subprocess
+import tempfile
+import time
+from collections.abc import Iterable
+from dataclasses import asdict, dataclass
+
+from conda_forge_tick.utils import run_command_hiding_token
+
+logger = logging.getLogger(__name__)
+
+RNG = secrets.SystemRandom()
+GIT_CMD_TIMEOUT = 300
+FILE_MODE = "100644"
+NULL_SHA = "0" * 40
+
+
+@dataclass
+class GitCLIDeployMetrics:
+    """Metrics of a single deploy via the git CLI."""
+
+    num_tries: int = 0
+    """The number of fetch+commit+push tries."""
+
+    num_failed_fetches: int = 0
+    """The number of tries where fetching the branch failed."""
+
+    num_rejected_pushes: int = 0
+    """The number of tries where the push was rejected (e.g., the branch moved)."""
+
+    num_files_added: int = 0
+    """The number of files added or updated."""
+
+    num_files_deleted: int = 0
+    """The number of files deleted."""
+
+    bytes_pushed: int = 0
+    """The total size in bytes of the added or updated files."""
+
+    duration: float = 0.0
+    """The wall time of the deploy in seconds."""
+
+    commit: str | None = None
+    """The SHA of the commit at the head of the branch after the deploy."""
+
+    def to_json_data(self) -> dict:
+        return asdict(self)
+
+
+def _git(
+    repo_dir: str, args: list[str], env: dict | None = None, input: str | None = None
+) -> str:
+    r = subprocess.run(
+        ["git", *args],
+        cwd=repo_dir,
+        env=env,
+        input=input,
+        capture_output=True,
+        text=True,
+        check=True,
+        timeout=GIT_CMD_TIMEOUT,
+    )
+    return r.stdout
+
+
+def _git_remote(repo_dir: str, args: list[str], token: str | None) -> int:
+    if token:
+        return run_command_hiding_token(
+            ["git", *args], token=token, cwd=repo_dir, timeout=GIT_CMD_TIMEOUT
+        )
+    else:
+        r = subprocess.run(
+            ["git", *args],
+            cwd=repo_dir,
+            capture_output=True,
+            text=True,
+            timeout=GIT_CMD_TIMEOUT,
+        )
+        if r.returncode != 0:
+            logger.info("git %s failed: %s", args[0], r.stderr.strip())
+        return r.returncode
+
+
+def _make_index_info(
+    repo_dir: str, files_to_add: list[str], files_to_delete: list[str]
+) -> str:
+    """Write the blobs for the files to add and return `git update-index
+    --index-info` input for all changes.
+    """
+    lines = []
+    if files_to_add:
+        shas = _git(
+            repo_dir,
+            ["hash-object", "-w", "--stdin-paths"],
+            input="\n".join(files_to_add) + "\n",
+        ).split()
+        for sha, pth in zip(shas, files_to_add, strict=True):
+            lines.append(f"{FILE_MODE} {sha}\t{pth}")
+    for pth in files_to_delete:
+        # mode 0 removes the path from the index
+        lines.append(f"0 {NULL_SHA}\t{pth}")
+    return "\n".join(lines) + "\n"
+
+
+def _commit_onto(
+    repo_dir: str, upstream: str, index_info: str, msg: str, index_dir: str
+) -> str:
+    """Commit the changes on top of `upstream` using a temporary index.
+
+    Returns `upstream` if the changes are already part of it.
+    """
+    env = {**os.environ, "GIT_INDEX_FILE": os.path.join(index_dir, "index")}
+    _git(repo_dir, ["read-tree", upstream], env=env)
+    _git(repo_dir, ["update-index", "--index-info"], env=env, input=index_info)
+    tree = _git(repo_dir, ["write-tree"], env=env).strip()
+    if tree == _git(repo_dir, ["rev-parse", f"{upstream}^{{tree}}"]).strip():
+        return upstream
+    return _git(repo_dir, ["commit-tree", tree, "-p", upstream, "-m", msg]).strip()
+
+
+def _sync_local_branch(
+    repo_dir: str, commit: str, deployed: set[str], chunk_size: int = 500
+):
+    """Move the local branch to `commit` and check out what others changed.
+
+    The deployed files already have the right content in the work tree. All
+    other files that differ between the old local head and `commit` are
+    updated from `commit`.
+    """
+    old_head = _git(repo_dir, ["rev-parse", "HEAD"]).strip()
+    _git(repo_dir, ["reset", "-q", commit])
+    changed = [
+        pth
+        for pth in _git(
+            repo_dir, ["diff", "--name-only", "--no-renames", "-z", old_head, commit]
+        ).split("\0")
+        if pth and pth not in deployed
+    ]
+    for i in range(0, len(changed), chunk_size):
+        chunk = changed[i : i + chunk_size]
+        present = [
+            pth
+            for pth in _git(
+                repo_dir, ["ls-tree", "-r", "-z", "--name-only", commit, "--"] + chunk
+            ).split("\0")
+            if pth
+        ]
+        if present:
+            _git(repo_dir, ["checkout", "-q", commit, "--"] + present)
+        for pth in set(chunk) - set(present):
+            full_pth = os.path.join(repo_dir, pth)
+            if os.path.exists(full_pth):
+                os.remove(full_pth)
+
+
+def deploy_files_via_git_cli(
+    files_to_add: Iterable[str],
+    files_to_delete: Iterable[str],
+    msg: str,
+    *,
+    remote_url: str,
+    branch: str,
+    token: str | None = None,
+    repo_dir: str = ".",
+    max_tries: int = 30,
+    exp_backoff_base: float = 1.1,
+    exp_backoff_rfrac: float = 0.5,
+    sync_local: bool = True,
+) -> GitCLIDeployMetrics:
+    """Push changed and deleted files to a branch in a single commit.
+
+    The changes are applied onto the current upstream tree of the branch, so
+    upstream changes to any other files are kept as they are. Files to add
+    that do not exist anymore are skipped.
+
+    Parameters
+    ----------
+    files_to_add : iterable of str
+        The paths of the files to add or update, relative to `repo_dir`.
+    files_to_delete : iterable of str
+        The paths of the files to delete, relative to `repo_dir`.
+    msg : str
+        The commit message.
+    remote_url : str
+        The URL of the remote to fetch from and push to.
+    branch : str
+        The branch to deploy to.
+    token : str, optional
+        A token in `remote_url` to hide in the output.
+    repo_dir : str, optional
+        The local clone of the repository.
+    max_tries : int, optional
+        The maximum number of fetch+commit+push tries.
+    exp_backoff_base : float, optional
+        The base of the exponential backoff between tries.
+    exp_backoff_rfrac : float, optional
+        The random fraction of the exponential backoff between tries.
+    sync_local : bool, optional
+        If True, move the local branch to the pushed commit afterwards.
+
+    Returns
+    -------
+    GitCLIDeployMetrics
+        The metrics of the deploy.
+
+    Raises
+    ------
+    RuntimeError
+        Raised if the data could not be pushed in `max_tries` tries.
+    """
+    t0 = time.perf_counter()
+    metrics = GitCLIDeployMetrics()
+
+    _files_to_add = sorted(
+        pth for pth in set(files_to_add) if os.path.isfile(os.path.join(repo_dir, pth))
+    )
+    _files_to_delete = sorted(set(files_to_delete) - set(_files_to_add))
+    if not _files_to_add and not _files_to_delete:
+        return metrics
+
+    metrics.num_files_added = len(_files_to_add)
+    metrics.num_files_deleted = len(_files_to_delete)
+    metrics.bytes_pushed = sum(
+        os.path.getsize(os.path.join(repo_dir, pth)) for pth in _files_to_add
+    )
+    index_info = _make_index_info(repo_dir, _files_to_add, _files_to_delete)
+
+    with tempfile.TemporaryDirectory() as index_dir:
+        for num_try in range(max_tries):
+            if num_try > 0:
+                interval = exp_backoff_base ** (num_try - 1)
+                interval = interval * exp_backoff_rfrac * (1.0 + RNG.uniform(0, 1))
+                time.sleep(interval)
+            metrics.num_tries += 1
+
+            if (
+                _git_remote(
+                    repo_dir,
+                    ["fetch", "--quiet", remote_url, f"refs/heads/{branch}"],
+                    token,
+                )
+                != 0
+            ):
+                metrics.num_failed_fetches += 1
+                continue
+            upstream = _git(repo_dir, ["rev-parse", "FETCH_HEAD"]).strip()
+
+            commit = _commit_onto(repo_dir, upstream, index_info, msg, index_dir)
+            if commit == upstream:
+                logger.info("the branch already contains all changes")
+                metrics.commit = commit
+                break
+
+            if (
+                _git_remote(
+                    repo_dir,
+                    ["push", "--quiet", remote_url, f"{commit}:refs/heads/{branch}"],
+                    token,
+                )
+                == 0
+            ):
+                metrics.commit = commit
+                break
+
+            metrics.num_rejected_pushes += 1
+            logger.info(
+                "push to '%s' rejected - fetching and trying %d more times",
+                branch,
+                max_tries - num_try - 1,
+            )
+
+    metrics.duration = time.perf_counter() - t0
+    logger.info("git CLI deploy metrics: %s", metrics.to_json_data())
+
+    if metrics.commit is None:
+        # we did try to push to a branch but it never worked so we'll just stop
+        raise RuntimeError("bot did not push its data! stopping!")
+
+    if sync_local:
+        _sync_local_branch(
+            repo_dir, metrics.commit, set(_files_to_add) | set(_files_to_delete)
+        )
+
+    return metrics
@@ -11,7 +11,7 @@ import textwrap
 import threading
 import time
 from abc import ABC, abstractmethod
-from collections.abc import Iterator, Sequence
+from collections.abc import Iterable, Iterator, Sequence
 from datetime import datetime
 from email import utils
 from functools import cached_property
@@ -27,10 +27,15 @@ import github3.pulls
 import github3.repos
 import requests
 from github3.session import GitHubSession
+from requests.adapters import HTTPAdapter
 from requests.exceptions import RequestException, Timeout
 from requests.structures import CaseInsensitiveDict
 
 from conda_forge_tick import sensitive_env
+from conda_forge_tick.github_rate_limit import (
+    get_rate_limit_tracker,
+    record_pygithub_rate_limit,
+)
 from conda_forge_tick.lazy_json_backends import (
     LazyJson,
     _test_and_raise_besides_file_not_exists,
@@ -88,6 +93,46 @@ PR_KEYS_TO_KEEP = {
 
 RNG = secrets.SystemRandom()
 
+GITHUB_API_URL = "https://api.github.com"
+
+GITHUB_API_POOL_SIZE = 64
+"""
+The maximum number of connections to the GitHub API kept open by the shared
+`requests` session.
+"""
+
+_GITHUB_API_SESSION: requests.Session | None = None
+_GITHUB_API_SESSION_LOCK = threading.Lock()
+
+
+def get_github_api_session() -> requests.Session:
+    """Get the process-wide `requests` session for the GitHub REST API.
+
+    The session keeps a pool of connections open so that many concurrent
+    requests do not each pay for a new TLS connection. The rate limit headers
+    of all responses are recorded by the rate limit tracker.
+
+    Returns
+    -------
+    requests.Session
+        The shared session.
+    """
+    global _GITHUB_API_SESSION
+
+    with _GITHUB_API_SESSION_LOCK:
+        if _GITHUB_API_SESSION is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(
+                pool_connections=4,
+                pool_maxsize=GITHUB_API_POOL_SIZE,
+                pool_block=True,
+            )
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            session.hooks["response"].append(get_rate_limit_tracker().record_response)
+            _GITHUB_API_SESSION = session
+        return _GITHUB_API_SESSION
+
 
 def get_bot_token() -> str:
     """Get the bot token from the environment.
@@ -113,6 +158,9 @@ def github3_client() -> github3.GitHub:
     """
     if not hasattr(GITHUB3_CLIENT, "client"):
         GITHUB3_CLIENT.client = github3.login(token=get_bot_token())
+        GITHUB3_CLIENT.client.session.hooks["response"].append(
+            get_rate_limit_tracker().record_response
+        )
     return GITHUB3_CLIENT.client
 
 
@@ -1115,6 +1163,10 @@ class GitHubBackend(GitPlatformBackend):
         self.__token = token
 
         self.github3_client = github3_client
+        # record the rate limit headers of every response in the process-wide tracker
+        self.github3_client.session.hooks["response"].append(
+            get_rate_limit_tracker().record_response
+        )
         self._github3_session = _Github3SessionWrapper(self.github3_client.session)
         self.github3_client.session = self._github3_session
 
@@ -1246,6 +1298,12 @@ class GitHubBackend(GitPlatformBackend):
             logger.warning("GitHub API error while parsing rate limit.", exc_info=e)
             return None
 
+        get_rate_limit_tracker().update(
+            remaining_limit,
+            limit=core_resource.get("limit"),
+            reset=core_resource.get("reset"),
+        )
+
         if remaining_limit != 0:
             return remaining_limit
 
@@ -1511,15 +1569,35 @@ def github_backend() -> GitHubBackend:
     return GitHubBackend.from_token(get_bot_token())
 
 
+def get_github_api_requests_left() -> int | None:
+    """
+    Return the number of GitHub API requests left.
+
+    The value is taken from the process-wide rate limit tracker, which records the
+    rate limit headers of the API responses the bot receives. The API is only
+    queried if the tracked value is stale.
+
+    Returns
+    -------
+    int | None
+        The number of remaining API requests. Returns None if the rate limit
+        could not be determined.
+    """
+    if hasattr(GITHUB_CLIENT, "client"):
+        record_pygithub_rate_limit(GITHUB_CLIENT.client.requester)
+
+    return get_rate_limit_tracker().get_requests_left(
+        refresh=lambda: github_backend().get_api_requests_left()
+    )
+
+
 def is_github_api_limit_reached() -> bool:
     """
     Return True if the GitHub API limit has been reached, False otherwise.
 
-    This method will be removed in the future, use the GitHubBackend class directly.
+    If the rate limit could not be determined, this returns True, assuming the limit has been reached.
     """
-    backend = github_backend()
-
-    return backend.is_api_limit_reached()
+    return get_github_api_requests_left() in (0, None)
 
 
 @lock_git_operation()
@@ -1594,10 +1672,11 @@ def lazy_update_pr_json(
 ) -> dict | LazyJson:
     """Lazily update a GitHub PR.
 
-    This function will use the Last-Modified field in the GitHub API to update
-    PR information lazily. It sends the Last-Modified to github properly and
-    if nothing is changed on their end, it simply returns the PR. Otherwise
-    the information is refreshed.
+    This function will use the ETag and Last-Modified fields in the GitHub API to
+    update PR information lazily. It sends them to github as conditional request
+    headers and if nothing is changed on their end, it simply returns the PR.
+    Otherwise the information is refreshed. Requests answered with a 304 do not
+    count against the GitHub API rate limit.
 
     Parameters
     ----------
@@ -1618,6 +1697,8 @@ def lazy_update_pr_json(
     }
     if not force and "Last-Modified" in pr_json:
         hdrs["if-modified-since"] = pr_json["Last-Modified"]
+    if not force and "ETag" in pr_json:
+        hdrs["if-none-match"] = pr_json["ETag"]
 
     if "repo" not in pr_json["base"] or (
         "repo" in pr_json["base"] and "name" not in pr_json["base"]["repo"]
@@ -1635,8 +1716,8 @@ def lazy_update_pr_json(
             "/pull/",
         )[0]
 
-    r = requests.get(
-        "https://api.github.com/repos/conda-forge/"
+    r = get_github_api_session().get(
+        f"{GITHUB_API_URL}/repos/conda-forge/"
         f"{pr_json['base']['repo']['name']}/pulls/{pr_json['number']}",
         headers=hdrs,
     )
@@ -1662,6 +1743,7 @@ def lazy_update_pr_json(
 def refresh_pr(
     pr_json: LazyJson | dict,
     dry_run: bool = False,
+    prefetched_pr_json: dict | None = None,
 ) -> dict | None:
     from conda_forge_tick.settings import settings
 
@@ -1671,6 +1753,16 @@ def refresh_pr(
         if dry_run:
             print("dry run: refresh pr %s" % pr_json["id"])
             pr_dict = dict(pr_json)
+        elif prefetched_pr_json is not None:
+            # fresh data from a bulk (GraphQL) query, see github_graphql.py
+            # the ETag and Last-Modified of the last REST request are kept
+            pr_json = copy.deepcopy(dict(pr_json))
+            pr_json.update(copy.deepcopy(prefetched_pr_json))
+            pr_json = trim_pr_json_keys(pr_json)
+
+            if pr_json["state"] == "closed" and pr_json.get("merged_at", False):
+                delete_branch(pr_json=pr_json, dry_run=dry_run)
+            pr_dict = dict(pr_json)
         else:
             # Check if we should distrust Last-Modified for old PRs
             # GitHub API bug: returns 304 even when PR now has conflicts
@@ -1681,10 +1773,15 @@ def refresh_pr(
             # and logic can be simplified.
             force_refresh = False
 
-            last_fetched: str | None = pr_json.get("last_fetched", None)
+            last_fetched: datetime | str | None = pr_json.get("last_fetched", None)
             try:
                 # `except:` handles case when last_fetched is None or unparsable
-                last_fetched_date: datetime = dateutil.parser.isoparse(last_fetched)
+                # the value is a datetime until the PR json is dumped to disk
+                last_fetched_date: datetime = (
+                    last_fetched
+                    if isinstance(last_fetched, datetime)
+                    else dateutil.parser.isoparse(last_fetched)
+                )
                 last_fetched_tz = (
                     last_fetched_date.tzinfo if last_fetched_date.tzinfo else None
                 )
@@ -1971,6 +2068,32 @@ def reset_and_restore_file(pth: str):
     subprocess.run(["git", "clean", "-f", "--", pth], capture_output=True, text=True)
 
 
+@lock_git_operation()
+def reset_and_restore_files(pths: Iterable[str], chunk_size: int = 500):
+    """Reset the status of many files tracked by git to their versions at the current commit.
+
+    This is the same as calling `reset_and_restore_file` for each file, but uses
+    a few git commands per chunk of files instead of three per file.
+    """
+    pths = sorted(pths)
+    for i in range(0, len(pths), chunk_size):
+        chunk = pths[i : i + chunk_size]
+        # git restore fails for all files if any of them is not in the commit
+        tracked = subprocess.run(
+            ["git", "ls-tree", "-r", "--name-only", "HEAD", "--"] + chunk,
+            capture_output=True,
+            text=True,
+        ).stdout.splitlines()
+        subprocess.run(["git", "reset", "--"] + chunk, capture_output=True, text=True)
+        if tracked:
+            subprocess.run(
+                ["git", "restore", "--"] + tracked, capture_output=True, text=True
+            )
+        subprocess.run(
+            ["git", "clean", "-f", "--"] + chunk, capture_output=True, text=True
+        )
+
+
 @lock_git_operation()
 def is_tracked_by_git(pth: str):
     """Return True if the current working directory is a git repo and the `pth` is
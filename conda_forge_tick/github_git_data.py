@@ -0,0 +1,306 @@
+"""Commit many files to a GitHub repository at once via the Git Data API.
+
+The contents API used by `git_utils.push_file_via_gh_api` makes one commit per
+file and needs a few requests for each one. Here we build a single tree from all
+changed and deleted files on top of the current head of the branch, make one
+commit and fast-forward the branch to it. If the branch moves in the meantime
+(e.g., another bot job deployed), the same changes are applied on top of the new
+head and the update is tried again.
+
+See https://docs.github.com/en/rest/git for the endpoints used.
+"""
+
+import base64
+import json
+import logging
+import secrets
+import time
+from collections.abc import Iterable, Iterator
+
+import requests
+
+from conda_forge_tick.git_utils import get_bot_token
+from conda_forge_tick.github_rate_limit import get_rate_limit_tracker
+
+logger = logging.getLogger(__name__)
+
+RNG = secrets.SystemRandom()
+
+GITHUB_API_URL = "https://api.github.com"
+
+MAX_TREE_PAYLOAD_BYTES = 20 * 1024**2
+"""
+The maximum size in bytes of the JSON payload of a single tree creation request.
+Larger changes are split over several trees that are built on top of each other
+and still end up in a single commit.
+"""
+
+FILE_MODE = "100644"
+
+
+class GitDataAPIError(RuntimeError):
+    """Raised when a Git Data API request fails."""
+
+    def __init__(self, msg: str, status_code: int | None = None):
+        super().__init__(msg)
+        self.status_code = status_code
+
+
+class RefUpdateConflictError(GitDataAPIError):
+    """Raised when the branch moved and the ref update is not a fast-forward."""
+
+
+def _request(
+    session: requests.Session, method: str, url: str, ok_404: bool = False, **kwargs
+) -> dict | None:
+    r = session.request(method, url, **kwargs)
+    if r.status_code == 404 and ok_404:
+        return None
+    if r.status_code >= 400:
+        error_cls = (
+            RefUpdateConflictError
+            if method == "PATCH" and "/git/refs/" in url and r.status_code in (409, 422)
+            else GitDataAPIError
+        )
+        raise error_cls(
+            f"GitHub API request {method} {url} failed with status "
+            f"{r.status_code}: {r.text[:1000]}",
+            status_code=r.status_code,
+        )
+    return r.json() if r.content else {}
+
+
+def _make_tree_entry(
+    session: requests.Session, repo_url: str, pth: str, delete: bool
+) -> dict:
+    if delete:
+        return {"path": pth, "mode": FILE_MODE, "type": "blob", "sha": None}
+
+    with open(pth, "rb") as f:
+        data = f.read()
+
+    try:
+        # text files can be sent inline with the tree
+        return {
+            "path": pth,
+            "mode": FILE_MODE,
+            "type": "blob",
+            "content": data.decode("utf-8"),
+        }
+    except UnicodeDecodeError:
+        blob = _request(
+            session,
+            "POST",
+            f"{repo_url}/git/blobs",
+            json={
+                "content": base64.b64encode(data).decode("ascii"),
+                "encoding": "base64",
+            },
+        )
+        assert blob is not None
+        return {"path": pth, "mode": FILE_MODE, "type": "blob", "sha": blob["sha"]}
+
+
+def _chunk_tree_entries(
+    entries: Iterable[dict], max_payload_bytes: int
+) -> Iterator[list[dict]]:
+    chunk: list[dict] = []
+    size = 0
+    for entry in entries:
+        entry_size = len(json.dumps(entry))
+        if chunk and size + entry_size > max_payload_bytes:
+            yield chunk
+            chunk = []
+            size = 0
+        chunk.append(entry)
+        size += entry_size
+    if chunk:
+        yield chunk
+
+
+def _drop_missing_deletes(
+    session: requests.Session, repo_url: str, chunk: list[dict], ref: str
+) -> list[dict]:
+    new_chunk = []
+    for entry in chunk:
+        if "sha" in entry and entry["sha"] is None:
+            exists = _request(
+                session,
+                "GET",
+                f"{repo_url}/contents/{entry['path']}",
+                ok_404=True,
+                params={"ref": ref},
+            )
+            if exists is None:
+                logger.info("file '%s' to delete is already gone", entry["path"])
+                continue
+        new_chunk.append(entry)
+    return new_chunk
+
+
+def _build_tree(
+    session: requests.Session,
+    repo_url: str,
+    base_commit: str,
+    base_tree: str,
+    chunks: list[list[dict]],
+) -> str:
+    tree = base_tree
+    for i, chunk in enumerate(chunks):
+        try:
+            res = _request(
+                session,
+                "POST",
+                f"{repo_url}/git/trees",
+                json={"base_tree": tree, "tree": chunk},
+            )
+        except GitDataAPIError as e:
+            # deleting a file that does not exist anymore is an error, so we
+            # drop those and try again
+            if e.status_code != 422 or not any(
+                "sha" in entry and entry["sha"] is None for entry in chunk
+            ):
+                raise
+            chunks[i] = _drop_missing_deletes(session, repo_url, chunk, base_commit)
+            if not chunks[i]:
+                continue
+            res = _request(
+                session,
+                "POST",
+                f"{repo_url}/git/trees",
+                json={"base_tree": tree, "tree": chunks[i]},
+            )
+        assert res is not None
+        tree = res["sha"]
+    return tree
+
+
+def commit_files_via_gh_git_data_api(
+    files_to_add: Iterable[str],
+    files_to_delete: Iterable[str],
+    repo_full_name: str,
+    msg: str,
+    branch: str,
+    *,
+    token: str | None = None,
+    api_url: str = GITHUB_API_URL,
+    max_tries: int = 10,
+    max_payload_bytes: int = MAX_TREE_PAYLOAD_BYTES,
+    exp_backoff_base: float = 1.5,
+    exp_backoff_rfrac: float = 0.5,
+) -> str | None:
+    """Commit changed and deleted files to a branch in a single commit.
+
+    The files are read from the current working directory using the same
+    relative paths as in the repository.
+
+    Parameters
+    ----------
+    files_to_add : iterable of str
+        The paths of the files to add or update.
+    files_to_delete : iterable of str
+        The paths of the files to delete.
+    repo_full_name : str
+        The full name of the repository (e.g., "regro/cf-graph-countyfair").
+    msg : str
+        The commit message.
+    branch : str
+        The branch to commit to.
+    token : str, optional
+        The GitHub token. Defaults to the bot token.
+    api_url : str, optional
+        The URL of the GitHub REST API.
+    max_tries : int, optional
+        The number of times to try to update the branch if it moved.
+    max_payload_bytes : int, optional
+        The maximum size of the payload of a single tree creation request.
+    exp_backoff_base : float, optional
+        The base of the exponential backoff between tries.
+    exp_backoff_rfrac : float, optional
+        The random fraction of the exponential backoff between tries.
+
+    Returns
+    -------
+    str | None
+        The SHA of the new commit or None if there was nothing to commit.
+
+    Raises
+    ------
+    RefUpdateConflictError
+        Raised if the branch could not be updated after `max_tries` tries.
+    GitDataAPIError
+        Raised if any other request fails.
+    """
+    if token is None:
+        token = get_bot_token()
+
+    session = requests.Session()
+    session.headers.update(
+        {
+            "Authorization": f"token {token}",
+            "Accept": "application/vnd.github+json",
+            "X-GitHub-Api-Version": "2022-11-28",
+        }
+    )
+    session.hooks["response"].append(get_rate_limit_tracker().record_response)
+    repo_url = f"{api_url}/repos/{repo_full_name}"
+
+    entries = [
+        _make_tree_entry(session, repo_url, pth, delete=False)
+        for pth in sorted(set(files_to_add))
+    ] + [
+        _make_tree_entry(session, repo_url, pth, delete=True)
+        for pth in sorted(set(files_to_delete))
+    ]
+    if not entries:
+        return None
+    chunks = list(_chunk_tree_entries(entries, max_payload_bytes))
+
+    for tr in range(max_tries):
+        ref = _request(session, "GET", f"{repo_url}/git/ref/heads/{branch}")
+        assert ref is not None
+        head = ref["object"]["sha"]
+        head_commit = _request(session, "GET", f"{repo_url}/git/commits/{head}")
+        assert head_commit is not None
+
+        tree = _build_tree(session, repo_url, head, head_commit["tree"]["sha"], chunks)
+        if tree == head_commit["tree"]["sha"]:
+            logger.info("the branch already contains all changes")
+            return head
+
+        commit = _request(
+            session,
+            "POST",
+            f"{repo_url}/git/commits",
+            json={"message": msg, "tree": tree, "parents": [head]},
+        )
+        assert commit is not None
+
+        try:
+            _request(
+                session,
+                "PATCH",
+                f"{repo_url}/git/refs/heads/{branch}",
+                json={"sha": commit["sha"], "force": False},
+            )
+        except RefUpdateConflictError:
+            if tr == max_tries - 1:
+                raise
+            logger.info(
+                "branch '%s' moved - rebasing and trying %d more times",
+                branch,
+                max_tries - tr - 1,
+            )
+            interval = exp_backoff_base**tr
+            interval = exp_backoff_rfrac * interval * (1.0 + RNG.uniform(0, 1))
+            time.sleep(interval)
+        else:
+            logger.info(
+                "committed %d files in %d tree(s) as %s",
+                len(entries),
+                len(chunks),
+                commit["sha"],
+            )
+            return commit["sha"]
+
+    raise GitDataAPIError(f"could not update branch '{branch}' in {max_tries} tries")
@@ -0,0 +1,208 @@
+"""Fetch the state of many PRs at once via the GitHub GraphQL API.
+
+A single GraphQL query can look up many PRs (one aliased field per PR), so
+refreshing thousands of PRs takes a few dozen requests instead of one REST
+request per PR. The results are mapped to the `pr_json` schema used by the bot
+(see `git_utils.PR_KEYS_TO_KEEP` and `models/pr_json.py`).
+
+GraphQL cannot provide everything the REST API does. The `ETag` and
+`Last-Modified` headers only exist for REST responses, labels only come with
+their names, and GitHub computes the mergeable state lazily, so it may not be
+known yet. PRs whose mergeable state is not known (or which could not be
+found) are left out of the results so that callers fall back to REST for them.
+"""
+
+import logging
+from collections.abc import Iterable
+from datetime import datetime
+
+from . import git_utils
+from .git_utils import get_bot_token, get_github_api_session
+
+logger = logging.getLogger(__name__)
+
+GRAPHQL_PR_BATCH_SIZE = 100
+"""
+The maximum number of PRs looked up in a single GraphQL query.
+"""
+
+GRAPHQL_PR_FIELDS = """\
+fragment prFields on PullRequest {
+  databaseId
+  number
+  url
+  state
+  merged
+  isDraft
+  mergeable
+  mergeStateStatus
+  createdAt
+  updatedAt
+  mergedAt
+  closedAt
+  headRefName
+  labels(first: 100) {
+    nodes {
+      name
+    }
+  }
+  repository {
+    name
+  }
+}
+"""
+
+REST_MERGEABLE_STATES = {"dirty", "blocked", "behind", "unstable", "has_hooks", "clean"}
+"""
+The values of `mergeStateStatus` (in lower case) that are also valid REST
+`mergeable_state` values. PRs with other values are refreshed via REST.
+"""
+
+
+def make_pr_batch_query(num_prs: int, owner: str = "conda-forge") -> str:
+    """Make a GraphQL query that looks up `num_prs` PRs.
+
+    The repository name and number of the i-th PR are passed as the variables
+    `r{i}` and `p{i}`, and its data is returned under the alias `pr{i}`.
+    """
+    var_defs = ", ".join(f"$r{i}: String!, $p{i}: Int!" for i in range(num_prs))
+    fields = "\n".join(
+        f'  pr{i}: repository(owner: "{owner}", name: $r{i}) '
+        f"{{ pullRequest(number: $p{i}) {{ ...prFields }} }}"
+        for i in range(num_prs)
+    )
+    return f"query({var_defs}) {{\n{fields}\n}}\n{GRAPHQL_PR_FIELDS}"
+
+
+def graphql_pr_to_pr_json(node: dict) -> dict | None:
+    """Map the GraphQL data of a PR to the `pr_json` schema.
+
+    Parameters
+    ----------
+    node : dict
+        The `prFields` of the PR.
+
+    Returns
+    -------
+    dict | None
+        The PR data or None if the PR has to be refreshed via REST instead.
+    """
+    merge_state = (node.get("mergeStateStatus") or "").lower()
+    if node.get("state") == "OPEN" and merge_state not in REST_MERGEABLE_STATES:
+        return None
+
+    return {
+        "id": node["databaseId"],
+        "number": node["number"],
+        "html_url": node["url"],
+        "created_at": node["createdAt"],
+        "updated_at": node["updatedAt"],
+        "merged_at": node["mergedAt"],
+        "closed_at": node["closedAt"],
+        "state": "open" if node["state"] == "OPEN" else "closed",
+        "merged": node["merged"],
+        "draft": node["isDraft"],
+        "mergeable": {"MERGEABLE": True, "CONFLICTING": False}.get(node["mergeable"]),
+        "mergeable_state": merge_state
+        if merge_state in REST_MERGEABLE_STATES
+        else None,
+        "labels": [{"name": lab["name"]} for lab in node["labels"]["nodes"]],
+        "head": {"ref": node["headRefName"]},
+        "base": {"repo": {"name": node["repository"]["name"]}},
+        "last_fetched": datetime.now(),
+    }
+
+
+def _fetch_pr_batch(
+    prs: list[tuple[str, int]], token: str, api_url: str
+) -> dict[tuple[str, int], dict]:
+    r = get_github_api_session().post(
+        f"{api_url}/graphql",
+        json={
+            "query": make_pr_batch_query(len(prs)),
+            "variables": {
+                **{f"r{i}": repo for i, (repo, _) in enumerate(prs)},
+                **{f"p{i}": number for i, (_, number) in enumerate(prs)},
+            },
+        },
+        headers={
+            "Authorization": f"bearer {token}",
+            # mergeStateStatus is part of this schema preview
+            "Accept": "application/vnd.github.merge-info-preview+json",
+        },
+    )
+    r.raise_for_status()
+    res = r.json()
+
+    for err in res.get("errors") or []:
+        # missing repos or PRs are reported here and are null in the data
+        logger.debug("GraphQL error: %s", err.get("message"))
+
+    data = res.get("data") or {}
+    results = {}
+    for i, key in enumerate(prs):
+        node = (data.get(f"pr{i}") or {}).get("pullRequest")
+        if node is None:
+            continue
+        pr_json = graphql_pr_to_pr_json(node)
+        if pr_json is not None:
+            results[key] = pr_json
+    return results
+
+
+def fetch_pr_jsons_via_graphql(
+    prs: Iterable[tuple[str, int]],
+    *,
+    token: str | None = None,
+    api_url: str | None = None,
+    batch_size: int = GRAPHQL_PR_BATCH_SIZE,
+) -> dict[tuple[str, int], dict]:
+    """Fetch the data of many conda-forge PRs with batched GraphQL queries.
+
+    The batches are sent one after the other, as GitHub recommends for the
+    GraphQL API to avoid secondary rate limits.
+
+    Parameters
+    ----------
+    prs : iterable of (str, int)
+        The repository names (e.g., "numpy-feedstock") and numbers of the PRs.
+    token : str, optional
+        The GitHub token. Defaults to the bot token.
+    api_url : str, optional
+        The URL of the GitHub API. Defaults to `git_utils.GITHUB_API_URL`.
+    batch_size : int, optional
+        The number of PRs per query.
+
+    Returns
+    -------
+    dict
+        A mapping from (repository name, number) to the PR data in the
+        `pr_json` schema. PRs that have to be refreshed via REST (because they
+        could not be found, a batch failed or their mergeable state is not
+        known yet) are missing.
+    """
+    if token is None:
+        token = get_bot_token()
+    if api_url is None:
+        api_url = git_utils.GITHUB_API_URL
+
+    prs = sorted(set(prs))
+    results: dict[tuple[str, int], dict] = {}
+    for start in range(0, len(prs), batch_size):
+        batch = prs[start : start + batch_size]
+        try:
+            results.update(_fetch_pr_batch(batch, token, api_url))
+        except Exception as e:
+            logger.warning(
+                "GraphQL query for %d PRs failed - falling back to REST",
+                len(batch),
+                exc_info=e,
+            )
+
+    logger.info(
+        "fetched %d of %d PRs via GraphQL in %d queries",
+        len(results),
+        len(prs),
+        (len(prs) + batch_size - 1) // batch_size,
+    )
+    return results
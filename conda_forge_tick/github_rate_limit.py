@@ -0,0 +1,233 @@
+"""Process-wide tracking of the GitHub API rate limit.
+
+GitHub reports the state of the rate limit in the ``X-RateLimit-*`` headers of
+every API response. Instead of spending a request on the ``/rate_limit`` endpoint
+each time we want to know how many requests are left, we record these headers
+from the responses the bot already receives and keep a local estimate. The
+estimate is only refreshed from the API when it is stale.
+"""
+
+import logging
+import threading
+import time
+from collections.abc import Callable, Mapping
+from dataclasses import dataclass
+
+logger = logging.getLogger(__name__)
+
+RATE_LIMIT_MAX_AGE = 300.0
+"""
+The number of seconds after which the local estimate of the rate limit
+is considered stale and is refreshed from the API.
+"""
+
+DEFAULT_RESOURCE = "core"
+"""
+The rate limit resource used for REST API requests.
+"""
+
+
+@dataclass
+class _RateLimitState:
+    limit: int | None
+    remaining: int
+    reset: float | None
+    last_updated: float
+
+
+class GitHubRateLimitTracker:
+    """A thread-safe local estimate of the GitHub API rate limit.
+
+    The state is updated from the ``X-RateLimit-*`` response headers seen by the
+    bot (see `record_response`). Once the reset time has passed, the estimate
+    is refilled to the full limit, like a token bucket.
+
+    Parameters
+    ----------
+    max_age
+        The number of seconds after which the estimate is considered stale.
+    """
+
+    def __init__(self, max_age: float = RATE_LIMIT_MAX_AGE):
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._states: dict[str, _RateLimitState] = {}
+
+    def update(
+        self,
+        remaining: int,
+        limit: int | None = None,
+        reset: float | None = None,
+        resource: str = DEFAULT_RESOURCE,
+    ) -> None:
+        """Record the current state of the rate limit for a resource.
+
+        Parameters
+        ----------
+        remaining
+            The number of requests left.
+        limit
+            The total number of requests allowed per window, if known.
+        reset
+            The UNIX timestamp at which the limit resets, if known.
+        resource
+            The rate limit resource (e.g., ``core`` or ``graphql``).
+        """
+        with self._lock:
+            self._states[resource] = _RateLimitState(
+                limit=limit,
+                remaining=remaining,
+                reset=reset,
+                last_updated=time.time(),
+            )
+
+    def update_from_headers(self, headers: Mapping[str, str]) -> bool:
+        """Record the state of the rate limit from the headers of an API response.
+
+        Parameters
+        ----------
+        headers
+            The (case-insensitive) response headers.
+
+        Returns
+        -------
+        bool
+            True if the headers contained rate limit information, False otherwise.
+        """
+        remaining = headers.get("X-RateLimit-Remaining")
+        if remaining is None:
+            return False
+
+        try:
+            limit = headers.get("X-RateLimit-Limit")
+            reset = headers.get("X-RateLimit-Reset")
+            self.update(
+                int(remaining),
+                limit=int(limit) if limit is not None else None,
+                reset=float(reset) if reset is not None else None,
+                resource=headers.get("X-RateLimit-Resource", DEFAULT_RESOURCE),
+            )
+        except ValueError:
+            logger.debug("could not parse rate limit headers", exc_info=True)
+            return False
+
+        return True
+
+    def record_response(self, response, *args, **kwargs):
+        """Record the rate limit headers of a `requests` response.
+
+        This has the signature of a `requests` response hook, so it can be
+        registered via ``session.hooks["response"].append(tracker.record_response)``.
+        The response is not modified.
+        """
+        self.update_from_headers(response.headers)
+
+    def is_stale(self, resource: str = DEFAULT_RESOURCE) -> bool:
+        """Check whether the local estimate should be refreshed from the API.
+
+        Parameters
+        ----------
+        resource
+            The rate limit resource.
+
+        Returns
+        -------
+        bool
+            True if there is no estimate or it is older than `max_age`, False otherwise.
+        """
+        with self._lock:
+            state = self._states.get(resource)
+            return state is None or time.time() - state.last_updated > self.max_age
+
+    def estimate(self, resource: str = DEFAULT_RESOURCE) -> int | None:
+        """Get the local estimate of the number of requests left, without any API call.
+
+        Parameters
+        ----------
+        resource
+            The rate limit resource.
+
+        Returns
+        -------
+        int | None
+            The estimated number of requests left or None if nothing is known.
+        """
+        with self._lock:
+            state = self._states.get(resource)
+            if state is None:
+                return None
+            if (
+                state.reset is not None
+                and state.limit is not None
+                and time.time() >= state.reset
+            ):
+                # the window has reset since we last heard from GitHub
+                return state.limit
+            return state.remaining
+
+    def get_requests_left(
+        self,
+        refresh: Callable[[], int | None] | None = None,
+        resource: str = DEFAULT_RESOURCE,
+    ) -> int | None:
+        """Get the number of requests left, refreshing from the API only if stale.
+
+        Parameters
+        ----------
+        refresh
+            A callable that fetches the rate limit from the API. It is expected to
+            record the new state in this tracker and return the number of requests left.
+            Called only if the local estimate is stale.
+        resource
+            The rate limit resource.
+
+        Returns
+        -------
+        int | None
+            The number of requests left or None if it could not be determined.
+        """
+        if refresh is not None and self.is_stale(resource):
+            remaining = refresh()
+            if remaining is not None:
+                return remaining
+        return self.estimate(resource)
+
+    def clear(self) -> None:
+        """Forget everything that is known about the rate limit."""
+        with self._lock:
+            self._states.clear()
+
+
+RATE_LIMIT_TRACKER = GitHubRateLimitTracker()
+"""
+The process-wide rate limit tracker. Use `get_rate_limit_tracker` to access it.
+"""
+
+
+def get_rate_limit_tracker() -> GitHubRateLimitTracker:
+    """Get the process-wide GitHub rate limit tracker."""
+    return RATE_LIMIT_TRACKER
+
+
+def record_pygithub_rate_limit(requester) -> None:
+    """Record the rate limit last seen by a PyGithub requester.
+
+    PyGithub parses the rate limit headers of each response itself and does not
+    expose response hooks, so we read its bookkeeping instead. This does not make
+    any API calls.
+
+    Parameters
+    ----------
+    requester
+        The ``github.Requester.Requester`` of a PyGithub client.
+    """
+    remaining, limit = getattr(requester, "rate_limiting", (-1, -1))
+    if limit < 0 or remaining < 0:
+        # no API response seen yet
+        return
+    current = RATE_LIMIT_TRACKER.estimate()
+    if current is not None and current <= remaining:
+        # within a window the count only goes down, so we already know better
+        return
+    reset = getattr(requester, "rate_limiting_resettime", None)
+    RATE_LIMIT_TRACKER.update(remaining, limit=limit, reset=reset)
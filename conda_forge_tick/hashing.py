@@ -1,76 +1,422 @@
 import functools
 import hashlib
-import math
+import json
+import logging
+import os
+import queue
+import tempfile
+import threading
 import time
-from multiprocessing import Pipe, Process
+from concurrent.futures import Future
+from dataclasses import dataclass
 
 import requests
+import urllib3
 
+from .settings import settings
 
-def _hash_url(url, hash_type, progress=False, conn=None, timeout=None):
-    _hash = None
+logger = logging.getLogger(__name__)
+
+URL_VALIDATOR_HEADERS = ("ETag", "Last-Modified", "Content-Length")
+"""
+The response headers that identify the content of a URL in the hash cache.
+"""
+
+
+CHUNK_SIZE_MIN = 64 * 1024
+"""
+The size of the first chunks read from a download.
+"""
+
+CHUNK_SIZE_MAX = 4 * 1024 * 1024
+"""
+The largest chunks read from a download. The chunk size doubles up to this
+size as long as the chunks arrive quickly.
+"""
+
+# the number of chunks buffered between the download and the hashing
+_CHUNK_QUEUE_SIZE = 4
+
+
+@dataclass
+class URLHashResult:
+    """The digests of a download and how fast it was downloaded and hashed."""
+
+    hashes: dict[str, str]
+    """The hex digests by hash type."""
+
+    num_bytes: int
+    """The size of the download."""
+
+    download_seconds: float
+    """The time spent waiting for the data."""
+
+    hash_seconds: float
+    """The time spent computing the digests."""
+
+    @property
+    def download_throughput(self) -> float:
+        """The download throughput in bytes per second."""
+        return self.num_bytes / self.download_seconds if self.download_seconds else 0.0
+
+    @property
+    def hash_throughput(self) -> float:
+        """The hashing throughput in bytes per second."""
+        return self.num_bytes / self.hash_seconds if self.hash_seconds else 0.0
+
+
+class _Deadline:
+    def __init__(self, timeout):
+        self.end = None if timeout is None else time.monotonic() + timeout
+
+    @property
+    def remaining(self):
+        return None if self.end is None else self.end - time.monotonic()
+
+    @property
+    def passed(self):
+        return self.end is not None and time.monotonic() >= self.end
+
+    def request_timeout(self):
+        # requests applies the timeout to each connect and read call
+        if self.end is None:
+            return 10
+        return max(min(self.remaining, 10), 0.001)
+
+
+# network errors mean that the URL cannot be hashed (right now)
+_DOWNLOAD_ERRORS = (requests.RequestException, urllib3.exceptions.HTTPError, OSError)
+
+
+def _read_chunks(resp, deadline, chunks, stop, stats):
+    """Read a download into the `chunks` queue with growing chunk sizes.
+
+    The queue gets the chunks, then None at the end or the exception that
+    stopped the download.
+    """
+
+    def _put(item):
+        while not stop.is_set():
+            try:
+                chunks.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    chunk_size = CHUNK_SIZE_MIN
     try:
-        ha = getattr(hashlib, hash_type)()
-
-        timedout = False
-        t0 = time.time()
-
-        resp = requests.get(url, stream=True, timeout=timeout or 10)
-
-        if timeout is not None:
-            if time.time() - t0 > timeout:
-                timedout = True
-
-        if resp.status_code == 200 and not timedout:
-            if "Content-length" in resp.headers:
-                num = math.ceil(float(resp.headers["Content-length"]) / 8192)
-            elif resp.url != url:
-                # redirect for download
-                h = requests.head(resp.url).headers
-                if "Content-length" in h:
-                    num = math.ceil(float(h["Content-length"]) / 8192)
-                else:
-                    num = None
-            else:
-                num = None
-
-            loc = 0
-            for itr, chunk in enumerate(resp.iter_content(chunk_size=8192)):
-                ha.update(chunk)
-                if num is not None and int((itr + 1) / num * 25) > loc and progress:
-                    eta = (time.time() - t0) / (itr + 1) * (num - (itr + 1))
-                    loc = int((itr + 1) / num * 25)
-                    print(
-                        "eta {: 7.2f}s: [{}{}]".format(
-                            eta, "".join(["=" * loc]), "".join([" " * (25 - loc)])
-                        ),
+        while not stop.is_set() and not deadline.passed:
+            t0 = time.monotonic()
+            chunk = resp.raw.read(chunk_size, decode_content=True)
+            dt = time.monotonic() - t0
+            stats["download_seconds"] += dt
+            if not chunk:
+                _put(None)
+                return
+            if not _put(chunk):
+                return
+            # use larger (and fewer) reads as long as the data arrives quickly
+            if len(chunk) >= chunk_size and dt < 0.05:
+                chunk_size = min(2 * chunk_size, CHUNK_SIZE_MAX)
+    except BaseException as e:
+        _put(e)
+
+
+def _print_progress(num_bytes, total, t0, loc):
+    new_loc = int(num_bytes / total * 25)
+    if new_loc > loc:
+        eta = (time.monotonic() - t0) / num_bytes * (total - num_bytes)
+        print(
+            "eta {: 7.2f}s: [{}{}]".format(
+                eta, "".join(["=" * new_loc]), "".join([" " * (25 - new_loc)])
+            ),
+        )
+    return max(new_loc, loc)
+
+
+def hash_url_digests(url, hash_types=("sha256",), timeout=None, progress=False):
+    """Download a URL once and compute one or more digests of it.
+
+    The download runs in a separate thread, so that reading from the network
+    and hashing overlap. The timeout is enforced cooperatively by both.
+
+    Parameters
+    ----------
+    url : str
+        The URL to hash.
+    hash_types : sequence of str, optional
+        The kinds of hashes (e.g., "sha256" and "md5"). Each must be an
+        attribute of `hashlib`.
+    timeout : float, optional
+        The timeout in seconds for the whole download. Set to `None` for no
+        timeout.
+    progress : bool, optional
+        If True, show a simple progress meter.
+
+    Returns
+    -------
+    URLHashResult or None
+        The digests, None if the operation timed out or the URL does not exist.
+    """
+    hashers = {hash_type: getattr(hashlib, hash_type)() for hash_type in hash_types}
+    deadline = _Deadline(timeout)
+    if deadline.passed:
+        return None
+
+    t0 = time.monotonic()
+    stats = {"download_seconds": 0.0}
+    hash_seconds = 0.0
+    num_bytes = 0
+    try:
+        resp = requests.get(url, stream=True, timeout=deadline.request_timeout())
+    except _DOWNLOAD_ERRORS as e:
+        logger.debug("could not download %s", url, exc_info=e)
+        return None
+
+    with resp:
+        if resp.status_code != 200 or deadline.passed:
+            return None
+
+        total = None
+        if "Content-length" in resp.headers and not resp.headers.get(
+            "Content-Encoding"
+        ):
+            total = int(resp.headers["Content-length"])
+        loc = 0
+
+        chunks = queue.Queue(maxsize=_CHUNK_QUEUE_SIZE)
+        stop = threading.Event()
+        reader = threading.Thread(
+            target=_read_chunks,
+            args=(resp, deadline, chunks, stop, stats),
+            daemon=True,
+        )
+        reader.start()
+        try:
+            while True:
+                remaining = deadline.remaining
+                try:
+                    chunk = chunks.get(
+                        timeout=None if remaining is None else max(remaining, 0)
                     )
-                if timeout is not None:
-                    if time.time() - t0 > timeout:
-                        timedout = True
-
-            if not timedout:
-                _hash = ha.hexdigest()
-            else:
-                _hash = None
-        else:
-            _hash = None
-    except requests.ConnectionError:
-        _hash = None
+                except queue.Empty:
+                    return None
+                if chunk is None:
+                    break
+                if isinstance(chunk, _DOWNLOAD_ERRORS):
+                    logger.debug("could not download %s", url, exc_info=chunk)
+                    return None
+                if isinstance(chunk, BaseException):
+                    raise chunk
+
+                th = time.monotonic()
+                for ha in hashers.values():
+                    ha.update(chunk)
+                hash_seconds += time.monotonic() - th
+                num_bytes += len(chunk)
+
+                if progress and total:
+                    loc = _print_progress(num_bytes, total, t0, loc)
+                if deadline.passed:
+                    return None
+        finally:
+            stop.set()
+
+    res = URLHashResult(
+        hashes={hash_type: ha.hexdigest() for hash_type, ha in hashers.items()},
+        num_bytes=num_bytes,
+        download_seconds=stats["download_seconds"],
+        hash_seconds=hash_seconds,
+    )
+    logger.debug(
+        "hashed %s: %d bytes, download %.1f MB/s, hashing %.1f MB/s",
+        url,
+        res.num_bytes,
+        res.download_throughput / 1e6,
+        res.hash_throughput / 1e6,
+    )
+    return res
+
+
+def _hash_url(url, hash_type, progress=False, timeout=None):
+    res = hash_url_digests(url, [hash_type], timeout=timeout, progress=progress)
+    return None if res is None else res.hashes[hash_type]
+
+
+class URLHashCache:
+    """A persistent on-disk cache of the hashes of URLs.
+
+    The hashes are keyed by the URL, the hash type and the validators of the
+    content the server reports (see `URL_VALIDATOR_HEADERS`), so a changed
+    file is hashed again. Each entry is a small JSON file. Entries older than
+    `ttl` are ignored and the oldest entries are removed once there are more
+    than `max_entries`. The cache can be shared by several processes of the
+    same user: the directories are created only accessible by the current user
+    and entries owned by other users are ignored.
+
+    Parameters
+    ----------
+    cache_dir : str
+        The directory of the cache.
+    ttl : float
+        The time in seconds after which an entry expires.
+    max_entries : int
+        The maximum number of entries to keep.
+    """
+
+    # the number of stores between removing expired and excess entries
+    prune_every = 100
+
+    def __init__(self, cache_dir, ttl, max_entries):
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._num_stores = 0
+
+    def _path(self, url, hash_type, validators):
+        key = json.dumps([url, hash_type, validators], sort_keys=True)
+        key = hashlib.sha256(key.encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, key[:2], key + ".json")
+
+    def get(self, url, hash_type, validators):
+        """Get a cached hash or None if there is no valid entry."""
+        try:
+            with open(self._path(url, hash_type, validators)) as fp:
+                if os.fstat(fp.fileno()).st_uid != os.getuid():
+                    return None
+                entry = json.load(fp)
+        except (OSError, ValueError):
+            return None
+        if (
+            entry.get("url") != url
+            or entry.get("hash_type") != hash_type
+            or entry.get("validators") != validators
+            or time.time() - entry.get("time", 0) > self.ttl
+        ):
+            return None
+        return entry["hash"]
+
+    def put(self, url, hash_type, validators, _hash):
+        """Store a hash in the cache."""
+        pth = self._path(url, hash_type, validators)
+        entry = {
+            "url": url,
+            "hash_type": hash_type,
+            "validators": validators,
+            "hash": _hash,
+            "time": time.time(),
+        }
+        try:
+            os.makedirs(self.cache_dir, mode=0o700, exist_ok=True)
+            os.makedirs(os.path.dirname(pth), mode=0o700, exist_ok=True)
+            # move a temporary file into place so that concurrent readers
+            # never see partial entries
+            fd, tmp_pth = tempfile.mkstemp(dir=os.path.dirname(pth))
+            with os.fdopen(fd, "w") as fp:
+                json.dump(entry, fp)
+            os.replace(tmp_pth, pth)
+        except OSError as e:
+            logger.debug("could not cache the hash of %s", url, exc_info=e)
+            return
+
+        with self._lock:
+            self._num_stores += 1
+            prune = self._num_stores % self.prune_every == 1
+        if prune:
+            self.prune()
+
+    def prune(self):
+        """Remove expired entries and the oldest entries above `max_entries`."""
+        entries = []
+        now = time.time()
+        try:
+            subdirs = list(os.scandir(self.cache_dir))
+        except OSError:
+            return
+        for subdir in subdirs:
+            if not subdir.is_dir():
+                continue
+            for entry in os.scandir(subdir.path):
+                if not entry.name.endswith(".json"):
+                    continue
+                try:
+                    mtime = entry.stat().st_mtime
+                    if now - mtime > self.ttl:
+                        os.remove(entry.path)
+                    else:
+                        entries.append((mtime, entry.path))
+                except OSError:
+                    pass
+
+        entries.sort()
+        for _, pth in entries[: max(len(entries) - self.max_entries, 0)]:
+            try:
+                os.remove(pth)
+            except OSError:
+                pass
+
+
+@functools.lru_cache(maxsize=8)
+def _get_url_hash_cache(cache_dir, ttl, max_entries):
+    return URLHashCache(cache_dir, ttl, max_entries)
+
+
+def get_url_hash_cache():
+    """Get the URL hash cache configured in the settings.
+
+    Returns
+    -------
+    URLHashCache or None
+        The cache or None if the cache is disabled.
+    """
+    cache_dir = settings().url_hash_cache_dir
+    if not cache_dir:
+        return None
+    return _get_url_hash_cache(
+        cache_dir,
+        settings().url_hash_cache_ttl,
+        settings().url_hash_cache_max_entries,
+    )
+
+
+def _get_url_validators(url, timeout=None):
+    """Get the validators of the content of a URL via a HEAD request.
+
+    Returns None if there are none or the request failed.
+    """
+    try:
+        resp = requests.head(
+            url, allow_redirects=True, timeout=10 if timeout is None else timeout
+        )
     except Exception as e:
-        _hash = (repr(e),)
-    finally:
-        if conn is not None:
-            conn.send(_hash)
-            conn.close()
-        else:
-            return _hash
+        logger.debug("could not get the headers of %s", url, exc_info=e)
+        return None
+    if resp.status_code != 200:
+        return None
+    validators = {
+        k: resp.headers[k] for k in URL_VALIDATOR_HEADERS if k in resp.headers
+    }
+    # the length alone does not identify the content
+    if not any(k in validators for k in ("ETag", "Last-Modified")):
+        return None
+    return validators
+
+
+# the future of the hash and the timeout of the thread computing it
+_HASHES_IN_FLIGHT: dict[tuple[str, str], tuple[Future, float | None]] = {}
+_HASHES_IN_FLIGHT_LOCK = threading.Lock()
 
 
 @functools.lru_cache(maxsize=1024)
 def hash_url(url, timeout=None, progress=False, hash_type="sha256"):
     """Hash a url with a timeout.
 
+    Concurrent calls for the same URL and hash type share one download. Each
+    call waits at most its own timeout and hashes the URL again if the download
+    was given up by a call with a shorter timeout.
+
     Parameters
     ----------
     url : str
@@ -90,37 +436,63 @@ def hash_url(url, timeout=None, progress=False, hash_type="sha256"):
         The hash, possibly None if the operation timed out or the url does
         not exist.
     """  # noqa: DOC501
-    _hash = None
+    # only one thread downloads a URL, the others wait for its result
+    key = (url, hash_type)
+    deadline = None if timeout is None else time.monotonic() + timeout
+    while True:
+        with _HASHES_IN_FLIGHT_LOCK:
+            in_flight = _HASHES_IN_FLIGHT.get(key)
+            if in_flight is None:
+                fut = Future()
+                _HASHES_IN_FLIGHT[key] = (fut, timeout)
+                break
 
-    try:
-        parent_conn, child_conn = Pipe()
-        p = Process(
-            target=_hash_url,
-            args=(url, hash_type),
-            kwargs={"progress": progress, "conn": child_conn},
-        )
-        p.start()
-        if parent_conn.poll(timeout):
-            _hash = parent_conn.recv()
-
-        p.join(timeout=0)
-        if p.exitcode != 0:
-            p.terminate()
-    except AssertionError as e:
-        # if launched in a process we cannot use another process
-        if "daemonic" in repr(e):
-            _hash = _hash_url(
-                url,
-                hash_type,
-                progress=progress,
-                conn=None,
-                timeout=timeout,
+        fut, leader_timeout = in_flight
+        try:
+            _hash = fut.result(
+                timeout=None if deadline is None else deadline - time.monotonic()
             )
-        else:
-            raise e
+        except TimeoutError:
+            return None
+        # a thread with a shorter timeout may have given up too early
+        if _hash is not None or (
+            leader_timeout is None
+            or (timeout is not None and timeout <= leader_timeout)
+        ):
+            return _hash
+        timeout = None if deadline is None else max(deadline - time.monotonic(), 0)
+
+    try:
+        _hash = _hash_url_cached(url, timeout, progress, hash_type)
+    except BaseException as e:
+        _done_hashing(key)
+        fut.set_exception(e)
+        raise
+    _done_hashing(key)
+    fut.set_result(_hash)
+    return _hash
+
+
+def _done_hashing(key):
+    # the entry is removed before the result is set so that waiting threads
+    # that retry do not find the finished future again
+    with _HASHES_IN_FLIGHT_LOCK:
+        del _HASHES_IN_FLIGHT[key]
+
+
+def _hash_url_cached(url, timeout, progress, hash_type):
+    cache = get_url_hash_cache()
+    validators = None
+    if cache is not None:
+        validators = _get_url_validators(url, timeout=timeout)
+    if validators is not None:
+        _hash = cache.get(url, hash_type, validators)
+        if _hash is not None:
+            logger.debug("using cached hash for %s", url)
+            return _hash
 
-    if isinstance(_hash, tuple):
-        # TODO: What is this? (remove noqa from above)
-        raise eval(_hash[0])
+    _hash = _hash_url(url, hash_type, progress=progress, timeout=timeout)
 
+    if validators is not None and isinstance(_hash, str):
+        cache.put(url, hash_type, validators, _hash)
     return _hash
@@ -0,0 +1,399 @@
+"""A shared HTTP client with an on-disk cache for the version sources.
+
+The version sources fetch the same JSON documents, feeds and listings on
+every run. The client in this module keeps a pool of keep-alive connections
+per host, limits the number of concurrent requests per host and caches
+responses that carry an `ETag` or `Last-Modified` header on disk. Cached
+responses are revalidated with a conditional request, so an unchanged
+resource costs a `304 Not Modified` instead of a full download. The cache
+directory is created only accessible by the current user and entries owned
+by other users are ignored.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+import urllib.parse
+from dataclasses import asdict, dataclass
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+from .github_rate_limit import get_rate_limit_tracker
+from .settings import settings
+
+logger = logging.getLogger(__name__)
+
+CACHED_HEADERS = ("Content-Type", "ETag", "Last-Modified")
+"""
+The response headers stored in the cache along with the body.
+"""
+
+MISSING_STATUS_CODES = (404, 410)
+"""
+The status codes for which `CachingHTTPClient.url_exists` remembers a URL as missing.
+"""
+
+
+@dataclass
+class HTTPCacheStats:
+    """Statistics of the requests made by a `CachingHTTPClient`."""
+
+    num_requests: int = 0
+    """The number of requests made."""
+
+    num_hits: int = 0
+    """The number of requests answered from the cache after revalidation."""
+
+    num_misses: int = 0
+    """The number of requests that downloaded the resource."""
+
+    num_stored: int = 0
+    """The number of responses written to the cache."""
+
+    num_probes: int = 0
+    """The number of URL existence probes sent."""
+
+    num_negative_hits: int = 0
+    """The number of URL existence probes answered from the negative cache."""
+
+    @property
+    def hit_rate(self) -> float:
+        """The fraction of requests answered from the cache."""
+        return self.num_hits / self.num_requests if self.num_requests else 0.0
+
+    def to_json_data(self) -> dict:
+        return {**asdict(self), "hit_rate": self.hit_rate}
+
+
+def _record_github_rate_limit(response: requests.Response, *args, **kwargs):
+    # other hosts may send headers with the same names for their own limits
+    if urllib.parse.urlsplit(response.url).hostname == "api.github.com":
+        get_rate_limit_tracker().record_response(response)
+
+
+class CachingHTTPClient:
+    """An HTTP client with per-host connection pools and an on-disk cache.
+
+    The client is thread-safe.
+
+    Parameters
+    ----------
+    cache_dir
+        The directory of the on-disk cache. If None, nothing is cached.
+    max_connections_per_host
+        The maximum number of concurrent requests (and open connections) per host.
+    negative_cache_ttl
+        The time in seconds for which URLs found to be missing by `url_exists`
+        are remembered.
+    cache_ttl
+        The time in seconds after which a cached response expires.
+    cache_max_entries
+        The maximum number of responses to keep in the on-disk cache.
+    """
+
+    # the number of stores between removing expired and excess cache entries
+    prune_every = 100
+
+    def __init__(
+        self,
+        cache_dir: str | None = None,
+        max_connections_per_host: int = 8,
+        negative_cache_ttl: float = 300.0,
+        cache_ttl: float = 7 * 24 * 3600.0,
+        cache_max_entries: int = 10_000,
+    ):
+        self.cache_dir = cache_dir
+        self.max_connections_per_host = max_connections_per_host
+        self.negative_cache_ttl = negative_cache_ttl
+        self.cache_ttl = cache_ttl
+        self.cache_max_entries = cache_max_entries
+        self.stats = HTTPCacheStats()
+
+        self._lock = threading.Lock()
+        self._host_semaphores: dict[str, threading.BoundedSemaphore] = {}
+        # ordered by expiry since all entries have the same time to live
+        self._missing_urls: dict[str, float] = {}
+        self._num_stores = 0
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            # the number of hosts to keep a connection pool for
+            pool_connections=64,
+            pool_maxsize=max_connections_per_host,
+        )
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.hooks["response"].append(_record_github_rate_limit)
+
+    def _host_semaphore(self, url: str) -> threading.BoundedSemaphore:
+        host = urllib.parse.urlsplit(url).netloc
+        with self._lock:
+            if host not in self._host_semaphores:
+                self._host_semaphores[host] = threading.BoundedSemaphore(
+                    self.max_connections_per_host
+                )
+            return self._host_semaphores[host]
+
+    def _cache_paths(self, url: str) -> tuple[str, str]:
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        base = os.path.join(self.cache_dir, key[:2], key)
+        return base + ".json", base + ".body"
+
+    def _load(self, url: str) -> tuple[dict, bytes] | None:
+        if self.cache_dir is None:
+            return None
+        meta_pth, body_pth = self._cache_paths(url)
+        try:
+            with open(meta_pth) as fp:
+                st = os.fstat(fp.fileno())
+                if (
+                    st.st_uid != os.getuid()
+                    or time.time() - st.st_mtime > self.cache_ttl
+                ):
+                    return None
+                meta = json.load(fp)
+            with open(body_pth, "rb") as fp:
+                if os.fstat(fp.fileno()).st_uid != os.getuid():
+                    return None
+                body = fp.read()
+        except (OSError, ValueError):
+            return None
+        if meta.get("url") != url:
+            return None
+        return meta, body
+
+    def _store(self, url: str, r: requests.Response) -> None:
+        if self.cache_dir is None:
+            return
+        meta = {
+            "url": url,
+            "final_url": r.url,
+            "encoding": r.encoding,
+            "headers": {k: r.headers[k] for k in CACHED_HEADERS if k in r.headers},
+        }
+        meta_pth, body_pth = self._cache_paths(url)
+        os.makedirs(self.cache_dir, mode=0o700, exist_ok=True)
+        os.makedirs(os.path.dirname(meta_pth), mode=0o700, exist_ok=True)
+        # write to temporary files and move them into place so that concurrent
+        # readers never see partial files, the body goes first since the
+        # metadata decides whether an entry is used
+        for pth, data in [(body_pth, r.content), (meta_pth, json.dumps(meta).encode())]:
+            fd, tmp_pth = tempfile.mkstemp(dir=os.path.dirname(pth))
+            with os.fdopen(fd, "wb") as fp:
+                fp.write(data)
+            os.replace(tmp_pth, pth)
+        with self._lock:
+            self.stats.num_stored += 1
+            self._num_stores += 1
+            prune = self._num_stores % self.prune_every == 1
+        if prune:
+            self.prune()
+
+    def prune(self) -> None:
+        """Remove expired cache entries and the oldest ones above `cache_max_entries`."""
+        if self.cache_dir is None:
+            return
+        entries = []
+        now = time.time()
+        try:
+            subdirs = list(os.scandir(self.cache_dir))
+        except OSError:
+            return
+        for subdir in subdirs:
+            if not subdir.is_dir():
+                continue
+            for entry in os.scandir(subdir.path):
+                if not entry.name.endswith(".json"):
+                    continue
+                try:
+                    mtime = entry.stat().st_mtime
+                except OSError:
+                    continue
+                if now - mtime > self.cache_ttl:
+                    self._remove_entry(entry.path)
+                else:
+                    entries.append((mtime, entry.path))
+
+        entries.sort()
+        for _, pth in entries[: max(len(entries) - self.cache_max_entries, 0)]:
+            self._remove_entry(pth)
+
+    @staticmethod
+    def _remove_entry(meta_pth: str) -> None:
+        # the metadata goes first since it decides whether an entry is used
+        for pth in [meta_pth, meta_pth[: -len(".json")] + ".body"]:
+            try:
+                os.remove(pth)
+            except OSError:
+                pass
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        """Make a GET request, using the cache if possible.
+
+        Parameters
+        ----------
+        url
+            The URL to get.
+        **kwargs
+            Passed on to `requests.Session.get`.
+
+        Returns
+        -------
+        requests.Response
+            The response. If the cached response is still valid, it is returned
+            with status code 200.
+        """
+        cached = self._load(url)
+        headers = dict(kwargs.pop("headers", None) or {})
+        if cached is not None:
+            cached_headers = cached[0]["headers"]
+            if "ETag" in cached_headers:
+                headers["If-None-Match"] = cached_headers["ETag"]
+            if "Last-Modified" in cached_headers:
+                headers["If-Modified-Since"] = cached_headers["Last-Modified"]
+
+        with self._host_semaphore(url):
+            r = self.session.get(url, headers=headers, **kwargs)
+
+        with self._lock:
+            self.stats.num_requests += 1
+            if cached is not None and r.status_code == 304:
+                self.stats.num_hits += 1
+            else:
+                self.stats.num_misses += 1
+
+        if cached is not None and r.status_code == 304:
+            meta, body = cached
+            # keep entries that are still in use from expiring
+            try:
+                os.utime(self._cache_paths(url)[0])
+            except OSError:
+                pass
+            response = requests.Response()
+            response.status_code = 200
+            response._content = body
+            response.headers = CaseInsensitiveDict(meta["headers"])
+            response.encoding = meta["encoding"]
+            response.url = r.url or meta["final_url"]
+            response.request = r.request
+            return response
+
+        if r.status_code == 200 and any(
+            k in r.headers for k in ("ETag", "Last-Modified")
+        ):
+            try:
+                self._store(url, r)
+            except OSError:
+                logger.debug("could not cache the response for %s", url, exc_info=True)
+
+        return r
+
+    def _probe(self, url: str, timeout: float) -> int | None:
+        """Probe a URL, returning the status code or None if that failed."""
+        try:
+            with self._host_semaphore(url):
+                r = self.session.head(url, allow_redirects=True, timeout=timeout)
+                if r.ok or r.status_code in MISSING_STATUS_CODES + (429,):
+                    return r.status_code
+                # some servers do not support (or forbid) HEAD requests
+                with self.session.get(
+                    url,
+                    headers={"Range": "bytes=0-0"},
+                    allow_redirects=True,
+                    stream=True,
+                    timeout=timeout,
+                ) as r:
+                    return r.status_code
+        except requests.RequestException as e:
+            logger.debug("could not probe %s", url, exc_info=e)
+            return None
+
+    def url_exists(self, url: str, timeout: float = 5, on_error: bool = False) -> bool:
+        """Check whether an HTTP(S) URL exists without downloading it.
+
+        A HEAD request is sent, falling back to a GET request for the first byte
+        if the server does not answer HEAD requests. Redirects are followed, so
+        URLs redirecting to a missing file do not exist. URLs answered with
+        `404 Not Found` or `410 Gone` are remembered as missing for
+        `negative_cache_ttl` seconds. Rate limits (429) and server errors (5xx)
+        count as errors.
+
+        Parameters
+        ----------
+        url
+            The URL to check.
+        timeout
+            The timeout of each request in seconds.
+        on_error
+            The value returned if the URL could not be checked (e.g., on a timeout).
+
+        Returns
+        -------
+        bool
+            True if the URL exists, False if it does not and `on_error` if that is
+            not known.
+        """
+        with self._lock:
+            expiry = self._missing_urls.get(url)
+            if expiry is not None and expiry > time.monotonic():
+                self.stats.num_negative_hits += 1
+                return False
+            self.stats.num_probes += 1
+
+        status_code = self._probe(url, timeout)
+        if status_code is None or status_code == 429 or status_code >= 500:
+            # errors are not cached since the URL might exist
+            return on_error
+
+        if status_code in MISSING_STATUS_CODES:
+            with self._lock:
+                now = time.monotonic()
+                # move the URL to the end to keep the entries ordered by expiry
+                self._missing_urls.pop(url, None)
+                self._missing_urls[url] = now + self.negative_cache_ttl
+                # drop expired entries so that the process-wide client does not
+                # grow with every missing URL
+                while self._missing_urls:
+                    oldest_url = next(iter(self._missing_urls))
+                    if self._missing_urls[oldest_url] > now:
+                        break
+                    del self._missing_urls[oldest_url]
+        return 200 <= status_code < 400
+
+
+_HTTP_CLIENT: CachingHTTPClient | None = None
+_HTTP_CLIENT_LOCK = threading.Lock()
+
+
+def get_http_client() -> CachingHTTPClient:
+    """Get the process-wide HTTP client of the version sources.
+
+    The cache directory and limits, the per-host connection limit and the time
+    for which missing URLs are remembered are taken from the settings. The
+    on-disk cache is disabled unless a cache directory is set.
+
+    Returns
+    -------
+    CachingHTTPClient
+        The shared client.
+    """
+    global _HTTP_CLIENT
+
+    with _HTTP_CLIENT_LOCK:
+        if _HTTP_CLIENT is None:
+            _HTTP_CLIENT = CachingHTTPClient(
+                cache_dir=settings().version_sources_http_cache_dir or None,
+                max_connections_per_host=(
+                    settings().version_sources_max_connections_per_host
+                ),
+                negative_cache_ttl=settings().version_sources_url_negative_cache_ttl,
+                cache_ttl=settings().version_sources_http_cache_ttl,
+                cache_max_entries=settings().version_sources_http_cache_max_entries,
+            )
+        return _HTTP_CLIENT
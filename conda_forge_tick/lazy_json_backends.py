@@ -1144,6 +1144,23 @@ class LazyJson(MutableMapping):
             self._data = None
             self._data_hash_at_load = None
 
+    def evict(self) -> bool:
+        """Evict the loaded data from memory if it is not in use.
+
+        The data is only evicted outside of a context, since all changes are
+        written when the context is exited. It is loaded again on the next access.
+
+        Returns
+        -------
+        bool
+            True if data was evicted, False otherwise.
+        """
+        if self._in_context or self._no_sync or self._data is None:
+            return False
+        self._data = None
+        self._data_hash_at_load = None
+        return True
+
     def __getitem__(self, item: Any) -> Any:
         self._load()
         assert self._data is not None
@@ -1149,6 +1149,98 @@ def _load_migrators(
     return migrators
 
 
+def _load_migrator_kind(name: str) -> tuple[str | None, bool]:
+    import conda_forge_tick.migrators
+
+    # we only read here, so we do not enter the LazyJson context
+    data = LazyJson(f"migrators/{name}.json").data
+    kwargs = data.get("kwargs", {}) or {}
+    paused = kwargs.get("paused", False)
+
+    cls = getattr(conda_forge_tick.migrators, data["class"])
+    if issubclass(cls, Version):
+        kind = None
+    elif issubclass(cls, (MigrationYamlCreator, MigrationYaml)):
+        kind = "longterm" if kwargs.get("longterm", False) else "pinning"
+    else:
+        kind = "other"
+    return kind, paused
+
+
+def load_migrator_names(
+    skip_paused: bool = True, filter_name: list[str] | None = None
+) -> list[str]:
+    """Get the names of the current migrators in the order they should be run.
+
+    This is the lazy counterpart of `load_migrators`. Only the migrator metadata
+    is read, so no migrator (and none of its graphs) is kept in memory. Use
+    `load_migrator` to build each migrator when it is needed. The version migrator
+    is not stored in the ``migrators`` hashmap and is not included.
+
+    Parameters
+    ----------
+    skip_paused : bool, optional
+        Whether to skip paused migrators, defaults to True.
+    filter_name : list of str, optional
+        Filter migrators by name (case-insensitive), see `load_migrators`.
+
+    Returns
+    -------
+    names : list of str
+        The migrator names in the same (randomized) order as `load_migrators`.
+    """
+    all_names = get_all_keys_for_hashmap("migrators")
+    if filter_name:
+        filter_lowers = [f.lower() for f in filter_name]
+        all_names = [
+            n
+            for n in all_names
+            if any(filter_lower in n.lower() for filter_lower in filter_lowers)
+        ]
+
+    names_by_kind: dict[str, list[str]] = {
+        "other": [],
+        "pinning": [],
+        "longterm": [],
+    }
+    for name in sorted(all_names):
+        kind, paused = _load_migrator_kind(name)
+        if kind is None or (paused and skip_paused):
+            continue
+        names_by_kind[kind].append(name)
+
+    RNG.shuffle(names_by_kind["pinning"])
+    RNG.shuffle(names_by_kind["longterm"])
+    return names_by_kind["other"] + names_by_kind["pinning"] + names_by_kind["longterm"]
+
+
+def load_migrator(name: str) -> Migrator:
+    """Load a single migrator by its name in the ``migrators`` hashmap.
+
+    Parameters
+    ----------
+    name : str
+        The name of the migrator, see `load_migrator_names`.
+
+    Returns
+    -------
+    migrator : Migrator
+        The migrator.
+    """
+    return _load(name)
+
+
+def make_version_migrator() -> Version:
+    """Make the version migrator from the current graph.
+
+    Returns
+    -------
+    migrator : Version
+        The version migrator.
+    """
+    return _make_version_migrator(load_existing_graph())
+
+
 def dump_migrators(migrators: MutableSequence[Migrator], dry_run: bool = False) -> None:
     """Dump the current migrators to JSON.
 
@@ -0,0 +1,217 @@
+"""Tracking of the memory usage of long-running bot jobs.
+
+The auto-tick job processes many migrators, each of which comes with its own
+copies of parts of the graph. The `MemoryUsageTracker` records the resident set
+size (RSS) of the process for each phase of such a job and can write the records
+to a JSON report. It also implements a soft memory budget: when the RSS goes
+over the budget, registered eviction callbacks are called to release cached data
+before the hard limit (see ``MEMORY_LIMIT_GB`` in ``auto_tick``) is hit.
+"""
+
+import contextlib
+import gc
+import json
+import logging
+import time
+from collections.abc import Callable, Iterator
+from dataclasses import asdict, dataclass
+
+import networkx as nx
+import psutil
+
+from conda_forge_tick.lazy_json_backends import LazyJson
+
+logger = logging.getLogger(__name__)
+
+
+def get_rss_bytes() -> int:
+    """Get the current resident set size of this process in bytes."""
+    return psutil.Process().memory_info().rss
+
+
+@dataclass
+class MemoryPhaseRecord:
+    """The memory usage of a single phase of a job."""
+
+    name: str
+    """
+    The name of the phase.
+    """
+    rss_start: int
+    """
+    The RSS in bytes at the start of the phase.
+    """
+    rss_end: int | None = None
+    """
+    The RSS in bytes at the end of the phase.
+    """
+    rss_peak: int = 0
+    """
+    The highest RSS in bytes observed during the phase.
+    """
+    duration: float | None = None
+    """
+    The duration of the phase in seconds.
+    """
+    num_evictions: int = 0
+    """
+    The number of times cached data was evicted during the phase.
+    """
+
+
+class MemoryUsageTracker:
+    """Record the memory usage per phase and enforce a soft memory budget.
+
+    Parameters
+    ----------
+    soft_limit_bytes
+        If set, `maybe_evict` releases cached data when the RSS is above this
+        number of bytes.
+    get_rss
+        The function used to measure the memory usage. Defaults to `get_rss_bytes`.
+    """
+
+    def __init__(
+        self,
+        soft_limit_bytes: int | None = None,
+        get_rss: Callable[[], int] = get_rss_bytes,
+    ):
+        self.soft_limit_bytes = soft_limit_bytes
+        self.get_rss = get_rss
+        self.records: list[MemoryPhaseRecord] = []
+        self._current: MemoryPhaseRecord | None = None
+        self._evictors: list[Callable[[], int]] = []
+
+    def register_evictor(self, evictor: Callable[[], int]) -> None:
+        """Register a callable that releases cached data.
+
+        Parameters
+        ----------
+        evictor
+            A callable without arguments that returns the number of evicted items.
+        """
+        self._evictors.append(evictor)
+
+    def sample(self) -> int:
+        """Measure the RSS and update the peak of the current phase.
+
+        Returns
+        -------
+        int
+            The RSS in bytes.
+        """
+        rss = self.get_rss()
+        if self._current is not None:
+            self._current.rss_peak = max(self._current.rss_peak, rss)
+        return rss
+
+    @contextlib.contextmanager
+    def phase(self, name: str) -> Iterator[MemoryPhaseRecord]:
+        """Record the memory usage of a phase.
+
+        Phases can be nested. The outer phase then includes the inner one.
+
+        Parameters
+        ----------
+        name
+            The name of the phase.
+
+        Yields
+        ------
+        MemoryPhaseRecord
+            The record of the phase.
+        """
+        rss = self.get_rss()
+        record = MemoryPhaseRecord(name=name, rss_start=rss, rss_peak=rss)
+        self.records.append(record)
+        outer = self._current
+        self._current = record
+        t0 = time.time()
+        try:
+            yield record
+        finally:
+            record.rss_end = self.sample()
+            record.duration = time.time() - t0
+            self._current = outer
+            if outer is not None:
+                outer.rss_peak = max(outer.rss_peak, record.rss_peak)
+                outer.num_evictions += record.num_evictions
+            logger.info(
+                "memory usage for %s: start %d MB, end %d MB, peak %d MB",
+                name,
+                record.rss_start // 1024**2,
+                record.rss_end // 1024**2,
+                record.rss_peak // 1024**2,
+            )
+
+    def is_over_budget(self) -> bool:
+        """Check whether the RSS is above the soft limit."""
+        return (
+            self.soft_limit_bytes is not None and self.sample() > self.soft_limit_bytes
+        )
+
+    def maybe_evict(self) -> bool:
+        """Release cached data if the RSS is above the soft limit.
+
+        Returns
+        -------
+        bool
+            True if cached data was evicted, False otherwise.
+        """
+        if not self.is_over_budget():
+            return False
+
+        num = sum(evictor() for evictor in self._evictors)
+        gc.collect()
+        if self._current is not None:
+            self._current.num_evictions += 1
+        logger.info(
+            "memory usage above soft limit of %d MB: evicted %d cached items, "
+            "now at %d MB",
+            self.soft_limit_bytes // 1024**2,  # type: ignore[operator]
+            num,
+            self.sample() // 1024**2,
+        )
+        return True
+
+    def to_json_data(self) -> dict:
+        """Get the report of all phases as JSON-compatible data."""
+        return {
+            "soft_limit_bytes": self.soft_limit_bytes,
+            "peak_rss": max((r.rss_peak for r in self.records), default=None),
+            "phases": [asdict(r) for r in self.records],
+        }
+
+    def dump_report(self, path: str) -> None:
+        """Write the report of all phases to a JSON file.
+
+        Parameters
+        ----------
+        path
+            The path of the JSON file.
+        """
+        with open(path, "w") as f:
+            json.dump(self.to_json_data(), f, indent=2)
+
+
+def evict_graph_payloads(gx: nx.DiGraph) -> int:
+    """Evict the loaded node payloads of a graph from memory.
+
+    Payloads that are currently in use are left alone. Evicted payloads are
+    loaded again from the backends the next time they are accessed.
+
+    Parameters
+    ----------
+    gx
+        The graph.
+
+    Returns
+    -------
+    int
+        The number of evicted payloads.
+    """
+    num = 0
+    for _, payload in gx.nodes(data="payload"):
+        if isinstance(payload, LazyJson) and payload.evict():
+            num += 1
+    return num
@@ -380,6 +380,7 @@ class RebuildBroken(Migrator):
         self,
         graph: nx.DiGraph,
         total_graph: nx.DiGraph,
+        attempt_index=None,
     ):
         return sorted(list(graph.nodes), key=lambda x: RNG.random())
 
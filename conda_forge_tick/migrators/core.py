@@ -30,6 +30,7 @@ from conda_forge_tick.utils import (
 from ..migrators_types import AttrsTypedDict, MigrationUidTypedDict, PackageName
 
 if typing.TYPE_CHECKING:
+    from conda_forge_tick.pr_attempt_index import PRAttemptIndex
     from conda_forge_tick.utils import JsonFriendly
 
 MIGRATION_SUPPORT_DIRS = [
@@ -708,6 +709,7 @@ class Migrator:
         self,
         graph: nx.DiGraph,
         total_graph: nx.DiGraph,
+        attempt_index: "PRAttemptIndex | None" = None,
     ) -> Sequence["PackageName"]:
         """Determine migration order.
 
@@ -720,6 +722,9 @@ class Migrator:
             - a random number in [0, val] if it is not yet time to be retried
 
         Ties are sorted randomly.
+
+        If an `attempt_index` is given, the attempts are looked up there instead
+        of in the node payloads.
         """
         migrator_name = self.report_name
 
@@ -728,7 +733,11 @@ class Migrator:
         base = 2 / 24.0  # 2 hours in days
 
         @functools.lru_cache(maxsize=1024)
-        def _get_last_attempt_ts_and_try(node):
+        def _get_attempts_and_ts(node):
+            if attempt_index is not None:
+                record = attempt_index.get(migrator_name, node)
+                return record.attempts, record.last_attempt_ts
+
             with total_graph.nodes[node]["payload"] as attrs:
                 with attrs.get(
                     "pr_info", contextlib.nullcontext(enter_result={})
@@ -740,20 +749,24 @@ class Migrator:
                         migrator_name,
                         0,
                     )
+                    ts = pri.get(
+                        "pre_pr_migrator_attempt_ts",
+                        {},
+                    ).get(
+                        migrator_name,
+                        None,
+                    )
 
-                    if attempts > 0:
-                        ts = pri.get(
-                            "pre_pr_migrator_attempt_ts",
-                            {},
-                        ).get(
-                            migrator_name,
-                            None,
-                        )
-                        if ts is None:
-                            # one hour per attempt
-                            ts = now - (3600 * attempts)
-                    else:
-                        ts = -math.inf
+            return attempts, ts
+
+        def _get_last_attempt_ts_and_try(node):
+            attempts, ts = _get_attempts_and_ts(node)
+            if attempts > 0:
+                if ts is None:
+                    # one hour per attempt
+                    ts = now - (3600 * attempts)
+            else:
+                ts = -math.inf
 
             return (ts * seconds_to_days, attempts)
 
@@ -794,6 +794,7 @@ class MigrationYamlCreator(Migrator):
         self,
         graph: nx.DiGraph,
         total_graph: nx.DiGraph,
+        attempt_index=None,
     ) -> Sequence["PackageName"]:
         """Run the order by number of decedents, ties are resolved by package name."""
         return sorted(
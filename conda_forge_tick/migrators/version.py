@@ -9,7 +9,7 @@ import time
 import warnings
 from collections.abc import Sequence
 from pathlib import Path
-from typing import Any, Literal
+from typing import TYPE_CHECKING, Any, Literal
 
 import conda.exceptions
 import networkx as nx
@@ -33,6 +33,9 @@ from conda_forge_tick.utils import (
 )
 from conda_forge_tick.version_filters import is_version_ignored
 
+if TYPE_CHECKING:
+    from conda_forge_tick.pr_attempt_index import PRAttemptIndex
+
 SKIP_DEPS_NODES = [
     "ansible",
 ]
@@ -517,6 +520,7 @@ class Version(Migrator):
         self,
         graph: nx.DiGraph,
         total_graph: nx.DiGraph,
+        attempt_index: "PRAttemptIndex | None" = None,
     ) -> Sequence["PackageName"]:
         """Determine version migration order.
 
@@ -529,13 +533,20 @@ class Version(Migrator):
               time-based threshold for the next retry
 
         Ties are sorted randomly.
+
+        If an `attempt_index` is given, the attempts are looked up there instead
+        of in the node payloads.
         """
         seconds_to_days = 1.0 / (60.0 * 60.0 * 24.0)
         now = int(time.time()) * seconds_to_days
         base = 2 / 24.0  # 2 hours in days
 
         @functools.lru_cache(maxsize=1024)
-        def _get_last_attempt_ts_and_try(node):
+        def _get_attempts_and_ts(node):
+            if attempt_index is not None:
+                record = attempt_index.get(self.report_name, node, is_version=True)
+                return record.attempts, record.last_attempt_ts
+
             with total_graph.nodes[node]["payload"] as attrs:
                 with attrs.get(
                     "version_pr_info", contextlib.nullcontext(enter_result={})
@@ -549,20 +560,24 @@ class Version(Migrator):
                         new_version,
                         0,
                     )
+                    ts = vpri.get(
+                        "new_version_attempt_ts",
+                        {},
+                    ).get(
+                        new_version,
+                        None,
+                    )
+
+            return attempts, ts
 
-                    if attempts > 0:
-                        ts = vpri.get(
-                            "new_version_attempt_ts",
-                            {},
-                        ).get(
-                            new_version,
-                            None,
-                        )
-                        if ts is None:
-                            # one hour per attempt
-                            ts = now - (3600 * attempts)
-                    else:
-                        ts = -math.inf
+        def _get_last_attempt_ts_and_try(node):
+            attempts, ts = _get_attempts_and_ts(node)
+            if attempts > 0:
+                if ts is None:
+                    # one hour per attempt
+                    ts = now - (3600 * attempts)
+            else:
+                ts = -math.inf
 
             return (ts * seconds_to_days, attempts)
 
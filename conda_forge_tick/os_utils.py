@@ -2,8 +2,14 @@ import contextlib
 import copy
 import logging
 import os
+import re
+import shutil
 import subprocess
 import tempfile
+import threading
+from collections.abc import Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
 
 logger = logging.getLogger(__name__)
 
@@ -104,3 +110,151 @@ def clean_disk_space(ci_service: str = "github-actions") -> None:
                 raise ValueError(f"Unknown CI service: {ci_service}")
 
             subprocess.run(["bash", "clean_disk.sh"])
+
+
+def _dir_size(path: str) -> int:
+    total = 0
+    try:
+        with os.scandir(path) as it:
+            for entry in it:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        total += _dir_size(entry.path)
+                    else:
+                        total += entry.stat(follow_symlinks=False).st_size
+                except OSError:
+                    pass
+    except OSError:
+        pass
+    return total
+
+
+def _log_rmtree_error(func, path, exc):
+    logger.debug("could not remove %s", path, exc_info=exc)
+
+
+class TempWorkspaceManager:
+    """Manage per-feedstock temporary directories under a single run-specific root.
+
+    Everything a feedstock run writes to the temporary directory (including
+    subprocesses, which inherit ``TMPDIR``) ends up in its workspace, so it can be
+    reclaimed in-process with `shutil.rmtree` without scanning or touching the
+    temporary files of other processes.
+
+    Parameters
+    ----------
+    root
+        The directory under which the run root is created. Defaults to the
+        system temporary directory.
+    max_bytes
+        If set, workspaces are removed synchronously whenever the run root uses
+        more than this many bytes, instead of being left to the background thread.
+    background
+        If True, workspaces are removed in a background thread.
+    """
+
+    def __init__(
+        self,
+        root: str | None = None,
+        max_bytes: int | None = None,
+        background: bool = False,
+    ):
+        self.root = Path(tempfile.mkdtemp(prefix="cf-tick-run-", dir=root))
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._counter = 0
+        self._pool = ThreadPoolExecutor(max_workers=1) if background else None
+        self._pending: list[Future] = []
+
+    def disk_usage(self) -> int:
+        """Get the number of bytes used by all workspaces (including those still being removed)."""
+        return _dir_size(str(self.root))
+
+    def _make_workspace_dir(self, name: str) -> Path:
+        safe_name = re.sub(r"[^\w.-]", "_", name)
+        with self._lock:
+            self._counter += 1
+            counter = self._counter
+        pth = self.root / f"{safe_name}-{counter}"
+        pth.mkdir()
+        return pth
+
+    def reclaim(self, path: Path) -> None:
+        """Remove a workspace directory.
+
+        The directory is first renamed so that its name can be reused immediately.
+        If a background thread is used and the disk usage is within the limit, the
+        removal happens in the background.
+        """
+        trash = path.with_name(path.name + ".trash")
+        try:
+            os.rename(path, trash)
+        except OSError:
+            trash = path
+
+        if self._pool is not None and (
+            self.max_bytes is None or self.disk_usage() <= self.max_bytes
+        ):
+            with self._lock:
+                self._pending = [f for f in self._pending if not f.done()]
+                self._pending.append(
+                    self._pool.submit(shutil.rmtree, trash, onexc=_log_rmtree_error)
+                )
+        else:
+            shutil.rmtree(trash, onexc=_log_rmtree_error)
+
+    @contextlib.contextmanager
+    def workspace(self, name: str, set_tempdir: bool = False) -> Iterator[Path]:
+        """Create a workspace directory that is removed on exit.
+
+        Parameters
+        ----------
+        name
+            The name of the workspace, e.g. the feedstock name.
+        set_tempdir
+            If True, `tempfile` and subprocesses (via ``TMPDIR``) use the workspace
+            as their temporary directory within the context. This changes process-wide
+            state, so only one workspace per process may use it at a time.
+
+        Yields
+        ------
+        Path
+            The workspace directory.
+        """
+        pth = self._make_workspace_dir(name)
+        old_tempdir = tempfile.tempdir
+        old_env = os.environ.get("TMPDIR")
+        try:
+            if set_tempdir:
+                tempfile.tempdir = str(pth)
+                os.environ["TMPDIR"] = str(pth)
+            yield pth
+        finally:
+            if set_tempdir:
+                tempfile.tempdir = old_tempdir
+                if old_env is None:
+                    os.environ.pop("TMPDIR", None)
+                else:
+                    os.environ["TMPDIR"] = old_env
+            self.reclaim(pth)
+
+    def wait(self) -> None:
+        """Wait for all background removals to finish."""
+        with self._lock:
+            pending = list(self._pending)
+            self._pending = []
+        for f in pending:
+            f.result()
+
+    def close(self) -> None:
+        """Wait for background removals and remove the run root."""
+        self.wait()
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+        shutil.rmtree(self.root, onexc=_log_rmtree_error)
+
+    def __enter__(self) -> "TempWorkspaceManager":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
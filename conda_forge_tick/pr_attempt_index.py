@@ -0,0 +1,166 @@
+"""An in-memory index of the bot's PR attempts per migrator and node.
+
+Looking up the number of attempts for a migrator on a node otherwise requires
+opening the node's payload and its ``pr_info`` or ``version_pr_info`` LazyJson.
+Doing this for every node of every migrator at the start of a run results in
+tens of thousands of file parses. The index is built with a single pass over
+the ``pr_info`` and ``version_pr_info`` hashmaps instead.
+"""
+
+import logging
+from collections.abc import Iterable
+from dataclasses import dataclass
+
+from conda_forge_tick.lazy_json_backends import LazyJson, get_all_keys_for_hashmap
+from conda_forge_tick.utils import get_migrator_report_name_from_pr_data
+
+logger = logging.getLogger(__name__)
+
+VERSION_MIGRATOR_NAME = "version"
+"""
+The report name of the version migrator. Version attempts are tracked per new version
+in ``version_pr_info`` and are indexed under this name.
+"""
+
+
+@dataclass(frozen=True)
+class PRAttemptRecord:
+    """The state of a migrator on a single node."""
+
+    attempts: float = 0
+    """
+    The number of pre-PR attempts (for version migrations, for the current new version).
+    """
+    last_attempt_ts: float | None = None
+    """
+    The UNIX timestamp of the last attempt, if recorded.
+    """
+    has_pr: bool = False
+    """
+    Whether a PR (or a spoofed closed PR) is recorded for the migrator.
+    """
+
+
+_EMPTY_RECORD = PRAttemptRecord()
+
+
+class PRAttemptIndex:
+    """Map ``(migrator report name, node)`` to the PR attempt state.
+
+    Note that the index is a snapshot. It stays valid for a migrator during an
+    auto-tick run because a migrator only changes its own entries, and each
+    migrator runs once per run.
+    """
+
+    def __init__(self):
+        self._records: dict[tuple[str, str], PRAttemptRecord] = {}
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def get(
+        self, migrator_name: str, node: str, *, is_version: bool = False
+    ) -> PRAttemptRecord:
+        """Get the attempt state of a migrator for a node.
+
+        Parameters
+        ----------
+        migrator_name
+            The report name of the migrator.
+        node
+            The name of the node in the graph.
+        is_version
+            Whether the migrator is the version migrator.
+
+        Returns
+        -------
+        PRAttemptRecord
+            The attempt state. Nodes without any data get an empty record.
+        """
+        if is_version:
+            migrator_name = VERSION_MIGRATOR_NAME
+        return self._records.get((migrator_name, node), _EMPTY_RECORD)
+
+    def get_attempts(
+        self, migrator_name: str, node: str, *, is_version: bool = False
+    ) -> float:
+        """Get the number of pre-PR attempts of a migrator for a node.
+
+        This is the indexed equivalent of
+        ``auto_tick._get_pre_pr_migrator_attempts``.
+
+        Returns
+        -------
+        float
+            The number of attempts.
+        """
+        return self.get(migrator_name, node, is_version=is_version).attempts
+
+    def add_pr_info(self, node: str, pri: dict) -> None:
+        """Index the contents of a node's ``pr_info``."""
+        attempts = pri.get("pre_pr_migrator_attempts", {}) or {}
+        attempt_ts = pri.get("pre_pr_migrator_attempt_ts", {}) or {}
+
+        prs = set()
+        for migration in pri.get("PRed", []) or []:
+            if "data" not in migration:
+                continue
+            name = get_migrator_report_name_from_pr_data(migration)
+            if name is not None:
+                prs.add(name)
+
+        for name in set(attempts) | set(attempt_ts) | prs:
+            self._records[(name, node)] = PRAttemptRecord(
+                attempts=attempts.get(name, 0),
+                last_attempt_ts=attempt_ts.get(name, None),
+                has_pr=name in prs,
+            )
+
+    def add_version_pr_info(self, node: str, vpri: dict) -> None:
+        """Index the contents of a node's ``version_pr_info``."""
+        new_version = vpri.get("new_version", "")
+
+        has_pr = False
+        for migration in vpri.get("PRed", []) or []:
+            if migration.get("data", {}).get("version", None) == new_version:
+                has_pr = True
+                break
+
+        self._records[(VERSION_MIGRATOR_NAME, node)] = PRAttemptRecord(
+            attempts=(vpri.get("new_version_attempts", {}) or {}).get(new_version, 0),
+            last_attempt_ts=(vpri.get("new_version_attempt_ts", {}) or {}).get(
+                new_version, None
+            ),
+            has_pr=has_pr,
+        )
+
+    @classmethod
+    def from_hashmaps(cls, nodes: Iterable[str] | None = None) -> "PRAttemptIndex":
+        """Build the index with a single pass over the ``pr_info`` and
+        ``version_pr_info`` hashmaps.
+
+        Parameters
+        ----------
+        nodes
+            If given, only these nodes are indexed.
+
+        Returns
+        -------
+        PRAttemptIndex
+            The index.
+        """
+        index = cls()
+        node_set = set(nodes) if nodes is not None else None
+
+        for hashmap, add in [
+            ("pr_info", index.add_pr_info),
+            ("version_pr_info", index.add_version_pr_info),
+        ]:
+            for node in get_all_keys_for_hashmap(hashmap):
+                if node_set is not None and node not in node_set:
+                    continue
+                # we only read here, so we do not enter the LazyJson context
+                add(node, LazyJson(f"{hashmap}/{node}.json").data)
+
+        logger.info("built PR attempt index with %d entries", len(index))
+        return index
@@ -0,0 +1,177 @@
+"""Refresh many PRs concurrently while staying within the GitHub API budget.
+
+The refreshes run in a thread pool and share the pooled `requests` session from
+`git_utils.get_github_api_session`. New refreshes are only started while the
+tracked GitHub API budget allows for them, and each result is handed to a
+callback in the calling thread as soon as it is available, so the callbacks can
+safely write to LazyJson objects.
+"""
+
+import logging
+import time
+from collections.abc import Callable, Hashable, Iterable
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from dataclasses import asdict, dataclass
+from typing import Generic, TypeVar
+
+from .executors import executor
+
+logger = logging.getLogger(__name__)
+
+K = TypeVar("K", bound=Hashable)
+
+
+@dataclass
+class PRRefreshStats:
+    """Statistics of a run of the PR refresh engine."""
+
+    num_submitted: int = 0
+    """The number of refreshes that were started."""
+
+    num_succeeded: int = 0
+    """The number of refreshes that returned new PR data."""
+
+    num_unchanged: int = 0
+    """The number of refreshes that returned no new PR data."""
+
+    num_failed: int = 0
+    """The number of refreshes that raised an error."""
+
+    stopped_early: bool = False
+    """If True, not all refreshes were run (e.g., the API budget was used up)."""
+
+    duration: float = 0.0
+    """The wall time of the run in seconds."""
+
+    def to_json_data(self) -> dict:
+        return asdict(self)
+
+
+class PRRefreshEngine(Generic[K]):
+    """Run PR refreshes concurrently, bounded by the GitHub API budget.
+
+    Parameters
+    ----------
+    max_workers
+        The maximum number of refreshes running at the same time.
+    requests_left
+        A callable returning the number of GitHub API requests left, or None if
+        it is unknown. If None, the budget is not checked (e.g., for dry runs).
+    min_requests_left
+        The number of API requests to keep in reserve.
+    requests_per_refresh
+        The (worst case) number of API requests made by a single refresh.
+    """
+
+    def __init__(
+        self,
+        max_workers: int,
+        requests_left: Callable[[], int | None] | None = None,
+        min_requests_left: int = 0,
+        requests_per_refresh: int = 1,
+    ):
+        self.max_workers = max_workers
+        self.requests_left = requests_left
+        self.min_requests_left = min_requests_left
+        self.requests_per_refresh = requests_per_refresh
+
+    def _max_in_flight(self, num_in_flight: int) -> int:
+        """Get the number of refreshes that may run at once right now.
+
+        Returns 0 if no more refreshes should be started at all.
+        """
+        if self.requests_left is None:
+            return self.max_workers
+        left = self.requests_left()
+        if left is None:
+            return self.max_workers
+        # requests of refreshes in flight are not yet reflected in the budget
+        budget = (
+            left - self.min_requests_left
+        ) // self.requests_per_refresh - num_in_flight
+        if budget <= 0:
+            return 0 if num_in_flight == 0 else num_in_flight
+        return min(self.max_workers, num_in_flight + budget)
+
+    def run(
+        self,
+        refreshes: Iterable[tuple[K, Callable[[], dict | None]]],
+        on_result: Callable[[K, dict | None], None],
+        on_error: Callable[[K, Exception], bool],
+    ) -> PRRefreshStats:
+        """Run the refreshes.
+
+        Parameters
+        ----------
+        refreshes
+            Pairs of a key and a function that refreshes a PR and returns the new
+            PR data (or None if there is nothing new). The iterable is consumed
+            lazily.
+        on_result
+            Called in the calling thread with the key and the result of each
+            successful refresh.
+        on_error
+            Called in the calling thread with the key and the exception of each
+            failed refresh. If it returns True, no more refreshes are started and
+            the ones not yet running are cancelled. Exceptions raised by it are
+            propagated after cancelling the pending refreshes.
+
+        Returns
+        -------
+        PRRefreshStats
+            The statistics of the run.
+        """
+        t0 = time.perf_counter()
+        stats = PRRefreshStats()
+        pending: dict[Future, K] = {}
+
+        def _collect() -> bool:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in done:
+                key = pending.pop(fut)
+                try:
+                    res = fut.result()
+                except Exception as e:
+                    stats.num_failed += 1
+                    if on_error(key, e):
+                        return True
+                else:
+                    if res:
+                        stats.num_succeeded += 1
+                    else:
+                        stats.num_unchanged += 1
+                    on_result(key, res)
+            return False
+
+        with executor("thread", self.max_workers) as pool:
+            try:
+                stop = False
+                for key, refresh in refreshes:
+                    max_in_flight = self._max_in_flight(len(pending))
+                    while pending and len(pending) >= max(max_in_flight, 1):
+                        stop = _collect()
+                        if stop:
+                            break
+                        max_in_flight = self._max_in_flight(len(pending))
+                    if stop:
+                        break
+                    if max_in_flight == 0:
+                        logger.warning(
+                            "GitHub API limit reached, not starting more PR refreshes"
+                        )
+                        stop = True
+                        break
+
+                    pending[pool.submit(refresh)] = key
+                    stats.num_submitted += 1
+
+                while pending and not stop:
+                    stop = _collect()
+                stats.stopped_early = stop
+            finally:
+                for fut in pending:
+                    fut.cancel()
+
+        stats.duration = time.perf_counter() - t0
+        logger.info("PR refresh stats: %s", stats.to_json_data())
+        return stats
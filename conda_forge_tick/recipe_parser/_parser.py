@@ -1,6 +1,8 @@
 import collections.abc
+import functools
 import io
 import re
+import threading
 from typing import Any
 
 import jinja2
@@ -63,6 +65,11 @@ def _get_yaml_parser(typ="jinja2"):
     return parser
 
 
+@functools.lru_cache(maxsize=1)
+def _get_jinja2_env():
+    return jinja2.sandbox.SandboxedEnvironment()
+
+
 def _line_is_only_selector(line):
     return ONLY_SELECTOR_RE.match(line) is not None
 
@@ -104,8 +111,7 @@ def _parse_jinja2_variables(meta_yaml: str) -> tuple[dict[str, Any], dict[str, s
         name of the variable will be `<name>__###conda-selector###__<selector>`.
     """
     meta_yaml_lines = meta_yaml.splitlines()
-    env = jinja2.sandbox.SandboxedEnvironment()
-    parsed_content = env.parse(meta_yaml)
+    parsed_content = _get_jinja2_env().parse(meta_yaml)
     all_nodes = list(parsed_content.iter_child_nodes())
 
     jinja2_exprs: dict[str, str] = {}
@@ -251,40 +257,45 @@ def _unmunge_split_key_value_pairs_with_selectors(lines):
     return _lines
 
 
-def _munge_multiline_jinja2(lines):
-    """Put a comment slug in front of any multiline jinja2 statements."""
-    in_statement = False
-    special_end_slug_re: list[re.Pattern | None] = []
-    new_lines = []
-    for line in lines:
+class _MultilineJinja2Munger:
+    """Put a comment slug in front of any multiline jinja2 statements.
+
+    Call it with the lines of a recipe one after the other.
+    """
+
+    def __init__(self):
+        self.in_statement = False
+        self.special_end_slug_re: list[re.Pattern | None] = []
+
+    def __call__(self, line: str) -> str:
         if line.strip().startswith("{%") and "%}" not in line:
-            in_statement = True
+            self.in_statement = True
 
-        if in_statement:
+        if self.in_statement:
             if JINJA2_FOR_RE.match(line):
-                special_end_slug_re.append(JINJA2_ENDFOR_RE)
+                self.special_end_slug_re.append(JINJA2_ENDFOR_RE)
             elif JINJA2_IF_RE.match(line):
-                special_end_slug_re.append(JINJA2_ENDIF_RE)
+                self.special_end_slug_re.append(JINJA2_ENDIF_RE)
             elif line.strip().startswith("{%") and "%}" not in line:
-                special_end_slug_re.append(None)
+                self.special_end_slug_re.append(None)
 
-        if in_statement:
-            new_lines.append("# {# " + JINJA2_ML_SLUG + line[:-1] + " #}\n")
+        if self.in_statement:
+            new_line = "# {# " + JINJA2_ML_SLUG + line[:-1] + " #}\n"
         else:
-            new_lines.append(line)
+            new_line = line
 
-        if len(special_end_slug_re) > 0:
-            if special_end_slug_re[-1] is not None:
-                if special_end_slug_re[-1].match(line):
-                    special_end_slug_re = special_end_slug_re[:-1]
+        if len(self.special_end_slug_re) > 0:
+            if self.special_end_slug_re[-1] is not None:
+                if self.special_end_slug_re[-1].match(line):
+                    self.special_end_slug_re = self.special_end_slug_re[:-1]
             else:
                 if "%}" in line and "{%" not in line:
-                    special_end_slug_re = special_end_slug_re[:-1]
+                    self.special_end_slug_re = self.special_end_slug_re[:-1]
 
-        if len(special_end_slug_re) == 0:
-            in_statement = False
+        if len(self.special_end_slug_re) == 0:
+            self.in_statement = False
 
-    return new_lines
+        return new_line
 
 
 def _unmunge_multiline_jinja2(lines):
@@ -461,8 +472,34 @@ def _build_jinja2_expr_tmp(jinja2_exprs):
     return "\n".join(exprs + tmpls)
 
 
-def _remove_quoted_jinja2_vars(lines):
-    r"""Remove any quoted jinja2 vars from the lines.
+@functools.lru_cache(maxsize=1024)
+def _find_undeclared_jinja2_vars(tmpl: str) -> frozenset[str]:
+    """Find the variables a template of jinja2 expressions uses but does not set."""
+    ast = _get_jinja2_env().parse(tmpl)
+    return frozenset(jinja2.meta.find_undeclared_variables(ast))
+
+
+@functools.lru_cache(maxsize=1024)
+def _compile_jinja2_expr_tmpl(tmpl: str) -> jinja2.Template:
+    return jinja2.Template(tmpl)
+
+
+_JINJA2_EXPR_PARSERS = threading.local()
+
+
+def _get_jinja2_expr_yaml_parser():
+    """Get the yaml parser of this thread for the evaluated jinja2 expressions.
+
+    It is separate from the parsers of the recipes since the parser carries state
+    about the jinja2 munging of the last document it loaded.
+    """
+    if not hasattr(_JINJA2_EXPR_PARSERS, "parser"):
+        _JINJA2_EXPR_PARSERS.parser = _get_yaml_parser()
+    return _JINJA2_EXPR_PARSERS.parser
+
+
+def _remove_quoted_jinja2_vars(line):
+    r"""Remove any quoted jinja2 vars from a line.
 
     Sometimes people write
 
@@ -472,32 +509,22 @@ def _remove_quoted_jinja2_vars(lines):
 
     We remove all instances of "['\"]{{" and "}}['\"]" to be safe.
     """
-    new_lines = []
-    for line in lines:
-        if "'{{" in line and "}}'" in line:
-            start_jinja = line.find("'{{")
-            end_jinja = line.find("}}'")
-        elif '"{{' in line and '}}"' in line:
-            start_jinja = line.find('"{{')
-            end_jinja = line.find('}}"')
-        else:
-            start_jinja = None
-            end_jinja = None
+    if "'{{" in line and "}}'" in line:
+        start_jinja = line.find("'{{")
+        end_jinja = line.find("}}'")
+    elif '"{{' in line and '}}"' in line:
+        start_jinja = line.find('"{{')
+        end_jinja = line.find('}}"')
+    else:
+        return line
 
-        if (
-            start_jinja is not None
-            and end_jinja is not None
-            and "(" in line[start_jinja:end_jinja]
-            and ")" in line[start_jinja:end_jinja]
-        ):
-            new_lines.append(re.sub(r"['\"]{{", "{{", line))
-            new_lines[-1] = re.sub(r"}}['\"]", "}}", new_lines[-1])
-        else:
-            new_lines.append(line)
-    return new_lines
+    if "(" in line[start_jinja:end_jinja] and ")" in line[start_jinja:end_jinja]:
+        line = re.sub(r"['\"]{{", "{{", line)
+        line = re.sub(r"}}['\"]", "}}", line)
+    return line
 
 
-def _remove_bad_jinja2_set_statements(lines):
+def _remove_bad_jinja2_set_statements(line):
     """Remove any jinja2 set statements that have bad newline adjustments
     by removing the adjustments.
 
@@ -509,24 +536,82 @@ def _remove_bad_jinja2_set_statements(lines):
 
         {% set var = val %}
     """
-    new_lines = []
-    for line in lines:
-        if BAD_JINJA2_SET_STATEMENT.match(line):
-            new_lines.append(line.replace("{%-", "{%").replace("-%}", "%}"))
-        else:
-            new_lines.append(line)
-    return new_lines
+    if BAD_JINJA2_SET_STATEMENT.match(line):
+        return line.replace("{%-", "{%").replace("-%}", "%}")
+    return line
 
 
-def _munge_jinj2_comments(lines):
+def _munge_jinj2_comments(line):
     """Turn any jinja2 comments: `{# #}` into yaml comments."""
-    new_lines = []
-    for line in lines:
-        if line.lstrip().startswith("{#") and line.rstrip().endswith("#}"):
-            line = line.replace("{#", "#").replace("#}", "")
-            line = line.rstrip() + "\n"
-        new_lines.append(line)
-    return new_lines
+    if line.lstrip().startswith("{#") and line.rstrip().endswith("#}"):
+        line = line.replace("{#", "#").replace("#}", "")
+        line = line.rstrip() + "\n"
+    return line
+
+
+def _preprocess_meta_yaml(meta_yaml: str) -> tuple[str, str]:
+    """Munge a recipe into something the jinja2 and yaml parsers understand.
+
+    This function makes a single pass over the lines of the recipe.
+
+    Parameters
+    ----------
+    meta_yaml : str
+        The recipe as a string.
+
+    Returns
+    -------
+    jinja2_meta_yaml : str
+        The recipe without the syntax we do not want (jinja2 comments, set
+        statements with newline adjustments, multiline jinja2 statements and
+        quoted jinja2 vars).
+    yaml_meta_yaml : str
+        The same recipe with the selectors of the keys munged into the keys.
+
+    Raises
+    ------
+    RuntimeError
+        If a multiline string is paired with a selector.
+    """
+    multiline_munger = _MultilineJinja2Munger()
+    jinja2_lines = []
+    yaml_lines = []
+    for line in io.StringIO(meta_yaml):
+        if "|" in line:
+            for _line in line.splitlines():
+                if BAD_MULTILINE_STRING_WITH_SELECTOR.match(_line):
+                    raise RuntimeError(
+                        "Could not parse meta.yaml due to multiline string '|' "
+                        "paired with a conda build selector! (offending line: "
+                        "'%s')" % _line,
+                    )
+
+        # pre-munge odd syntax that we do not want
+        # (most lines have no jinja2 syntax at all)
+        if "{" in line or multiline_munger.in_statement:
+            line = _munge_jinj2_comments(line)
+            line = _remove_bad_jinja2_set_statements(line)
+            line = multiline_munger(line)
+            line = _remove_quoted_jinja2_vars(line)
+        jinja2_lines.append(line)
+
+        # munge any duplicate keys
+        yaml_lines.append(_munge_line(line) if "#" in line else line)
+
+    return "".join(jinja2_lines), "".join(yaml_lines)
+
+
+_RECIPE_YAML_PARSERS = threading.local()
+
+# the attribute of the parser where the jinja2 plugin of ruamel.yaml keeps its state
+_JINJA2_PLUG_IN_ATTR = "_plug_in_jinja2"
+
+
+def _get_recipe_yaml_parser():
+    """Get the yaml parser of this thread for the recipes."""
+    if not hasattr(_RECIPE_YAML_PARSERS, "parser"):
+        _RECIPE_YAML_PARSERS.parser = _get_yaml_parser()
+    return _RECIPE_YAML_PARSERS.parser
 
 
 class CondaMetaYAML:
@@ -573,54 +658,40 @@ class CondaMetaYAML:
     """
 
     def __init__(self, meta_yaml: str):
-        for line in meta_yaml.splitlines():
-            if BAD_MULTILINE_STRING_WITH_SELECTOR.match(line):
-                raise RuntimeError(
-                    "Could not parse meta.yaml due to multiline string '|' paired "
-                    "with a conda build selector! (offending line: '%s')" % line,
-                )
-
-        # pre-munge odd syntax that we do not want
-        lines = list(io.StringIO(meta_yaml).readlines())
-
-        # turn jinja2 comments in yaml ones
-        lines = _munge_jinj2_comments(lines)
-
-        # remove bad jinja2 set statements
-        lines = _remove_bad_jinja2_set_statements(lines)
-
-        # remove multiline jinja2 statements
-        lines = _munge_multiline_jinja2(lines)
-
-        # get rid of quoted jinja2 vars
-        lines = _remove_quoted_jinja2_vars(lines)
-
-        meta_yaml = "".join(lines)
+        meta_yaml, munged_meta_yaml = _preprocess_meta_yaml(meta_yaml)
 
         # get any variables set in the file by jinja2
         v, e = _parse_jinja2_variables(meta_yaml)
         self.jinja2_vars = v
         self.jinja2_exprs = e
+        self._jinja2_expr_tmpls: dict[
+            tuple[tuple[tuple[str, str], ...], frozenset[str]], jinja2.Template | None
+        ] = {}
 
         if "<{{ " in meta_yaml:
             self._jinja2_sentinel = "<<"
         else:
             self._jinja2_sentinel = "<"
 
-        # munge any duplicate keys
-        in_data = io.StringIO(meta_yaml)
-        in_data.seek(0)
-        lines = []
-        for line in in_data.readlines():
-            lines.append(_munge_line(line))
-
         # parse with yaml
-        self._parser = _get_yaml_parser()
-        self.meta = self._parser.load("".join(lines))
+        self.meta = self._load_yaml(munged_meta_yaml)
 
         # undo munging of jinja2 variables '<{ var }}' -> '{{ var }}'
         self.meta = _demunge_jinja2_vars(self.meta, self._jinja2_sentinel)
 
+    def _load_yaml(self, munged_meta_yaml: str) -> Any:
+        parser = _get_recipe_yaml_parser()
+        meta = parser.load(munged_meta_yaml)
+        # the jinja2 plugin of ruamel.yaml stores how it munged the jinja2 syntax
+        # of the recipe on the parser and needs it again to dump the recipe
+        self._jinja2_plug_in_data = getattr(parser, _JINJA2_PLUG_IN_ATTR)
+        return meta
+
+    def _dump_yaml(self, meta: Any, fp: Any) -> None:
+        parser = _get_recipe_yaml_parser()
+        setattr(parser, _JINJA2_PLUG_IN_ATTR, self._jinja2_plug_in_data)
+        parser.dump(meta, fp)
+
     def eval_jinja2_exprs(self, jinja2_vars):
         """Evaluate the jinja2 template to get any jinja2 expression values,
         using a set of values for the jinja2 vars.
@@ -635,18 +706,32 @@ class CondaMetaYAML:
         exprs : dict
             A dictionary mapping variable names to their computed values.
         """
+        tmpl = self._get_jinja2_expr_tmpl(frozenset(jinja2_vars))
+        if tmpl is None:
+            return {}
+        return _get_jinja2_expr_yaml_parser().load(tmpl.render(**jinja2_vars))
+
+    def _get_jinja2_expr_tmpl(self, names: frozenset[str]) -> jinja2.Template | None:
+        """Get the compiled template of the jinja2 expressions that can be
+        evaluated given values for the jinja2 vars in `names`.
+
+        The result is cached for the current `jinja2_exprs`.
+        """
+        key = (tuple(self.jinja2_exprs.items()), names)
+        if key in self._jinja2_expr_tmpls:
+            return self._jinja2_expr_tmpls[key]
+
         exprs = self.jinja2_exprs
         # Loop until we stop finding undefined variables
         while True:
             tmpl = _build_jinja2_expr_tmp(exprs)
             if len(tmpl.strip()) == 0:
-                return {}
+                break
 
             # look for undefined things
-            env = jinja2.sandbox.SandboxedEnvironment()
-            ast = env.parse(tmpl)
-            undefined = jinja2.meta.find_undeclared_variables(ast)
-            undefined = {u for u in undefined if u not in jinja2_vars}
+            undefined = {
+                u for u in _find_undeclared_jinja2_vars(tmpl) if u not in names
+            }
 
             # if we found them, remove the offending statements
             if len(undefined) > 0:
@@ -658,15 +743,12 @@ class CondaMetaYAML:
             else:
                 break
 
-        # rebuild the template and render
-        tmpl = _build_jinja2_expr_tmp(exprs)
         if len(tmpl.strip()) == 0:
-            return {}
-
-        # get a new parser since it carries state about the jinja2 munging
-        # that we don't want to ruin
-        _parser = _get_yaml_parser()
-        return _parser.load(jinja2.Template(tmpl).render(**jinja2_vars))
+            compiled_tmpl = None
+        else:
+            compiled_tmpl = _compile_jinja2_expr_tmpl(tmpl)
+        self._jinja2_expr_tmpls[key] = compiled_tmpl
+        return compiled_tmpl
 
     def dumps(self):
         """Dump the recipe to a string."""
@@ -689,7 +771,7 @@ class CondaMetaYAML:
         try:
             # first dump to yaml
             s = io.StringIO()
-            self._parser.dump(self.meta, s)
+            self._dump_yaml(self.meta, s)
             s.seek(0)
 
             # now unmunge
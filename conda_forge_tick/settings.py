@@ -91,6 +91,112 @@ class BotSettings(BaseSettings):
     In tests or when debugging, you probably need to set this to 1.0 to update all feedstocks.
     """
 
+    feedstock_parsing_max_workers: int | None = Field(None, ge=1)
+    """
+    The number of processes that render the variants (one per .ci_support file) of a
+    feedstock at the same time when its attributes are parsed.
+    If None, 4 processes are used when parsing in a container and the variants are
+    rendered one after another otherwise. Processes are only started if the parsing
+    process does not run any other threads.
+    """
+
+    version_sources_http_cache_dir: str | None = None
+    """
+    The directory of the on-disk HTTP cache used by the version sources.
+    If None or empty, the cache is disabled. The directory is created only readable
+    by the current user and entries owned by other users are ignored.
+    """
+
+    version_sources_http_cache_ttl: float = 7 * 24 * 3600.0
+    """
+    The time in seconds after which a response in the on-disk HTTP cache expires.
+    """
+
+    version_sources_http_cache_max_entries: int = 10_000
+    """
+    The maximum number of responses kept in the on-disk HTTP cache.
+    """
+
+    version_sources_max_connections_per_host: int = 8
+    """
+    The maximum number of concurrent requests the version sources make to a single host.
+    """
+
+    version_sources_probe_concurrency: int = Field(1, ge=1)
+    """
+    The number of version sources of a feedstock that are tried at the same time.
+    The sources are still used in order of priority: lower priority sources are only
+    started early so that their result is ready if the higher priority ones find nothing.
+    The RawURL sources are never started early. By default, the sources are tried one
+    after another.
+    """
+
+    version_sources_index_dir: str | None = None
+    """
+    The directory where the indexes of the CRAN and ROSDistro version sources are cached.
+    If None, a directory of the current user in the system's temporary directory is used.
+    The directory is made only accessible by the current user, who must own it, and is
+    mounted read-only into the containers that look up versions.
+    """
+
+    version_sources_index_ttl: float = 6 * 3600.0
+    """
+    The time in seconds after which the cached version source indexes are fetched again.
+    """
+
+    version_sources_url_probe_in_process: bool = True
+    """
+    Whether the RawURL version sources check if HTTP(S) URLs exist with an in-process,
+    pooled HTTP client instead of a wget/curl subprocess per URL.
+    FTP URLs are always checked with wget/curl.
+    """
+
+    version_sources_url_probe_concurrency: int = Field(8, ge=1)
+    """
+    The number of candidate URLs the RawURL version sources check at the same time.
+    """
+
+    version_sources_url_negative_cache_ttl: float = 300.0
+    """
+    The time in seconds for which URLs found to be missing are not checked again.
+    """
+
+    url_template_probe_concurrency: int = Field(8, ge=1)
+    """
+    The number of candidate source URLs the version migrator checks at the same time
+    before downloading and hashing the first one that exists.
+    """
+
+    url_hash_cache_dir: str | None = None
+    """
+    The directory of the on-disk cache of the hashes of downloaded source archives.
+    If None or empty, the cache is disabled. The directory is created only readable
+    by the current user and entries owned by other users are ignored.
+    """
+
+    url_hash_cache_ttl: float = 30 * 24 * 3600.0
+    """
+    The time in seconds after which a cached hash of a source archive expires.
+    """
+
+    url_hash_cache_max_entries: int = 100_000
+    """
+    The maximum number of hashes kept in the on-disk hash cache.
+    """
+
+    update_prs_max_workers: int = 16
+    """
+    The maximum number of PRs refreshed at the same time in the prs job.
+    Fewer refreshes run at once when the GitHub API budget is running low.
+    """
+
+    update_prs_use_graphql: bool = True
+    """
+    If True, the prs job fetches the state of all PRs it refreshes with batched
+    GraphQL queries first and only falls back to one REST request per PR for the
+    PRs GraphQL cannot answer.
+    """
+
     frac_update_pr_json: Fraction = 0.25
     """
     The fraction of feedstocks (randomly selected) to update in the prs job.
@@ -110,6 +216,32 @@ class BotSettings(BaseSettings):
     Set to 0 to always refresh.
     """
 
+    auto_tick_tmp_disk_limit_gb: float | None = None
+    """
+    The disk space (in GB) that the temporary feedstock workspaces of the auto-tick job
+    may use before they are removed synchronously instead of in the background.
+    None means no limit.
+    """
+
+    auto_tick_memory_budget_gb: float | None = None
+    """
+    The soft memory budget (in GB) of the auto-tick job. When the resident memory
+    of the job is above this budget after a migrator has run, cached graph data is
+    evicted from memory. None means no budget.
+    """
+
+    auto_tick_memory_report_path: str | None = None
+    """
+    If set, the auto-tick job writes a JSON report of its memory usage per phase
+    to this path.
+    """
+
+    deploy_strict_schema_validation: bool = False
+    """
+    If True, the deploy step refuses to push graph data files that do not conform
+    to their pydantic models. Otherwise such files are only logged.
+    """
+
 
 _use_settings_override: BotSettings | None = None
 """
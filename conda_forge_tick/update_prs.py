@@ -1,9 +1,9 @@
 import copy
+import functools
 import hashlib
 import logging
 import secrets
 import time
-from concurrent.futures._base import as_completed
 
 import github
 import github3
@@ -14,12 +14,14 @@ from conda_forge_tick.cli_context import CliContext
 from conda_forge_tick.git_utils import (
     close_out_dirty_prs,
     close_out_labels,
+    get_github_api_requests_left,
     is_github_api_limit_reached,
     refresh_pr,
 )
 from conda_forge_tick.utils import get_keys_default, pr_can_be_archived
 
-from .executors import executor
+from .github_graphql import fetch_pr_jsons_via_graphql
+from .pr_refresh import PRRefreshEngine
 from .settings import settings
 from .utils import load_existing_graph
 
@@ -29,15 +31,24 @@ logger = logging.getLogger(__name__)
 
 RNG = secrets.SystemRandom()
 
-NUM_GITHUB_THREADS = 2
+REQUESTS_PER_PR_REFRESH = 2
+"""
+The number of GitHub API requests a single PR refresh usually needs. Conditional
+requests answered with a 304 are free, so this is an upper bound for most PRs.
+"""
 
 
 def _combined_update_function(
-    pr_json: dict, dry_run: bool, remake_prs_with_conflicts: bool
+    pr_json: dict,
+    dry_run: bool,
+    remake_prs_with_conflicts: bool,
+    prefetched_pr_json: dict | None = None,
 ) -> dict | None:
     return_it = False
 
-    pr_data = refresh_pr(pr_json, dry_run=dry_run)
+    pr_data = refresh_pr(
+        pr_json, dry_run=dry_run, prefetched_pr_json=prefetched_pr_json
+    )
     if pr_data is not None:
         return_it = True
         pr_json.update(pr_data)
@@ -48,7 +59,9 @@ def _combined_update_function(
         pr_json.update(pr_data)
 
     if remake_prs_with_conflicts:
-        pr_data = refresh_pr(pr_json, dry_run=dry_run)
+        pr_data = refresh_pr(
+            pr_json, dry_run=dry_run, prefetched_pr_json=prefetched_pr_json
+        )
         if pr_data is not None:
             return_it = True
             pr_json.update(pr_data)
@@ -87,12 +100,85 @@ def _filter_feedstock_nodes(node_ids, feedstock_filter):
     return [node_id for node_id in node_ids if node_id == feedstock_filter]
 
 
+def _iter_prs_to_refresh(gx, node_ids, now, feedstock_filter=None):
+    update_frac = settings().frac_update_pr_json
+    for node_id in tqdm.tqdm(
+        node_ids,
+        desc="refreshing PRs",
+        leave=False,
+        ncols=80,
+    ):
+        node = gx.nodes[node_id]["payload"]
+
+        if node.get("archived", False):
+            continue
+
+        remake_prs_with_conflicts = get_keys_default(
+            node,
+            ["conda-forge.yml", "bot", "remake_prs_with_conflicts"],
+            {},
+            True,
+        )
+
+        prs = node.get("pr_info", {}).get("PRed", [])
+
+        for i, migration in enumerate(prs):
+            # Skip random sampling if a specific feedstock is selected
+            if not feedstock_filter and RNG.random() >= update_frac:
+                continue
+
+            pr_json = migration.get("PR", None)
+
+            if pr_json and (not pr_can_be_archived(pr_json, now=now)):
+                yield (node_id, i, pr_json), remake_prs_with_conflicts
+
+
+def _pr_graphql_key(pr_json):
+    try:
+        return pr_json["base"]["repo"]["name"], pr_json["number"]
+    except KeyError:
+        # old PR json blobs without the repo name are refreshed via REST
+        return None
+
+
+def _iter_pr_refreshes(
+    update_function, dry_run, gx, node_ids, now, feedstock_filter=None
+):
+    prs_to_refresh = _iter_prs_to_refresh(
+        gx, node_ids, now, feedstock_filter=feedstock_filter
+    )
+
+    prefetched = {}
+    if settings().update_prs_use_graphql and not dry_run:
+        # we need to know all PRs up front to query them in bulk
+        prs_to_refresh = list(prs_to_refresh)
+        prefetched = fetch_pr_jsons_via_graphql(
+            key
+            for (_, _, pr_json), _ in prs_to_refresh
+            if pr_json["state"] != "closed"
+            and (key := _pr_graphql_key(pr_json)) is not None
+        )
+
+    for key, remake_prs_with_conflicts in prs_to_refresh:
+        _pr_json = copy.deepcopy(key[2].data)
+        kwargs = {}
+        prefetched_pr_json = prefetched.get(_pr_graphql_key(_pr_json))
+        if prefetched_pr_json is not None:
+            kwargs["prefetched_pr_json"] = prefetched_pr_json
+        yield (
+            key,
+            functools.partial(
+                update_function,
+                _pr_json,
+                dry_run,
+                remake_prs_with_conflicts,
+                **kwargs,
+            ),
+        )
+
+
 def _update_pr(update_function, dry_run, gx, job, n_jobs, feedstock_filter=None):
-    failed_refresh = 0
-    succeeded_refresh = 0
-    futures = {}
     node_ids = list(gx.nodes)
-    update_frac = settings().frac_update_pr_json
 
     # Apply feedstock filter if provided
     # When filtering to a specific feedstock, disable random sampling
@@ -113,83 +199,58 @@ def _update_pr(update_function, dry_run, gx, job, n_jobs, feedstock_filter=None)
     # this makes sure that github rate limits are dispersed
     RNG.shuffle(node_ids)
 
-    with executor("thread", NUM_GITHUB_THREADS) as pool:
-        for node_id in tqdm.tqdm(
-            node_ids,
-            desc="submitting PR refresh jobs",
-            leave=False,
-            ncols=80,
-        ):
-            node = gx.nodes[node_id]["payload"]
-
-            if node.get("archived", False):
-                continue
-
-            remake_prs_with_conflicts = get_keys_default(
-                node,
-                ["conda-forge.yml", "bot", "remake_prs_with_conflicts"],
-                {},
-                True,
+    def _on_result(key, res):
+        name, i, pr_json = key
+        if res:
+            if (
+                "Last-Modified" in pr_json
+                and "Last-Modified" in res
+                and pr_json["Last-Modified"] != res["Last-Modified"]
+            ):
+                tqdm.tqdm.write(f"Updated PR json for {name}: {res['id']}")
+            with pr_json as attrs:
+                attrs.update(**res)
+
+    def _on_error(key, e):
+        name, i, pr_json = key
+        if isinstance(e, (github3.GitHubError, github.GithubException)):
+            logger.error("GITHUB ERROR ON FEEDSTOCK: %s", name)
+            if is_github_api_limit_reached():
+                logger.warning("GitHub API error", exc_info=e)
+                return True
+            return False
+        elif isinstance(e, github3.exceptions.ConnectionError):
+            logger.error("GITHUB ERROR ON FEEDSTOCK: %s", name)
+            return False
+        else:
+            logger.critical(
+                "ERROR ON FEEDSTOCK: %s: %s",
+                name,
+                gx.nodes[name]["payload"]["pr_info"]["PRed"][i],
+                exc_info=e,
             )
+            raise e
+
+    # the tracked budget is updated from response headers, so checking it is cheap
+    engine = PRRefreshEngine(
+        settings().update_prs_max_workers,
+        requests_left=None if dry_run else get_github_api_requests_left,
+        requests_per_refresh=REQUESTS_PER_PR_REFRESH,
+    )
+    stats = engine.run(
+        _iter_pr_refreshes(
+            update_function,
+            dry_run,
+            gx,
+            node_ids,
+            now,
+            feedstock_filter=feedstock_filter,
+        ),
+        _on_result,
+        _on_error,
+    )
 
-            prs = node.get("pr_info", {}).get("PRed", [])
-
-            for i, migration in enumerate(prs):
-                # Skip random sampling if a specific feedstock is selected
-                if not feedstock_filter and RNG.random() >= update_frac:
-                    continue
-
-                pr_json = migration.get("PR", None)
-
-                if pr_json and (not pr_can_be_archived(pr_json, now=now)):
-                    _pr_json = copy.deepcopy(pr_json.data)
-                    future = pool.submit(
-                        update_function,
-                        _pr_json,
-                        dry_run,
-                        remake_prs_with_conflicts,
-                    )
-                    futures[future] = (node_id, i, pr_json)
-
-        for f in tqdm.tqdm(
-            as_completed(futures),
-            total=len(futures),
-            desc="gathering PR data",
-            leave=False,
-            ncols=80,
-        ):
-            name, i, pr_json = futures[f]
-            try:
-                res = f.result()
-                if res:
-                    succeeded_refresh += 1
-                    if (
-                        "Last-Modified" in pr_json
-                        and "Last-Modified" in res
-                        and pr_json["Last-Modified"] != res["Last-Modified"]
-                    ):
-                        tqdm.tqdm.write(f"Updated PR json for {name}: {res['id']}")
-                    with pr_json as attrs:
-                        attrs.update(**res)
-            except (github3.GitHubError, github.GithubException) as e:
-                logger.error("GITHUB ERROR ON FEEDSTOCK: %s", name)
-                failed_refresh += 1
-                if is_github_api_limit_reached():
-                    logger.warning("GitHub API error", exc_info=e)
-                    break
-            except (github3.exceptions.ConnectionError, github.GithubException):
-                logger.error("GITHUB ERROR ON FEEDSTOCK: %s", name)
-                failed_refresh += 1
-            except Exception:
-                logger.critical(
-                    "ERROR ON FEEDSTOCK: %s: %s",
-                    name,
-                    gx.nodes[name]["payload"]["pr_info"]["PRed"][i],
-                    exc_info=True,
-                )
-                raise
-
-    return succeeded_refresh, failed_refresh
+    return stats.num_succeeded, stats.num_failed
 
 
 def update_pr_combined(
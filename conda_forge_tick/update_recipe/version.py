@@ -1,6 +1,7 @@
 import collections.abc
 import hashlib
 import io
+import itertools
 import logging
 import os
 import pprint
@@ -9,6 +10,7 @@ import shutil
 import tempfile
 import traceback
 from collections.abc import MutableMapping
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
 from typing import Any
 
@@ -29,6 +31,7 @@ from conda_forge_feedstock_ops.os_utils import (
 )
 
 from conda_forge_tick.hashing import hash_url
+from conda_forge_tick.http_cache import get_http_client
 from conda_forge_tick.lazy_json_backends import loads
 from conda_forge_tick.recipe_parser import CONDA_SELECTOR, CondaMetaYAML
 from conda_forge_tick.settings import (
@@ -152,11 +155,11 @@ def _render_jinja2(tmpl, context):
     return env.from_string(tmpl).render(**context)
 
 
-def _try_pypi_api(url_tmpl: str, context: MutableMapping, hash_type: str, cmeta: Any):
+def _get_pypi_url_tmpls(url_tmpl: str, context: MutableMapping, cmeta: Any):
     """
-    Try to get a new version from the PyPI API. The returned URL might use a different
-    format (host) than the original URL template, e.g. `https://files.pythonhosted.org/`
-    instead of `https://pypi.io/`.
+    Get the URL templates of the new version from the PyPI API. The returned URLs
+    might use a different format (host) than the original URL template, e.g.
+    `https://files.pythonhosted.org/` instead of `https://pypi.io/`.
 
     Parameters
     ----------
@@ -164,24 +167,22 @@ def _try_pypi_api(url_tmpl: str, context: MutableMapping, hash_type: str, cmeta:
         The URL template to try to update.
     context : dict
         The context to render the URL template.
-    hash_type : str
-        The hash type to use.
+    cmeta : Any
+        The parsed recipe.
 
     Returns
     -------
-    new_url_tmpl : str or None
-        The new URL template if found.
-    new_hash : str or None
-        The new hash if found.
+    new_url_tmpls : list of str
+        The new URL templates to try, in order. Empty if none were found.
     """
     if "version" not in context:
-        return None, None
+        return []
 
     if not any(
         pypi_slug in url_tmpl
         for pypi_slug in ["/pypi.org/", "/pypi.io/", "/files.pythonhosted.org/"]
     ):
-        return None, None
+        return []
 
     orig_pypi_name = None
 
@@ -259,7 +260,7 @@ def _try_pypi_api(url_tmpl: str, context: MutableMapping, hash_type: str, cmeta:
             context["version"],
             orig_pypi_name,
         )
-        return None, None
+        return []
 
     bn, _ = os.path.split(url_tmpl)
     pypi_name = finfo["filename"].split(context["version"] + ext)[0]
@@ -285,68 +286,108 @@ def _try_pypi_api(url_tmpl: str, context: MutableMapping, hash_type: str, cmeta:
             bn, finfo["filename"].replace(context["version"], "{{ version }}")
         )
 
-    logger.debug("new url template from PyPI API: %s", new_url_tmpl)
-    url = _render_jinja2(new_url_tmpl, context)
-    new_hash = _try_url_and_hash_it(url, hash_type)
-    if new_hash is not None:
-        return new_url_tmpl, new_hash
+    new_url_tmpls = [
+        new_url_tmpl,
+        finfo["url"].replace(context["version"], "{{ version }}"),
+    ]
+    logger.debug("new url templates from PyPI API: %s", new_url_tmpls)
+    return new_url_tmpls
 
-    new_url_tmpl = finfo["url"].replace(context["version"], "{{ version }}")
-    logger.debug("new url template from PyPI API: %s", new_url_tmpl)
-    url = _render_jinja2(new_url_tmpl, context)
-    new_hash = _try_url_and_hash_it(url, hash_type)
-    if new_hash is not None:
-        return new_url_tmpl, new_hash
-
-    return None, None
-
-
-def _get_new_url_tmpl_and_hash(
-    url_tmpl: str, context: MutableMapping, hash_type: str, cmeta: Any
-):
-    logger.info(
-        "processing URL template: %s",
-        url_tmpl,
-    )
-    if context:
-        logger.info("rendering URL w/ jinja2 context: %s", pprint.pformat(context))
 
+def _get_url_candidates(url_tmpl: str, context: MutableMapping, cmeta: Any):
+    """Yield the (URL template, URL) pairs to try for a source, in order."""
     try:
         url = _render_jinja2(url_tmpl, context)
         logger.info("initial rendered URL: %s", url)
     except jinja2.UndefinedError:
         logger.info("initial URL template does not render")
         url = None
-        pass
 
-    if url != url_tmpl:
-        new_hash = _try_url_and_hash_it(url, hash_type)
-        if new_hash is not None:
-            return url_tmpl, new_hash
+    if url is None:
+        pass
+    elif url != url_tmpl:
+        yield url_tmpl, url
     else:
         logger.info("initial URL template does not update with version. skipping it.")
 
-    new_url_tmpl = None
-    new_hash = None
-
     try:
-        new_url_tmpl, new_hash = _try_pypi_api(url_tmpl, context, hash_type, cmeta)
-        if new_hash is not None and new_url_tmpl is not None:
-            return new_url_tmpl, new_hash
+        new_url_tmpls = _get_pypi_url_tmpls(url_tmpl, context, cmeta)
     except Exception as e:
         logger.debug("PyPI API url+hash update failed: %s", repr(e), exc_info=e)
+        new_url_tmpls = []
 
-    for new_url_tmpl in gen_transformed_urls(url_tmpl):
+    for new_url_tmpl in [*new_url_tmpls, *gen_transformed_urls(url_tmpl)]:
         try:
-            url = _render_jinja2(new_url_tmpl, context)
-            new_hash = _try_url_and_hash_it(url, hash_type)
+            yield new_url_tmpl, _render_jinja2(new_url_tmpl, context)
         except jinja2.UndefinedError:
-            new_hash = None
+            pass
 
-        if new_hash is not None:
-            break
 
-    return new_url_tmpl, new_hash
+def _get_new_url_tmpl_and_hash(
+    url_tmpl: str, context: MutableMapping, hash_type: str, cmeta: Any
+):
+    """Find the URL template of the new version of a source and its hash.
+
+    The candidates are the URL template itself, the URLs from the PyPI API
+    (for PyPI sources) and the variants from `gen_transformed_urls`. The URL
+    template itself is tried first, so the PyPI API is only asked if it does
+    not work. The other candidates are checked for existence concurrently and
+    the first one (in that order) that exists and can be hashed is used, so
+    only the archive of that candidate is downloaded.
+
+    Parameters
+    ----------
+    url_tmpl : str
+        The URL template of the source.
+    context : dict
+        The context to render the URL template.
+    hash_type : str
+        The hash type to use.
+    cmeta : Any
+        The parsed recipe.
+
+    Returns
+    -------
+    new_url_tmpl : str or None
+        The new URL template if found.
+    new_hash : str or None
+        The new hash if found.
+    """
+    logger.info(
+        "processing URL template: %s",
+        url_tmpl,
+    )
+    if context:
+        logger.info("rendering URL w/ jinja2 context: %s", pprint.pformat(context))
+
+    client = get_http_client()
+    pool = ThreadPoolExecutor(max_workers=settings().url_template_probe_concurrency)
+    try:
+        all_candidates = _get_url_candidates(url_tmpl, context, cmeta)
+        probes: dict[str, Future] = {}
+        # the generator only asks the PyPI API after the first candidate
+        for batch in [itertools.islice(all_candidates, 1), all_candidates]:
+            candidates = []
+            for new_url_tmpl, url in batch:
+                # a URL that failed before fails again
+                if url not in probes:
+                    candidates.append((new_url_tmpl, url))
+                    # if the URL could not be checked, we try to download it anyways
+                    probes[url] = pool.submit(
+                        client.url_exists, url, timeout=30, on_error=True
+                    )
+
+            for new_url_tmpl, url in candidates:
+                if not probes[url].result():
+                    logger.debug("url does not exist: %s", url)
+                    continue
+                new_hash = _try_url_and_hash_it(url, hash_type)
+                if new_hash is not None:
+                    return new_url_tmpl, new_hash
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    return None, None
 
 
 def _try_replace_hash(
@@ -2,19 +2,23 @@ import abc
 import collections.abc
 import copy
 import functools
-import json
 import logging
 import os
 import re
 import subprocess
 import tempfile
+import threading
+import time
 import typing
 import urllib.parse
-import urllib.request
 from collections.abc import Callable, Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
 
 import feedparser
+import jinja2
+import jinja2.meta
+import jinja2.sandbox
 import orjson
 import requests
 import yaml
@@ -27,6 +31,7 @@ from conda_forge_tick.migrators_types import (
     RecipeTypedDict,
     SourceTypedDict,
 )
+from conda_forge_tick.recipe_parser import CONDA_SELECTOR, CondaMetaYAML
 from conda_forge_tick.utils import (
     get_keys_default,
     get_platform_arch_from_ci_support_filename,
@@ -36,12 +41,106 @@ from conda_forge_tick.utils import (
 from conda_forge_tick.version_filters import is_tag_ignored, is_version_ignored
 
 from .hashing import hash_url
+from .http_cache import CachingHTTPClient, get_http_client
+from .settings import settings
 
 CRAN_INDEX: dict[str, str] = {}
 
+SOURCE_INDEX_READ_ONLY_DIR: str | None = None
+"""
+If set, the indexes of the version sources (e.g., CRAN) are read from this
+directory regardless of their age and never written to it. This is used in
+containers, where the index directory of the host is mounted read-only.
+"""
+
+_SOURCE_INDEX_LOCK = threading.Lock()
+
 logger = logging.getLogger(__name__)
 
 
+def get_source_index_dir() -> str:
+    """Get the (host-side) directory of the cached version source indexes.
+
+    The directory is mounted into the containers that look up versions, so it
+    must only be writable by the current user.
+
+    Returns
+    -------
+    str
+        The directory, which is created only accessible by the current user if
+        it does not exist.
+
+    Raises
+    ------
+    RuntimeError
+        If the directory is owned by another user.
+    """
+    index_dir = settings().version_sources_index_dir
+    if index_dir is None:
+        index_dir = os.path.join(
+            tempfile.gettempdir(), f"conda-forge-tick-source-indexes-{os.getuid()}"
+        )
+    os.makedirs(index_dir, mode=0o700, exist_ok=True)
+    st = os.stat(index_dir)
+    if st.st_uid != os.getuid():
+        raise RuntimeError(
+            f"The version source index directory {index_dir} is not owned by "
+            "the current user."
+        )
+    if st.st_mode & 0o077:
+        os.chmod(index_dir, 0o700)
+    return index_dir
+
+
+def load_source_index(filename: str, fetch: Callable[[], dict]) -> dict:
+    """Load the index of a version source from the on-disk cache or fetch it.
+
+    The cached index is used if it is younger than the TTL given by the
+    `version_sources_index_ttl` setting and owned by the current user.
+    Otherwise, it is fetched and written to the cache. If
+    `SOURCE_INDEX_READ_ONLY_DIR` is set, the index is read from there and
+    only fetched (but not written) if it is missing.
+
+    Parameters
+    ----------
+    filename
+        The name of the index file in the index directory.
+    fetch
+        A function fetching the index. The index must be JSON-serializable.
+
+    Returns
+    -------
+    dict
+        The index.
+    """
+    if SOURCE_INDEX_READ_ONLY_DIR is not None:
+        pth = os.path.join(SOURCE_INDEX_READ_ONLY_DIR, filename)
+        if os.path.exists(pth):
+            with open(pth, "rb") as fp:
+                return orjson.loads(fp.read())
+        return fetch()
+
+    pth = os.path.join(get_source_index_dir(), filename)
+    try:
+        with open(pth, "rb") as fp:
+            st = os.fstat(fp.fileno())
+            if (
+                st.st_uid == os.getuid()
+                and time.time() - st.st_mtime < settings().version_sources_index_ttl
+            ):
+                return orjson.loads(fp.read())
+    except (OSError, orjson.JSONDecodeError):
+        pass
+
+    index = fetch()
+    # other processes on the host may read the index at the same time
+    fd, tmp_pth = tempfile.mkstemp(dir=os.path.dirname(pth))
+    with os.fdopen(fd, "wb") as fp:
+        fp.write(orjson.dumps(index))
+    os.replace(tmp_pth, pth)
+    return index
+
+
 def urls_from_meta(meta_yaml: RecipeTypedDict) -> set[str]:
     if "source" not in meta_yaml:
         return set()
@@ -137,6 +236,16 @@ def next_version(ver: str, increment_alpha: bool = False) -> Iterator[str]:
 class AbstractSource(abc.ABC):
     name: str
 
+    index_filename: str | None = None
+    """
+    If not None, the source uses an index cached in this file in the source
+    index directory (see `load_source_index`) and loads it in `init`.
+    """
+
+    def init(self) -> None:
+        """Load the data shared by all uses of the source (e.g., an index)."""
+        pass
+
     @abc.abstractmethod
     def get_version(self, url: str, node_attrs: AttrsTypedDict) -> str | None:
         """Get the version given a url.
@@ -205,7 +314,17 @@ class VersionFromFeed(AbstractSource, abc.ABC):
     ]
 
     def get_version(self, url: str, node_attrs: AttrsTypedDict) -> str | None:
-        data = feedparser.parse(url)
+        try:
+            r = get_http_client().get(url)
+        except requests.RequestException:
+            logger.debug("could not fetch the feed %s", url, exc_info=True)
+            return None
+        if not r.ok:
+            return None
+        data = feedparser.parse(
+            r.content,
+            response_headers={"content-type": r.headers.get("Content-Type", "")},
+        )
         if data["bozo"] == 1:
             return None
         vers = []
@@ -262,7 +381,7 @@ class PyPI(AbstractSource):
         return f"https://pypi.org/pypi/{pkg}/json"
 
     def get_version(self, url: str, node_attrs: AttrsTypedDict) -> str | None:
-        r = requests.get(url)
+        r = get_http_client().get(url)
         # If it is a pre-release don't give back the pre-release version
         if not r.ok:
             return None
@@ -299,7 +418,7 @@ class NPM(AbstractSource):
         return f"https://registry.npmjs.org/{'/'.join(pkg)}"
 
     def get_version(self, url: str, node_attrs: AttrsTypedDict) -> str | None:
-        r = requests.get(url)
+        r = get_http_client().get(url)
         if not r.ok:
             return None
         latest = r.json()["dist-tags"].get("latest", "").strip()
@@ -323,25 +442,33 @@ class CRAN(AbstractSource):
     memory on module level as `CRAN_INDEX` like a singleton. This way it
     is shared on executor level and not serialized with every instance of
     the CRAN class to allow efficient distributed execution with e.g.
-    dask.
+    dask. The index is also cached on disk (see `load_source_index`), so it
+    is fetched once per TTL on the host and read from the mounted cache in
+    containers.
     """
 
     name = "CRAN"
     url_contains = "cran.r-project.org/src/contrib/Archive"
     cran_url = "https://cran.r-project.org"
+    index_filename = "cran_index.json"
 
     def init(self) -> None:
         global CRAN_INDEX
-        if not CRAN_INDEX:
-            try:
-                session = requests.Session()
-                CRAN_INDEX = self._get_cran_index(session)
-                logger.debug("Cran source initialized")
-            except Exception:
-                logger.exception("Cran initialization failed")
-                CRAN_INDEX = {}
+        with _SOURCE_INDEX_LOCK:
+            if not CRAN_INDEX:
+                try:
+                    index = load_source_index(
+                        self.index_filename,
+                        lambda: self._get_cran_index(get_http_client()),
+                    )
+                    # JSON turns the (name, version) tuples into lists
+                    CRAN_INDEX = {k: tuple(v) for k, v in index.items()}
+                    logger.debug("Cran source initialized")
+                except Exception:
+                    logger.exception("Cran initialization failed")
+                    CRAN_INDEX = {}
 
-    def _get_cran_index(self, session: requests.Session) -> dict:
+    def _get_cran_index(self, session: CachingHTTPClient) -> dict:
         # from conda_build/skeletons/cran.py:get_cran_index
         logger.debug("Fetching cran index from %s", self.cran_url)
         r = session.get(self.cran_url + "/src/contrib/")
@@ -392,11 +519,12 @@ ROS_DISTRO_INDEX: dict = {}
 
 class ROSDistro(AbstractSource):
     name = "ROSDistro"
+    rosdistro_url = "https://raw.githubusercontent.com/ros/rosdistro/master"
+    index_filename = "rosdistro_index.json"
 
     def parse_idx(self, distro_name: str = "melodic") -> dict:
-        session = requests.Session()
-        res = session.get(
-            f"https://raw.githubusercontent.com/ros/rosdistro/master/{distro_name}/distribution.yaml",  # noqa
+        res = get_http_client().get(
+            f"{self.rosdistro_url}/{distro_name}/distribution.yaml",
         )
         res.raise_for_status()
         resd = yaml.safe_load(res.text)
@@ -426,14 +554,18 @@ class ROSDistro(AbstractSource):
 
     def init(self) -> None:
         global ROS_DISTRO_INDEX
-        if not ROS_DISTRO_INDEX:
+        if not hasattr(self, "version_url_cache"):
             self.version_url_cache: dict[str, str] = {}
-            try:
-                ROS_DISTRO_INDEX = self.parse_idx("melodic")
-                logger.info("ROS Distro source initialized")
-            except Exception:
-                logger.exception("ROS Distro initialization failed")
-                ROS_DISTRO_INDEX = {}
+        with _SOURCE_INDEX_LOCK:
+            if not ROS_DISTRO_INDEX:
+                try:
+                    ROS_DISTRO_INDEX = load_source_index(
+                        self.index_filename, lambda: self.parse_idx("melodic")
+                    )
+                    logger.info("ROS Distro source initialized")
+                except Exception:
+                    logger.exception("ROS Distro initialization failed")
+                    ROS_DISTRO_INDEX = {}
 
     def get_url(self, node_attrs: AttrsTypedDict) -> str | None:
         if not node_attrs["name"].startswith("ros-"):
@@ -479,6 +611,37 @@ def get_sha256(url: str) -> str | None:
 
 
 def url_exists(url: str, timeout: int | float = 5, use_curl: bool = False) -> bool:
+    """Check whether a URL exists.
+
+    HTTP(S) URLs are checked in-process with the shared HTTP client, which
+    follows redirects (GitHub redirects with a 3XX code even if the file does
+    not exist) and remembers missing URLs for a while. Other URLs (e.g., FTP,
+    which requests cannot handle) are checked with curl/wget.
+
+    Parameters
+    ----------
+    url : str
+        The URL to check.
+    timeout : int | float, optional
+        The timeout in seconds.
+    use_curl : bool, optional
+        Use curl instead of wget for URLs checked in a subprocess.
+
+    Returns
+    -------
+    bool
+        True if the URL exists.
+    """
+    if settings().version_sources_url_probe_in_process and urllib.parse.urlsplit(
+        url
+    ).scheme in ("http", "https"):
+        return get_http_client().url_exists(url, timeout=timeout)
+    return _url_exists_subprocess(url, timeout=timeout, use_curl=use_curl)
+
+
+def _url_exists_subprocess(
+    url: str, timeout: int | float = 5, use_curl: bool = False
+) -> bool:
     """
     We use curl/wget here, as opposed requests.head, because
      - github urls redirect with a 3XX code even if the file doesn't exist
@@ -556,6 +719,166 @@ def url_exists_swap_exts(url: str, use_curl: bool = False):
     return False, None
 
 
+# any jinja2 statement besides setting a variable (e.g., if, for, macro)
+_JINJA2_CONTROL_STATEMENT_RE = re.compile(r"{%-?\s*(?!\s|set\s)")
+_JINJA2_SET_STATEMENT_RE = re.compile(r"{%-?\s*set\s+([a-zA-Z_][a-zA-Z0-9_]*)\s*=")
+
+
+def _has_selector_keys(dct: typing.Any, key: str) -> bool:
+    return isinstance(dct, collections.abc.Mapping) and any(
+        k.startswith(key + CONDA_SELECTOR) for k in dct
+    )
+
+
+def _render_recipe_urls(content: str) -> dict | None:
+    """Render the package version and source URLs of a recipe without conda-build.
+
+    Only the jinja2 variables set in the recipe (see `CondaMetaYAML`) are
+    available. If the version or the URLs depend on anything else (e.g.,
+    selectors, jinja2 control statements or the conda-build context), None is
+    returned and the recipe has to be rendered in full.
+
+    Parameters
+    ----------
+    content : str
+        The recipe (v0, i.e., a meta.yaml).
+
+    Returns
+    -------
+    dict | None
+        A partial recipe with the `package` version and the `source` URLs.
+    """
+    if _JINJA2_CONTROL_STATEMENT_RE.search(content):
+        return None
+
+    try:
+        cmeta = CondaMetaYAML(content)
+    except Exception as e:
+        logger.debug("could not parse recipe for its URLs", exc_info=e)
+        return None
+
+    meta = cmeta.meta
+    if (
+        _has_selector_keys(meta, "package")
+        or _has_selector_keys(meta, "source")
+        or not isinstance(meta.get("package"), collections.abc.Mapping)
+        or _has_selector_keys(meta["package"], "version")
+        or "version" not in meta["package"]
+        or "source" not in meta
+    ):
+        return None
+
+    if isinstance(meta["source"], collections.abc.Mapping):
+        sources = [meta["source"]]
+    elif isinstance(meta["source"], collections.abc.Sequence):
+        sources = list(meta["source"])
+    else:
+        return None
+
+    templates = [str(meta["package"]["version"])]
+    for src in sources:
+        if not isinstance(src, collections.abc.Mapping) or _has_selector_keys(
+            src, "url"
+        ):
+            return None
+        url = src.get("url")
+        if isinstance(url, str):
+            templates.append(url)
+        elif isinstance(url, collections.abc.Sequence):
+            if not all(isinstance(u, str) for u in url):
+                return None
+            templates.extend(url)
+        elif url is not None:
+            return None
+
+    env = jinja2.sandbox.SandboxedEnvironment(undefined=jinja2.StrictUndefined)
+
+    # collect the variables the templates depend on, including the ones used
+    # by jinja2 expressions (e.g., `{% set major = version.split(".")[0] %}`)
+    try:
+        needed = set()
+        for tmpl in templates:
+            needed |= jinja2.meta.find_undeclared_variables(env.parse(tmpl))
+        todo = set(needed)
+        while todo:
+            var = todo.pop()
+            if var in cmeta.jinja2_exprs:
+                expr = cmeta.jinja2_exprs[var]
+                if "# [" in expr:
+                    return None
+                new = jinja2.meta.find_undeclared_variables(env.parse(expr)) - needed
+                needed |= new
+                todo |= new
+    except jinja2.TemplateError:
+        return None
+
+    # values that depend on the platform or on the position in the recipe
+    # cannot be used
+    selector_vars = {
+        k.split(CONDA_SELECTOR)[0] for k in cmeta.jinja2_vars if CONDA_SELECTOR in k
+    }
+    num_sets = collections.Counter(_JINJA2_SET_STATEMENT_RE.findall(content))
+    if needed & selector_vars or any(num_sets[var] > 1 for var in needed):
+        return None
+
+    context = {k: v for k, v in cmeta.jinja2_vars.items() if CONDA_SELECTOR not in k}
+    try:
+        context.update(cmeta.eval_jinja2_exprs(context))
+        rendered = [env.from_string(tmpl).render(**context) for tmpl in templates]
+    except Exception as e:
+        logger.debug("could not render recipe URLs", exc_info=e)
+        return None
+
+    version, urls = rendered[0], iter(rendered[1:])
+    new_sources = []
+    for src in sources:
+        url = src.get("url")
+        if isinstance(url, str):
+            new_sources.append({"url": next(urls)})
+        elif url is not None:
+            new_sources.append({"url": [next(urls) for _ in url]})
+        else:
+            new_sources.append({})
+
+    return {
+        "package": {"version": version},
+        "source": new_sources[0]
+        if isinstance(meta["source"], collections.abc.Mapping)
+        else new_sources,
+    }
+
+
+class _RawURLCandidate(typing.NamedTuple):
+    """A candidate version of `BaseRawURL.get_url` and the checks of its URLs."""
+
+    next_ver: str
+    new_content: str | None = None
+    probes: list[tuple[str, Future]] | None = None
+    """The URLs and the futures of their `url_exists_swap_exts` checks, None if
+    the rendered recipe has no URL."""
+    error: Exception | None = None
+    """The exception raised while rendering the recipe, if any."""
+
+
+def _is_raw_url_search_decided(candidates: list[_RawURLCandidate]) -> bool:
+    """Whether the candidates rendered so far decide the result of a round.
+
+    This is the case if all URL checks of the leading candidates are done and
+    one of them exists, or if a candidate ends the search.
+    """
+    for candidate in candidates:
+        if candidate.probes is None:
+            return True
+        if not all(probe.done() for _, probe in candidate.probes):
+            return False
+        if any(
+            probe.exception() is None and probe.result()[0]
+            for _, probe in candidate.probes
+        ):
+            return True
+    return False
+
+
 class BaseRawURL(AbstractSource):
     name = "BaseRawURL"
     next_ver_func: Callable[[str], Iterator[str]]
@@ -585,6 +908,7 @@ class BaseRawURL(AbstractSource):
             platform_arch = f"{plat}-{arch}"
             cbc_data = node_attrs[ci_support_key]  # type: ignore[literal-required]
         else:
+            plat, arch = None, None
             platform_arch = None
             cbc_data = None
 
@@ -607,102 +931,136 @@ class BaseRawURL(AbstractSource):
         count = 0
         max_count = 10
 
-        while found and count < max_count:
-            found = False
-            for next_ver in self.next_ver_func(current_ver):
-                logger.debug("trying version: %s", next_ver)
-
-                if is_version_ignored(node_attrs, next_ver):
-                    logger.debug("version is ignored - skipping!")
-                    continue
+        # the candidate URLs are checked concurrently while the next candidates
+        # are rendered, the first candidate version (in order) with an
+        # existing URL wins
+        pool = ThreadPoolExecutor(
+            max_workers=settings().version_sources_url_probe_concurrency
+        )
+        try:
+            while found and count < max_count:
+                found = False
+                candidates: list[_RawURLCandidate] = []
+                for next_ver in self.next_ver_func(current_ver):
+                    logger.debug("trying version: %s", next_ver)
+
+                    if is_version_ignored(node_attrs, next_ver):
+                        logger.debug("version is ignored - skipping!")
+                        continue
 
-                if has_version_jinja2:
-                    _new_lines = []
-                    for ln in content.splitlines():
-                        if ln.startswith("{% set version ") or ln.startswith(
-                            "{% set version=",
+                    try:
+                        new_content, new_meta = self._render_candidate(
+                            node_attrs,
+                            content,
+                            next_ver,
+                            orig_ver,
+                            has_version_jinja2,
+                            cbc_data,
+                            plat,
+                            arch,
+                            platform_arch,
+                        )
+                    except Exception as e:
+                        # only raised if no earlier candidate is found
+                        candidates.append(_RawURLCandidate(next_ver, error=e))
+                        break
+
+                    new_urls = urls_from_meta(new_meta)
+                    if len(new_urls) == 0:
+                        candidates.append(_RawURLCandidate(next_ver))
+                        break
+
+                    logger.debug(
+                        "parsed new version: %s", new_meta["package"]["version"]
+                    )
+                    probes = []
+                    for url in new_urls:
+                        # this URL looks bad if these things happen
+                        if (
+                            str(new_meta["package"]["version"]) != next_ver
+                            or node_attrs.get("url", "") == url
+                            or url in orig_urls
                         ):
-                            _new_lines.append('{%% set version = "%s" %%}' % next_ver)
-                        else:
-                            _new_lines.append(ln)
-                    new_content = "\n".join(_new_lines)
-                else:
-                    new_content = content.replace(orig_ver, next_ver)
-                if node_attrs["meta_yaml"].get("schema_version", 0) == 0:
-                    if cbc_data is not None:
-                        with tempfile.TemporaryDirectory() as tmpdir:
-                            cbc_pth = os.path.join(tmpdir, "conda_build_config.yaml")
-                            with open(cbc_pth, "w") as fp:
-                                fp.write(cbc_data)
-                            new_meta = parse_meta_yaml(
-                                new_content, platform=plat, arch=arch, cbc_path=cbc_pth
+                            logger.debug(
+                                "skipping url '%s' due to "
+                                "\n    %s = %s\n    %s = %s\n    %s = %s",
+                                url,
+                                'str(new_meta["package"]["version"]) != next_ver',
+                                str(new_meta["package"]["version"]) != next_ver,
+                                'meta_yaml["url"] == url',
+                                node_attrs.get("url", "") == url,
+                                "url in orig_urls",
+                                url in orig_urls,
                             )
-                    else:
-                        new_meta = parse_meta_yaml(new_content)
-                else:
-                    new_meta = parse_recipe_yaml(
-                        new_content, platform_arch=platform_arch, cbc_path=cbc_data
+                            continue
+
+                        logger.debug("trying url: %s", url)
+                        probes.append(
+                            (
+                                url,
+                                pool.submit(
+                                    url_exists_swap_exts, url, use_curl=use_curl
+                                ),
+                            )
+                        )
+                    candidates.append(
+                        _RawURLCandidate(
+                            next_ver, new_content=new_content, probes=probes
+                        )
                     )
-                new_urls = urls_from_meta(new_meta)
-                if len(new_urls) == 0:
-                    logger.debug("No URL in meta.yaml")
-                    return None
 
-                logger.debug("parsed new version: %s", new_meta["package"]["version"])
-                url_to_use = None
-                for url in urls_from_meta(new_meta):
-                    # this URL looks bad if these things happen
-                    if (
-                        str(new_meta["package"]["version"]) != next_ver
-                        or node_attrs.get("url", "") == url
-                        or url in orig_urls
-                    ):
-                        logger.debug(
-                            "skipping url '%s' due to "
-                            "\n    %s = %s\n    %s = %s\n    %s = %s",
-                            url,
-                            'str(new_meta["package"]["version"]) != next_ver',
-                            str(new_meta["package"]["version"]) != next_ver,
-                            'meta_yaml["url"] == url',
-                            node_attrs.get("url", "") == url,
-                            "url in orig_urls",
-                            url in orig_urls,
-                        )
-                        continue
+                    if _is_raw_url_search_decided(candidates):
+                        break
 
-                    logger.debug("trying url: %s", url)
-                    _exists, _url_to_use = url_exists_swap_exts(url, use_curl=use_curl)
-                    if not _exists:
-                        logger.debug(
-                            "version %s does not exist for url %s",
-                            next_ver,
-                            url,
-                        )
-                        continue
-                    else:
-                        url_to_use = _url_to_use
-
-                if url_to_use is not None:
-                    found = True
-                    count = count + 1
-                    current_ver = next_ver
-                    new_sha256 = get_sha256(url_to_use)
-                    if new_sha256 is None:
-                        logger.debug(
-                            "skipping url %s because it did not has",
-                            url_to_use,
-                        )
+                for candidate in candidates:
+                    if candidate.error is not None:
+                        raise candidate.error
+                    if candidate.probes is None:
+                        logger.debug("No URL in meta.yaml")
                         return None
 
-                    if new_sha256 == current_sha256 or new_sha256 in new_content:
+                    url_to_use = None
+                    for url, probe in candidate.probes:
+                        _exists, _url_to_use = probe.result()
+                        if not _exists:
+                            logger.debug(
+                                "version %s does not exist for url %s",
+                                candidate.next_ver,
+                                url,
+                            )
+                            continue
+                        else:
+                            url_to_use = _url_to_use
+
+                    if url_to_use is not None:
+                        found = True
+                        count = count + 1
+                        current_ver = candidate.next_ver
+                        new_sha256 = get_sha256(url_to_use)
+                        if new_sha256 is None:
+                            logger.debug(
+                                "skipping url %s because it did not has",
+                                url_to_use,
+                            )
+                            return None
+
+                        if (
+                            new_sha256 == current_sha256
+                            or new_sha256 in candidate.new_content
+                        ):
+                            logger.debug(
+                                "skipping url %s because it returned the same hash",
+                                url_to_use,
+                            )
+                            return None
+                        current_sha256 = new_sha256
                         logger.debug(
-                            "skipping url %s because it returned the same hash",
-                            url_to_use,
+                            "version %s is ok for url %s", current_ver, url_to_use
                         )
-                        return None
-                    current_sha256 = new_sha256
-                    logger.debug("version %s is ok for url %s", current_ver, url_to_use)
-                    break
+                        break
+        finally:
+            # do not wait for the probes of candidates that are not needed
+            pool.shutdown(wait=False, cancel_futures=True)
 
         if current_ver != orig_ver:
             logger.debug("using version %s", current_ver)
@@ -710,6 +1068,61 @@ class BaseRawURL(AbstractSource):
 
         return None
 
+    def _render_candidate(
+        self,
+        node_attrs: AttrsTypedDict,
+        content: str,
+        next_ver: str,
+        orig_ver: str,
+        has_version_jinja2: bool,
+        cbc_data: str | None,
+        plat: str | None,
+        arch: str | None,
+        platform_arch: str | None,
+        render_urls_only: bool = True,
+    ) -> tuple[str, typing.Any]:
+        """Render the recipe with the version set to `next_ver`.
+
+        Returns the new recipe content and the rendered recipe. If
+        `render_urls_only` is True and possible, only the package version and
+        the source URLs of a v0 recipe are rendered (see `_render_recipe_urls`)
+        instead of the full recipe.
+        """
+        if has_version_jinja2:
+            _new_lines = []
+            for ln in content.splitlines():
+                if ln.startswith("{% set version ") or ln.startswith(
+                    "{% set version=",
+                ):
+                    _new_lines.append('{%% set version = "%s" %%}' % next_ver)
+                else:
+                    _new_lines.append(ln)
+            new_content = "\n".join(_new_lines)
+        else:
+            new_content = content.replace(orig_ver, next_ver)
+        if node_attrs["meta_yaml"].get("schema_version", 0) == 0:
+            if render_urls_only:
+                new_meta = _render_recipe_urls(new_content)
+                if new_meta is not None:
+                    return new_content, new_meta
+                logger.debug("rendering full recipe for version %s", next_ver)
+
+            if cbc_data is not None:
+                with tempfile.TemporaryDirectory() as tmpdir:
+                    cbc_pth = os.path.join(tmpdir, "conda_build_config.yaml")
+                    with open(cbc_pth, "w") as fp:
+                        fp.write(cbc_data)
+                    new_meta = parse_meta_yaml(
+                        new_content, platform=plat, arch=arch, cbc_path=cbc_pth
+                    )
+            else:
+                new_meta = parse_meta_yaml(new_content)
+        else:
+            new_meta = parse_recipe_yaml(
+                new_content, platform_arch=platform_arch, cbc_path=cbc_data
+            )
+        return new_content, new_meta
+
     def get_version(self, url: str, node_attrs: AttrsTypedDict) -> str:
         return url
 
@@ -834,7 +1247,7 @@ class GithubReleases(AbstractSource):
         return f"https://github.com/{owner}/{repo}/releases/latest"
 
     def get_version(self, url: str, node_attrs: AttrsTypedDict) -> str | None:
-        r = requests.get(url)
+        r = get_http_client().get(url)
         if not r.ok:
             return None
         # "/releases/latest" redirects to "/releases/tag/<tag name>"
@@ -976,7 +1389,7 @@ class NVIDIA(AbstractSource):
         """
         actual_url, slug = url.split("#")
         logger.debug("Searching %s for redistrib_X.Y.Z.json", actual_url)
-        response = requests.get(actual_url)
+        response = get_http_client().get(actual_url)
         html_content = response.text
         # Search for links to redistrib_*.json in the response and strip the versions from there
         # re doesn't support repeating patterns, so we cannot use r"redistrib_([0-9]+\.)+json<"
@@ -991,10 +1404,11 @@ class NVIDIA(AbstractSource):
         release_version = stripped_results[0]
 
         # Fetch library details from developer archive
-        response = urllib.request.urlopen(
+        response = get_http_client().get(
             f"{actual_url}/redistrib_{release_version}.json"
         )
-        json_data = json.loads(response.read().decode("utf-8"))
+        response.raise_for_status()
+        json_data = response.json()
 
         # Extract version from library details
         try:
@@ -1026,7 +1440,7 @@ class CratesIO(AbstractSource):
         return f"https://index.crates.io/{tier}"
 
     def get_version(self, url: str, node_attrs: AttrsTypedDict) -> str | None:
-        r = requests.get(url)
+        r = get_http_client().get(url)
 
         if not r.ok:
             return None
@@ -5,7 +5,7 @@ import os
 import secrets
 import time
 from collections.abc import Iterable, Iterator, Mapping, MutableMapping
-from concurrent.futures import as_completed
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
 from typing import (
     Any,
     TypeVar,
@@ -22,6 +22,7 @@ from conda_forge_feedstock_ops.container_utils import (
 from conda_forge_tick.cli_context import CliContext
 from conda_forge_tick.deploy import deploy
 from conda_forge_tick.executors import executor
+from conda_forge_tick.http_cache import get_http_client
 from conda_forge_tick.lazy_json_backends import LazyJson, dumps
 from conda_forge_tick.settings import (
     ENV_CONDA_FORGE_ORG,
@@ -33,6 +34,7 @@ from conda_forge_tick.update_sources import (
     NPM,
     NVIDIA,
     AbstractSource,
+    BaseRawURL,
     CratesIO,
     Github,
     GithubReleases,
@@ -41,6 +43,7 @@ from conda_forge_tick.update_sources import (
     PyPI,
     RawURL,
     ROSDistro,
+    get_source_index_dir,
 )
 from conda_forge_tick.utils import get_keys_default, load_existing_graph
 from conda_forge_tick.version_filters import is_version_ignored
@@ -53,6 +56,96 @@ logger = logging.getLogger(__name__)
 RNG = secrets.SystemRandom()
 
 
+def _get_version_from_source(
+    name: str, attrs: Mapping[str, Any], source: AbstractSource
+) -> str | None:
+    logger.debug("Fetching latest version for %s from %s...", name, source.name)
+    url = source.get_url(attrs)  # type: ignore[arg-type]
+    if url is None:
+        return None
+    logger.debug("Using URL %s", url)
+    ver = source.get_version(url, attrs)  # type: ignore[arg-type]
+    if not ver:
+        logger.debug("Upstream: Could not find version on %s", source.name)
+        return None
+    logger.debug("Found version %s on %s", ver, source.name)
+    return ver
+
+
+def _log_source_exception(name: str, source: AbstractSource, e: Exception) -> None:
+    logger.error(
+        "An exception occurred while fetching %s from %s.",
+        name,
+        source.name,
+        exc_info=e,
+    )
+
+
+def _probe_sources_sequential(
+    name: str, attrs: Mapping[str, Any], sources: Iterable[AbstractSource]
+) -> tuple[str | None, list[Exception]]:
+    """Try the sources one after another and stop at the first version found.
+
+    Returns the version (or None) and the exceptions of the sources tried.
+    """
+    exceptions = []
+    for source in sources:
+        try:
+            ver = _get_version_from_source(name, attrs, source)
+        except Exception as e:
+            _log_source_exception(name, source, e)
+            exceptions.append(e)
+        else:
+            if ver:
+                return ver, exceptions
+    return None, exceptions
+
+
+def _probe_sources_concurrent(
+    name: str,
+    attrs: Mapping[str, Any],
+    sources: list[AbstractSource],
+    max_concurrency: int,
+) -> tuple[str | None, list[Exception]]:
+    """Try up to `max_concurrency` sources at once, in priority order.
+
+    The result is the same as for `_probe_sources_sequential`: the version of
+    the first source (in the given order) that finds one, along with the
+    exceptions of the sources before it. Lower priority sources are started
+    speculatively while higher priority ones are still running, and the ones
+    not yet started are cancelled as soon as the result is known.
+
+    The raw URL sources render the recipe and download the candidate sources,
+    which is neither cheap nor thread-safe. They are never started
+    speculatively, and no source after them is started before they are tried.
+    """
+    pool = ThreadPoolExecutor(max_workers=max_concurrency)
+    futures: list[Future] = []
+    exceptions = []
+    try:
+        for head, source in enumerate(sources):
+            # keep the next sources in order running while waiting for this one
+            while len(futures) < min(head + max_concurrency, len(sources)):
+                next_source = sources[len(futures)]
+                if isinstance(next_source, BaseRawURL) and len(futures) > head:
+                    break
+                futures.append(
+                    pool.submit(_get_version_from_source, name, attrs, next_source)
+                )
+
+            try:
+                ver = futures[head].result()
+            except Exception as e:
+                _log_source_exception(name, source, e)
+                exceptions.append(e)
+            else:
+                if ver:
+                    return ver, exceptions
+        return None, exceptions
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
 def get_latest_version_local(
     name: str,
     attrs: Mapping[str, Any],
@@ -126,29 +219,14 @@ def get_latest_version_local(
     else:
         sources_to_use = sources
 
-    exceptions = []
-    for source in sources_to_use:
-        try:
-            logger.debug("Fetching latest version for %s from %s...", name, source.name)
-            url = source.get_url(attrs)  # type: ignore[arg-type]
-            if url is None:
-                continue
-            logger.debug("Using URL %s", url)
-            ver = source.get_version(url, attrs)  # type: ignore[arg-type]
-            if not ver:
-                logger.debug("Upstream: Could not find version on %s", source.name)
-                continue
-            logger.debug("Found version %s on %s", ver, source.name)
-            version_data["new_version"] = ver
-            break
-        except Exception as e:
-            logger.error(
-                "An exception occurred while fetching %s from %s.",
-                name,
-                source.name,
-                exc_info=e,
-            )
-            exceptions.append(e)
+    max_concurrency = settings().version_sources_probe_concurrency
+    if max_concurrency > 1:
+        ver, exceptions = _probe_sources_concurrent(
+            name, attrs, list(sources_to_use), max_concurrency
+        )
+    else:
+        ver, exceptions = _probe_sources_sequential(name, attrs, sources_to_use)
+    version_data["new_version"] = ver
 
     new_version = version_data["new_version"]
 
@@ -204,14 +282,19 @@ def get_latest_version_containerized(
         "-",
         "--sources",
         ",".join([source.name for source in sources]),
+        "--source-index-dir",
+        "/cf_feedstock_ops_dir",
     ]
     args += get_default_log_level_args(logger)
 
     json_blob = dumps(attrs.data) if isinstance(attrs, LazyJson) else dumps(attrs)
 
+    # the source indexes fetched on the host are shared with the container
     return run_container_operation(
         args,
         input=json_blob,
+        mount_readonly=True,
+        mount_dir=get_source_index_dir(),
         extra_container_args=[
             "-e",
             f"{ENV_CONDA_FORGE_ORG}={settings().conda_forge_org}",
@@ -254,6 +337,23 @@ def get_latest_version(
         return get_latest_version_local(name, attrs, sources)
 
 
+def prepare_source_indexes(sources: Iterable[AbstractSource]) -> None:
+    """Fetch (or load from the on-disk cache) the indexes of the version sources.
+
+    This is done once on the host before looking up many versions, so that
+    every version lookup (in a container or not) can use the cached indexes.
+    Otherwise, the indexes are loaded lazily by the sources.
+
+    Parameters
+    ----------
+    sources
+        The version sources.
+    """
+    for source in sources:
+        if source.index_filename is not None:
+            source.init()
+
+
 def get_job_number_for_package(name: str, n_jobs: int):
     """Get the job number for a package.
 
@@ -392,6 +492,9 @@ def _update_upstream_versions_process_pool(
     to_update: Iterable[tuple[str, Mapping]],
     sources: Iterable[AbstractSource],
 ) -> None:
+    # fetch the shared indexes once here instead of in every container
+    prepare_source_indexes(sources)
+
     futures = {}
     # we use threads here since all of the work is done in a container anyways
     with executor(kind="thread", max_workers=5) as pool:
@@ -562,6 +665,12 @@ def update_upstream_versions(
     logger.info("Updating upstream versions")
     updater(to_update, sources)  # type: ignore[arg-type]
 
+    # only covers the requests made in this process (i.e., not in containers)
+    logger.info(
+        "version sources HTTP cache stats: %s",
+        get_http_client().stats.to_json_data(),
+    )
+
 
 def main(
     ctx: CliContext,
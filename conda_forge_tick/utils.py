@@ -1,6 +1,7 @@
 import contextlib
 import copy
 import datetime
+import hashlib
 import io
 import itertools
 import logging
@@ -10,12 +11,14 @@ import re
 import subprocess
 import sys
 import tempfile
+import threading
 import time
 import traceback
 import typing
 import warnings
 from collections import defaultdict
 from collections.abc import Iterable, Mapping, MutableMapping, Sequence
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import (
     Any,
@@ -353,6 +356,195 @@ def parse_recipe_yaml_containerized(
     return data
 
 
+def parse_recipe_yaml_batch(
+    text: str,
+    variants: Sequence[tuple[str | None, Path | str | None]],
+    for_pinning: bool = False,
+    use_container: bool | None = None,
+) -> list["RecipeTypedDict"]:
+    """Parse the recipe.yaml for many platforms and variant config files at once.
+
+    Parameters
+    ----------
+    text : str
+        The raw text in conda-forge feedstock recipe.yaml file
+    variants : sequence of (str | None, Path | str | None)
+        The platform and arch (e.g., 'linux-64') and the value of or path to
+        the global pinning file of each variant. See `parse_recipe_yaml`.
+    for_pinning : bool, optional
+        If True, render the recipe.yaml for pinning migrators, by default False.
+    use_container
+        Whether to use a container to run the parsing.
+        If None, the function will use a container if the environment
+        variable `CF_FEEDSTOCK_OPS_IN_CONTAINER` is 'false'. This feature can be
+        used to avoid container in container calls.
+
+    Returns
+    -------
+    list of dict :
+        The parsed YAML dict of each variant, in the order of `variants`.
+        If parsing fails for some variants, the error of the first one is raised.
+    """
+    if should_use_container(use_container=use_container):
+        return parse_recipe_yaml_batch_containerized(
+            text,
+            variants,
+            for_pinning=for_pinning,
+        )
+    else:
+        return parse_recipe_yaml_batch_local(
+            text,
+            variants,
+            for_pinning=for_pinning,
+        )
+
+
+def parse_recipe_yaml_batch_containerized(
+    text: str,
+    variants: Sequence[tuple[str | None, Path | str | None]],
+    for_pinning: bool = False,
+) -> list["RecipeTypedDict"]:
+    """Parse the recipe.yaml for many platforms and variant config files at once.
+
+    **This function runs the parsing of all variants in a single container.**
+
+    Parameters
+    ----------
+    text : str
+        The raw text in conda-forge feedstock recipe.yaml file
+    variants : sequence of (str | None, Path | str | None)
+        The platform and arch (e.g., 'linux-64') and the value of or path to
+        the global pinning file of each variant. See `parse_recipe_yaml`.
+    for_pinning : bool, optional
+        If True, render the recipe.yaml for pinning migrators, by default False.
+
+    Returns
+    -------
+    list of dict :
+        The parsed YAML dict of each variant, in the order of `variants`.
+    """
+    args = [
+        "conda-forge-tick-container",
+        "parse-recipe-yaml-batch",
+    ]
+
+    args += get_default_log_level_args(logger)
+
+    if for_pinning:
+        args += ["--for-pinning"]
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        os.chmod(tmpdir, 0o755)
+
+        for i, (platform_arch, cbc_path) in enumerate(variants):
+            if cbc_path is not None:
+                if os.path.exists(cbc_path):
+                    with open(cbc_path) as fp_r:
+                        cbc_data = fp_r.read()
+                else:
+                    cbc_data = str(cbc_path)
+
+                with open(os.path.join(tmpdir, f"cbc_path_{i}.yaml"), "w") as fp:
+                    fp.write(cbc_data)
+
+                container_cbc_path = f"/cf_feedstock_ops_dir/cbc_path_{i}.yaml"
+            else:
+                container_cbc_path = ""
+
+            args += ["--variant", f"{platform_arch or ''}:{container_cbc_path}"]
+
+        data = run_container_operation(
+            args,
+            input=text,
+            mount_readonly=True,
+            mount_dir=tmpdir,
+            extra_container_args=[
+                "-e",
+                f"{ENV_CONDA_FORGE_ORG}={settings().conda_forge_org}",
+                "-e",
+                f"{ENV_GRAPH_GITHUB_BACKEND_REPO}={settings().graph_github_backend_repo}",
+            ],
+        )
+
+    return data
+
+
+def get_feedstock_parsing_max_workers() -> int:
+    """Get the number of variants of a feedstock to render at the same time.
+
+    Returns
+    -------
+    int
+        The `feedstock_parsing_max_workers` setting or, if it is not set, 4 inside
+        of a container and 1 otherwise.
+    """
+    max_workers = settings().feedstock_parsing_max_workers
+    if max_workers is None:
+        if os.environ.get("CF_FEEDSTOCK_OPS_IN_CONTAINER", "false") == "true":
+            max_workers = 4
+        else:
+            max_workers = 1
+    return max_workers
+
+
+def parse_recipe_yaml_batch_local(
+    text: str,
+    variants: Sequence[tuple[str | None, Path | str | None]],
+    for_pinning: bool = False,
+) -> list["RecipeTypedDict"]:
+    """Parse the recipe.yaml for many platforms and variant config files at once.
+
+    The recipe is prepared for rendering once and up to
+    `get_feedstock_parsing_max_workers()` variants are rendered at the same time.
+
+    Parameters
+    ----------
+    text : str
+        The raw text in conda-forge feedstock recipe.yaml file
+    variants : sequence of (str | None, Path | str | None)
+        The platform and arch (e.g., 'linux-64') and the value of or path to
+        the global pinning file of each variant. See `parse_recipe_yaml`.
+    for_pinning : bool, optional
+        If True, render the recipe.yaml for pinning migrators, by default False.
+
+    Returns
+    -------
+    list of dict :
+        The parsed YAML dict of each variant, in the order of `variants`.
+        If parsing fails for some variants, the error of the first one is raised.
+    """
+    prepared_text = _prepare_recipe_yaml_text(text)
+    max_workers = min(get_feedstock_parsing_max_workers(), len(variants))
+    if max_workers <= 1:
+        return [
+            _parse_prepared_recipe_yaml(
+                prepared_text,
+                for_pinning=for_pinning,
+                platform_arch=platform_arch,
+                cbc_path=cbc_path,
+            )
+            for platform_arch, cbc_path in variants
+        ]
+
+    # the rendering happens in rattler-build subprocesses, so threads suffice
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = [
+            pool.submit(
+                _parse_prepared_recipe_yaml,
+                prepared_text,
+                for_pinning=for_pinning,
+                platform_arch=platform_arch,
+                cbc_path=cbc_path,
+            )
+            for platform_arch, cbc_path in variants
+        ]
+        try:
+            return [future.result() for future in futures]
+        finally:
+            for future in futures:
+                future.cancel()
+
+
 def _flatten_requirement_pin_dicts(
     recipes: list["RecipeTypedDict"],
 ) -> list["RecipeTypedDict"]:
@@ -433,14 +625,30 @@ def parse_recipe_yaml_local(
     dict :
         The parsed YAML dict. If parsing fails, returns an empty dict. May raise
         for some errors. Have fun.
+    """
+    return _parse_prepared_recipe_yaml(
+        _prepare_recipe_yaml_text(text),
+        for_pinning=for_pinning,
+        platform_arch=platform_arch,
+        cbc_path=cbc_path,
+    )
+
+
+def _parse_prepared_recipe_yaml(
+    prepared_text: str,
+    for_pinning: bool = False,
+    platform_arch: str | None = None,
+    cbc_path: Path | str | None = None,
+) -> "RecipeTypedDict":
+    """Parse a recipe.yaml prepared by `_prepare_recipe_yaml_text`.
 
     Raises
     ------
     RuntimeError
         If the recipe YAML rendering fails or no output recipes are found.
     """
-    rendered_recipes = _render_recipe_yaml(
-        text, cbc_path=cbc_path, platform_arch=platform_arch
+    rendered_recipes = _render_prepared_recipe_yaml(
+        prepared_text, cbc_path=cbc_path, platform_arch=platform_arch
     )
     if not rendered_recipes:
         raise RuntimeError("Failed to render recipe YAML! No output recipes found!")
@@ -478,6 +686,24 @@ def replace_compiler_with_stub(text: str) -> str:
     return text
 
 
+RENDERED_RECIPE_YAML_CACHE_MAX_ENTRIES = 256
+"""
+The maximum number of rattler-build renders of recipe.yaml files kept in memory.
+"""
+
+_RENDERED_RECIPE_YAML_CACHE: dict[tuple, list[dict[str, Any]]] = {}
+_RENDERED_RECIPE_YAML_CACHE_LOCK = threading.Lock()
+
+
+def _prepare_recipe_yaml_text(text: str) -> str:
+    stubbed_text = replace_compiler_with_stub(text)
+    # rattler-build --render-only drops staging outputs and does not
+    # propagate their build/host requirements into inheriting outputs,
+    # so flatten them first to keep the dep graph complete for pinning
+    # and arch migrations.
+    return flatten_staging_inheritance(stubbed_text)
+
+
 def _render_recipe_yaml(
     text: str,
     platform_arch: str | None = None,
@@ -499,12 +725,49 @@ def _render_recipe_yaml(
     -------
     dict[str, Any]
         The rendered recipe as a dictionary.
+    """
+    return _render_prepared_recipe_yaml(
+        _prepare_recipe_yaml_text(text),
+        platform_arch=platform_arch,
+        cbc_path=cbc_path,
+    )
+
+
+def _render_prepared_recipe_yaml(
+    prepared_text: str,
+    platform_arch: str | None = None,
+    cbc_path: str | Path | None = None,
+) -> list[dict[str, Any]]:
+    """Render a recipe prepared by `_prepare_recipe_yaml_text`.
+
+    The renders are cached by the hashes of the recipe and of the variant
+    config file, so rendering the same recipe with the same pinnings again
+    does not run rattler-build.
 
     Raises
     ------
     RuntimeError
         If no output recipes are found.
     """
+    if cbc_path is not None and os.path.exists(str(cbc_path)):
+        with open(cbc_path, "rb") as fp:
+            cbc_data = fp.read()
+    elif cbc_path is not None:
+        cbc_data = str(cbc_path).encode("utf-8")
+    else:
+        cbc_data = None
+    # rattler-build only gets the target platform if there is no variant config
+    key = (
+        hashlib.sha256(prepared_text.encode("utf-8")).hexdigest(),
+        hashlib.sha256(cbc_data).hexdigest() if cbc_data is not None else None,
+        platform_arch if cbc_data is None else None,
+    )
+    with _RENDERED_RECIPE_YAML_CACHE_LOCK:
+        outputs = _RENDERED_RECIPE_YAML_CACHE.get(key)
+    if outputs is not None:
+        # the callers modify the recipes in place
+        return copy.deepcopy(outputs)
+
     with tempfile.TemporaryDirectory() as tmpdir:
         if cbc_path is not None and not os.path.exists(str(cbc_path)):
             _cbc_path = os.path.join(tmpdir, "conda_build_config.yaml")
@@ -522,13 +785,6 @@ def _render_recipe_yaml(
             else ["--target-platform", platform_arch]
         )
 
-        stubbed_text = replace_compiler_with_stub(text)
-        # rattler-build --render-only drops staging outputs and does not
-        # propagate their build/host requirements into inheriting outputs,
-        # so flatten them first to keep the dep graph complete for pinning
-        # and arch migrations.
-        prepared_text = flatten_staging_inheritance(stubbed_text)
-
         res = subprocess.run(
             ["rattler-build", "build", "--render-only"]
             + variant_config_flags
@@ -553,7 +809,12 @@ def _render_recipe_yaml(
             raise RuntimeError(
                 f"Failed to render recipe YAML! No output recipes found!\n{res.stdout}\n{res.stderr}"
             )
-        return outputs
+
+    with _RENDERED_RECIPE_YAML_CACHE_LOCK:
+        if len(_RENDERED_RECIPE_YAML_CACHE) >= RENDERED_RECIPE_YAML_CACHE_MAX_ENTRIES:
+            del _RENDERED_RECIPE_YAML_CACHE[next(iter(_RENDERED_RECIPE_YAML_CACHE))]
+        _RENDERED_RECIPE_YAML_CACHE[key] = outputs
+    return copy.deepcopy(outputs)
 
 
 def _process_recipe_for_pinning(recipes: list[dict[str, Any]]) -> list[dict[str, Any]]:
@@ -1028,19 +1289,10 @@ def parse_meta_yaml_local(
                 module=r"conda_build\.environ",
             )
 
-            class RenderingFilter(logging.Filter):
-                def filter(self, record):
-                    if (
-                        record.msg.startswith("No numpy version specified")
-                        or record.msg.startswith("Setting build platform")
-                        or record.msg.startswith("Setting build arch")
-                    ):
-                        return False
-                    return True
-
-            rendering_filter = RenderingFilter()
             try:
-                logging.getLogger("conda_build.metadata").addFilter(rendering_filter)
+                logging.getLogger("conda_build.metadata").addFilter(
+                    _CONDA_BUILD_RENDERING_FILTER
+                )
 
                 return _parse_meta_yaml_impl(
                     text,
@@ -1052,7 +1304,9 @@ def parse_meta_yaml_local(
                     orig_cbc_path=(orig_cbc_path if use_orig_cbc_path else None),
                 )
             finally:
-                logging.getLogger("conda_build.metadata").removeFilter(rendering_filter)
+                logging.getLogger("conda_build.metadata").removeFilter(
+                    _CONDA_BUILD_RENDERING_FILTER
+                )
 
     try:
         return _run(use_orig_cbc_path=True)
@@ -1070,6 +1324,145 @@ def parse_meta_yaml_local(
             )
 
 
+class _CondaBuildRenderingFilter(logging.Filter):
+    def filter(self, record):
+        if (
+            record.msg.startswith("No numpy version specified")
+            or record.msg.startswith("Setting build platform")
+            or record.msg.startswith("Setting build arch")
+        ):
+            return False
+        return True
+
+
+_CONDA_BUILD_RENDERING_FILTER = _CondaBuildRenderingFilter()
+
+
+class CondaBuildRenderContext:
+    """The conda-build state reused when rendering many meta.yaml files.
+
+    Preparing the conda-build config and loading the variant config files
+    (i.e., the pinnings) takes longer than rendering a recipe with them, while
+    the bot renders many recipes with the same few variant config files. This
+    context keeps the config, the combined variant spec and the exploded
+    variants for each platform, architecture and contents of the variant
+    config files. Only the recipe-dependent state is created for every render.
+
+    The context is thread-safe.
+
+    Parameters
+    ----------
+    max_entries
+        The maximum number of prepared configs kept. The oldest one is dropped
+        when more are needed.
+    """
+
+    def __init__(self, max_entries: int = 64):
+        self.max_entries = max_entries
+        self.num_hits = 0
+        self.num_misses = 0
+
+        self._lock = threading.Lock()
+        self._entries: dict[tuple, tuple[Any, list[dict]]] = {}
+
+    def clear(self) -> None:
+        """Drop all prepared configs."""
+        with self._lock:
+            self._entries.clear()
+
+    def get_config_and_variants(
+        self,
+        recipe_dir: str,
+        platform: str,
+        arch: str,
+        cbc_path: str,
+        log_debug: bool = False,
+    ) -> tuple[Any, list[dict]]:
+        """Get the conda-build config and the variants to render a recipe with.
+
+        Parameters
+        ----------
+        recipe_dir
+            The directory of the recipe. Its `conda_build_config.yaml` (if any)
+            is part of the variant config.
+        platform
+            The platform (e.g., 'linux', 'osx', 'win').
+        arch
+            The CPU architecture (e.g., '64', 'aarch64').
+        cbc_path
+            The path to the variant config file (e.g., a .ci_support file).
+        log_debug
+            If False, the output of conda-build while preparing the config
+            is suppressed.
+
+        Returns
+        -------
+        tuple
+            The conda-build config and a copy of the exploded variants. The
+            config must not be modified.
+        """
+        import conda_build.config
+        import conda_build.variants
+
+        with open(cbc_path, "rb") as fp:
+            cbc_hash = hashlib.sha256(fp.read()).hexdigest()
+        recipe_cbc_path = os.path.join(recipe_dir, "conda_build_config.yaml")
+        if os.path.exists(recipe_cbc_path):
+            with open(recipe_cbc_path, "rb") as fp:
+                recipe_cbc_hash = hashlib.sha256(fp.read()).hexdigest()
+        else:
+            recipe_cbc_hash = None
+        key = (platform, arch, cbc_hash, recipe_cbc_hash)
+
+        with self._lock:
+            if key in self._entries:
+                self.num_hits += 1
+                config, variants = self._entries[key]
+                return config, copy.deepcopy(variants)
+            self.num_misses += 1
+
+            logger.debug(
+                "preparing conda-build config for platform %s with cbc %s and arch %s",
+                platform,
+                cbc_path,
+                arch,
+            )
+            # this code did use wulritzer.sys_pipes but that seemed
+            # to cause conda-build to hang
+            # versions:
+            #   wurlitzer 3.0.2 py38h50d1736_1    conda-forge
+            #   conda     4.11.0           py38h50d1736_0    conda-forge
+            #   conda-build   3.21.7           py38h50d1736_0    conda-forge
+            with contextlib.ExitStack() as stack:
+                if not log_debug:
+                    stack.enter_context(contextlib.redirect_stdout(io.StringIO()))
+                    stack.enter_context(contextlib.redirect_stderr(io.StringIO()))
+                config = conda_build.config.get_or_merge_config(
+                    None,
+                    platform=platform,
+                    arch=arch,
+                    variant_config_files=[cbc_path],
+                )
+                _cbc, _ = conda_build.variants.get_package_combined_spec(
+                    recipe_dir,
+                    config=config,
+                )
+            variants = conda_build.variants.explode_variants(_cbc)
+
+            if len(self._entries) >= self.max_entries:
+                del self._entries[next(iter(self._entries))]
+            self._entries[key] = (config, variants)
+            return config, copy.deepcopy(variants)
+
+
+_CONDA_BUILD_RENDER_CONTEXT = CondaBuildRenderContext()
+
+
+def get_conda_build_render_context() -> CondaBuildRenderContext:
+    """Get the process-wide conda-build render context used by `parse_meta_yaml`."""
+    return _CONDA_BUILD_RENDER_CONTEXT
+
+
 def _parse_meta_yaml_impl(
     text: str,
     for_pinning=False,
@@ -1079,11 +1472,9 @@ def _parse_meta_yaml_impl(
     log_debug=False,
     orig_cbc_path=None,
 ) -> "RecipeTypedDict":
-    import conda_build.api
     import conda_build.environ
     from conda_build.config import Config
     from conda_build.metadata import MetaData, parse
-    from conda_build.variants import explode_variants
 
     if logger.getEffectiveLevel() <= logging.DEBUG:
         log_debug = True
@@ -1100,48 +1491,22 @@ def _parse_meta_yaml_impl(
                     ) as fp_w:
                         fp_w.write(fp_r.read())
 
-            def _run_parsing():
-                logger.debug(
-                    "parsing for platform %s with cbc %s and arch %s",
-                    platform,
-                    cbc_path,
-                    arch,
-                )
-                config = conda_build.config.get_or_merge_config(
-                    None,
-                    platform=platform,
-                    arch=arch,
-                    variant_config_files=[
-                        cbc_path,
-                    ],
-                )
-                _cbc, _ = conda_build.variants.get_package_combined_spec(
-                    tmpdir,
-                    config=config,
-                )
-                return config, _cbc
-
-            if not log_debug:
-                fout = io.StringIO()
-                ferr = io.StringIO()
-                # this code did use wulritzer.sys_pipes but that seemed
-                # to cause conda-build to hang
-                # versions:
-                #   wurlitzer 3.0.2 py38h50d1736_1    conda-forge
-                #   conda     4.11.0           py38h50d1736_0    conda-forge
-                #   conda-build   3.21.7           py38h50d1736_0    conda-forge
-                with (
-                    contextlib.redirect_stdout(
-                        fout,
-                    ),
-                    contextlib.redirect_stderr(ferr),
-                ):
-                    config, _cbc = _run_parsing()
-            else:
-                config, _cbc = _run_parsing()
+            logger.debug(
+                "parsing for platform %s with cbc %s and arch %s",
+                platform,
+                cbc_path,
+                arch,
+            )
+            config, variants = get_conda_build_render_context().get_config_and_variants(
+                tmpdir,
+                platform,
+                arch,
+                cbc_path,
+                log_debug=log_debug,
+            )
 
             cfg_as_dict = {}
-            for var in explode_variants(_cbc):
+            for var in variants:
                 try:
                     m = MetaData(tmpdir, config=config, variant=var)
                 except SystemExit as e:
@@ -3,6 +3,11 @@ import os
 import shutil
 import subprocess
 import tempfile
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from types import TracebackType
 from typing import Self
 
@@ -168,3 +173,142 @@ def temporary_environment():
     finally:
         os.environ.clear()
         os.environ.update(old_env)
+
+
+@dataclass
+class FakeHTTPRequest:
+    method: str
+    path: str
+    headers: dict[str, str]
+    body: bytes
+
+
+FakeHTTPResponse = tuple[int, dict[str, str], bytes]
+
+
+class FakeHTTPServer:
+    """A local HTTP server for tests.
+
+    Register responses with `add_route`. Every request is recorded in `requests`.
+    Unknown routes return a 404. A route whose path ends with ``/*`` matches all
+    paths below it.
+    """
+
+    def __init__(self):
+        self.routes: dict[
+            tuple[str, str], Callable[[FakeHTTPRequest], FakeHTTPResponse]
+        ] = {}
+        self.requests: list[FakeHTTPRequest] = []
+        self._lock = threading.Lock()
+
+        server = self
+
+        class _Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _handle(self):
+                length = int(self.headers.get("Content-Length", 0) or 0)
+                req = FakeHTTPRequest(
+                    method=self.command,
+                    path=self.path,
+                    headers=dict(self.headers.items()),
+                    body=self.rfile.read(length) if length else b"",
+                )
+                with server._lock:
+                    server.requests.append(req)
+                    route = server._find_route(self.command, self.path.split("?")[0])
+
+                if route is None:
+                    status, headers, body = 404, {}, b"not found"
+                else:
+                    status, headers, body = route(req)
+
+                self.send_response(status)
+                for k, v in headers.items():
+                    self.send_header(k, v)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                if self.command != "HEAD":
+                    self.wfile.write(body)
+
+            do_GET = _handle
+            do_HEAD = _handle
+            do_POST = _handle
+            do_PATCH = _handle
+            do_PUT = _handle
+            do_DELETE = _handle
+
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        self._httpd.daemon_threads = True
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+
+    def _find_route(
+        self, method: str, path: str
+    ) -> Callable[[FakeHTTPRequest], FakeHTTPResponse] | None:
+        route = self.routes.get((method, path))
+        if route is None:
+            # the longest matching wildcard route wins
+            for (_method, _path), _route in sorted(
+                self.routes.items(), key=lambda x: -len(x[0][1])
+            ):
+                if (
+                    _method == method
+                    and _path.endswith("/*")
+                    and path.startswith(_path[:-1])
+                ):
+                    return _route
+        return route
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def add_route(
+        self,
+        method: str,
+        path: str,
+        status: int = 200,
+        headers: dict[str, str] | None = None,
+        body: bytes | str = b"",
+        delay: float = 0.0,
+        handler: Callable[[FakeHTTPRequest], FakeHTTPResponse] | None = None,
+    ) -> None:
+        """Register a fixed response (or a custom `handler`) for a method and path."""
+        if handler is None:
+            _body = body.encode("utf-8") if isinstance(body, str) else body
+            _headers = headers or {}
+
+            def handler(req: FakeHTTPRequest) -> FakeHTTPResponse:
+                if delay:
+                    time.sleep(delay)
+                return status, _headers, _body
+
+        with self._lock:
+            self.routes[(method, path)] = handler
+
+    def num_requests(self, method: str | None = None, path: str | None = None) -> int:
+        with self._lock:
+            return sum(
+                1
+                for r in self.requests
+                if (method is None or r.method == method)
+                and (path is None or r.path.split("?")[0] == path)
+            )
+
+    def __enter__(self) -> Self:
+        self._thread.start()
+        return self
+
+    def __exit__(self, *args) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+
+@pytest.fixture
+def local_http_server():
+    with FakeHTTPServer() as server:
+        yield server
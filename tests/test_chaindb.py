@@ -0,0 +1,150 @@
+import itertools
+import json
+from collections import ChainMap
+from collections.abc import MutableMapping, MutableSequence, MutableSet
+from pathlib import Path
+
+import pytest
+
+from conda_forge_tick.chaindb import ChainDB, ChainDBDefault, _convert_to_dict
+
+TESTS_PATH = Path(__file__).parent
+
+NODE_ATTRS_FIXTURES = [
+    "test_files_make_migrators/numpy_node_attrs.json",
+    "test_files_make_migrators/aws-c-io_node_attrs.json",
+    "test_yaml/ngmix.json",
+    "test_pypi_name_mapping/node_attrs/a/d/f/6/3/zope.interface.json",
+    "test_pypi_name_mapping/node_attrs/4/0/a/3/b/psutil.json",
+    "test_node_attrs/stackvana-core.json",
+]
+
+
+class _LegacyChainDB(ChainMap):
+    # the implementation before the merged values were memoized
+    def __getitem__(self, key):
+        res = None
+        results = []
+        for mapping in self.maps:
+            results.append(mapping.get(key, ChainDBDefault))
+        if all([isinstance(result, MutableMapping) for result in results]):
+            for result in results:
+                if res is None:
+                    res = _LegacyChainDB(result)
+                else:
+                    res.maps.append(result)
+        elif all(
+            [isinstance(result, (MutableSequence, MutableSet)) for result in results]
+        ):
+            results_chain = itertools.chain(*results)
+            if all([isinstance(result, type(results[0])) for result in results]):
+                return type(results[0])(results_chain)
+            else:
+                return list(results_chain)
+        else:
+            for result in reversed(results):
+                if result is not ChainDBDefault:
+                    return result
+            raise KeyError(f"{key} is none of the current mappings")
+        return res
+
+
+def _legacy_convert_to_dict(cm):
+    if isinstance(cm, ChainMap):
+        return {k: _legacy_convert_to_dict(v) for k, v in cm.items()}
+    return cm
+
+
+def _load_variant_meta_yamls():
+    variants = []
+    for fixture in NODE_ATTRS_FIXTURES:
+        with open(TESTS_PATH / fixture) as fp:
+            node_attrs = json.load(fp)
+        variants.append(
+            [
+                node_attrs[k]
+                for k in sorted(node_attrs)
+                if k.endswith("_meta_yaml") and k != "raw_meta_yaml"
+            ]
+        )
+    return variants
+
+
+def test_chaindb_merges():
+    db = ChainDB(
+        {"a": {"x": 1, "l": [1]}, "b": [1, 2], "c": 1, "s": {1}},
+        {"a": {"y": 2, "l": [2]}, "b": [3], "s": {2}},
+    )
+
+    assert isinstance(db["a"], ChainDB)
+    assert db["a"]["l"] == [1, 2]
+    assert db["b"] == [1, 2, 3]
+    assert db["c"] == 1
+    assert db["s"] == {1, 2}
+    with pytest.raises(KeyError):
+        db["d"]
+    assert db.to_dict() == {
+        "a": {"x": 1, "l": [1, 2], "y": 2},
+        "b": [1, 2, 3],
+        "c": 1,
+        "s": {1, 2},
+    }
+    assert list(db.to_dict()) == list(_legacy_convert_to_dict(_LegacyChainDB(*db.maps)))
+
+
+def test_chaindb_memoizes_and_invalidates():
+    m1 = {"a": [1], "b": 1}
+    m2 = {"a": [2], "b": 2}
+    db = ChainDB(m1, m2)
+
+    assert db["a"] == [1, 2]
+    # merged lists are new objects on every lookup
+    db["a"].append(3)
+    assert db["a"] == [1, 2]
+    assert db["a"] is not db["a"]
+
+    db["b"] = 3
+    assert m1 == {"a": [1], "b": 3}
+    assert m2 == {"a": [2], "b": 3}
+    assert db["b"] == 3
+
+    db["a"] = [4]
+    assert db["a"] == [4, 4]
+
+    db["c"] = 5
+    assert db["c"] == 5
+    del db["c"]
+    assert "c" not in db
+    with pytest.raises(KeyError):
+        db["c"]
+
+    # changes to the underlying mappings need the cache to be cleared
+    assert db["b"] == 3
+    m2["b"] = 6
+    assert db["b"] == 3
+    db.clear_cache()
+    assert db["b"] == 6
+
+
+@pytest.mark.parametrize("fixture", range(len(NODE_ATTRS_FIXTURES)))
+def test_chaindb_to_dict_matches_legacy(fixture):
+    variants = _load_variant_meta_yamls()[fixture]
+    expected = _legacy_convert_to_dict(_LegacyChainDB(*variants))
+    res = _convert_to_dict(ChainDB(*variants))
+    # the key order matters as well
+    assert json.dumps(res) == json.dumps(expected)
+    db = ChainDB(*variants)
+    assert json.dumps({k: _convert_to_dict(db[k]) for k in db}) == json.dumps(expected)
+
+
+def test_chaindb_to_dict_wide_feedstocks():
+    """Merge the per-platform meta.yaml of wide feedstocks."""
+    # a few variants per platform as for feedstocks with many .ci_support files
+    all_variants = [variants * 4 for variants in _load_variant_meta_yamls()]
+
+    expected = [
+        _legacy_convert_to_dict(_LegacyChainDB(*variants)) for variants in all_variants
+    ]
+    res = [_convert_to_dict(ChainDB(*variants)) for variants in all_variants]
+
+    assert json.dumps(res) == json.dumps(expected)
@@ -46,6 +46,8 @@ from conda_forge_tick.utils import (
     frozen_to_json_friendly,
     parse_meta_yaml,
     parse_meta_yaml_containerized,
+    parse_recipe_yaml_batch_containerized,
+    parse_recipe_yaml_containerized,
 )
 
 TOTAL_GRAPH = nx.DiGraph()
@@ -239,6 +241,31 @@ def test_container_tasks_parse_meta_yaml_containerized(use_containers):
         assert data["package"]["name"] == "conda-smithy"
 
 
+@pytest.mark.skipif(
+    not HAVE_CONTAINERS_AND_TEST_IMAGE, reason="containers not available"
+)
+def test_container_tasks_parse_recipe_yaml_batch_containerized(use_containers):
+    with open(
+        os.path.join(os.path.dirname(__file__), "test_recipe_yaml", "libssh.yaml")
+    ) as fp:
+        text = fp.read()
+    variants = [
+        ("linux-64", "target_platform:\n - 'linux-64'\n"),
+        ("osx-arm64", "target_platform:\n - 'osx-arm64'\n"),
+        ("win-64", None),
+    ]
+
+    data = parse_recipe_yaml_batch_containerized(text, variants)
+
+    assert data == [
+        parse_recipe_yaml_containerized(
+            text, platform_arch=platform_arch, cbc_path=cbc_path
+        )
+        for platform_arch, cbc_path in variants
+    ]
+    assert all(d["package"]["name"] == "libssh" for d in data)
+
+
 @pytest.mark.skipif(
     not HAVE_CONTAINERS_AND_TEST_IMAGE, reason="containers not available"
 )
@@ -1,10 +1,21 @@
+import json
 import os
+import subprocess
 import tempfile
+from unittest import mock
 
+import networkx as nx
 import pytest
 
-from conda_forge_tick.deploy import _parse_gh_conflicts
+from conda_forge_tick.deploy import (
+    _get_files_to_deploy,
+    _parse_gh_conflicts,
+    _validate_files_to_deploy,
+    _validate_graph,
+)
+from conda_forge_tick.lazy_json_backends import LazyJson, get_sharded_path
 from conda_forge_tick.os_utils import pushd
+from conda_forge_tick.utils import dump_graph
 
 
 @pytest.mark.parametrize(
@@ -35,3 +46,210 @@ def test_deploy_parse_gh_conflicts(output, fnames):
                 with open(fname, "w") as f:
                     f.write("")
         assert _parse_gh_conflicts(output) == fnames
+
+
+def _make_deploy_graph(num_nodes):
+    gx = nx.DiGraph()
+    for i in range(num_nodes):
+        name = f"pkg{i}"
+        lzj = LazyJson(f"node_attrs/{name}.json")
+        with lzj as attrs:
+            attrs["feedstock_name"] = name
+        gx.add_node(name, payload=lzj)
+        with LazyJson(f"versions/{name}.json") as vd:
+            vd["new_version"] = f"1.{i}"
+    dump_graph(gx)
+
+
+def _write_graph_data(pth, data):
+    pth = get_sharded_path(pth)
+    with open(pth, "w") as fp:
+        fp.write(data if isinstance(data, str) else json.dumps(data))
+    return pth
+
+
+def test_deploy_validate_files_partial(tmpdir):
+    with pushd(tmpdir):
+        _make_deploy_graph(3)
+        files = {
+            _write_graph_data("versions/pkg0.json", {"new_version": "2.0"}),
+            _write_graph_data("versions/pkg1.json", {"bad": "no version"}),
+            "status/some-status.json",
+        }
+
+        with mock.patch(
+            "conda_forge_tick.deploy._validate_graph", side_effect=AssertionError
+        ):
+            assert _validate_files_to_deploy(files, set()) == 0
+            assert (
+                _validate_files_to_deploy(
+                    files, {get_sharded_path("versions/pkg2.json")}
+                )
+                == 0
+            )
+
+
+def test_deploy_validate_files_invalid_json(tmpdir):
+    with pushd(tmpdir):
+        _make_deploy_graph(3)
+        files = {_write_graph_data("versions/pkg0.json", '{"new_version": ')}
+
+        with pytest.raises(ValueError, match="not valid JSON"):
+            _validate_files_to_deploy(files, set())
+
+
+def test_deploy_validate_files_schema(tmpdir):
+    with pushd(tmpdir):
+        _make_deploy_graph(3)
+        files = {
+            _write_graph_data("versions/pkg0.json", {"new_version": 1, "x": 2}),
+            _write_graph_data("versions/pkg1.json", {"new_version": "2.0"}),
+        }
+
+        assert _validate_files_to_deploy(files, set()) == 1
+        with pytest.raises(ValueError, match="does not conform"):
+            _validate_files_to_deploy(files, set(), strict=True)
+
+
+@pytest.mark.parametrize(
+    "files_to_add,files_to_delete",
+    [
+        ({"graph.json"}, set()),
+        (set(), {get_sharded_path("node_attrs/pkg1.json")}),
+    ],
+)
+def test_deploy_validate_files_graph(tmpdir, files_to_add, files_to_delete):
+    with pushd(tmpdir):
+        _make_deploy_graph(3)
+        with mock.patch("conda_forge_tick.deploy._validate_graph") as vg:
+            _validate_files_to_deploy(files_to_add, files_to_delete)
+        vg.assert_called_once()
+
+        _validate_graph()
+        _write_graph_data("node_attrs/pkg2.json", "{")
+        with pytest.raises(json.JSONDecodeError):
+            _validate_graph()
+
+
+def test_deploy_validate_files_scales_with_change(tmpdir):
+    with pushd(tmpdir):
+        _make_deploy_graph(200)
+
+        for num in [10, 100]:
+            files = {get_sharded_path(f"versions/pkg{i}.json") for i in range(num)}
+            with (
+                mock.patch("conda_forge_tick.deploy._validate_graph") as vg,
+                mock.patch(
+                    "conda_forge_tick.deploy.open", wraps=open, create=True
+                ) as op,
+            ):
+                assert _validate_files_to_deploy(files, set()) == 0
+            # only the changed files are read
+            vg.assert_not_called()
+            assert op.call_count == num
+
+
+def _get_files_to_deploy_per_dir(drs_to_deploy):
+    """Find the files to deploy with several git calls per directory."""
+
+    def _git(*args):
+        return set(
+            subprocess.run(
+                ["git", *args], capture_output=True, text=True, check=True
+            ).stdout.splitlines()
+        )
+
+    files_to_add = set()
+    for dr in drs_to_deploy:
+        if not os.path.exists(dr):
+            continue
+        files_to_add |= _git("ls-files", "-o", "--exclude-standard", dr)
+        files_to_add |= _git("diff", "--name-only", dr)
+        files_to_add |= _git("diff", "--name-only", "--cached", "--diff-filter=d", dr)
+
+    files_to_delete = set()
+    for line in _git("diff", "--name-status", "--cached"):
+        res = line.strip().split()
+        if len(res) >= 2 and res[0] == "D":
+            files_to_delete.add(res[1])
+    return files_to_add, files_to_delete
+
+
+def _make_deploy_repo(num_files):
+    def _git(*args):
+        subprocess.run(["git", *args], check=True, capture_output=True)
+
+    def _write(pth, data="{}"):
+        os.makedirs(os.path.dirname(pth) or ".", exist_ok=True)
+        with open(pth, "w") as fp:
+            fp.write(data)
+
+    _git("init", "-b", "main", ".")
+    _git("config", "user.email", "bot@example.com")
+    _git("config", "user.name", "bot")
+    for hashmap in ["node_attrs", "versions", "pr_json"]:
+        for i in range(num_files):
+            _write(get_sharded_path(f"{hashmap}/pkg{i}.json"), json.dumps({"i": i}))
+    for pth in ["graph.json", "all_feedstocks.json", "other.txt"]:
+        _write(pth)
+    _write(".gitignore", "*.log\n")
+    _git("add", ".")
+    _git("commit", "-m", "initial")
+
+    # untracked, including a new shard directory and an ignored file
+    for pth in ["node_attrs/new.json", "versions/new.json", "pr_json/new.json"]:
+        _write(get_sharded_path(pth))
+    _write("versions/debug.log", "ignored")
+
+    # changed in the work tree
+    for i in range(0, num_files, 7):
+        _write(get_sharded_path(f"node_attrs/pkg{i}.json"))
+    _write("graph.json", '{"a": 1}')
+
+    # deleted in the work tree only
+    os.remove(get_sharded_path("versions/pkg1.json"))
+
+    # staged changes and additions
+    _write(get_sharded_path("versions/pkg2.json"))
+    _write(get_sharded_path("pr_json/staged.json"), '{"staged": true}')
+    _git(
+        "add",
+        get_sharded_path("versions/pkg2.json"),
+        get_sharded_path("pr_json/staged.json"),
+    )
+
+    # staged and then changed again
+    _write(get_sharded_path("pr_json/staged.json"), '{"staged": false}')
+
+    # staged deletions, one outside of the deployed directories
+    _git(
+        "rm",
+        "-q",
+        get_sharded_path("pr_json/pkg3.json"),
+        get_sharded_path("node_attrs/pkg4.json"),
+        "other.txt",
+    )
+
+    # changes outside of the deployed directories
+    _write("all_feedstocks.json", "[]")
+
+
+def test_deploy_get_files_to_deploy(tmpdir):
+    drs_to_deploy = ["versions", "pr_json", "node_attrs", "graph.json", "mappings"]
+    with pushd(tmpdir):
+        _make_deploy_repo(200)
+
+        old_files = _get_files_to_deploy_per_dir(drs_to_deploy)
+        new_files = _get_files_to_deploy(drs_to_deploy)
+
+    assert new_files == old_files
+    files_to_add, files_to_delete = new_files
+    assert "graph.json" in files_to_add
+    assert get_sharded_path("versions/pkg1.json") in files_to_add
+    assert "all_feedstocks.json" not in files_to_add
+    assert not any(pth.endswith(".log") for pth in files_to_add)
+    assert files_to_delete == {
+        get_sharded_path("pr_json/pkg3.json"),
+        get_sharded_path("node_attrs/pkg4.json"),
+        "other.txt",
+    }
@@ -1,14 +1,23 @@
 import pprint
+import threading
 from pathlib import Path
+from unittest import mock
 
 import pytest
 
 from conda_forge_tick.feedstock_parser import (
     _get_feedstock_commit_hash_and_timestamp,
     _get_requirements,
+    _parse_variant_yamls,
     load_feedstock_local,
+    populate_feedstock_attributes,
+)
+from conda_forge_tick.settings import BotSettings, use_settings
+from conda_forge_tick.utils import (
+    get_feedstock_parsing_max_workers,
+    parse_meta_yaml,
+    parse_recipe_yaml,
 )
-from conda_forge_tick.utils import parse_meta_yaml, parse_recipe_yaml
 
 
 @pytest.mark.parametrize(
@@ -126,3 +135,122 @@ def test_get_feedstock_commit_hash_and_timestamp():
     sha, ts = _get_feedstock_commit_hash_and_timestamp("ngmix")
     assert sha is not None
     assert ts is not None
+
+
+VARIANT_META_YAML = """\
+{% set version = "1.0.0" %}
+
+package:
+  name: foo
+  version: {{ version }}
+
+source:
+  url: https://example.com/foo-{{ version }}.tar.gz
+  sha256: 0000000000000000000000000000000000000000000000000000000000000000
+
+build:
+  number: 0
+
+requirements:
+  build:
+    - {{ compiler('c') }}
+  host:
+    - python
+    - numpy
+    - pip
+  run:
+    - python
+    - {{ pin_compatible('numpy') }}
+
+test:
+  imports:
+    - foo
+"""
+
+
+def _make_variant_feedstock(feedstock_dir: Path) -> None:
+    recipe_dir = feedstock_dir / "recipe"
+    recipe_dir.mkdir(parents=True)
+    (recipe_dir / "meta.yaml").write_text(VARIANT_META_YAML)
+    ci_support_dir = feedstock_dir / ".ci_support"
+    ci_support_dir.mkdir()
+    for plat_arch in ["linux_64", "linux_aarch64", "osx_64", "osx_arm64", "win_64"]:
+        for python in ["3.9", "3.10", "3.11", "3.12"]:
+            for numpy in ["1.26", "2.0"]:
+                (
+                    ci_support_dir
+                    / f"{plat_arch}_numpy{numpy}python{python}.____cpython.yaml"
+                ).write_text(
+                    f"c_compiler:\n- {'vs2019' if plat_arch == 'win_64' else 'gcc'}\n"
+                    f"numpy:\n- '{numpy}'\n"
+                    f"python:\n- {python}.* *_cpython\n"
+                    f"target_platform:\n- {plat_arch.replace('_', '-')}\n"
+                )
+
+
+def test_populate_feedstock_attributes_parallel_variants(tmp_path):
+    pytest.importorskip("conda_build")
+    _make_variant_feedstock(tmp_path)
+
+    results = {}
+    for max_workers in [1, 8]:
+        with use_settings(BotSettings(feedstock_parsing_max_workers=max_workers)):
+            results[max_workers] = populate_feedstock_attributes(
+                "foo",
+                {},
+                meta_yaml=VARIANT_META_YAML,
+                feedstock_dir=tmp_path,
+            )
+
+    assert not results[1]["parsing_error"]
+    assert not results[8]["parsing_error"]
+    for key in ["meta_yaml", "requirements", "total_requirements"]:
+        assert results[8][key] == results[1][key]
+
+
+def _fake_parse_variant_meta_yaml(cbc_path, plat_arch, recipe_dir, meta_yaml):
+    return {"cbc_path": str(cbc_path), "plat_arch": plat_arch}
+
+
+def test_parse_variant_yamls_no_processes_with_threads(tmp_path):
+    ci_support_files = [tmp_path / f"linux_64_{i}.yaml" for i in range(4)]
+    plat_archs = [("linux", "64")] * 4
+
+    running = threading.Event()
+    done = threading.Event()
+    thread = threading.Thread(target=lambda: (running.set(), done.wait()))
+    thread.start()
+    try:
+        running.wait()
+        with (
+            use_settings(BotSettings(feedstock_parsing_max_workers=4)),
+            mock.patch(
+                "conda_forge_tick.feedstock_parser._parse_variant_meta_yaml",
+                _fake_parse_variant_meta_yaml,
+            ),
+            mock.patch("conda_forge_tick.feedstock_parser.ProcessPoolExecutor") as pool,
+        ):
+            res = _parse_variant_yamls(
+                ci_support_files, plat_archs, tmp_path, meta_yaml=""
+            )
+    finally:
+        done.set()
+        thread.join()
+
+    # forking a multithreaded process is not safe
+    pool.assert_not_called()
+    assert res == [
+        {"cbc_path": str(pth), "plat_arch": ("linux", "64")} for pth in ci_support_files
+    ]
+
+
+@pytest.mark.parametrize(
+    "max_workers,in_container,expected",
+    [(None, "false", 1), (None, "true", 4), (2, "false", 2), (2, "true", 2)],
+)
+def test_get_feedstock_parsing_max_workers(
+    monkeypatch, max_workers, in_container, expected
+):
+    monkeypatch.setenv("CF_FEEDSTOCK_OPS_IN_CONTAINER", in_container)
+    with use_settings(BotSettings(feedstock_parsing_max_workers=max_workers)):
+        assert get_feedstock_parsing_max_workers() == expected
@@ -0,0 +1,195 @@
+import json
+import os
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from conda_forge_tick.git_cli_deploy import deploy_files_via_git_cli
+
+
+def _git(repo_dir, *args):
+    return subprocess.run(
+        ["git", *args], cwd=repo_dir, check=True, capture_output=True, text=True
+    ).stdout
+
+
+def _write(repo_dir, pth, data):
+    full_pth = os.path.join(repo_dir, pth)
+    os.makedirs(os.path.dirname(full_pth), exist_ok=True)
+    with open(full_pth, "w") as fp:
+        json.dump(data, fp)
+
+
+def _clone(upstream, repo_dir):
+    _git(".", "clone", "-q", upstream, str(repo_dir))
+    _git(repo_dir, "config", "user.email", "bot@example.com")
+    _git(repo_dir, "config", "user.name", "bot")
+    return str(repo_dir)
+
+
+def _upstream_files(upstream):
+    files = {}
+    for pth in _git(upstream, "ls-tree", "-r", "--name-only", "main").splitlines():
+        files[pth] = json.loads(_git(upstream, "show", f"main:{pth}"))
+    return files
+
+
+@pytest.fixture
+def upstream(tmp_path):
+    """Make a bare upstream repository with files owned by three writers."""
+    upstream = str(tmp_path / "upstream.git")
+    _git(".", "init", "-q", "--bare", "-b", "main", upstream)
+
+    seed = _clone(upstream, tmp_path / "seed")
+    for writer in range(3):
+        for i in range(5):
+            _write(seed, f"node_attrs/w{writer}/{i}.json", {"writer": writer, "v": 0})
+    _git(seed, "add", ".")
+    _git(seed, "commit", "-q", "-m", "initial")
+    _git(seed, "push", "-q", "origin", "main")
+    return upstream
+
+
+def _deploy(repo_dir, upstream, files_to_add, files_to_delete, **kwargs):
+    return deploy_files_via_git_cli(
+        files_to_add,
+        files_to_delete,
+        "deploy",
+        remote_url=upstream,
+        branch="main",
+        repo_dir=repo_dir,
+        exp_backoff_base=1.0,
+        exp_backoff_rfrac=0.01,
+        **kwargs,
+    )
+
+
+def test_git_cli_deploy_single_writer(tmp_path, upstream):
+    repo = _clone(upstream, tmp_path / "repo")
+    other = _clone(upstream, tmp_path / "other")
+
+    # another job deploys first, so our clone is behind
+    _write(other, "node_attrs/w1/0.json", {"writer": 1, "v": 1})
+    _git(other, "commit", "-q", "-am", "other")
+    _git(other, "push", "-q", "origin", "main")
+
+    _write(repo, "node_attrs/w0/0.json", {"writer": 0, "v": 1})
+    _write(repo, "node_attrs/w0/new.json", {"writer": 0, "v": 1})
+    _git(repo, "rm", "-q", "node_attrs/w0/1.json")
+    _write(repo, "node_attrs/w0/2.json", {"writer": 0, "v": "not deployed"})
+
+    metrics = _deploy(
+        repo,
+        upstream,
+        {"node_attrs/w0/0.json", "node_attrs/w0/new.json", "node_attrs/w0/gone.json"},
+        {"node_attrs/w0/1.json"},
+    )
+
+    assert metrics.num_tries == 1
+    assert metrics.num_rejected_pushes == 0
+    assert metrics.num_files_added == 2
+    assert metrics.num_files_deleted == 1
+    assert metrics.bytes_pushed == sum(
+        os.path.getsize(os.path.join(repo, pth))
+        for pth in ["node_attrs/w0/0.json", "node_attrs/w0/new.json"]
+    )
+
+    files = _upstream_files(upstream)
+    assert files["node_attrs/w0/0.json"]["v"] == 1
+    assert files["node_attrs/w0/new.json"]["v"] == 1
+    assert "node_attrs/w0/1.json" not in files
+    assert files["node_attrs/w0/2.json"]["v"] == 0
+    assert files["node_attrs/w1/0.json"]["v"] == 1
+
+    # the local branch is at the deployed commit, other changes are kept
+    assert _git(repo, "rev-parse", "HEAD").strip() == metrics.commit
+    assert _git(upstream, "rev-parse", "main").strip() == metrics.commit
+    with open(os.path.join(repo, "node_attrs/w1/0.json")) as fp:
+        assert json.load(fp)["v"] == 1
+    assert _git(repo, "status", "--porcelain").strip() == "M node_attrs/w0/2.json"
+
+    # deploying again is a no-op
+    metrics = _deploy(repo, upstream, {"node_attrs/w0/0.json"}, set())
+    assert metrics.commit == _git(upstream, "rev-parse", "main").strip()
+    assert _git(upstream, "rev-list", "--count", "main").strip() == "3"
+
+
+def test_git_cli_deploy_gives_up(tmp_path, upstream):
+    repo = _clone(upstream, tmp_path / "repo")
+    _write(repo, "node_attrs/w0/0.json", {"writer": 0, "v": 1})
+
+    with pytest.raises(RuntimeError, match="did not push"):
+        deploy_files_via_git_cli(
+            {"node_attrs/w0/0.json"},
+            set(),
+            "deploy",
+            remote_url=str(tmp_path / "does-not-exist.git"),
+            branch="main",
+            repo_dir=repo,
+            max_tries=3,
+            exp_backoff_rfrac=0.01,
+        )
+
+
+def test_git_cli_deploy_multi_writer(tmp_path, upstream):
+    """Several jobs deploying disjoint files at once converge without losing data."""
+    num_writers = 3
+    num_rounds = 4
+    repos = [_clone(upstream, tmp_path / f"writer{w}") for w in range(num_writers)]
+    barrier = threading.Barrier(num_writers)
+
+    def _run_writer(writer):
+        repo = repos[writer]
+        all_metrics = []
+        for rnd in range(1, num_rounds + 1):
+            files_to_add = set()
+            for i in range(5):
+                pth = f"node_attrs/w{writer}/{i}.json"
+                _write(repo, pth, {"writer": writer, "v": rnd})
+                files_to_add.add(pth)
+            new_pth = f"node_attrs/w{writer}/new{rnd}.json"
+            _write(repo, new_pth, {"writer": writer, "v": rnd})
+            files_to_add.add(new_pth)
+
+            files_to_delete = set()
+            if rnd > 1:
+                old_pth = f"node_attrs/w{writer}/new{rnd - 1}.json"
+                os.remove(os.path.join(repo, old_pth))
+                files_to_delete.add(old_pth)
+
+            # make the jobs push at the same time as much as possible
+            barrier.wait()
+            all_metrics.append(
+                _deploy(repo, upstream, files_to_add, files_to_delete, max_tries=50)
+            )
+        return all_metrics
+
+    with ThreadPoolExecutor(max_workers=num_writers) as pool:
+        results = list(pool.map(_run_writer, range(num_writers)))
+
+    files = _upstream_files(upstream)
+    expected = {}
+    for writer in range(num_writers):
+        for i in range(5):
+            expected[f"node_attrs/w{writer}/{i}.json"] = {
+                "writer": writer,
+                "v": num_rounds,
+            }
+        expected[f"node_attrs/w{writer}/new{num_rounds}.json"] = {
+            "writer": writer,
+            "v": num_rounds,
+        }
+    assert files == expected
+
+    # every deploy is a single fast-forward commit on a linear history
+    num_commits = int(_git(upstream, "rev-list", "--count", "main"))
+    assert num_commits == 1 + num_writers * num_rounds
+    assert _git(upstream, "rev-list", "--merges", "main").strip() == ""
+
+    all_metrics = [m for metrics in results for m in metrics]
+    assert all(
+        m.num_tries == m.num_rejected_pushes + m.num_failed_fetches + 1
+        for m in all_metrics
+    )
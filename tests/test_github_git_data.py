@@ -0,0 +1,309 @@
+import base64
+import hashlib
+import json
+import os
+import threading
+from unittest import mock
+
+import pytest
+
+from conda_forge_tick.github_git_data import (
+    GitDataAPIError,
+    RefUpdateConflictError,
+    commit_files_via_gh_git_data_api,
+)
+from conda_forge_tick.os_utils import pushd
+
+REPO = "/repos/regro/cf-graph"
+
+
+class FakeGitDataAPI:
+    """An in-memory stand-in for the GitHub Git Data API of a single repository.
+
+    Trees are stored as flat dicts mapping paths to file contents.
+    """
+
+    def __init__(self, server, branch="master"):
+        self.server = server
+        self.branch = branch
+        self.lock = threading.Lock()
+        self.blobs = {}
+        self.trees = {}
+        self.commits = {}
+        self.before_ref_update = None
+
+        root_tree = self._add_tree({})
+        self.head = self._add_commit("initial", root_tree, [])
+
+        server.add_route("GET", f"{REPO}/git/ref/heads/{branch}", handler=self._get_ref)
+        server.add_route("GET", f"{REPO}/git/commits/*", handler=self._get_commit)
+        server.add_route("POST", f"{REPO}/git/blobs", handler=self._post_blob)
+        server.add_route("POST", f"{REPO}/git/trees", handler=self._post_tree)
+        server.add_route("POST", f"{REPO}/git/commits", handler=self._post_commit)
+        server.add_route(
+            "PATCH", f"{REPO}/git/refs/heads/{branch}", handler=self._patch_ref
+        )
+        server.add_route("GET", f"{REPO}/contents/*", handler=self._get_contents)
+
+    @staticmethod
+    def _sha(data):
+        return hashlib.sha1(
+            json.dumps(
+                data, sort_keys=True, default=lambda b: b.decode("latin-1")
+            ).encode()
+        ).hexdigest()
+
+    def _add_tree(self, files):
+        sha = self._sha(files)
+        self.trees[sha] = dict(files)
+        return sha
+
+    def _add_commit(self, msg, tree, parents):
+        sha = self._sha([msg, tree, parents])
+        self.commits[sha] = {"message": msg, "tree": tree, "parents": parents}
+        return sha
+
+    @staticmethod
+    def _json(status, data):
+        return status, {"Content-Type": "application/json"}, json.dumps(data).encode()
+
+    @property
+    def files(self):
+        return self.trees[self.commits[self.head]["tree"]]
+
+    def push_other_commit(self, files):
+        """Commit files as another writer would."""
+        with self.lock:
+            tree = dict(self.files)
+            tree.update(files)
+            self.head = self._add_commit(
+                "other writer", self._add_tree(tree), [self.head]
+            )
+
+    def _get_ref(self, req):
+        return self._json(200, {"object": {"sha": self.head}})
+
+    def _get_commit(self, req):
+        sha = req.path.split("?")[0].split("/")[-1]
+        if sha not in self.commits:
+            return self._json(404, {"message": "Not Found"})
+        return self._json(200, {"sha": sha, "tree": {"sha": self.commits[sha]["tree"]}})
+
+    def _post_blob(self, req):
+        data = json.loads(req.body)
+        content = base64.b64decode(data["content"])
+        sha = hashlib.sha1(content).hexdigest()
+        self.blobs[sha] = content
+        return self._json(201, {"sha": sha})
+
+    def _post_tree(self, req):
+        data = json.loads(req.body)
+        files = dict(self.trees[data["base_tree"]])
+        for entry in data["tree"]:
+            if "content" in entry:
+                files[entry["path"]] = entry["content"].encode("utf-8")
+            elif entry["sha"] is None:
+                if entry["path"] not in files:
+                    return self._json(422, {"message": "GitRPC::BadObjectState"})
+                del files[entry["path"]]
+            else:
+                files[entry["path"]] = self.blobs[entry["sha"]]
+        return self._json(201, {"sha": self._add_tree(files)})
+
+    def _post_commit(self, req):
+        data = json.loads(req.body)
+        sha = self._add_commit(data["message"], data["tree"], data["parents"])
+        return self._json(201, {"sha": sha})
+
+    def _patch_ref(self, req):
+        if self.before_ref_update is not None:
+            self.before_ref_update()
+        data = json.loads(req.body)
+        with self.lock:
+            if self.commits[data["sha"]]["parents"] != [self.head]:
+                return self._json(422, {"message": "Update is not a fast forward"})
+            self.head = data["sha"]
+        return self._json(200, {"object": {"sha": self.head}})
+
+    def _get_contents(self, req):
+        pth = req.path.split("?")[0][len(f"{REPO}/contents/") :]
+        if pth in self.files:
+            return self._json(200, {"path": pth})
+        return self._json(404, {"message": "Not Found"})
+
+
+@pytest.fixture
+def fake_git_data_api(local_http_server):
+    return FakeGitDataAPI(local_http_server)
+
+
+def _commit(server, files_to_add, files_to_delete, **kwargs):
+    return commit_files_via_gh_git_data_api(
+        files_to_add,
+        files_to_delete,
+        "regro/cf-graph",
+        "test commit",
+        "master",
+        token="xyz",
+        api_url=server.url,
+        exp_backoff_base=0.01,
+        **kwargs,
+    )
+
+
+def _write_files(num, prefix="node_attrs", content="{}"):
+    names = []
+    for i in range(num):
+        name = f"{prefix}/{i}.json"
+        os.makedirs(os.path.dirname(name), exist_ok=True)
+        with open(name, "w") as f:
+            f.write(content.replace("{}", '{"i": %d}' % i))
+        names.append(name)
+    return names
+
+
+def test_commit_files_single_commit(tmpdir, fake_git_data_api, local_http_server):
+    api = fake_git_data_api
+    api.push_other_commit({"pr_json/1.json": b"{}", "pr_json/2.json": b"{}"})
+    old_head = api.head
+
+    with pushd(tmpdir):
+        files = _write_files(50)
+        with open("binary.bin", "wb") as f:
+            f.write(b"\xff\xfe\x00")
+        sha = _commit(
+            local_http_server,
+            set(files) | {"binary.bin"},
+            {"pr_json/1.json"},
+        )
+
+    assert sha == api.head
+    assert api.commits[api.head]["parents"] == [old_head]
+    assert api.commits[api.head]["message"] == "test commit"
+    assert set(api.files) == set(files) | {"binary.bin", "pr_json/2.json"}
+    assert api.files["node_attrs/3.json"] == b'{"i": 3}'
+    assert api.files["binary.bin"] == b"\xff\xfe\x00"
+
+    # one commit and one tree for all of the files
+    assert local_http_server.num_requests("POST", f"{REPO}/git/trees") == 1
+    assert local_http_server.num_requests("POST", f"{REPO}/git/commits") == 1
+    assert local_http_server.num_requests("PATCH") == 1
+    assert local_http_server.requests[-1].headers["Authorization"] == "token xyz"
+
+
+def test_commit_files_rebases_when_ref_moves(
+    tmpdir, fake_git_data_api, local_http_server
+):
+    api = fake_git_data_api
+    num_moves = {"val": 2}
+
+    def _move_ref():
+        if num_moves["val"] > 0:
+            num_moves["val"] -= 1
+            api.push_other_commit({f"versions/other{num_moves['val']}.json": b"{}"})
+
+    api.before_ref_update = _move_ref
+
+    with pushd(tmpdir):
+        files = _write_files(3)
+        with mock.patch("conda_forge_tick.github_git_data.time.sleep") as sleep_mock:
+            _commit(local_http_server, files, [])
+
+    assert sleep_mock.call_count == 2
+    assert local_http_server.num_requests("PATCH") == 3
+    # nothing written by the other writer is lost
+    assert set(api.files) == set(files) | {
+        "versions/other0.json",
+        "versions/other1.json",
+    }
+    assert api.commits[api.commits[api.head]["parents"][0]]["message"] == (
+        "other writer"
+    )
+
+
+def test_commit_files_gives_up(tmpdir, fake_git_data_api, local_http_server):
+    api = fake_git_data_api
+    api.before_ref_update = lambda: api.push_other_commit(
+        {"other.json": os.urandom(8).hex().encode()}
+    )
+
+    with pushd(tmpdir):
+        files = _write_files(1)
+        with (
+            mock.patch("conda_forge_tick.github_git_data.time.sleep"),
+            pytest.raises(RefUpdateConflictError),
+        ):
+            _commit(local_http_server, files, [], max_tries=3)
+
+    assert local_http_server.num_requests("PATCH") == 3
+    assert "node_attrs/0.json" not in api.files
+
+
+def test_commit_files_chunks_large_payloads(
+    tmpdir, fake_git_data_api, local_http_server
+):
+    api = fake_git_data_api
+    with pushd(tmpdir):
+        files = _write_files(20, content="{}" + " " * 1000)
+        _commit(local_http_server, files, [], max_payload_bytes=5000)
+
+    assert local_http_server.num_requests("POST", f"{REPO}/git/trees") > 1
+    assert local_http_server.num_requests("POST", f"{REPO}/git/commits") == 1
+    assert set(api.files) == set(files)
+
+
+def test_commit_files_missing_deletes(tmpdir, fake_git_data_api, local_http_server):
+    api = fake_git_data_api
+    api.push_other_commit({"pr_json/1.json": b"{}"})
+
+    with pushd(tmpdir):
+        files = _write_files(1)
+        _commit(local_http_server, files, ["pr_json/1.json", "pr_json/gone.json"])
+
+    assert set(api.files) == set(files)
+
+
+def test_commit_files_nothing_to_do(tmpdir, fake_git_data_api, local_http_server):
+    with pushd(tmpdir):
+        assert _commit(local_http_server, [], []) is None
+    assert local_http_server.num_requests() == 0
+
+
+def test_commit_files_error(tmpdir, local_http_server):
+    with pushd(tmpdir):
+        files = _write_files(1)
+        with pytest.raises(GitDataAPIError):
+            _commit(local_http_server, files, [])
+
+
+@mock.patch("conda_forge_tick.deploy.reset_and_restore_files")
+@mock.patch("conda_forge_tick.deploy.commit_files_via_gh_git_data_api")
+def test_deploy_via_api_single_commit(commit_mock, reset_mock):
+    from conda_forge_tick.deploy import _deploy_via_api
+
+    do_git_ops, files_to_add, files_done, files_to_try_again = _deploy_via_api(
+        False, {"a.json", "b.json"}, {"c.json"}, set(), set()
+    )
+
+    commit_mock.assert_called_once()
+    assert commit_mock.call_args.args[:2] == ({"a.json", "b.json"}, {"c.json"})
+    assert "3 files" in commit_mock.call_args.args[3]
+    assert not do_git_ops
+    assert files_done == {"a.json", "b.json", "c.json"}
+    assert files_to_try_again == set()
+    reset_mock.assert_called_once_with(files_done)
+
+
+@mock.patch("conda_forge_tick.deploy.reset_and_restore_files")
+@mock.patch("conda_forge_tick.deploy.commit_files_via_gh_git_data_api")
+def test_deploy_via_api_falls_back_to_git(commit_mock, reset_mock):
+    from conda_forge_tick.deploy import _deploy_via_api
+
+    commit_mock.side_effect = GitDataAPIError("bad")
+    do_git_ops, files_to_add, files_done, files_to_try_again = _deploy_via_api(
+        False, {"a.json", "b.json"}, {"c.json"}, set(), set()
+    )
+
+    assert do_git_ops
+    assert files_done == set()
+    assert files_to_try_again == {"a.json", "b.json"}
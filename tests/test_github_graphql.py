@@ -0,0 +1,283 @@
+import json
+import math
+from datetime import datetime
+from unittest import mock
+
+import networkx as nx
+import pytest
+from pydantic import TypeAdapter
+from test_update_prs import FakeGitHubPulls
+
+from conda_forge_tick.git_utils import refresh_pr
+from conda_forge_tick.github_graphql import (
+    fetch_pr_jsons_via_graphql,
+    graphql_pr_to_pr_json,
+    make_pr_batch_query,
+)
+from conda_forge_tick.github_rate_limit import get_rate_limit_tracker
+from conda_forge_tick.lazy_json_backends import LazyJson
+from conda_forge_tick.models.pr_json import PullRequestData
+from conda_forge_tick.os_utils import pushd
+from conda_forge_tick.settings import BotSettings, use_settings
+from conda_forge_tick.update_prs import _combined_update_function, _update_pr
+
+
+def _make_node(repo, number, **kwargs):
+    node = {
+        "databaseId": 1000 + number,
+        "number": number,
+        "url": f"https://github.com/conda-forge/{repo}/pull/{number}",
+        "state": "OPEN",
+        "merged": False,
+        "isDraft": False,
+        "mergeable": "MERGEABLE",
+        "mergeStateStatus": "CLEAN",
+        "createdAt": "2024-01-01T00:00:00Z",
+        "updatedAt": "2024-01-02T00:00:00Z",
+        "mergedAt": None,
+        "closedAt": None,
+        "headRefName": "branch",
+        "labels": {"nodes": []},
+        "repository": {"name": repo},
+    }
+    node.update(kwargs)
+    return node
+
+
+class FakeGitHubGraphQL:
+    """A stand-in for the GraphQL endpoint of the GitHub API.
+
+    It answers the batched PR queries of `make_pr_batch_query` from `prs`.
+    """
+
+    def __init__(self, server):
+        self.prs = {}
+        self.num_requests = 0
+        self.max_batch_size = 0
+        server.add_route("POST", "/graphql", handler=self._handle)
+
+    def _handle(self, req):
+        query = json.loads(req.body)
+        assert "fragment prFields on PullRequest" in query["query"]
+        variables = query["variables"]
+        num_prs = len(variables) // 2
+        self.num_requests += 1
+        self.max_batch_size = max(self.max_batch_size, num_prs)
+
+        data, errors = {}, []
+        for i in range(num_prs):
+            node = self.prs.get((variables[f"r{i}"], variables[f"p{i}"]))
+            if node is None:
+                data[f"pr{i}"] = None
+                errors.append(
+                    {"type": "NOT_FOUND", "path": [f"pr{i}"], "message": "not found"}
+                )
+            else:
+                data[f"pr{i}"] = {"pullRequest": node}
+        res = {"data": data}
+        if errors:
+            res["errors"] = errors
+        return 200, {"Content-Type": "application/json"}, json.dumps(res).encode()
+
+
+def test_make_pr_batch_query():
+    query = make_pr_batch_query(2)
+    assert "$r0: String!, $p0: Int!, $r1: String!, $p1: Int!" in query
+    assert 'pr1: repository(owner: "conda-forge", name: $r1)' in query
+    assert "pullRequest(number: $p1) { ...prFields }" in query
+
+
+@pytest.mark.parametrize(
+    "kwargs,expected",
+    [
+        ({}, {"state": "open", "mergeable": True, "mergeable_state": "clean"}),
+        (
+            {"mergeable": "CONFLICTING", "mergeStateStatus": "DIRTY"},
+            {"state": "open", "mergeable": False, "mergeable_state": "dirty"},
+        ),
+        (
+            {"state": "MERGED", "merged": True, "mergedAt": "2024-01-03T00:00:00Z"},
+            {"state": "closed", "merged": True, "merged_at": "2024-01-03T00:00:00Z"},
+        ),
+        (
+            {"state": "CLOSED", "mergeable": "UNKNOWN", "mergeStateStatus": "UNKNOWN"},
+            {"state": "closed", "mergeable": None, "mergeable_state": None},
+        ),
+        # GitHub did not compute the merge state yet or it is not a REST value
+        ({"mergeable": "UNKNOWN", "mergeStateStatus": "UNKNOWN"}, None),
+        ({"isDraft": True, "mergeStateStatus": "DRAFT"}, None),
+    ],
+)
+def test_graphql_pr_to_pr_json(kwargs, expected):
+    pr_json = graphql_pr_to_pr_json(_make_node("foo-feedstock", 5, **kwargs))
+    if expected is None:
+        assert pr_json is None
+        return
+
+    for k, v in expected.items():
+        assert pr_json[k] == v
+    assert pr_json["id"] == 1005
+    assert pr_json["head"]["ref"] == "branch"
+    assert pr_json["base"]["repo"]["name"] == "foo-feedstock"
+
+    # the data is valid in the pr_json schema (with the REST headers kept)
+    TypeAdapter(PullRequestData).validate_python(
+        {
+            **pr_json,
+            "ETag": '"abc"',
+            "Last-Modified": "Mon, 01 Jan 2024 00:00:00 GMT",
+        }
+    )
+
+
+def test_graphql_pr_to_pr_json_labels():
+    pr_json = graphql_pr_to_pr_json(
+        _make_node("foo-feedstock", 1, labels={"nodes": [{"name": "bot-rerun"}]})
+    )
+    assert pr_json["labels"] == [{"name": "bot-rerun"}]
+
+
+def test_graphql_pr_json_is_not_force_refreshed():
+    pr_json = graphql_pr_to_pr_json(_make_node("foo-feedstock", 1))
+    pr_json["ETag"] = '"abc"'
+    with mock.patch(
+        "conda_forge_tick.git_utils.lazy_update_pr_json", side_effect=lambda x, force: x
+    ) as lazy_update:
+        refresh_pr(pr_json)
+    # a PR fetched via GraphQL in this run is fresh, so the conditional
+    # REST request is kept
+    lazy_update.assert_called_once_with(mock.ANY, force=False)
+
+
+def test_fetch_pr_jsons_via_graphql(local_http_server):
+    fake = FakeGitHubGraphQL(local_http_server)
+    fake.prs[("foo-feedstock", 1)] = _make_node("foo-feedstock", 1)
+    fake.prs[("foo-feedstock", 2)] = _make_node(
+        "foo-feedstock", 2, mergeable="UNKNOWN", mergeStateStatus="UNKNOWN"
+    )
+    fake.prs[("bar-feedstock", 3)] = _make_node("bar-feedstock", 3)
+
+    res = fetch_pr_jsons_via_graphql(
+        [
+            ("foo-feedstock", 1),
+            ("foo-feedstock", 2),
+            ("bar-feedstock", 3),
+            ("missing-feedstock", 4),
+        ],
+        token="xyz",
+        api_url=local_http_server.url,
+        batch_size=2,
+    )
+
+    assert set(res) == {("foo-feedstock", 1), ("bar-feedstock", 3)}
+    assert res[("bar-feedstock", 3)]["number"] == 3
+    assert fake.num_requests == 2
+    assert all(
+        r.headers["Authorization"] == "bearer xyz" for r in local_http_server.requests
+    )
+
+
+def test_fetch_pr_jsons_via_graphql_failed_batch(local_http_server):
+    local_http_server.add_route("POST", "/graphql", status=502, body="bad gateway")
+
+    res = fetch_pr_jsons_via_graphql(
+        [("foo-feedstock", 1)], token="xyz", api_url=local_http_server.url
+    )
+
+    assert res == {}
+
+
+def test_fetch_pr_jsons_via_graphql_api_calls_per_10k_prs(local_http_server):
+    """Count the API calls needed to refresh 10k PRs."""
+    fake = FakeGitHubGraphQL(local_http_server)
+    num_prs = 10_000
+    prs = []
+    for n in range(num_prs // 2):
+        for number in [1, 2]:
+            repo = f"pkg{n}-feedstock"
+            fake.prs[(repo, number)] = _make_node(repo, number)
+            prs.append((repo, number))
+
+    res = fetch_pr_jsons_via_graphql(prs, token="xyz", api_url=local_http_server.url)
+
+    assert len(res) == num_prs
+    assert fake.max_batch_size == 100
+    assert fake.num_requests == math.ceil(num_prs / 100)
+
+
+def test_update_pr_uses_graphql(tmpdir, local_http_server):
+    fake_rest = FakeGitHubPulls(local_http_server, delay=0)
+    fake_graphql = FakeGitHubGraphQL(local_http_server)
+    gx = nx.DiGraph()
+    num_nodes = 10
+    with pushd(tmpdir):
+        for n in range(num_nodes):
+            name = f"pkg{n}-feedstock"
+            prs = []
+            for number in [1, 2]:
+                fake_rest.add_pr(name, number, f'W/"{name}-{number}"')
+                if number == 1:
+                    fake_graphql.prs[(name, number)] = _make_node(
+                        name, number, updatedAt="graphql"
+                    )
+                elif n % 2:
+                    # the mergeable state is not known yet
+                    fake_graphql.prs[(name, number)] = _make_node(
+                        name, number, mergeStateStatus="UNKNOWN"
+                    )
+                pr_json = LazyJson(f"pr_json/{name}-{number}.json")
+                with pr_json:
+                    pr_json.update(
+                        {
+                            "id": number,
+                            "number": number,
+                            "state": "open",
+                            "mergeable_state": "clean",
+                            "updated_at": "old",
+                            "labels": [],
+                            "head": {"ref": "branch"},
+                            "base": {"repo": {"name": name}},
+                            "ETag": 'W/"old"',
+                            "Last-Modified": "Mon, 01 Jan 2024 00:00:00 GMT",
+                            "last_fetched": datetime.now().isoformat(),
+                        }
+                    )
+                prs.append({"PR": pr_json, "data": {}})
+            gx.add_node(name, payload={"pr_info": {"PRed": prs}})
+
+        with (
+            use_settings(BotSettings(frac_update_pr_json=1.0)),
+            mock.patch(
+                "conda_forge_tick.git_utils.GITHUB_API_URL", local_http_server.url
+            ),
+            mock.patch("conda_forge_tick.git_utils.get_bot_token", return_value="xyz"),
+            mock.patch(
+                "conda_forge_tick.github_graphql.get_bot_token", return_value="xyz"
+            ),
+            mock.patch(
+                "conda_forge_tick.update_prs.get_github_api_requests_left",
+                return_value=5000,
+            ),
+        ):
+            try:
+                succeeded, failed = _update_pr(
+                    _combined_update_function, False, gx, job=1, n_jobs=1
+                )
+            finally:
+                get_rate_limit_tracker().clear()
+
+        assert failed == 0
+        assert succeeded == 2 * num_nodes
+        assert fake_graphql.num_requests == 1
+        # only the PRs GraphQL could not answer are refreshed via REST
+        assert fake_rest.num_200 == num_nodes
+        assert fake_rest.num_304 == num_nodes
+        for n in range(num_nodes):
+            name = f"pkg{n}-feedstock"
+            pr_json = LazyJson(f"pr_json/{name}-1.json")
+            assert pr_json["updated_at"] == "graphql"
+            assert pr_json["id"] == 1001
+            # GraphQL does not provide the REST headers
+            assert pr_json["ETag"] == 'W/"old"'
+            pr_json = LazyJson(f"pr_json/{name}-2.json")
+            assert pr_json["updated_at"] == f'W/"{name}-2"'
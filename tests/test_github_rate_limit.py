@@ -0,0 +1,138 @@
+import time
+from unittest import mock
+
+import requests
+
+from conda_forge_tick.github_rate_limit import (
+    GitHubRateLimitTracker,
+    get_rate_limit_tracker,
+    record_pygithub_rate_limit,
+)
+
+
+def _rate_limit_headers(remaining, limit=5000, reset=None, resource="core"):
+    return {
+        "X-RateLimit-Limit": str(limit),
+        "X-RateLimit-Remaining": str(remaining),
+        "X-RateLimit-Reset": str(int(reset or time.time() + 3600)),
+        "X-RateLimit-Resource": resource,
+    }
+
+
+def test_rate_limit_tracker_records_response_headers(local_http_server):
+    local_http_server.add_route(
+        "GET", "/repos/a/b", headers=_rate_limit_headers(4321), body="{}"
+    )
+    local_http_server.add_route(
+        "GET", "/graphql", headers=_rate_limit_headers(17, resource="graphql")
+    )
+    local_http_server.add_route("GET", "/no-headers", body="{}")
+
+    tracker = GitHubRateLimitTracker()
+    session = requests.Session()
+    session.hooks["response"].append(tracker.record_response)
+
+    assert tracker.estimate() is None
+    assert tracker.is_stale()
+
+    session.get(local_http_server.url + "/repos/a/b")
+    assert tracker.estimate() == 4321
+    assert not tracker.is_stale()
+
+    session.get(local_http_server.url + "/graphql")
+    assert tracker.estimate("graphql") == 17
+    assert tracker.estimate() == 4321
+
+    # responses without rate limit info do not change anything
+    session.get(local_http_server.url + "/no-headers")
+    assert tracker.estimate() == 4321
+
+
+def test_rate_limit_tracker_refreshes_only_when_stale(local_http_server):
+    remaining = {"val": 10}
+
+    def _handler(req):
+        remaining["val"] -= 1
+        return 200, _rate_limit_headers(remaining["val"]), b"{}"
+
+    local_http_server.add_route("GET", "/rate_limit", handler=_handler)
+
+    tracker = GitHubRateLimitTracker(max_age=3600)
+
+    def _refresh():
+        r = requests.get(local_http_server.url + "/rate_limit")
+        tracker.record_response(r)
+        return tracker.estimate()
+
+    for _ in range(5):
+        assert tracker.get_requests_left(refresh=_refresh) == 9
+
+    assert local_http_server.num_requests("GET", "/rate_limit") == 1
+
+    tracker.max_age = 0
+    time.sleep(0.01)
+    assert tracker.get_requests_left(refresh=_refresh) == 8
+    assert local_http_server.num_requests("GET", "/rate_limit") == 2
+
+
+def test_rate_limit_tracker_reset():
+    tracker = GitHubRateLimitTracker()
+    tracker.update(2, limit=5000, reset=time.time() + 3600)
+    assert tracker.estimate() == 2
+
+    # once the window has reset, the full limit is available again
+    tracker.update(0, limit=5000, reset=time.time() - 1)
+    assert tracker.estimate() == 5000
+
+
+def test_rate_limit_tracker_bad_headers():
+    tracker = GitHubRateLimitTracker()
+    assert not tracker.update_from_headers({"X-RateLimit-Remaining": "lots"})
+    assert tracker.estimate() is None
+
+
+def test_record_pygithub_rate_limit():
+    tracker = get_rate_limit_tracker()
+    tracker.clear()
+
+    requester = mock.MagicMock()
+    requester.rate_limiting = (-1, -1)
+    record_pygithub_rate_limit(requester)
+    assert tracker.estimate() is None
+
+    requester.rate_limiting = (100, 5000)
+    requester.rate_limiting_resettime = time.time() + 3600
+    record_pygithub_rate_limit(requester)
+    assert tracker.estimate() == 100
+
+    # older (higher) values from PyGithub do not override what we know
+    tracker.update(50, limit=5000, reset=time.time() + 3600)
+    record_pygithub_rate_limit(requester)
+    assert tracker.estimate() == 50
+
+    tracker.clear()
+
+
+@mock.patch("conda_forge_tick.git_utils.github_backend")
+def test_get_github_api_requests_left_uses_tracker(backend_mock):
+    from conda_forge_tick.git_utils import (
+        get_github_api_requests_left,
+        is_github_api_limit_reached,
+    )
+
+    tracker = get_rate_limit_tracker()
+    tracker.clear()
+    backend_mock.return_value.get_api_requests_left.return_value = 42
+
+    assert get_github_api_requests_left() == 42
+    backend_mock.assert_called_once()
+
+    tracker.update(3, limit=5000, reset=time.time() + 3600)
+    assert get_github_api_requests_left() == 3
+    backend_mock.assert_called_once()
+
+    tracker.update(0, limit=5000, reset=time.time() + 3600)
+    assert is_github_api_limit_reached()
+    backend_mock.assert_called_once()
+
+    tracker.clear()
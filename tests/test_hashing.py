@@ -1,6 +1,21 @@
+import hashlib
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
 import pytest
+import requests
 
-from conda_forge_tick.hashing import _hash_url, hash_url
+from conda_forge_tick.hashing import (
+    URLHashCache,
+    _hash_url,
+    get_url_hash_cache,
+    hash_url,
+    hash_url_digests,
+)
+from conda_forge_tick.settings import BotSettings, use_settings
 
 
 def test_hashing_smoke():
@@ -49,3 +64,212 @@ def test_hashing_badtype():
     url = "https://github.com/LSSTDESC/CLMM/archive/0.1.0.tar.gz"
     with pytest.raises(AttributeError):
         hash_url(url, timeout=100, hash_type="blah")
+
+
+@pytest.fixture(autouse=True)
+def url_hash_cache_dir(tmp_path):
+    with use_settings(BotSettings(url_hash_cache_dir=str(tmp_path / "hash-cache"))):
+        hash_url.cache_clear()
+        yield tmp_path / "hash-cache"
+        hash_url.cache_clear()
+
+
+class FakeArchive:
+    """Serve a large file with an ETag, counting the downloads."""
+
+    def __init__(self, server, path, size=8 * 1024 * 1024, delay=0.0):
+        self.body = os.urandom(size)
+        self.etag = '"v1"'
+        self.delay = delay
+        self.num_downloads = 0
+        self.lock = threading.Lock()
+        server.add_route("HEAD", path, handler=self._handle)
+        server.add_route("GET", path, handler=self._handle)
+
+    @property
+    def sha256(self):
+        return hashlib.sha256(self.body).hexdigest()
+
+    def _handle(self, req):
+        if req.method == "GET":
+            time.sleep(self.delay)
+            with self.lock:
+                self.num_downloads += 1
+        return 200, {"ETag": self.etag}, self.body
+
+
+def test_hashing_persistent_cache(local_http_server):
+    archive = FakeArchive(local_http_server, "/foo-1.0.tar.gz")
+    url = local_http_server.url + "/foo-1.0.tar.gz"
+
+    assert hash_url(url) == archive.sha256
+    # a later run only checks the headers
+    hash_url.cache_clear()
+    assert hash_url(url) == archive.sha256
+    assert archive.num_downloads == 1
+
+    # changed content is hashed again
+    archive.body = os.urandom(1024)
+    archive.etag = '"v2"'
+    hash_url.cache_clear()
+    assert hash_url(url) == archive.sha256
+    assert archive.num_downloads == 2
+
+    # as are other hash types
+    assert hash_url(url, hash_type="md5") == hashlib.md5(archive.body).hexdigest()
+    assert archive.num_downloads == 3
+
+
+def test_hashing_persistent_cache_disabled(local_http_server):
+    archive = FakeArchive(local_http_server, "/foo-1.0.tar.gz", size=1024)
+    url = local_http_server.url + "/foo-1.0.tar.gz"
+
+    with use_settings(BotSettings(url_hash_cache_dir="")):
+        for _ in range(2):
+            hash_url.cache_clear()
+            assert hash_url(url) == archive.sha256
+    assert archive.num_downloads == 2
+    assert local_http_server.num_requests("HEAD") == 0
+
+
+def test_hashing_persistent_cache_no_validators(local_http_server):
+    local_http_server.add_route("HEAD", "/foo.tar.gz", body="foo")
+    local_http_server.add_route("GET", "/foo.tar.gz", body="foo")
+    url = local_http_server.url + "/foo.tar.gz"
+
+    for _ in range(2):
+        hash_url.cache_clear()
+        assert hash_url(url) == hashlib.sha256(b"foo").hexdigest()
+    assert local_http_server.num_requests("GET", "/foo.tar.gz") == 2
+
+
+def test_hashing_concurrent_requests_download_once(local_http_server):
+    archive = FakeArchive(local_http_server, "/foo-1.0.tar.gz", delay=0.5)
+    url = local_http_server.url + "/foo-1.0.tar.gz"
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        hashes = list(pool.map(lambda _: hash_url(url, timeout=30), range(8)))
+
+    assert hashes == [archive.sha256] * 8
+    assert archive.num_downloads == 1
+
+
+def test_hashing_concurrent_requests_own_timeout(local_http_server):
+    FakeArchive(local_http_server, "/foo-1.0.tar.gz", delay=2)
+    url = local_http_server.url + "/foo-1.0.tar.gz"
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        leader = pool.submit(hash_url, url, timeout=30)
+        time.sleep(0.2)
+        t0 = time.monotonic()
+        # a waiting thread gives up after its own timeout
+        assert hash_url(url, timeout=0.5) is None
+        assert time.monotonic() - t0 < 1.5
+        assert leader.result() is not None
+
+
+def test_hashing_concurrent_requests_longer_timeout(local_http_server):
+    archive = FakeArchive(local_http_server, "/foo-1.0.tar.gz", delay=1)
+    url = local_http_server.url + "/foo-1.0.tar.gz"
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        leader = pool.submit(hash_url, url, timeout=0.5)
+        time.sleep(0.2)
+        # the hash is computed again if the first thread timed out
+        assert hash_url(url, timeout=30) == archive.sha256
+        assert leader.result() is None
+
+
+def test_url_hash_cache_ttl_and_size(tmp_path):
+    cache = URLHashCache(str(tmp_path), ttl=3600, max_entries=5)
+    validators = {"ETag": '"v1"'}
+    urls = [f"https://example.com/{i}.tar.gz" for i in range(10)]
+    now = time.time()
+    for i, url in enumerate(urls):
+        cache.put(url, "sha256", validators, str(i))
+        mtime = now - 100 + i
+        os.utime(cache._path(url, "sha256", validators), (mtime, mtime))
+
+    assert cache.get(urls[9], "sha256", validators) == "9"
+    assert cache.get(urls[9], "md5", validators) is None
+    assert cache.get(urls[9], "sha256", {"ETag": '"v2"'}) is None
+
+    # only the newest entries are kept
+    cache.prune()
+    assert [cache.get(url, "sha256", validators) for url in urls] == [None] * 5 + [
+        str(i) for i in range(5, 10)
+    ]
+
+    # expired entries are not used and removed
+    cache.ttl = 0
+    assert cache.get(urls[9], "sha256", validators) is None
+    cache.prune()
+    assert not list(tmp_path.glob("*/*.json"))
+
+
+def test_url_hash_cache_disabled_by_default():
+    with use_settings(BotSettings(url_hash_cache_dir=None)):
+        assert get_url_hash_cache() is None
+
+
+def test_url_hash_cache_private(tmp_path):
+    cache_dir = tmp_path / "hash-cache"
+    cache = URLHashCache(str(cache_dir), ttl=3600, max_entries=5)
+    validators = {"ETag": '"v1"'}
+    url = "https://example.com/foo.tar.gz"
+    cache.put(url, "sha256", validators, "abc")
+
+    pth = cache._path(url, "sha256", validators)
+    assert os.stat(cache_dir).st_mode & 0o777 == 0o700
+    assert os.stat(os.path.dirname(pth)).st_mode & 0o777 == 0o700
+    assert os.stat(pth).st_mode & 0o077 == 0
+    assert cache.get(url, "sha256", validators) == "abc"
+
+    # entries planted by other users are not trusted
+    with mock.patch("conda_forge_tick.hashing.os.getuid", return_value=os.getuid() + 1):
+        assert cache.get(url, "sha256", validators) is None
+
+
+def test_hash_url_digests_single_download(local_http_server):
+    archive = FakeArchive(local_http_server, "/foo-1.0.tar.gz")
+    url = local_http_server.url + "/foo-1.0.tar.gz"
+
+    res = hash_url_digests(url, ["md5", "sha256"])
+
+    assert res.hashes == {
+        "md5": hashlib.md5(archive.body).hexdigest(),
+        "sha256": archive.sha256,
+    }
+    assert res.num_bytes == len(archive.body)
+    assert res.download_throughput > 0
+    assert res.hash_throughput > 0
+    assert archive.num_downloads == 1
+
+
+def test_hash_url_digests_missing(local_http_server):
+    assert hash_url_digests(local_http_server.url + "/missing.tar.gz") is None
+
+
+def test_hash_url_digests_deadline(local_http_server):
+    FakeArchive(local_http_server, "/slow.tar.gz", delay=2)
+
+    assert hash_url_digests(local_http_server.url + "/slow.tar.gz", timeout=0.2) is None
+
+
+def _legacy_hash_url(url):
+    # hash_url used to hash in 8192 byte chunks
+    ha = hashlib.sha256()
+    for chunk in requests.get(url, stream=True).iter_content(chunk_size=8192):
+        ha.update(chunk)
+    return ha.hexdigest()
+
+
+def test_hash_url_digests_matches_legacy(local_http_server):
+    """Compare hashing a large file against hashing it in small chunks."""
+    archive = FakeArchive(local_http_server, "/big.tar.gz", size=64 * 1024 * 1024)
+    url = local_http_server.url + "/big.tar.gz"
+
+    legacy_hash = _legacy_hash_url(url)
+    res = hash_url_digests(url, ["sha256"])
+
+    assert res.hashes["sha256"] == legacy_hash == archive.sha256
@@ -0,0 +1,205 @@
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+from conda_forge_tick.http_cache import CachingHTTPClient, get_http_client
+from conda_forge_tick.settings import BotSettings, use_settings
+from conda_forge_tick.update_sources import NPM, PyPI
+
+
+class FakeConditionalResource:
+    """Serve a resource with an ETag and answer conditional requests with a 304."""
+
+    def __init__(self, server, path, body, etag='"v1"', delay=0.0):
+        self.body = body
+        self.etag = etag
+        self.delay = delay
+        self.num_200 = 0
+        self.num_304 = 0
+        self.lock = threading.Lock()
+        self.running = 0
+        self.max_running = 0
+        server.add_route("GET", path, handler=self._handle)
+
+    def _handle(self, req):
+        with self.lock:
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+        time.sleep(self.delay)
+        with self.lock:
+            self.running -= 1
+            headers = {k.lower(): v for k, v in req.headers.items()}
+            if headers.get("if-none-match") == self.etag:
+                self.num_304 += 1
+                return 304, {"ETag": self.etag}, b""
+            self.num_200 += 1
+            return (
+                200,
+                {"ETag": self.etag, "Content-Type": "application/json"},
+                self.body.encode(),
+            )
+
+
+def test_caching_http_client_revalidates(tmp_path, local_http_server):
+    res = FakeConditionalResource(local_http_server, "/pkg.json", '{"version": "1"}')
+    client = CachingHTTPClient(cache_dir=str(tmp_path))
+    url = local_http_server.url + "/pkg.json"
+
+    r = client.get(url)
+    assert r.status_code == 200
+    assert r.json() == {"version": "1"}
+
+    for _ in range(3):
+        r = client.get(url)
+        assert r.status_code == 200
+        assert r.ok
+        assert r.json() == {"version": "1"}
+        assert r.headers["content-type"] == "application/json"
+        assert r.url == url
+
+    assert res.num_200 == 1
+    assert res.num_304 == 3
+    assert client.stats.num_requests == 4
+    assert client.stats.num_hits == 3
+    assert client.stats.num_stored == 1
+    assert client.stats.hit_rate == 0.75
+
+    # a new client (e.g., in the next run) uses the cache on disk
+    res.body = '{"version": "2"}'
+    res.etag = '"v2"'
+    client = CachingHTTPClient(cache_dir=str(tmp_path))
+    assert client.get(url).json() == {"version": "2"}
+    assert client.get(url).json() == {"version": "2"}
+    assert client.stats.num_hits == 1
+
+
+def test_caching_http_client_no_validators(tmp_path, local_http_server):
+    local_http_server.add_route("GET", "/plain", body="hello")
+    client = CachingHTTPClient(cache_dir=str(tmp_path))
+
+    for _ in range(2):
+        assert client.get(local_http_server.url + "/plain").text == "hello"
+
+    assert local_http_server.num_requests("GET", "/plain") == 2
+    assert client.stats.num_stored == 0
+    assert not any(tmp_path.iterdir())
+
+
+def test_caching_http_client_no_cache_dir(local_http_server):
+    res = FakeConditionalResource(local_http_server, "/pkg.json", "{}")
+    client = CachingHTTPClient(cache_dir=None)
+
+    for _ in range(2):
+        client.get(local_http_server.url + "/pkg.json")
+
+    assert res.num_200 == 2
+    assert client.stats.num_hits == 0
+
+
+def test_caching_http_client_errors_not_cached(tmp_path, local_http_server):
+    local_http_server.add_route(
+        "GET", "/missing", status=404, headers={"ETag": '"x"'}, body="not found"
+    )
+    client = CachingHTTPClient(cache_dir=str(tmp_path))
+
+    for _ in range(2):
+        assert not client.get(local_http_server.url + "/missing").ok
+
+    assert client.stats.num_stored == 0
+    assert client.stats.num_misses == 2
+
+
+def test_caching_http_client_cache_is_private(tmp_path, local_http_server):
+    res = FakeConditionalResource(local_http_server, "/pkg.json", "{}")
+    cache_dir = tmp_path / "cache"
+    url = local_http_server.url + "/pkg.json"
+
+    CachingHTTPClient(cache_dir=str(cache_dir)).get(url)
+    assert cache_dir.stat().st_mode & 0o777 == 0o700
+    assert all(d.stat().st_mode & 0o777 == 0o700 for d in cache_dir.iterdir())
+
+    # entries written by another user are not trusted
+    client = CachingHTTPClient(cache_dir=str(cache_dir))
+    with mock.patch(
+        "conda_forge_tick.http_cache.os.getuid", return_value=os.getuid() + 1
+    ):
+        client.get(url)
+    assert client.stats.num_hits == 0
+    assert res.num_304 == 0
+
+
+def test_caching_http_client_cache_expires(tmp_path, local_http_server):
+    res = FakeConditionalResource(local_http_server, "/pkg.json", "{}")
+    url = local_http_server.url + "/pkg.json"
+
+    client = CachingHTTPClient(cache_dir=str(tmp_path), cache_ttl=0)
+    for _ in range(2):
+        client.get(url)
+    assert res.num_200 == 2
+    assert client.stats.num_hits == 0
+
+
+def test_caching_http_client_prune(tmp_path, local_http_server):
+    for i in range(5):
+        FakeConditionalResource(local_http_server, f"/pkg{i}.json", "{}")
+    client = CachingHTTPClient(cache_dir=str(tmp_path), cache_max_entries=2)
+
+    for i in range(5):
+        client.get(local_http_server.url + f"/pkg{i}.json")
+    client.prune()
+
+    files = [f.name for f in tmp_path.glob("*/*")]
+    assert len([f for f in files if f.endswith(".json")]) == 2
+    assert len([f for f in files if f.endswith(".body")]) == 2
+
+    client.cache_ttl = 0
+    client.prune()
+    assert not list(tmp_path.glob("*/*"))
+
+
+def test_http_client_cache_disabled_by_default():
+    with (
+        mock.patch("conda_forge_tick.http_cache._HTTP_CLIENT", None),
+        use_settings(BotSettings()),
+    ):
+        assert get_http_client().cache_dir is None
+
+
+def test_caching_http_client_per_host_limit(tmp_path, local_http_server):
+    res = FakeConditionalResource(local_http_server, "/slow", "{}", delay=0.05)
+    client = CachingHTTPClient(cache_dir=None, max_connections_per_host=2)
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(lambda _: client.get(local_http_server.url + "/slow"), range(8)))
+
+    assert res.num_200 == 8
+    assert res.max_running == 2
+
+
+def test_version_sources_use_http_cache(tmp_path, local_http_server):
+    pypi = FakeConditionalResource(
+        local_http_server,
+        "/pypi/foo/json",
+        json.dumps({"info": {"version": "1.2.3"}, "releases": {"1.2.3": []}}),
+    )
+    npm = FakeConditionalResource(
+        local_http_server, "/foo", json.dumps({"dist-tags": {"latest": "4.5.6"}})
+    )
+    client = CachingHTTPClient(cache_dir=str(tmp_path))
+
+    with mock.patch(
+        "conda_forge_tick.update_sources.get_http_client", return_value=client
+    ):
+        for _ in range(2):
+            assert (
+                PyPI().get_version(local_http_server.url + "/pypi/foo/json", {})
+                == "1.2.3"
+            )
+            assert NPM().get_version(local_http_server.url + "/foo", {}) == "4.5.6"
+
+    assert pypi.num_200 == npm.num_200 == 1
+    assert pypi.num_304 == npm.num_304 == 1
+    assert client.stats.hit_rate == 0.5
@@ -0,0 +1,203 @@
+import os
+import shutil
+from pathlib import Path
+from unittest import mock
+
+import networkx as nx
+import pytest
+
+from conda_forge_tick.auto_tick import (
+    _remove_closed_pr_json,
+    _update_nodes_with_bot_rerun,
+    _update_nodes_with_new_versions,
+    _update_nodes_with_pr_info,
+)
+from conda_forge_tick.lazy_json_backends import FileLazyJsonBackend, LazyJson
+from conda_forge_tick.os_utils import pushd
+from conda_forge_tick.utils import dump_graph, load_existing_graph
+
+OLD_LAST_MODIFIED = "Mon, 01 Jan 2018 00:00:00 GMT"
+NOW = 2e9
+
+
+def _make_pr(node, ind, state, labels=()):
+    pr = LazyJson(f"pr_json/{node}-{ind}.json")
+    with pr:
+        pr.update(
+            {
+                "state": state,
+                "number": ind,
+                "Last-Modified": OLD_LAST_MODIFIED,
+                "labels": [{"name": lb} for lb in labels],
+            }
+        )
+    return pr
+
+
+def _make_prep_data(num_nodes):
+    gx = nx.DiGraph()
+    for i in range(num_nodes):
+        name = f"pkg{i}"
+
+        pri = LazyJson(f"pr_info/{name}.json")
+        with pri:
+            pri["bad"] = "some error"
+            pri["pre_pr_migrator_attempts"] = {"mig-a": 2, "mig-b": 1}
+            pri["PRed"] = [
+                {
+                    "PR": _make_pr(name, 0, "closed"),
+                    "data": {"name": "mig-a", "bot_rerun": False},
+                },
+                {
+                    "PR": _make_pr(name, 1, "open", labels=["bot-rerun"] * (i % 2)),
+                    "data": {"name": "mig-b", "bot_rerun": False},
+                },
+            ]
+
+        vpri = LazyJson(f"version_pr_info/{name}.json")
+        with vpri:
+            vpri["new_version"] = "1.0"
+            vpri["new_version_attempts"] = {"1.0": 1, "1.1": 3}
+            vpri["PRed"] = [
+                {
+                    "PR": _make_pr(
+                        name, 2, "open", labels=["bot-rerun"] * (i % 3 == 0)
+                    ),
+                    "data": {"version": "1.1", "bot_rerun": False},
+                },
+            ]
+
+        if i % 2:
+            with LazyJson(f"versions/{name}.json") as vd:
+                vd["new_version"] = f"2.{i}"
+
+        lzj = LazyJson(f"node_attrs/{name}.json")
+        with lzj as attrs:
+            attrs.update(
+                {
+                    "feedstock_name": name,
+                    "version": "1.0",
+                    "archived": i % 5 == 4,
+                    "pr_info": pri,
+                    "version_pr_info": vpri,
+                }
+            )
+        gx.add_node(name, payload=lzj)
+
+    # PR info of a node that is no longer in the graph
+    with LazyJson("pr_info/gone.json") as pri:
+        pri["PRed"] = [{"PR": _make_pr("gone", 0, "closed"), "data": {"name": "x"}}]
+
+    # pr json blobs that are not referenced anymore
+    _make_pr("orphan", 0, "closed")
+    _make_pr("orphan", 1, "open")
+
+    dump_graph(gx)
+
+
+def _run_three_passes():
+    _remove_closed_pr_json()
+    gx = load_existing_graph()
+    _update_nodes_with_bot_rerun(gx)
+    _update_nodes_with_new_versions(gx)
+    dump_graph(gx)
+
+
+def _run_fused_pass():
+    gx = load_existing_graph()
+    _update_nodes_with_pr_info(gx, max_workers=4)
+    dump_graph(gx)
+
+
+def _read_tree(root):
+    return {
+        os.path.relpath(os.path.join(dirpath, fn), root): Path(dirpath, fn).read_bytes()
+        for dirpath, _, filenames in os.walk(root)
+        for fn in filenames
+    }
+
+
+def _run_in_copy(base_dir, run_dir, func):
+    counts = {"get": 0, "set": 0}
+    orig_hget = FileLazyJsonBackend.hget
+    orig_hset = FileLazyJsonBackend.hset
+
+    def _counting_hget(self, name, key):
+        counts["get"] += 1
+        return orig_hget(self, name, key)
+
+    def _counting_hset(self, name, key, value):
+        counts["set"] += 1
+        return orig_hset(self, name, key, value)
+
+    shutil.copytree(base_dir, run_dir)
+    with (
+        pushd(str(run_dir)),
+        mock.patch("conda_forge_tick.auto_tick.time.time", return_value=NOW),
+        mock.patch.object(FileLazyJsonBackend, "hget", _counting_hget),
+        mock.patch.object(FileLazyJsonBackend, "hset", _counting_hset),
+    ):
+        func()
+    return _read_tree(run_dir), counts
+
+
+def test_update_nodes_with_pr_info_matches_three_passes(tmp_path):
+    base_dir = tmp_path / "base"
+    base_dir.mkdir()
+    with pushd(str(base_dir)):
+        _make_prep_data(50)
+
+    old_tree, old_counts = _run_in_copy(base_dir, tmp_path / "old", _run_three_passes)
+    new_tree, new_counts = _run_in_copy(base_dir, tmp_path / "new", _run_fused_pass)
+
+    assert new_tree == old_tree
+    assert new_counts["get"] < old_counts["get"]
+    assert new_counts["set"] <= old_counts["set"]
+
+    # make sure the data actually exercised all of the updates
+    assert new_tree != _read_tree(base_dir)
+    assert not any("orphan-0" in k for k in new_tree)
+    assert any("orphan-1" in k for k in new_tree)
+    with pushd(str(tmp_path / "new")):
+        assert LazyJson("version_pr_info/pkg1.json")["new_version"] == "2.1"
+        assert LazyJson("version_pr_info/pkg2.json")["new_version"] == "1.0"
+        pri = LazyJson("pr_info/pkg1.json")
+        assert pri["bad"] is False
+        assert pri["PRed"][0]["PR"]["state"] == "closed"
+        assert pri["PRed"][1]["data"]["bot_rerun"] == NOW
+        assert "mig-b" not in pri["pre_pr_migrator_attempts"]
+        assert LazyJson("pr_info/pkg4.json")["bad"] == "some error"
+        assert LazyJson("pr_info/gone.json")["PRed"][0]["PR"]["state"] == "closed"
+
+
+def test_update_nodes_with_pr_info_missing_node(tmpdir):
+    with pushd(tmpdir):
+        _make_prep_data(2)
+        with LazyJson("versions/not-in-graph.json") as vd:
+            vd["new_version"] = "1.0"
+
+        with pytest.raises(KeyError):
+            _update_nodes_with_pr_info(load_existing_graph())
+
+
+def test_update_nodes_with_pr_info_mongodb_serial(tmpdir):
+    from conda_forge_tick import auto_tick
+
+    used_workers = []
+    orig_executor = auto_tick.executor
+
+    def _recording_executor(kind, max_workers):
+        used_workers.append(max_workers)
+        return orig_executor(kind, max_workers)
+
+    with (
+        pushd(tmpdir),
+        mock.patch.object(auto_tick, "executor", _recording_executor),
+        mock.patch.object(
+            auto_tick, "CF_TICK_GRAPH_DATA_BACKENDS", ("file", "mongodb")
+        ),
+    ):
+        _make_prep_data(2)
+        _update_nodes_with_pr_info(load_existing_graph(), max_workers=4)
+
+    assert used_workers == [1, 1]
@@ -0,0 +1,175 @@
+import gc
+import json
+import weakref
+
+import networkx as nx
+
+from conda_forge_tick.auto_tick import _get_migrator_info, _load_migrator_infos
+from conda_forge_tick.lazy_json_backends import LazyJson
+from conda_forge_tick.make_migrators import load_migrator, load_migrator_names
+from conda_forge_tick.memory_usage import MemoryUsageTracker, evict_graph_payloads
+from conda_forge_tick.os_utils import pushd
+
+
+def _make_big_graph(num_nodes, prefix):
+    gx = nx.DiGraph()
+    for i in range(num_nodes):
+        gx.add_node(f"{prefix}-pkg{i}", extra="x" * 200)
+        if i > 0:
+            gx.add_edge(f"{prefix}-pkg{i - 1}", f"{prefix}-pkg{i}")
+    return gx
+
+
+def _dump_synthetic_migrators(num_migrators, num_nodes):
+    names = []
+    for j in range(num_migrators):
+        gx = _make_big_graph(num_nodes, f"mig{j}")
+        name = f"mig{j}"
+        with LazyJson(f"migrators/{name}.json") as lzj:
+            lzj.update(
+                {
+                    "__migrator__": True,
+                    "class": "Migrator",
+                    "args": [],
+                    "kwargs": {
+                        "pr_limit": 1,
+                        "graph": gx,
+                        "effective_graph": gx,
+                    },
+                    "name": name,
+                }
+            )
+        names.append(name)
+    return names
+
+
+def test_memory_usage_tracker_phases(tmp_path):
+    rss = {"val": 100}
+    tracker = MemoryUsageTracker(get_rss=lambda: rss["val"])
+
+    with tracker.phase("outer") as outer:
+        rss["val"] = 300
+        with tracker.phase("inner") as inner:
+            rss["val"] = 500
+            tracker.sample()
+            rss["val"] = 200
+        rss["val"] = 250
+
+    assert inner.rss_start == 300
+    assert inner.rss_peak == 500
+    assert inner.rss_end == 200
+    assert outer.rss_start == 100
+    assert outer.rss_peak == 500
+    assert outer.rss_end == 250
+
+    report = tmp_path / "report.json"
+    tracker.dump_report(str(report))
+    data = json.loads(report.read_text())
+    assert data["peak_rss"] == 500
+    assert [p["name"] for p in data["phases"]] == ["outer", "inner"]
+
+
+def test_memory_usage_tracker_soft_limit():
+    rss = {"val": 100}
+    evicted = []
+
+    def _evict():
+        evicted.append(True)
+        rss["val"] = 50
+        return 3
+
+    tracker = MemoryUsageTracker(soft_limit_bytes=150, get_rss=lambda: rss["val"])
+    tracker.register_evictor(_evict)
+
+    with tracker.phase("run") as record:
+        assert not tracker.maybe_evict()
+        rss["val"] = 200
+        assert tracker.maybe_evict()
+        assert not tracker.maybe_evict()
+
+    assert len(evicted) == 1
+    assert record.num_evictions == 1
+
+    # without a budget, nothing is ever evicted
+    tracker = MemoryUsageTracker(get_rss=lambda: 10**12)
+    tracker.register_evictor(_evict)
+    assert not tracker.maybe_evict()
+    assert len(evicted) == 1
+
+
+def test_evict_graph_payloads(tmpdir):
+    with pushd(tmpdir):
+        gx = nx.DiGraph()
+        for name in ["a", "b"]:
+            lzj = LazyJson(f"node_attrs/{name}.json")
+            with lzj as attrs:
+                attrs["name"] = name
+            gx.add_node(name, payload=lzj)
+
+        # loaded outside of a context, so it stays in memory
+        assert gx.nodes["a"]["payload"]["name"] == "a"
+
+        with gx.nodes["b"]["payload"] as attrs:
+            attrs["version"] = "1.0"
+            assert evict_graph_payloads(gx) == 1
+            # payloads in use are not evicted
+            assert attrs["version"] == "1.0"
+
+        assert gx.nodes["a"]["payload"]._data is None
+        assert gx.nodes["a"]["payload"]["name"] == "a"
+        assert gx.nodes["b"]["payload"]["version"] == "1.0"
+
+
+def test_load_migrator_names(tmpdir):
+    with pushd(tmpdir):
+        names = _dump_synthetic_migrators(3, 2)
+        with LazyJson("migrators/paused.json") as lzj:
+            lzj.update(
+                {
+                    "__migrator__": True,
+                    "class": "Migrator",
+                    "args": [],
+                    "kwargs": {"paused": True},
+                    "name": "paused",
+                }
+            )
+
+        assert load_migrator_names() == names
+        assert load_migrator_names(filter_name=["MIG1"]) == ["mig1"]
+        assert sorted(load_migrator_names(skip_paused=False)) == names + ["paused"]
+
+        migrator = load_migrator("mig2")
+        assert set(migrator.graph.nodes) == {"mig2-pkg0", "mig2-pkg1"}
+
+
+def test_load_migrator_infos(tmpdir):
+    with pushd(tmpdir):
+        names = _dump_synthetic_migrators(4, 3)
+        first = load_migrator(names[0])
+
+        infos = _load_migrator_infos([first, *names[1:]])
+
+        assert infos == [_get_migrator_info(first)] + [
+            _get_migrator_info(load_migrator(name), name=name) for name in names[1:]
+        ]
+    assert infos[0].name is None
+    assert infos[1].nodes == ["mig1-pkg0", "mig1-pkg1", "mig1-pkg2"]
+
+
+def test_lazy_migrator_loading_releases_migrators(tmpdir):
+    """Loading migrators one at a time keeps at most one migrator in memory."""
+    num_migrators = 4
+    with pushd(tmpdir):
+        names = _dump_synthetic_migrators(num_migrators, 20)
+
+        refs = []
+        num_nodes = 0
+        for name in names:
+            migrator = load_migrator(name)
+            num_nodes += len(migrator.graph.nodes)
+            refs.append(weakref.ref(migrator))
+            del migrator
+            gc.collect()
+            assert all(ref() is None for ref in refs)
+
+    assert num_nodes == num_migrators * 20
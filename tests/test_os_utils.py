@@ -0,0 +1,96 @@
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+
+from conda_forge_tick.os_utils import TempWorkspaceManager
+
+
+def test_temp_workspace_manager_removes_workspaces(tmp_path):
+    with TempWorkspaceManager(root=str(tmp_path)) as workspaces:
+        root = workspaces.root
+        assert root.parent == tmp_path
+
+        with workspaces.workspace("numpy") as ws:
+            assert ws.is_dir()
+            assert ws.parent == root
+            (ws / "data.bin").write_bytes(b"x" * 1000)
+            assert workspaces.disk_usage() == 1000
+
+        assert not ws.exists()
+        assert list(root.iterdir()) == []
+
+    assert not root.exists()
+
+
+def test_temp_workspace_manager_set_tempdir(tmp_path):
+    old_tempdir = tempfile.tempdir
+    old_env = os.environ.get("TMPDIR")
+
+    with TempWorkspaceManager(root=str(tmp_path)) as workspaces:
+        with workspaces.workspace("a/b c", set_tempdir=True) as ws:
+            with tempfile.TemporaryDirectory() as tmpdir:
+                assert os.path.dirname(tmpdir) == str(ws)
+
+            # subprocesses also write into the workspace
+            out = subprocess.run(
+                [sys.executable, "-c", "import tempfile; print(tempfile.mkdtemp())"],
+                capture_output=True,
+                text=True,
+                check=True,
+            ).stdout.strip()
+            assert os.path.dirname(out) == str(ws)
+
+        assert not os.path.exists(out)
+        assert tempfile.tempdir == old_tempdir
+        assert os.environ.get("TMPDIR") == old_env
+
+
+def test_temp_workspace_manager_leaves_other_files_alone(tmp_path):
+    other = tmp_path / "other-worker-file"
+    other.write_text("keep me")
+
+    with TempWorkspaceManager(root=str(tmp_path), background=True) as workspaces:
+        for i in range(5):
+            with workspaces.workspace("pkg") as ws:
+                (ws / "f").write_text(str(i))
+        workspaces.wait()
+        assert list(workspaces.root.iterdir()) == []
+
+    assert other.read_text() == "keep me"
+    assert list(tmp_path.iterdir()) == [other]
+
+
+def test_temp_workspace_manager_concurrent(tmp_path):
+    seen = []
+
+    def _work(workspaces, i):
+        with workspaces.workspace("pkg") as ws:
+            (ws / "f").write_text(str(i))
+            seen.append(ws)
+
+    with TempWorkspaceManager(root=str(tmp_path), background=True) as workspaces:
+        threads = [
+            threading.Thread(target=_work, args=(workspaces, i)) for i in range(10)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        workspaces.wait()
+
+        assert len(set(seen)) == 10
+        assert list(workspaces.root.iterdir()) == []
+
+
+def test_temp_workspace_manager_disk_limit(tmp_path):
+    with TempWorkspaceManager(
+        root=str(tmp_path), max_bytes=100, background=True
+    ) as workspaces:
+        with workspaces.workspace("big") as ws:
+            (ws / "f").write_bytes(b"x" * 1000)
+
+        # over the limit, so the workspace is removed before we continue
+        assert workspaces._pending == []
+        assert workspaces.disk_usage() == 0
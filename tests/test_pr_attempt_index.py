@@ -0,0 +1,159 @@
+import time
+from unittest import mock
+
+import networkx as nx
+
+from conda_forge_tick.auto_tick import _compute_time_per_migrator, _get_migrator_info
+from conda_forge_tick.lazy_json_backends import FileLazyJsonBackend, LazyJson
+from conda_forge_tick.migrators import Migrator
+from conda_forge_tick.os_utils import pushd
+from conda_forge_tick.pr_attempt_index import PRAttemptIndex, PRAttemptRecord
+
+
+def _make_synthetic_graph(num_nodes, migrator_names):
+    gx = nx.DiGraph()
+    for i in range(num_nodes):
+        name = f"pkg{i}"
+        pri = LazyJson(f"pr_info/{name}.json")
+        with pri:
+            pri["pre_pr_migrator_attempts"] = {
+                mname: (i + j) % 5 for j, mname in enumerate(migrator_names)
+            }
+            pri["pre_pr_migrator_attempt_ts"] = {
+                mname: int(time.time()) - 3600 * (i % 7)
+                for mname in migrator_names
+                if i % 3
+            }
+            pri["PRed"] = []
+            if i % 4 == 0:
+                pri["PRed"].append(
+                    {"data": {"migrator_name": "Migrator", "name": migrator_names[0]}}
+                )
+        vpri = LazyJson(f"version_pr_info/{name}.json")
+        with vpri:
+            vpri["new_version"] = "1.0"
+            vpri["new_version_attempts"] = {"1.0": i % 4, "0.9": 10}
+            vpri["new_version_attempt_ts"] = {"1.0": 123}
+            vpri["PRed"] = [{"data": {"version": "1.0"}}] if i % 2 else []
+
+        lzj = LazyJson(f"node_attrs/{name}.json")
+        with lzj as attrs:
+            attrs.update(
+                {
+                    "feedstock_name": name,
+                    "pr_info": pri,
+                    "version_pr_info": vpri,
+                }
+            )
+        gx.add_node(name, payload=lzj)
+        if i > 0:
+            gx.add_edge(f"pkg{i - 1}", name)
+    return gx
+
+
+class _NamedMigrator(Migrator):
+    def __init__(self, name, gx):
+        self.name = name
+        super().__init__(graph=gx, effective_graph=gx, pr_limit=5)
+
+
+def test_pr_attempt_index_records(tmpdir):
+    with pushd(tmpdir):
+        gx = _make_synthetic_graph(8, ["mig-a", "mig-b"])
+        index = PRAttemptIndex.from_hashmaps()
+
+    assert index.get("mig-a", "pkg0") == PRAttemptRecord(
+        attempts=0, last_attempt_ts=None, has_pr=True
+    )
+    assert index.get_attempts("mig-b", "pkg2") == 3
+    assert index.get("mig-b", "pkg2").has_pr is False
+    assert index.get("mig-b", "pkg2").last_attempt_ts is not None
+
+    vrec = index.get("version", "pkg3", is_version=True)
+    assert vrec == PRAttemptRecord(attempts=3, last_attempt_ts=123, has_pr=True)
+
+    # unknown nodes or migrators give empty records
+    assert index.get("mig-c", "pkg1") == PRAttemptRecord()
+    assert index.get_attempts("mig-a", "not-a-node") == 0
+
+    with pushd(tmpdir):
+        sub_index = PRAttemptIndex.from_hashmaps(nodes=["pkg1"])
+    assert sub_index.get_attempts("mig-b", "pkg1") == 2
+    assert sub_index.get_attempts("mig-b", "pkg2") == 0
+    assert len(gx.nodes) == 8
+
+
+def test_pr_attempt_index_has_pr_matches_pred(tmpdir):
+    names = ["mig-a", "mig-b"]
+    with pushd(tmpdir):
+        gx = _make_synthetic_graph(12, names)
+        index = PRAttemptIndex.from_hashmaps()
+
+        for node in gx.nodes:
+            pred = LazyJson(f"pr_info/{node}.json")["PRed"]
+            for name in names:
+                assert index.get(name, node).has_pr == any(
+                    pr["data"]["name"] == name for pr in pred
+                )
+
+            vpri = LazyJson(f"version_pr_info/{node}.json")
+            assert index.get("version", node, is_version=True).has_pr == any(
+                pr["data"]["version"] == vpri["new_version"] for pr in vpri["PRed"]
+            )
+
+
+def test_pr_attempt_index_compute_time_per_migrator_matches(tmpdir):
+    names = [f"mig-{j}" for j in range(6)]
+    with pushd(tmpdir):
+        gx = _make_synthetic_graph(60, names)
+        migrators = [_NamedMigrator(name, gx) for name in names]
+
+        expected = _compute_time_per_migrator(migrators)
+        index = PRAttemptIndex.from_hashmaps()
+        assert _compute_time_per_migrator(migrators, attempt_index=index) == expected
+
+        # the data of the migrators is enough with an index
+        infos = [_get_migrator_info(migrator) for migrator in migrators]
+        assert _compute_time_per_migrator(infos, attempt_index=index) == expected
+
+
+def test_pr_attempt_index_migrator_order_matches(tmpdir):
+    with pushd(tmpdir):
+        gx = _make_synthetic_graph(30, ["mig-a"])
+        migrator = _NamedMigrator("mig-a", gx)
+        index = PRAttemptIndex.from_hashmaps()
+
+        # the order uses random tie breaking, so we turn that off
+        with mock.patch("conda_forge_tick.migrators.core.RNG.random", return_value=0.0):
+            expected = migrator.order(gx, gx)
+            assert migrator.order(gx, gx, attempt_index=index) == expected
+
+
+def test_pr_attempt_index_reads(tmpdir):
+    """Count the file parses on synthetic data."""
+    names = [f"mig-{j}" for j in range(10)]
+    num_nodes = 100
+    with pushd(tmpdir):
+        gx = _make_synthetic_graph(num_nodes, names)
+        migrators = [_NamedMigrator(name, gx) for name in names]
+
+        orig_hget = FileLazyJsonBackend.hget
+        calls = {"n": 0}
+
+        def _counting_hget(self, name, key):
+            calls["n"] += 1
+            return orig_hget(self, name, key)
+
+        with mock.patch.object(FileLazyJsonBackend, "hget", _counting_hget):
+            _compute_time_per_migrator(migrators)
+            walk_reads = calls["n"]
+
+            calls["n"] = 0
+            index = PRAttemptIndex.from_hashmaps()
+            _compute_time_per_migrator(migrators, attempt_index=index)
+            index_reads = calls["n"]
+
+    # the walk opens the node payload and pr_info for every migrator
+    assert walk_reads == 2 * num_nodes * len(names)
+    # the index reads pr_info and version_pr_info once per node
+    assert index_reads == 2 * num_nodes
@@ -3,14 +3,24 @@ import os
 from collections.abc import Iterator
 from pathlib import Path
 
+import jinja2
+import jinja2.meta
+import jinja2.sandbox
 import pytest
 
 from conda_forge_tick.recipe_parser import CONDA_SELECTOR, CondaMetaYAML
 from conda_forge_tick.recipe_parser._parser import (
     _build_jinja2_expr_tmp,
+    _compile_jinja2_expr_tmpl,
     _demunge_jinja2_vars,
+    _get_yaml_parser,
+    _MultilineJinja2Munger,
+    _munge_jinj2_comments,
     _munge_line,
     _parse_jinja2_variables,
+    _preprocess_meta_yaml,
+    _remove_bad_jinja2_set_statements,
+    _remove_quoted_jinja2_vars,
     _remunge_jinja2_vars,
     _replace_jinja2_vars,
     _unmunge_line,
@@ -1864,3 +1874,174 @@ def test_recipe_parser_yaml_suite(recipe_path: Path):
     cm.dump(s)
     s.seek(0)
     assert s.read() == recipe
+
+
+def _legacy_eval_jinja2_exprs(cm, jinja2_vars):
+    # the implementation before the templates were cached
+    exprs = cm.jinja2_exprs
+    while True:
+        tmpl = _build_jinja2_expr_tmp(exprs)
+        if len(tmpl.strip()) == 0:
+            return {}
+        env = jinja2.sandbox.SandboxedEnvironment()
+        undefined = jinja2.meta.find_undeclared_variables(env.parse(tmpl))
+        undefined = {u for u in undefined if u not in jinja2_vars}
+        if len(undefined) > 0:
+            exprs = {
+                var: expr
+                for var, expr in exprs.items()
+                if not any(u in expr for u in undefined)
+            }
+        else:
+            break
+    return _get_yaml_parser().load(jinja2.Template(tmpl).render(**jinja2_vars))
+
+
+def _selector_contexts(cm):
+    # the contexts the version migrator evaluates the expressions with
+    selectors = {None} | {
+        key.split(CONDA_SELECTOR)[1] for key in cm.jinja2_vars if CONDA_SELECTOR in key
+    }
+    for selector in sorted(selectors, key=str):
+        context = {}
+        for key, val in cm.jinja2_vars.items():
+            if CONDA_SELECTOR in key:
+                if selector is not None and selector in key:
+                    context[key.split(CONDA_SELECTOR)[0]] = val
+            else:
+                context[key] = val
+        yield context
+
+
+def test_eval_jinja2_exprs_matches_legacy():
+    num_evals = 0
+    for recipe_path in collect_all_recipes(YAML_PATH):
+        cm = CondaMetaYAML(recipe_path.read_text())
+        for _ in range(2):
+            for context in _selector_contexts(cm):
+                try:
+                    expected = _legacy_eval_jinja2_exprs(cm, context)
+                except Exception as e:
+                    with pytest.raises(type(e)):
+                        cm.eval_jinja2_exprs(context)
+                else:
+                    assert cm.eval_jinja2_exprs(context) == expected, recipe_path
+                num_evals += 1
+    assert num_evals > 100
+
+
+def test_eval_jinja2_exprs_tracks_changed_exprs():
+    cm = CondaMetaYAML(
+        """\
+{% set version = "1.2.3" %}
+{% set major = version.split(".")[0] %}
+
+package:
+  name: foo
+  version: {{ version }}
+"""
+    )
+    assert cm.eval_jinja2_exprs(cm.jinja2_vars) == {"major": "1"}
+    assert cm.eval_jinja2_exprs({}) == {}
+
+    cm.jinja2_exprs["minor"] = '{% set minor = version.split(".")[1] %}'
+    assert cm.eval_jinja2_exprs(cm.jinja2_vars) == {"major": "1", "minor": "2"}
+    assert cm.eval_jinja2_exprs({"version": "4.5.6"}) == {"major": "4", "minor": "5"}
+
+
+def test_eval_jinja2_exprs_many_selectors():
+    """Evaluate the expressions of a recipe with many selectors."""
+    num_selectors = 20
+    lines = ['{% set version = "1.2.3" %}']
+    for i in range(num_selectors):
+        lines.append(f'{{% set sha = "{i:064x}" %}}  # [sel{i}]')
+    for i in range(10):
+        lines.append(f'{{% set part{i} = version.split(".")[{i % 3}] ~ "{i}" %}}')
+    lines += [
+        "",
+        "package:",
+        "  name: foo",
+        "  version: {{ version }}",
+        "",
+        "source:",
+        "  url: https://example.com/foo-{{ version }}.tar.gz",
+        "  sha256: {{ sha }}",
+    ]
+    cm = CondaMetaYAML("\n".join(lines) + "\n")
+    contexts = list(_selector_contexts(cm))
+    assert len(contexts) == num_selectors + 1
+
+    expected = [_legacy_eval_jinja2_exprs(cm, context) for context in contexts]
+    _compile_jinja2_expr_tmpl.cache_clear()
+    evaled = [cm.eval_jinja2_exprs(context) for context in contexts]
+
+    assert evaled == expected
+    assert evaled[0]["part1"] == "21"
+    # the expressions are analyzed once per set of var names, here with and
+    # without the selected sha, and the resulting template is compiled once
+    assert len(cm._jinja2_expr_tmpls) == 2
+    assert _compile_jinja2_expr_tmpl.cache_info().misses == 1
+
+
+TESTS_PATH = Path(__file__).parent
+
+
+def _collect_all_recipe_fixtures() -> list[Path]:
+    paths = []
+    for dirpath, _, filenames in os.walk(TESTS_PATH):
+        for filename in filenames:
+            if filename.endswith(".yaml") and (
+                "meta" in filename or filename.endswith("_correct.yaml")
+            ):
+                paths.append(Path(dirpath) / filename)
+    return sorted(paths)
+
+
+def _legacy_preprocess_meta_yaml(meta_yaml):
+    # the separate passes over the lines before they were fused
+    lines = list(io.StringIO(meta_yaml).readlines())
+    lines = [_munge_jinj2_comments(line) for line in lines]
+    lines = [_remove_bad_jinja2_set_statements(line) for line in lines]
+    munger = _MultilineJinja2Munger()
+    lines = [munger(line) for line in lines]
+    lines = [_remove_quoted_jinja2_vars(line) for line in lines]
+    meta_yaml = "".join(lines)
+    munged = "".join(_munge_line(line) for line in io.StringIO(meta_yaml).readlines())
+    return meta_yaml, munged
+
+
+def test_preprocess_meta_yaml_matches_separate_passes():
+    for recipe_path in _collect_all_recipe_fixtures():
+        recipe = recipe_path.read_text()
+        assert _preprocess_meta_yaml(recipe) == _legacy_preprocess_meta_yaml(recipe), (
+            recipe_path
+        )
+
+
+def test_preprocess_meta_yaml_raises_on_multiline_string_with_selector():
+    with pytest.raises(RuntimeError, match="offending line: 'a: |  # \\[win\\]'"):
+        _preprocess_meta_yaml("b: 1\na: |  # [win]\n  blah\n")
+
+
+def test_recipe_parser_parse_and_dump_all_fixtures():
+    """Parse and dump all recipe fixtures."""
+    recipes = []
+    for recipe_path in _collect_all_recipe_fixtures():
+        recipe = recipe_path.read_text()
+        try:
+            CondaMetaYAML(recipe)
+        except Exception:
+            # e.g., v1 recipes or recipes the parser is known to not support
+            continue
+        recipes.append((recipe_path, recipe))
+    assert len(recipes) > 150
+    suite = set(collect_all_recipes(YAML_PATH))
+
+    cms = [CondaMetaYAML(recipe) for _, recipe in recipes]
+    dumped = [cm.dumps() for cm in cms]
+
+    for (recipe_path, recipe), s in zip(recipes, dumped):
+        if recipe_path in suite:
+            assert s == recipe, recipe_path
+        # dumping is stable for all recipes
+        assert CondaMetaYAML(s).dumps() == s, recipe_path
@@ -1,20 +1,26 @@
 import os
 import shutil
+import subprocess
 from pathlib import Path
 from tempfile import TemporaryDirectory
+from unittest import mock
 
+import orjson
 import pytest
 
 from conda_forge_tick.feedstock_parser import (
     populate_feedstock_attributes,
 )
+from conda_forge_tick.settings import BotSettings, use_settings
 from conda_forge_tick.utils import (
+    _RENDERED_RECIPE_YAML_CACHE,
     _parse_recipe_yaml_requirements,
     _process_recipe_for_pinning,
     _render_recipe_yaml,
     parse_meta_yaml,
     parse_munged_run_export,
     parse_recipe_yaml,
+    parse_recipe_yaml_batch,
 )
 
 TEST_RECIPE_YAML_PATH = Path(__file__).parent / "test_recipe_yaml"
@@ -30,6 +36,76 @@ def test_render_recipe_yaml():
     assert package_data["version"] == "8.1.2"
 
 
+def test_render_recipe_yaml_cache():
+    text = TEST_RECIPE_YAML_PATH.joinpath("ipywidgets.yaml").read_text()
+    rendered = [{"recipe": {"package": {"name": "ipywidgets", "version": "8.1.2"}}}]
+    _RENDERED_RECIPE_YAML_CACHE.clear()
+
+    with mock.patch(
+        "conda_forge_tick.utils.subprocess.run",
+        return_value=subprocess.CompletedProcess(
+            [], 0, stdout=orjson.dumps(rendered).decode(), stderr=""
+        ),
+    ) as run:
+        for _ in range(2):
+            data = _render_recipe_yaml(text, cbc_path="python:\n- 3.12\n")
+            assert data == [rendered[0]["recipe"]]
+            # the callers modify the rendered recipes in place
+            data[0]["package"]["name"] = "foo"
+        assert run.call_count == 1
+
+        _render_recipe_yaml(text, cbc_path="python:\n- 3.13\n")
+        assert run.call_count == 2
+
+        # the target platform is only passed without a variant config
+        _render_recipe_yaml(text, platform_arch="osx-64", cbc_path="python:\n- 3.12\n")
+        assert run.call_count == 2
+        _render_recipe_yaml(text, platform_arch="osx-64")
+        _render_recipe_yaml(text, platform_arch="linux-64")
+        assert run.call_count == 4
+
+    _RENDERED_RECIPE_YAML_CACHE.clear()
+
+
+@pytest.mark.skipif(
+    shutil.which("rattler-build") is None, reason="rattler-build is not installed"
+)
+@pytest.mark.parametrize("recipe_name", ["libssh", "torchvision-reduced"])
+@pytest.mark.parametrize("for_pinning", [False, True])
+def test_parse_recipe_yaml_batch(recipe_name, for_pinning):
+    text = TEST_RECIPE_YAML_PATH.joinpath(f"{recipe_name}.yaml").read_text()
+    variants = [
+        (
+            platform_arch,
+            f"target_platform:\n - '{platform_arch}'\n"
+            f"cuda_compiler_version:\n  - '{cuda}'\n",
+        )
+        for platform_arch in ["linux-64", "linux-aarch64", "osx-arm64", "win-64"]
+        for cuda in ["None", "12.6"]
+    ] + [("linux-64", None)]
+
+    _RENDERED_RECIPE_YAML_CACHE.clear()
+    expected = [
+        parse_recipe_yaml(
+            text,
+            for_pinning=for_pinning,
+            platform_arch=platform_arch,
+            cbc_path=cbc_path,
+            use_container=False,
+        )
+        for platform_arch, cbc_path in variants
+    ]
+
+    _RENDERED_RECIPE_YAML_CACHE.clear()
+    with use_settings(BotSettings(feedstock_parsing_max_workers=4)):
+        batch = parse_recipe_yaml_batch(
+            text, variants, for_pinning=for_pinning, use_container=False
+        )
+
+    assert batch == expected
+    _RENDERED_RECIPE_YAML_CACHE.clear()
+
+
 def test_parse_validated_recipes():
     text = TEST_RECIPE_YAML_PATH.joinpath("mplb.yaml").read_text()
     recipe_yaml_dict = parse_recipe_yaml(text)
@@ -1,9 +1,25 @@
 """Tests for update_prs module."""
 
+import functools
+import json
+import threading
+import time
+from datetime import datetime
+from unittest import mock
+
 import networkx as nx
 import pytest
 
-from conda_forge_tick.update_prs import _filter_feedstock_nodes, _update_pr
+from conda_forge_tick.github_rate_limit import get_rate_limit_tracker
+from conda_forge_tick.lazy_json_backends import LazyJson
+from conda_forge_tick.os_utils import pushd
+from conda_forge_tick.pr_refresh import PRRefreshEngine
+from conda_forge_tick.settings import BotSettings, use_settings
+from conda_forge_tick.update_prs import (
+    _combined_update_function,
+    _filter_feedstock_nodes,
+    _update_pr,
+)
 
 
 @pytest.mark.parametrize(
@@ -65,3 +81,203 @@ def test_returns_zero_when_feedstock_not_found():
 
     assert succeeded == 0
     assert failed == 0
+
+
+def test_pr_refresh_engine_concurrency_and_results():
+    lock = threading.Lock()
+    running = {"now": 0, "max": 0}
+
+    def _refresh(i):
+        with lock:
+            running["now"] += 1
+            running["max"] = max(running["max"], running["now"])
+        time.sleep(0.01)
+        with lock:
+            running["now"] -= 1
+        if i % 5 == 0:
+            raise ValueError(i)
+        return {"i": i} if i % 2 else None
+
+    results = {}
+    errors = []
+    stats = PRRefreshEngine(4).run(
+        ((i, functools.partial(_refresh, i)) for i in range(40)),
+        results.__setitem__,
+        lambda key, e: errors.append(key) or False,
+    )
+
+    assert 1 < running["max"] <= 4
+    assert sorted(errors) == list(range(0, 40, 5))
+    assert set(results) == set(range(40)) - set(errors)
+    assert all(results[i] == ({"i": i} if i % 2 else None) for i in results)
+    assert stats.num_submitted == 40
+    assert stats.num_failed == 8
+    assert stats.num_succeeded == 16
+    assert stats.num_unchanged == 16
+    assert not stats.stopped_early
+
+
+def test_pr_refresh_engine_budget():
+    budget = {"left": 10}
+    lock = threading.Lock()
+
+    def _refresh():
+        with lock:
+            budget["left"] -= 2
+        return {}
+
+    stats = PRRefreshEngine(
+        8, requests_left=lambda: budget["left"], requests_per_refresh=2
+    ).run(
+        ((i, _refresh) for i in range(100)),
+        lambda key, res: None,
+        lambda key, e: False,
+    )
+
+    assert stats.num_submitted == 5
+    assert budget["left"] == 0
+    assert stats.stopped_early
+
+
+def test_pr_refresh_engine_stop_on_error():
+    def _refresh(i):
+        if i == 3:
+            raise RuntimeError("rate limit")
+        return {}
+
+    stats = PRRefreshEngine(1).run(
+        ((i, functools.partial(_refresh, i)) for i in range(10)),
+        lambda key, res: None,
+        lambda key, e: True,
+    )
+
+    assert stats.num_submitted == 4
+    assert stats.num_failed == 1
+    assert stats.stopped_early
+
+
+class FakeGitHubPulls:
+    """Serve the PR endpoint of the GitHub API with conditional request support."""
+
+    def __init__(self, server, delay=0.01):
+        self.prs = {}
+        self.delay = delay
+        self.lock = threading.Lock()
+        self.running = 0
+        self.max_running = 0
+        self.num_200 = 0
+        self.num_304 = 0
+        self.remaining = 5000
+        server.add_route("GET", "/repos/conda-forge/*", handler=self._handle)
+
+    def add_pr(self, repo, number, etag):
+        self.prs[(repo, number)] = {
+            "etag": etag,
+            "data": {
+                "id": number,
+                "number": number,
+                "state": "open",
+                "mergeable_state": "clean",
+                "updated_at": etag,
+                "labels": [],
+                "head": {"ref": "branch"},
+                "base": {"repo": {"name": repo}},
+                "html_url": f"https://github.com/conda-forge/{repo}/pull/{number}",
+            },
+        }
+
+    def _handle(self, req):
+        with self.lock:
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+        time.sleep(self.delay)
+        _, _, _, repo, _, number = req.path.split("?")[0].split("/")
+        pr = self.prs[(repo, int(number))]
+        with self.lock:
+            self.running -= 1
+            headers = {k.lower(): v for k, v in req.headers.items()}
+            if headers.get("if-none-match") == pr["etag"]:
+                self.num_304 += 1
+                status, body = 304, b""
+            else:
+                self.num_200 += 1
+                self.remaining -= 1
+                status, body = 200, json.dumps(pr["data"]).encode()
+            headers = {
+                "ETag": pr["etag"],
+                "Last-Modified": "Mon, 01 Jan 2024 00:00:00 GMT",
+                "X-RateLimit-Remaining": str(self.remaining),
+                "X-RateLimit-Limit": "5000",
+            }
+        return status, headers, body
+
+
+def test_update_pr_refreshes_all_prs(tmpdir, local_http_server):
+    fake = FakeGitHubPulls(local_http_server)
+    gx = nx.DiGraph()
+    num_nodes = 20
+    with pushd(tmpdir):
+        for n in range(num_nodes):
+            name = f"pkg{n}-feedstock"
+            prs = []
+            for number in [1, 2]:
+                # every third PR changed on GitHub since we last fetched it
+                old_etag = f'W/"{name}-{number}"'
+                new_etag = old_etag if (2 * n + number) % 3 else f'W/"{name}-new"'
+                fake.add_pr(name, number, new_etag)
+                pr_json = LazyJson(f"pr_json/{name}-{number}.json")
+                with pr_json:
+                    pr_json.update(
+                        {
+                            "id": number,
+                            "number": number,
+                            "state": "open",
+                            "mergeable_state": "clean",
+                            "updated_at": old_etag,
+                            "labels": [],
+                            "head": {"ref": "branch"},
+                            "base": {"repo": {"name": name}},
+                            "ETag": old_etag,
+                            "Last-Modified": "Mon, 01 Jan 2024 00:00:00 GMT",
+                            "last_fetched": datetime.now().isoformat(),
+                        }
+                    )
+                prs.append({"PR": pr_json, "data": {}})
+            gx.add_node(name, payload={"pr_info": {"PRed": prs}})
+
+        with (
+            use_settings(
+                BotSettings(
+                    frac_update_pr_json=1.0,
+                    update_prs_max_workers=8,
+                    update_prs_use_graphql=False,
+                )
+            ),
+            mock.patch(
+                "conda_forge_tick.git_utils.GITHUB_API_URL", local_http_server.url
+            ),
+            mock.patch("conda_forge_tick.git_utils.get_bot_token", return_value="xyz"),
+            mock.patch(
+                "conda_forge_tick.update_prs.get_github_api_requests_left",
+                side_effect=lambda: fake.remaining,
+            ),
+        ):
+            try:
+                succeeded, failed = _update_pr(
+                    _combined_update_function, False, gx, job=1, n_jobs=1
+                )
+            finally:
+                # the shared session records the fake rate limit headers
+                get_rate_limit_tracker().clear()
+
+        num_changed = sum(1 for pr in fake.prs.values() if pr["etag"].endswith('-new"'))
+        assert failed == 0
+        assert succeeded == 2 * num_nodes
+        # each PR is refreshed twice, but unchanged PRs are never re-downloaded
+        assert fake.num_200 == num_changed
+        assert fake.num_304 == 4 * num_nodes - num_changed
+        assert 1 < fake.max_running <= 8
+        for (name, number), pr in fake.prs.items():
+            pr_json = LazyJson(f"pr_json/{name}-{number}.json")
+            assert pr_json["ETag"] == pr["etag"]
+            assert pr_json["updated_at"] == pr["etag"]
@@ -1,8 +1,14 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
 from unittest.mock import Mock, patch
 
 import pytest
 
-from conda_forge_tick.update_sources import CratesIO
+from conda_forge_tick import update_sources
+from conda_forge_tick.http_cache import CachingHTTPClient
+from conda_forge_tick.settings import BotSettings, settings, use_settings
+from conda_forge_tick.update_sources import CRAN, CratesIO, PyPI, ROSDistro
+from conda_forge_tick.update_upstream_versions import prepare_source_indexes
 
 
 class TestCratesIOTierDirectory:
@@ -75,8 +81,8 @@ class TestCratesIOGetVersion:
         result = CratesIO().get_version(url, {})
         assert result is None
 
-    @patch("conda_forge_tick.update_sources.requests.get")
-    def test_empty_package(self, mock_get):
+    @patch("conda_forge_tick.update_sources.get_http_client")
+    def test_empty_package(self, mock_get_http_client):
         pkg = "syn"
         tier = CratesIO._tier_directory(pkg)
         url = f"https://index.crates.io/{tier}"
@@ -85,7 +91,287 @@ class TestCratesIOGetVersion:
         mock_response = Mock()
         mock_response.ok = True
         mock_response.text = '{"name": "syn"}'
-        mock_get.return_value = mock_response
+        mock_get_http_client.return_value.get.return_value = mock_response
 
         result = CratesIO().get_version(url, {})
         assert result is None
+
+
+CRAN_CONTRIB_HTML = "\n".join(
+    f'<tr><td><a href="pkg{i}_1.{i}.tar.gz">pkg{i}_1.{i}.tar.gz</a></td></tr>'
+    for i in range(20)
+)
+CRAN_ARCHIVE_HTML = '<tr><td><a href="oldpkg/">oldpkg/</a></td></tr>'
+ROSDISTRO_YAML = """\
+repositories:
+  foo_pkg:
+    release:
+      packages: [foo_pkg]
+      tags:
+        release: release/melodic/{package}/{version}
+      url: https://github.com/ros/foo.git
+      version: 1.2.3-1
+"""
+
+
+@pytest.fixture
+def source_index_server(tmp_path, local_http_server):
+    local_http_server.add_route("GET", "/src/contrib/", body=CRAN_CONTRIB_HTML)
+    local_http_server.add_route("GET", "/src/contrib/Archive/", body=CRAN_ARCHIVE_HTML)
+    local_http_server.add_route(
+        "GET", "/melodic/distribution.yaml", body=ROSDISTRO_YAML
+    )
+
+    with (
+        use_settings(BotSettings(version_sources_index_dir=str(tmp_path / "index"))),
+        patch(
+            "conda_forge_tick.update_sources.get_http_client",
+            return_value=CachingHTTPClient(cache_dir=None),
+        ),
+        patch.object(update_sources, "CRAN_INDEX", {}),
+        patch.object(update_sources, "ROS_DISTRO_INDEX", {}),
+        patch.object(update_sources, "SOURCE_INDEX_READ_ONLY_DIR", None),
+    ):
+        yield local_http_server
+
+
+def _num_index_fetches(server):
+    return sum(
+        server.num_requests("GET", pth)
+        for pth in [
+            "/src/contrib/",
+            "/src/contrib/Archive/",
+            "/melodic/distribution.yaml",
+        ]
+    )
+
+
+def _make_sources(server):
+    cran = CRAN()
+    cran.cran_url = server.url
+    ros = ROSDistro()
+    ros.rosdistro_url = server.url
+    return cran, ros
+
+
+def _lookup_versions(server):
+    """Look up the versions of many R and ROS packages like a job does."""
+    cran, ros = _make_sources(server)
+
+    def _lookup(i):
+        attrs = {
+            "url": f"https://cran.r-project.org/src/contrib/Archive/pkg{i}/"
+            f"pkg{i}_1.0.tar.gz"
+        }
+        assert cran.get_version(cran.get_url(attrs), attrs) == f"1.{i}"
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        list(pool.map(_lookup, range(20)))
+
+    attrs = {"url": "https://cran.r-project.org/src/contrib/Archive/oldpkg/x.tar.gz"}
+    assert cran.get_version(cran.get_url(attrs), attrs) is None
+
+    attrs = {"name": "ros-foo-pkg"}
+    url = ros.get_url(attrs)
+    assert (
+        url
+        == "https://github.com/ros/foo/archive/release/melodic/foo_pkg/1.2.3-1.tar.gz"
+    )
+    assert ros.get_version(url, attrs) == "1.2.3"
+
+
+def _new_run():
+    # a new process (e.g., a container or the next run) starts without indexes
+    update_sources.CRAN_INDEX = {}
+    update_sources.ROS_DISTRO_INDEX = {}
+
+
+def test_source_indexes_fetched_once_per_ttl(source_index_server):
+    server = source_index_server
+
+    _lookup_versions(server)
+    assert _num_index_fetches(server) == 3
+
+    # later runs on the host use the cached indexes
+    for _ in range(3):
+        _new_run()
+        _lookup_versions(server)
+    assert _num_index_fetches(server) == 3
+
+    # the indexes are fetched again once they are too old
+    _new_run()
+    with use_settings(
+        BotSettings(
+            version_sources_index_dir=settings().version_sources_index_dir,
+            version_sources_index_ttl=0.0,
+        )
+    ):
+        _lookup_versions(server)
+    assert _num_index_fetches(server) == 6
+
+
+def test_source_indexes_read_only_in_container(source_index_server):
+    server = source_index_server
+
+    # the host prepares the indexes once
+    prepare_source_indexes([*_make_sources(server), PyPI()])
+    assert _num_index_fetches(server) == 3
+    _new_run()
+    _lookup_versions(server)
+    assert _num_index_fetches(server) == 3
+
+    # the containers only read the mounted indexes, regardless of their age
+    with (
+        patch.object(
+            update_sources,
+            "SOURCE_INDEX_READ_ONLY_DIR",
+            settings().version_sources_index_dir,
+        ),
+        use_settings(
+            BotSettings(
+                version_sources_index_dir="/does/not/exist",
+                version_sources_index_ttl=0.0,
+            )
+        ),
+    ):
+        for _ in range(5):
+            _new_run()
+            _lookup_versions(server)
+
+    assert _num_index_fetches(server) == 3
+
+
+@pytest.mark.parametrize(
+    "recipe,version,urls",
+    [
+        (
+            """\
+{% set version = "1.2.3" %}
+{% set name = "foo" %}
+package:
+  name: {{ name }}
+  version: {{ version }}
+source:
+  url: https://example.com/{{ name }}-{{ version }}.tar.gz
+""",
+            "1.2.3",
+            {"https://example.com/foo-1.2.3.tar.gz"},
+        ),
+        (
+            """\
+{% set version = "1.10" %}
+{% set major = version.split(".")[0] %}
+{% set under = version.replace(".", "_") %}
+package:
+  name: foo
+  version: "{{ version }}"
+source:
+  - url:
+      - https://example.com/v{{ major }}/foo-{{ under }}.tar.gz
+      - https://mirror.example.com/v{{ major }}/foo-{{ under }}.tar.gz
+  - url: https://example.com/data-{{ version }}.zip
+build:
+  skip: true  # [win]
+""",
+            "1.10",
+            {
+                "https://example.com/v1/foo-1_10.tar.gz",
+                "https://mirror.example.com/v1/foo-1_10.tar.gz",
+                "https://example.com/data-1.10.zip",
+            },
+        ),
+    ],
+)
+def test_render_recipe_urls(recipe, version, urls):
+    meta = update_sources._render_recipe_urls(recipe)
+    assert meta["package"]["version"] == version
+    assert update_sources.urls_from_meta(meta) == urls
+
+
+@pytest.mark.parametrize(
+    "recipe",
+    [
+        # selectors
+        """\
+{% set version = "1.2.3" %}
+package:
+  version: {{ version }}
+source:
+  url: https://example.com/foo-{{ version }}.tar.gz  # [linux]
+  url: https://example.com/foo-{{ version }}.zip  # [win]
+""",
+        """\
+{% set version = "1.2.3" %}
+{% set name = "foo" %}  # [linux]
+{% set name = "foo-win" %}  # [win]
+package:
+  version: {{ version }}
+source:
+  url: https://example.com/{{ name }}-{{ version }}.tar.gz
+""",
+        # jinja2 control statements
+        """\
+{% set version = "1.2.3" %}
+package:
+  version: {{ version }}
+source:
+{% if version.startswith("1") %}
+  url: https://example.com/foo-{{ version }}.tar.gz
+{% endif %}
+""",
+        # conda-build context
+        """\
+{% set version = "1.2.3" %}
+package:
+  version: {{ version }}
+source:
+  url: {{ cran_mirror }}/src/contrib/foo_{{ version }}.tar.gz
+""",
+        # no sources
+        """\
+{% set version = "1.2.3" %}
+package:
+  version: {{ version }}
+""",
+    ],
+)
+def test_render_recipe_urls_needs_full_render(recipe):
+    assert update_sources._render_recipe_urls(recipe) is None
+
+
+def test_source_index_dir_is_private(source_index_server):
+    server = source_index_server
+    index_dir = settings().version_sources_index_dir
+    os.makedirs(index_dir, mode=0o777)
+    os.chmod(index_dir, 0o777)
+
+    _lookup_versions(server)
+    assert os.stat(index_dir).st_mode & 0o777 == 0o700
+
+    # a directory of another user is not used
+    with patch(
+        "conda_forge_tick.update_sources.os.getuid", return_value=os.getuid() + 1
+    ):
+        with pytest.raises(RuntimeError, match="not owned by the current user"):
+            update_sources.get_source_index_dir()
+
+
+def test_source_index_not_owned_by_user_ignored(source_index_server):
+    server = source_index_server
+    _lookup_versions(server)
+    assert _num_index_fetches(server) == 3
+
+    _new_run()
+    with patch(
+        "conda_forge_tick.update_sources.os.fstat",
+        return_value=Mock(st_uid=os.getuid() + 1, st_mtime=0.0),
+    ):
+        _lookup_versions(server)
+    assert _num_index_fetches(server) == 6
+
+
+def test_source_index_dir_default_per_user():
+    with use_settings(BotSettings()):
+        index_dir = update_sources.get_source_index_dir()
+    assert index_dir.endswith(f"-{os.getuid()}")
+    assert os.stat(index_dir).st_mode & 0o777 == 0o700
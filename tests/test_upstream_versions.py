@@ -2,6 +2,8 @@ import logging
 import os
 import random
 import re
+import threading
+import time
 from collections.abc import Mapping
 from concurrent.futures import Future
 from pathlib import Path
@@ -14,7 +16,7 @@ from conda.models.version import VersionOrder
 
 from conda_forge_tick.cli_context import CliContext
 from conda_forge_tick.lazy_json_backends import LazyJson, load
-from conda_forge_tick.settings import settings, use_settings
+from conda_forge_tick.settings import BotSettings, settings, use_settings
 from conda_forge_tick.update_sources import (
     NPM,
     NVIDIA,
@@ -25,7 +27,9 @@ from conda_forge_tick.update_sources import (
     GitTags,
     PyPI,
     RawURL,
+    _render_recipe_urls,
     next_version,
+    urls_from_meta,
 )
 from conda_forge_tick.update_upstream_versions import (
     _update_upstream_versions_process_pool,
@@ -432,6 +436,39 @@ def test_latest_version_rawurl(name, inp, curr_ver, ver, source, urls, tmpdir):
         assert ver == attempt["new_version"]
 
 
+def test_raw_url_render_urls_only_matches_full_render():
+    """Compare rendering only the URLs of candidates on the RawURL fixtures."""
+    recipes = [inp for _, inp, *_ in latest_url_rawurl_test_list]
+    assert all(_render_recipe_urls(inp) is not None for inp in recipes)
+    for fname in sorted(os.listdir(YAML_PATH)):
+        if fname.startswith("version_") and not fname.endswith("_correct.yaml"):
+            with open(os.path.join(YAML_PATH, fname)) as fp:
+                recipes.append(fp.read())
+
+    source = RawURL()
+    num_light = 0
+    for inp in recipes:
+        try:
+            meta = parse_meta_yaml(inp)
+        except Exception:
+            continue
+        node_attrs = {"raw_meta_yaml": inp, "meta_yaml": meta}
+        curr_ver = str(meta["package"]["version"])
+        has_version_jinja2 = "{% set version" in inp
+        for next_ver in list(next_version(curr_ver))[:2]:
+            args = (node_attrs, inp, next_ver, curr_ver, has_version_jinja2)
+            args += (None, None, None, None)
+
+            new_content, light = source._render_candidate(*args)
+            _, full = source._render_candidate(*args, render_urls_only=False)
+
+            num_light += _render_recipe_urls(new_content) is not None
+            assert urls_from_meta(light) == urls_from_meta(full)
+            assert str(light["package"]["version"]) == str(full["package"]["version"])
+
+    assert num_light > 0
+
+
 def test_latest_version_ca_policy_lcg(capfd, caplog):
     assert get_latest_version("ca-policy-lcg", {}, [RawURL()]) == {"new_version": None}
     out, err = capfd.readouterr()
@@ -569,6 +606,160 @@ def test_latest_version_error_and_no_new_version(caplog):
     assert "Cannot find version on any source, exceptions occurred" in caplog.text
 
 
+class DelayedSource(AbstractSource):
+    """A stand-in version source that answers after a delay."""
+
+    def __init__(self, name, delay, result):
+        self.name = name
+        self.delay = delay
+        self.result = result
+        self.started = threading.Event()
+        self.finished = threading.Event()
+
+    def get_url(self, node_attrs):
+        self.started.set()
+        return f"https://{self.name}.example.com"
+
+    def get_version(self, url, node_attrs):
+        try:
+            time.sleep(self.delay)
+            if isinstance(self.result, Exception):
+                raise self.result
+            return self.result
+        finally:
+            self.finished.set()
+
+
+def _get_latest_version_with_concurrency(sources, concurrency):
+    with use_settings(BotSettings(version_sources_probe_concurrency=concurrency)):
+        try:
+            return get_latest_version("pkg", {}, sources, use_container=False)
+        except Exception as e:
+            return e
+
+
+@pytest.mark.parametrize("concurrency", [2, 3, 10])
+@pytest.mark.parametrize(
+    "results",
+    [
+        ["1.0", "2.0", "3.0"],
+        [None, "2.0", "3.0"],
+        [ValueError("a"), None, "3.0"],
+        [ValueError("a"), ValueError("b"), None],
+        [None, None, None],
+        [None, ValueError("b"), "3.0", ValueError("d")],
+    ],
+)
+def test_latest_version_concurrent_same_as_sequential(results, concurrency):
+    def _make_sources():
+        # lower priority sources answer first
+        return [
+            DelayedSource(f"source{i}", 0.01 * (len(results) - i), res)
+            for i, res in enumerate(results)
+        ]
+
+    expected = _get_latest_version_with_concurrency(_make_sources(), 1)
+    result = _get_latest_version_with_concurrency(_make_sources(), concurrency)
+
+    # if nothing is found, the first exception in priority order is raised
+    assert result is expected if isinstance(expected, Exception) else result == expected
+
+
+class WaitingSource(DelayedSource):
+    """A stand-in version source that answers once another source has started."""
+
+    def __init__(self, name, waits_for, result):
+        super().__init__(name, 0.0, result)
+        self.waits_for = waits_for
+        self.saw_other_start = None
+
+    def get_version(self, url, node_attrs):
+        self.saw_other_start = self.waits_for.started.wait(timeout=5)
+        return super().get_version(url, node_attrs)
+
+
+def test_latest_version_concurrent_starts_lower_priority():
+    rawurl = DelayedSource("rawurl", 0.0, "1.0")
+    fast = DelayedSource("fast", 0.0, "2.0")
+    nothing = WaitingSource("nothing", rawurl, None)
+    sources = [
+        WaitingSource("timeout", nothing, TimeoutError("feed timed out")),
+        nothing,
+        rawurl,
+        fast,
+    ]
+
+    result = _get_latest_version_with_concurrency(sources, 3)
+
+    # the fast lower priority answer does not win
+    assert result == {"new_version": "1.0"}
+    # the lower priority sources ran while the higher priority ones were waiting
+    assert sources[0].saw_other_start
+    assert nothing.saw_other_start
+
+
+def test_latest_version_concurrent_cancels_lower_priority():
+    sources = [
+        DelayedSource("first", 0.05, "1.0"),
+        DelayedSource("slow", 0.1, "2.0"),
+        DelayedSource("third", 0.0, "3.0"),
+        DelayedSource("fourth", 0.0, "4.0"),
+    ]
+
+    result = _get_latest_version_with_concurrency(sources, 2)
+
+    assert result == {"new_version": "1.0"}
+    # the running lower priority source is finished before returning
+    assert sources[1].started.is_set()
+    assert sources[1].finished.is_set()
+    # the sources not yet started are never started
+    assert not sources[2].started.is_set()
+    assert not sources[3].started.is_set()
+
+
+class DelayedRawURL(RawURL):
+    """A stand-in raw URL version source that answers after a delay."""
+
+    def __init__(self, name, delay, result):
+        self.delayed = DelayedSource(name, delay, result)
+        self.name = name
+
+    def get_url(self, node_attrs):
+        return self.delayed.get_url(node_attrs)
+
+    def get_version(self, url, node_attrs):
+        return self.delayed.get_version(url, node_attrs)
+
+
+def test_latest_version_concurrent_rawurl_not_speculative():
+    rawurl = DelayedRawURL("rawurl", 0.0, "2.0")
+    sources = [
+        DelayedSource("first", 0.05, "1.0"),
+        rawurl,
+        DelayedSource("third", 0.0, "3.0"),
+    ]
+
+    result = _get_latest_version_with_concurrency(sources, 3)
+
+    assert result == {"new_version": "1.0"}
+    # the raw URL source and the ones after it are not started early
+    assert not rawurl.delayed.started.is_set()
+    assert not sources[2].started.is_set()
+
+    rawurl = DelayedRawURL("rawurl", 0.05, None)
+    sources = [
+        DelayedSource("first", 0.0, None),
+        rawurl,
+        DelayedSource("third", 0.0, "3.0"),
+    ]
+
+    result = _get_latest_version_with_concurrency(sources, 3)
+
+    # once the raw URL source is tried, the lower priority ones run alongside
+    assert result == {"new_version": "3.0"}
+    assert rawurl.delayed.finished.is_set()
+
+
 def test_latest_version_is_version_ignored(caplog):
     caplog.set_level(logging.DEBUG)
 
@@ -2013,10 +2204,13 @@ def test_github_version_prefix(url, version, version_prefix, tmpdir):
         assert gh.version_prefix == version_prefix
 
 
+@mock.patch("conda_forge_tick.update_sources.get_http_client")
 @mock.patch("conda_forge_tick.update_sources.feedparser.parse")
 def test_github_release_tag_with_slash_respects_allowed_tag_globs(
     feedparser_parse_mock: MagicMock,
+    get_http_client_mock: MagicMock,
 ):
+    get_http_client_mock.return_value.get.return_value.ok = True
     feedparser_parse_mock.return_value = {
         "bozo": 0,
         "entries": [
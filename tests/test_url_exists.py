@@ -1,6 +1,14 @@
+import hashlib
+import shutil
+import threading
+import time
+from unittest import mock
+
 import pytest
 
-from conda_forge_tick.update_sources import url_exists
+from conda_forge_tick.http_cache import CachingHTTPClient
+from conda_forge_tick.settings import BotSettings, use_settings
+from conda_forge_tick.update_sources import RawURL, _url_exists_subprocess, url_exists
 
 
 @pytest.mark.parametrize(
@@ -61,3 +69,227 @@ def test_url_exists(url, exists):
     else:
         kwargs = {}
     assert url_exists(url, **kwargs) is exists
+
+
+def _make_url_routes(server):
+    server.add_route("HEAD", "/exists.tar.gz")
+    server.add_route("HEAD", "/missing.tar.gz", status=404)
+    # servers that do not answer HEAD requests
+    server.add_route("HEAD", "/no-head.tar.gz", status=405)
+    server.add_route("GET", "/no-head.tar.gz", status=206, body="x")
+    server.add_route("HEAD", "/no-head-missing.tar.gz", status=403)
+    server.add_route("GET", "/no-head-missing.tar.gz", status=404)
+    server.add_route(
+        "HEAD",
+        "/redirect.tar.gz",
+        status=302,
+        headers={"Location": server.url + "/exists.tar.gz"},
+    )
+    # GitHub redirects even if the file does not exist
+    server.add_route(
+        "HEAD",
+        "/redirect-missing.tar.gz",
+        status=302,
+        headers={"Location": server.url + "/missing.tar.gz"},
+    )
+
+
+@pytest.mark.parametrize(
+    "path,exists",
+    [
+        ("/exists.tar.gz", True),
+        ("/missing.tar.gz", False),
+        ("/no-head.tar.gz", True),
+        ("/no-head-missing.tar.gz", False),
+        ("/redirect.tar.gz", True),
+        ("/redirect-missing.tar.gz", False),
+        ("/unknown.tar.gz", False),
+    ],
+)
+def test_url_exists_in_process(local_http_server, path, exists):
+    _make_url_routes(local_http_server)
+    with mock.patch(
+        "conda_forge_tick.update_sources.get_http_client",
+        return_value=CachingHTTPClient(),
+    ):
+        assert url_exists(local_http_server.url + path) is exists
+
+
+def test_url_exists_negative_cache(local_http_server):
+    _make_url_routes(local_http_server)
+    client = CachingHTTPClient(negative_cache_ttl=0.5)
+    url = local_http_server.url + "/missing.tar.gz"
+
+    for _ in range(3):
+        assert not client.url_exists(url)
+    assert local_http_server.num_requests("HEAD", "/missing.tar.gz") == 1
+    assert client.stats.num_negative_hits == 2
+
+    # the URL is checked again after the TTL
+    time.sleep(0.6)
+    assert not client.url_exists(url)
+    assert local_http_server.num_requests("HEAD", "/missing.tar.gz") == 2
+
+    # existing URLs are always checked
+    for _ in range(2):
+        assert client.url_exists(local_http_server.url + "/exists.tar.gz")
+    assert local_http_server.num_requests("HEAD", "/exists.tar.gz") == 2
+
+
+def test_url_exists_negative_cache_pruned(local_http_server):
+    _make_url_routes(local_http_server)
+    client = CachingHTTPClient(negative_cache_ttl=0.1)
+
+    for i in range(5):
+        assert not client.url_exists(local_http_server.url + f"/missing{i}.tar.gz")
+    assert len(client._missing_urls) == 5
+
+    # expired entries are dropped when the next missing URL is found
+    time.sleep(0.2)
+    assert not client.url_exists(local_http_server.url + "/missing.tar.gz")
+    assert list(client._missing_urls) == [local_http_server.url + "/missing.tar.gz"]
+
+
+@pytest.mark.parametrize("status", [429, 500, 503])
+def test_url_exists_server_errors_not_cached(local_http_server, status):
+    local_http_server.add_route("HEAD", "/error.tar.gz", status=status)
+    local_http_server.add_route("GET", "/error.tar.gz", status=status)
+    client = CachingHTTPClient()
+    url = local_http_server.url + "/error.tar.gz"
+
+    assert client.url_exists(url, on_error=True)
+    assert not client.url_exists(url, on_error=False)
+    assert local_http_server.num_requests("HEAD", "/error.tar.gz") == 2
+    assert client.stats.num_negative_hits == 0
+    # rate limited HEAD requests are not retried with a GET request
+    assert local_http_server.num_requests("GET", "/error.tar.gz") == (
+        0 if status == 429 else 2
+    )
+
+
+def test_url_exists_only_not_found_cached(local_http_server):
+    client = CachingHTTPClient()
+    url = local_http_server.url + "/forbidden.tar.gz"
+    local_http_server.add_route("HEAD", "/forbidden.tar.gz", status=403)
+    local_http_server.add_route("GET", "/forbidden.tar.gz", status=403)
+    local_http_server.add_route("HEAD", "/gone.tar.gz", status=410)
+
+    for _ in range(2):
+        assert not client.url_exists(url, on_error=True)
+    assert local_http_server.num_requests("HEAD", "/forbidden.tar.gz") == 2
+
+    for _ in range(2):
+        assert not client.url_exists(local_http_server.url + "/gone.tar.gz")
+    assert local_http_server.num_requests("HEAD", "/gone.tar.gz") == 1
+
+
+def test_url_exists_timeout_not_cached(local_http_server):
+    local_http_server.add_route("HEAD", "/slow.tar.gz", delay=0.5)
+    client = CachingHTTPClient()
+    url = local_http_server.url + "/slow.tar.gz"
+
+    assert not client.url_exists(url, timeout=0.1)
+    assert client.url_exists(url, timeout=5)
+    assert local_http_server.num_requests("HEAD", "/slow.tar.gz") == 2
+
+
+def test_url_exists_ftp_uses_subprocess():
+    with mock.patch(
+        "conda_forge_tick.update_sources._url_exists_subprocess", return_value=True
+    ) as mock_subprocess:
+        assert url_exists("ftp://ftp.example.com/foo.tar.gz", use_curl=True)
+    mock_subprocess.assert_called_once_with(
+        "ftp://ftp.example.com/foo.tar.gz", timeout=5, use_curl=True
+    )
+
+
+def test_url_exists_subprocess_setting(local_http_server):
+    _make_url_routes(local_http_server)
+    with (
+        use_settings(BotSettings(version_sources_url_probe_in_process=False)),
+        mock.patch(
+            "conda_forge_tick.update_sources._url_exists_subprocess", return_value=True
+        ) as mock_subprocess,
+    ):
+        assert url_exists(local_http_server.url + "/missing.tar.gz")
+    mock_subprocess.assert_called_once()
+    assert local_http_server.num_requests() == 0
+
+
+@pytest.mark.skipif(shutil.which("curl") is None, reason="curl is not installed")
+def test_url_exists_matches_curl(local_http_server):
+    """Compare the in-process checks against a curl subprocess per URL."""
+    _make_url_routes(local_http_server)
+    urls = [
+        local_http_server.url + path
+        for path in ["/exists.tar.gz", "/missing.tar.gz", "/redirect.tar.gz"]
+    ] * 10
+
+    expected = [_url_exists_subprocess(url, use_curl=True) for url in urls]
+
+    client = CachingHTTPClient(negative_cache_ttl=0)
+    results = [client.url_exists(url) for url in urls]
+
+    assert results == expected == [True, False, True] * 10
+
+
+class FakeRawURLServer:
+    """Serve the tarballs of the versions in `versions` with a delay."""
+
+    def __init__(self, server, versions, delay=0.05):
+        self.versions = versions
+        self.delay = delay
+        self.lock = threading.Lock()
+        self.running = 0
+        self.max_running = 0
+        server.add_route("HEAD", "/*", handler=self._handle)
+
+    def _handle(self, req):
+        with self.lock:
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+        time.sleep(self.delay)
+        with self.lock:
+            self.running -= 1
+        ver = req.path.rsplit("/foo-", 1)[-1].removesuffix(".tar.gz")
+        return (200 if ver in self.versions else 404), {}, b""
+
+
+@pytest.mark.parametrize("concurrency", [1, 8])
+def test_raw_url_checks_urls_concurrently(local_http_server, concurrency):
+    fake = FakeRawURLServer(local_http_server, {"1.0.1", "1.1.0", "1.1.1"})
+
+    def _url(ver):
+        return f"{local_http_server.url}/foo-{ver}.tar.gz"
+
+    def _render(node_attrs, content, next_ver, *args):
+        new_content = content.replace("1.0.0", next_ver)
+        return new_content, {
+            "package": {"version": next_ver},
+            "source": {"url": _url(next_ver)},
+        }
+
+    node_attrs = {
+        "feedstock_name": "foo",
+        "version": "1.0.0",
+        "raw_meta_yaml": '{% set version = "1.0.0" %}\n',
+        "meta_yaml": {"source": {"url": _url("1.0.0")}},
+    }
+    with (
+        use_settings(BotSettings(version_sources_url_probe_concurrency=concurrency)),
+        mock.patch(
+            "conda_forge_tick.update_sources.get_http_client",
+            return_value=CachingHTTPClient(),
+        ),
+        mock.patch.object(RawURL, "_render_candidate", side_effect=_render),
+        mock.patch(
+            "conda_forge_tick.update_sources.get_sha256",
+            side_effect=lambda url: hashlib.sha256(url.encode()).hexdigest(),
+        ),
+    ):
+        assert RawURL().get_url(node_attrs) == "1.1.1"
+
+    if concurrency == 1:
+        assert fake.max_running == 1
+    else:
+        assert 1 < fake.max_running <= concurrency
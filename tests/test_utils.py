@@ -2,6 +2,7 @@ import contextlib
 import tempfile
 import textwrap
 from io import StringIO
+from pathlib import Path
 from unittest import mock
 from unittest.mock import MagicMock, mock_open
 
@@ -11,12 +12,15 @@ from conda_forge_tick.lazy_json_backends import LazyJson
 from conda_forge_tick.os_utils import pushd
 from conda_forge_tick.utils import (
     DEFAULT_GRAPH_FILENAME,
+    CondaBuildRenderContext,
     _munge_dict_repr,
     extract_section_from_yaml_text,
+    get_conda_build_render_context,
     get_keys_default,
     get_recipe_schema_version,
     load_existing_graph,
     load_graph,
+    parse_meta_yaml,
     parse_munged_run_export,
     replace_compiler_with_stub,
     run_command_hiding_token,
@@ -467,3 +471,95 @@ def test_extract_section_from_yaml_text(
 )
 def test_replace_compiler_stub(text, expected):
     assert replace_compiler_with_stub(text) == expected
+
+
+def test_parse_meta_yaml_reuses_render_context():
+    pytest.importorskip("conda_build")
+    recipe_dir = Path(__file__).parent.joinpath(
+        "pytorch-cpu-feedstock", "meta_yaml", "recipe"
+    )
+    recipe_text = recipe_dir.joinpath("meta.yaml").read_text()
+    cbc_path = str(
+        recipe_dir.joinpath(
+            "..",
+            ".ci_support",
+            "linux_64_cuda_compiler_version10.2numpy1.19python3.9.____cpython.yaml",
+        )
+    )
+    render_context = get_conda_build_render_context()
+    num_parses = 3
+
+    def _parse():
+        return parse_meta_yaml(
+            recipe_text,
+            platform="linux",
+            arch="64",
+            cbc_path=cbc_path,
+            use_container=False,
+        )
+
+    fresh = []
+    for _ in range(num_parses):
+        render_context.clear()
+        fresh.append(_parse())
+
+    render_context.clear()
+    num_hits = render_context.num_hits
+    reused = [_parse() for _ in range(num_parses)]
+
+    # the prepared config is reused and renders the same as a fresh one
+    assert render_context.num_hits - num_hits == num_parses - 1
+    assert all(meta == fresh[0] for meta in fresh + reused)
+
+
+def test_conda_build_render_context_keys(tmp_path):
+    # only the caching is tested here, conda-build itself is replaced
+    conda_build = MagicMock()
+    conda_build.config.get_or_merge_config.side_effect = lambda *a, **kw: object()
+    conda_build.variants.get_package_combined_spec.return_value = ({}, None)
+    conda_build.variants.explode_variants.side_effect = lambda _: [{"python": "3.12"}]
+
+    cbc_path = tmp_path / "linux_64_.yaml"
+    cbc_path.write_text("python:\n- 3.12\n")
+    recipe_dir = tmp_path / "recipe"
+    recipe_dir.mkdir()
+
+    context = CondaBuildRenderContext(max_entries=2)
+    with mock.patch.dict(
+        "sys.modules",
+        {
+            "conda_build": conda_build,
+            "conda_build.config": conda_build.config,
+            "conda_build.variants": conda_build.variants,
+        },
+    ):
+        config, variants = context.get_config_and_variants(
+            str(recipe_dir), "linux", "64", str(cbc_path)
+        )
+        variants[0]["python"] = "3.11"
+        config_again, variants_again = context.get_config_and_variants(
+            str(recipe_dir), "linux", "64", str(cbc_path)
+        )
+        # the config is shared, the variants are copies
+        assert config_again is config
+        assert variants_again == [{"python": "3.12"}]
+        assert (context.num_hits, context.num_misses) == (1, 1)
+
+        # other platforms and changed variant configs get a new config
+        config_arm, _ = context.get_config_and_variants(
+            str(recipe_dir), "linux", "aarch64", str(cbc_path)
+        )
+        recipe_dir.joinpath("conda_build_config.yaml").write_text("numpy:\n- 2\n")
+        config_recipe_cbc, _ = context.get_config_and_variants(
+            str(recipe_dir), "linux", "64", str(cbc_path)
+        )
+        assert len({id(config), id(config_arm), id(config_recipe_cbc)}) == 3
+        assert (context.num_hits, context.num_misses) == (1, 3)
+
+        # the oldest config was dropped to make room for the last one
+        recipe_dir.joinpath("conda_build_config.yaml").unlink()
+        config_new, _ = context.get_config_and_variants(
+            str(recipe_dir), "linux", "64", str(cbc_path)
+        )
+        assert config_new is not config
+        assert (context.num_hits, context.num_misses) == (1, 4)
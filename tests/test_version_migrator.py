@@ -1,14 +1,24 @@
+import hashlib
 import logging
 import os
 import random
+import threading
+import time
 from pathlib import Path
+from unittest import mock
 
+import jinja2
 import networkx as nx
 import pytest
 from test_migrators import run_test_migration
 
+from conda_forge_tick.hashing import hash_url
+from conda_forge_tick.http_cache import CachingHTTPClient
 from conda_forge_tick.migrators import Version
 from conda_forge_tick.migrators.version import VersionMigrationError
+from conda_forge_tick.settings import BotSettings, use_settings
+from conda_forge_tick.update_recipe.version import _get_new_url_tmpl_and_hash
+from conda_forge_tick.url_transforms import gen_transformed_urls
 
 TOTAL_GRAPH = nx.DiGraph()
 TOTAL_GRAPH.graph["outputs_lut"] = {}
@@ -277,3 +287,102 @@ def test_version_rand_frac(tmp_path, caplog):
         tmp_path=tmp_path,
     )
     assert "random_fraction_to_keep: 0.1" in caplog.text
+
+
+def _get_url_tmpl_and_hash(url_tmpl, context):
+    with (
+        use_settings(BotSettings(url_hash_cache_dir="")),
+        mock.patch(
+            "conda_forge_tick.update_recipe.version.get_http_client",
+            return_value=CachingHTTPClient(cache_dir=None),
+        ),
+    ):
+        hash_url.cache_clear()
+        try:
+            return _get_new_url_tmpl_and_hash(url_tmpl, context, "sha256", None)
+        finally:
+            hash_url.cache_clear()
+
+
+@pytest.mark.parametrize("exts", [[".zip", ".tar.xz"], [".tar.gz"], []])
+def test_get_new_url_tmpl_and_hash_probes_concurrently(local_http_server, exts):
+    # all missing URLs are slow to answer
+    in_flight = {"now": 0, "max": 0}
+    lock = threading.Lock()
+
+    def _slow_missing(req):
+        with lock:
+            in_flight["now"] += 1
+            in_flight["max"] = max(in_flight["max"], in_flight["now"])
+        time.sleep(0.2)
+        with lock:
+            in_flight["now"] -= 1
+        return 404, {}, b"not found"
+
+    local_http_server.add_route("HEAD", "/*", handler=_slow_missing)
+    url_tmpl = local_http_server.url + "/foo-{{ version }}.tar.gz"
+    context = {"version": "1.2.3"}
+    bodies = {}
+    for ext in exts:
+        bodies[ext] = os.urandom(1024)
+        for method in ["HEAD", "GET"]:
+            local_http_server.add_route(
+                method, "/foo-1.2.3" + ext, body=bodies[ext], delay=0.05
+            )
+
+    # the URL template the sequential search would pick
+    candidates = [url_tmpl, *gen_transformed_urls(url_tmpl)]
+    urls = {local_http_server.url + "/foo-1.2.3" + ext: ext for ext in exts}
+    expected = next(
+        (
+            (tmpl, hashlib.sha256(bodies[urls[url]]).hexdigest())
+            for tmpl in candidates
+            if (url := jinja2.Template(tmpl).render(**context)) in urls
+        ),
+        (None, None),
+    )
+
+    assert _get_url_tmpl_and_hash(url_tmpl, context) == expected
+
+    num_missing = len(set(candidates)) - len(exts)
+    assert num_missing > 4
+    if ".tar.gz" in exts:
+        # the URL template exists, so no other URL is probed
+        assert in_flight["max"] == 0
+    else:
+        # the missing URLs are probed at the same time
+        assert in_flight["max"] > 1
+    # only the selected archive is downloaded
+    assert local_http_server.num_requests("GET") == (1 if exts else 0)
+
+
+def test_get_new_url_tmpl_and_hash_falls_back_if_download_fails(local_http_server):
+    url_tmpl = local_http_server.url + "/foo-{{ version }}.tar.gz"
+    local_http_server.add_route("HEAD", "/foo-1.2.3.tar.gz")
+    local_http_server.add_route("GET", "/foo-1.2.3.tar.gz", status=500)
+    local_http_server.add_route("HEAD", "/foo-1.2.3.zip")
+    local_http_server.add_route("GET", "/foo-1.2.3.zip", body=b"zip")
+
+    assert _get_url_tmpl_and_hash(url_tmpl, {"version": "1.2.3"}) == (
+        local_http_server.url + "/foo-{{ version }}.zip",
+        hashlib.sha256(b"zip").hexdigest(),
+    )
+
+
+@pytest.mark.parametrize("tmpl_exists", [True, False])
+def test_get_new_url_tmpl_and_hash_pypi_api_only_if_needed(
+    local_http_server, tmpl_exists
+):
+    url_tmpl = local_http_server.url + "/foo-{{ version }}.tar.gz"
+    if tmpl_exists:
+        local_http_server.add_route("HEAD", "/foo-1.2.3.tar.gz")
+        local_http_server.add_route("GET", "/foo-1.2.3.tar.gz", body=b"tar")
+
+    with mock.patch(
+        "conda_forge_tick.update_recipe.version._get_pypi_url_tmpls",
+        return_value=[],
+    ) as pypi_url_tmpls:
+        new_url_tmpl, _ = _get_url_tmpl_and_hash(url_tmpl, {"version": "1.2.3"})
+
+    assert (new_url_tmpl == url_tmpl) is tmpl_exists
+    assert pypi_url_tmpls.called is not tmpl_exists